@@ -3,19 +3,112 @@ AI model for smart access control decisions.
 
 This module demonstrates using machine learning to make dynamic access
 control decisions based on time of day and user history.
+
+The classifier is loaded on first use, not at import: the newest version
+saved by :func:`train_from_access_log` (``python -m src.main_train_models``)
+in the :class:`utils.model_store.ModelStore`, or else one trained on the
+example samples below.
 """
 
-import numpy as np
-from sklearn.neural_network import MLPClassifier
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from src.config import ANOMALY_WINDOW_ROWS
+from utils.model_store import ModelStore
+
+MODEL_NAME = "smart_access"
+FEATURES = ["time_of_day", "access_history"]
 
 # Training data: [time_of_day, access_history] -> access_granted
 # Example: [8am, has_history], [12pm, no_history], [3pm, has_history]
-data = np.array([[8, 1], [12, 0], [15, 1]])
-labels = np.array([1, 0, 1])  # 1 = grant access, 0 = deny access
+TRAINING_DATA = [[8, 1], [12, 0], [15, 1]]
+TRAINING_LABELS = [1, 0, 1]  # 1 = grant access, 0 = deny access
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _new_classifier():
+    from sklearn.neural_network import MLPClassifier
+
+    return MLPClassifier(hidden_layer_sizes=(10, 10), max_iter=1000, random_state=42)
+
+
+def get_model(store: Optional[ModelStore] = None):
+    """
+    The classifier, loaded or trained on first call.
 
-# Train a simple neural network classifier
-model = MLPClassifier(hidden_layer_sizes=(10, 10), max_iter=1000, random_state=42)
-model.fit(data, labels)
+    Args:
+        store: Where to look for a trained version (default: ``ModelStore()``).
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    model, _ = (store or ModelStore()).load(MODEL_NAME)
+                except FileNotFoundError:
+                    model = _new_classifier()
+                    model.fit(TRAINING_DATA, TRAINING_LABELS)
+                _model = model
+    return _model
+
+
+def train_from_access_log(
+    conn: sqlite3.Connection,
+    store: Optional[ModelStore] = None,
+    window_rows: int = ANOMALY_WINDOW_ROWS,
+) -> int:
+    """
+    Train the classifier on the latest *window_rows* rows of ``access_log``,
+    save it as a new version and use it from now on.
+
+    Each row becomes ``[hour, 1 if the user was granted access before]``,
+    labelled with ``access_granted``.
+
+    Returns:
+        The stored version.
+
+    Raises:
+        ValueError: If the rows do not contain both granted and denied
+            attempts.
+    """
+    started = time.perf_counter()
+    (max_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM access_log").fetchone()
+    cursor = conn.execute(
+        "SELECT id, user, timestamp, access_granted FROM access_log "
+        "WHERE id > ? AND timestamp IS NOT NULL ORDER BY id",
+        (max(max_id - window_rows, 0),),
+    )
+    data, labels, granted_before = [], [], set()
+    first_id = last_id = None
+    for row_id, user, timestamp, granted in cursor:
+        data.append([int(str(timestamp)[11:13] or 0), int(user in granted_before)])
+        labels.append(int(bool(granted)))
+        if granted:
+            granted_before.add(user)
+        first_id = row_id if first_id is None else first_id
+        last_id = row_id
+    if len(set(labels)) < 2:
+        raise ValueError("access_log needs granted and denied rows to train on")
+    model = _new_classifier()
+    model.fit(data, labels)
+    version = (store or ModelStore()).save(
+        MODEL_NAME,
+        model,
+        {
+            "features": FEATURES,
+            "rows": len(data),
+            "first_id": first_id,
+            "last_id": last_id,
+            "train_seconds": time.perf_counter() - started,
+        },
+    )
+    global _model
+    _model = model
+    return version
 
 
 def predict_smart_access(time_of_day: int, access_history: int) -> int:
@@ -29,7 +122,7 @@ def predict_smart_access(time_of_day: int, access_history: int) -> int:
     Returns:
         1 if access should be granted, 0 if denied
     """
-    return int(model.predict([[time_of_day, access_history]])[0])
+    return int(get_model().predict([[time_of_day, access_history]])[0])
 
 
 # Example usage
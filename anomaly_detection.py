@@ -3,17 +3,34 @@ Anomaly detection module for identifying unusual access patterns.
 
 Uses Isolation Forest algorithm to detect anomalous behavior
 in access times or patterns.
+
+The model is trained on first use rather than at import, so importing
+this module costs neither scikit-learn's import nor a fit.  For a model
+trained on the real ``access_log`` see
+:class:`utils.anomaly_detection.AccessAnomalyModel`.
 """
 
-import numpy as np
-from sklearn.ensemble import IsolationForest
+import threading
 
 # Training data: access times (hours). 50 is an anomalous value.
-data = np.array([[8], [12], [15], [50]])
+TRAINING_DATA = [[8], [12], [15], [50]]
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """The isolation forest, trained on ``TRAINING_DATA`` on first call."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sklearn.ensemble import IsolationForest
 
-# Train isolation forest model for anomaly detection
-model = IsolationForest(contamination=0.25, random_state=42)
-model.fit(data)
+                model = IsolationForest(contamination=0.25, random_state=42)
+                model.fit(TRAINING_DATA)
+                _model = model
+    return _model
 
 
 def detect_anomaly(value: float) -> int:
@@ -26,7 +43,7 @@ def detect_anomaly(value: float) -> int:
     Returns:
         1 if normal, -1 if anomalous
     """
-    prediction = model.predict([[value]])[0]
+    prediction = get_model().predict([[value]])[0]
     return int(prediction)
 
 
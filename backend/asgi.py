@@ -0,0 +1,220 @@
+"""
+asyncio (ASGI) variant of the access control API.
+
+Door controllers keep their connections open and send bursts of requests.
+Under a thread-per-request WSGI server every open connection that is
+waiting on SQLite holds a thread.  Here a connection is a coroutine and
+only the handler work runs on threads: the same framework-free handlers as
+the Flask app (``handle_*`` in ``backend/server.py``) run in a pool of
+``ASYNC_DB_THREADS`` threads, and requests beyond that wait on a semaphore
+instead of queueing inside the executor.  Thousands of idle or waiting
+connections then cost a few kilobytes each, not a thread stack each.
+
+Serve it with any ASGI server, for example::
+
+    uvicorn --factory backend.asgi:create_app --host 0.0.0.0 --port 5000 \\
+        --workers 4
+
+It answers ``/access``, ``/access/credential``, ``/users`` (``GET``,
+``POST``), ``/users/<id>`` (``DELETE``), ``/logs``, ``/stats`` and
+``/health`` on the same database and schema as the Flask app; the other
+endpoints are only served by the Flask app.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from backend import server, wsgi
+from src.config import ASYNC_DB_THREADS, ASYNC_MAX_BODY_BYTES
+
+_logger = logging.getLogger(__name__)
+
+_USER_PATH = re.compile(r"/users/(\d+)")
+
+
+class _Request(NamedTuple):
+    """The parts of an HTTP request the handlers need."""
+
+    data: Any  # decoded JSON body, None without one
+    args: Dict[str, str]  # query parameters
+
+
+def _delete_user(user_id: int, request: _Request) -> server.Result:
+    return server.handle_delete_user(user_id)
+
+
+# (method, path) -> handler(request) -> server.Result
+_ROUTES: Dict[Tuple[str, str], Callable[[_Request], server.Result]] = {
+    ("POST", "/access"): lambda r: server.handle_access(r.data),
+    ("POST", "/access/credential"): lambda r: server.handle_credential_access(r.data),
+    ("GET", "/users"): lambda r: server.handle_list_users(),
+    ("POST", "/users"): lambda r: server.handle_create_user(r.data),
+    ("GET", "/logs"): lambda r: server.handle_logs(r.args),
+    ("GET", "/stats"): lambda r: server.handle_stats(r.args),
+}
+
+
+class AccessApp:
+    """
+    ASGI application serving the access control endpoints.
+
+    Example:
+        >>> app = create_app()  # then run it with an ASGI server
+    """
+
+    def __init__(
+        self,
+        threads: int = ASYNC_DB_THREADS,
+        max_body_bytes: int = ASYNC_MAX_BODY_BYTES,
+    ):
+        """
+        Args:
+            threads: Handler threads (and so concurrent SQLite operations).
+            max_body_bytes: Larger request bodies are refused with 413.
+        """
+        self.threads = threads
+        self.max_body_bytes = max_body_bytes
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def _start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.threads, thread_name_prefix="access-api"
+            )
+            self._slots = asyncio.Semaphore(self.threads)
+
+    async def startup(self) -> None:
+        """Start the handler threads, the access log writer and the user
+        cache (see :func:`backend.wsgi.init_worker`)."""
+        self._start()
+        await self._run(wsgi.init_worker, False)
+
+    async def shutdown(self) -> None:
+        """Finish running handlers, then write the queued access log entries
+        and close the database connections."""
+        executor, self._executor = self._executor, None
+        loop = asyncio.get_running_loop()
+        if executor is not None:
+            await loop.run_in_executor(None, executor.shutdown)
+        await loop.run_in_executor(None, wsgi.shutdown_worker)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as exc:  # reported to the server, which exits
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # -- requests ----------------------------------------------------------
+
+    async def _run(self, func, *args):
+        """Run *func* on a handler thread, at most ``threads`` at a time."""
+        self._start()
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _http(self, scope, receive, send) -> None:
+        method, path = scope["method"], scope["path"]
+        handler = _ROUTES.get((method, path))
+        match = _USER_PATH.fullmatch(path)
+        if match and method == "DELETE":
+            handler = functools.partial(_delete_user, int(match.group(1)))
+        if handler is None:
+            if path == "/health" and method == "GET":
+                result = {"status": "ok"}, 200, {}
+            elif match or any(p == path for _, p in _ROUTES):
+                result = server._error("Method not allowed", 405)
+            else:
+                result = server._error("Not found", 404)
+            await _send_json(send, result)
+            return
+
+        body = await _read_body(receive, self.max_body_bytes)
+        if body is None:
+            await _send_json(send, server._error("Request body too large", 413))
+            return
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            await _send_json(send, server._error("Invalid JSON body", 400))
+            return
+        query = scope["query_string"].decode("latin-1")
+        request = _Request(data, dict(parse_qsl(query)))
+        try:
+            result = await self._run(handler, request)
+        except Exception:
+            _logger.exception("Unhandled error in %s %s", method, path)
+            result = server._error("Internal server error", 500)
+        await _send_json(send, result)
+
+
+async def _read_body(receive, limit: int) -> Optional[bytes]:
+    """The request body, or ``None`` if it is larger than *limit* bytes."""
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _send_json(send, result: server.Result) -> None:
+    payload, status, headers = result
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    raw_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    await send(
+        {"type": "http.response.start", "status": status, "headers": raw_headers}
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_app(
+    init_database: bool = True, threads: int = ASYNC_DB_THREADS
+) -> AccessApp:
+    """
+    Return the ASGI application.
+
+    Args:
+        init_database: Create or upgrade the database schema first (see
+            :func:`backend.server.init_db`).
+        threads: Handler threads; see :class:`AccessApp`.
+    """
+    if init_database:
+        server.init_db()
+    return AccessApp(threads)
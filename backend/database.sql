@@ -8,6 +8,12 @@ CREATE TABLE IF NOT EXISTS users (
     nfc_tag TEXT DEFAULT NULL
 );
 
+-- A badge identifies at most one user; users without one are not indexed.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_rfid_code
+ON users (rfid_code) WHERE rfid_code IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_nfc_tag
+ON users (nfc_tag) WHERE nfc_tag IS NOT NULL;
+
 CREATE TABLE IF NOT EXISTS access_log (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user TEXT,
@@ -15,3 +21,139 @@ CREATE TABLE IF NOT EXISTS access_log (
     access_granted BOOLEAN,
     method TEXT DEFAULT 'face'
 );
+
+CREATE INDEX IF NOT EXISTS idx_access_log_user ON access_log (user);
+CREATE INDEX IF NOT EXISTS idx_access_log_timestamp ON access_log (timestamp);
+CREATE INDEX IF NOT EXISTS idx_access_log_granted ON access_log (access_granted);
+CREATE INDEX IF NOT EXISTS idx_access_log_method ON access_log (method);
+
+-- Per-user rollups maintained by the triggers below; /stats reads these
+-- instead of aggregating access_log.
+CREATE TABLE IF NOT EXISTS access_stats_total (
+    user TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    granted INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS access_stats_hourly (
+    user TEXT NOT NULL,
+    hour TEXT NOT NULL,  -- UTC, 'YYYY-MM-DD HH:00:00'
+    total INTEGER NOT NULL,
+    granted INTEGER NOT NULL,
+    PRIMARY KEY (hour, user)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS access_log_rollup_insert
+AFTER INSERT ON access_log
+WHEN NEW.user IS NOT NULL AND NEW.timestamp IS NOT NULL
+BEGIN
+    INSERT INTO access_stats_total (user, total, granted)
+    VALUES (NEW.user, 1, CASE WHEN NEW.access_granted THEN 1 ELSE 0 END)
+    ON CONFLICT (user) DO UPDATE SET
+        total = total + 1,
+        granted = granted + excluded.granted;
+    INSERT INTO access_stats_hourly (user, hour, total, granted)
+    VALUES (
+        NEW.user,
+        strftime('%Y-%m-%d %H:00:00', NEW.timestamp),
+        1,
+        CASE WHEN NEW.access_granted THEN 1 ELSE 0 END
+    )
+    ON CONFLICT (hour, user) DO UPDATE SET
+        total = total + 1,
+        granted = granted + excluded.granted;
+END;
+
+CREATE TRIGGER IF NOT EXISTS access_log_rollup_delete
+AFTER DELETE ON access_log
+WHEN OLD.user IS NOT NULL AND OLD.timestamp IS NOT NULL
+BEGIN
+    UPDATE access_stats_total
+    SET total = total - 1,
+        granted = granted - (CASE WHEN OLD.access_granted THEN 1 ELSE 0 END)
+    WHERE user = OLD.user;
+    UPDATE access_stats_hourly
+    SET total = total - 1,
+        granted = granted - (CASE WHEN OLD.access_granted THEN 1 ELSE 0 END)
+    WHERE hour = strftime('%Y-%m-%d %H:00:00', OLD.timestamp)
+      AND user = OLD.user;
+END;
+
+-- Bumped by triggers whenever a cached table changes, so every worker
+-- process can tell when its in-memory copy is stale.
+CREATE TABLE IF NOT EXISTS cache_version (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO cache_version (name, version) VALUES ('users', 0);
+
+CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+-- Weekly access schedules; a user without rows here falls back to the
+-- daily access_start/access_end window, or is unrestricted without one.
+CREATE TABLE IF NOT EXISTS user_schedules (
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    weekday INTEGER NOT NULL CHECK (weekday BETWEEN 0 AND 6),  -- 0 = Monday
+    start_time TEXT NOT NULL,  -- 'HH:MM', local time
+    end_time TEXT NOT NULL,  -- 'HH:MM'; not after start_time: next day
+    PRIMARY KEY (user_id, weekday, start_time)
+) WITHOUT ROWID;
+
+-- Dates (local) on which users with a schedule are refused all day.
+CREATE TABLE IF NOT EXISTS holidays (
+    date TEXT PRIMARY KEY,  -- 'YYYY-MM-DD'
+    name TEXT
+);
+
+-- Foreign keys are not enforced by default in SQLite.
+CREATE TRIGGER IF NOT EXISTS users_delete_schedules AFTER DELETE ON users
+BEGIN
+    DELETE FROM user_schedules WHERE user_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_schedules_version_insert
+AFTER INSERT ON user_schedules
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_schedules_version_update
+AFTER UPDATE ON user_schedules
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_schedules_version_delete
+AFTER DELETE ON user_schedules
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS holidays_version_insert AFTER INSERT ON holidays
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS holidays_version_update AFTER UPDATE ON holidays
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS holidays_version_delete AFTER DELETE ON holidays
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
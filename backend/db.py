@@ -0,0 +1,115 @@
+"""
+Per-thread SQLite connection pool for the backend.
+
+Opening a connection per request costs a file open, schema parse and lock
+setup, and with the default rollback journal every commit is fsynced and
+readers block writers.  The pool keeps one long-lived connection per thread
+(and per process, so it is safe across ``fork``), configured for
+concurrent access:
+
+* ``journal_mode=WAL`` – readers never block the writer and vice versa.
+* ``synchronous=NORMAL`` – in WAL mode, commits are durable against
+  application crashes and only the last transactions may be lost on power
+  failure; no fsync per commit.
+* ``busy_timeout`` – writers wait for the lock instead of failing with
+  "database is locked".
+* ``cached_statements`` – prepared statements are reused across requests
+  on the same connection.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import List
+
+from src.config import DB_BUSY_TIMEOUT_MS, DB_STATEMENT_CACHE, DB_SYNCHRONOUS
+
+
+class ConnectionPool:
+    """
+    One SQLite connection per thread and process for a database file.
+
+    Example:
+        >>> pool = ConnectionPool("face_recon.db")
+        >>> conn = pool.connection()
+        >>> with conn:  # commits, or rolls back on error
+        ...     conn.execute("INSERT INTO access_log (user) VALUES (?)", ("bob",))
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS,
+        synchronous: str = DB_SYNCHRONOUS,
+        cached_statements: int = DB_STATEMENT_CACHE,
+    ):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._pid = os.getpid()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,  # only so close_all() can close it
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Return the calling thread's connection, opening it on first use.
+
+        The connection must not be closed by the caller.  Use ``with conn:``
+        around writes so that an error rolls back instead of leaving a
+        transaction open on the shared connection.
+        """
+        if os.getpid() != self._pid:
+            # Forked child (e.g. a gunicorn worker): never reuse the parent's
+            # connections, just forget them.
+            self._reset_after_fork()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def open(self) -> sqlite3.Connection:
+        """
+        Open a new, unpooled connection with the pool's settings.
+
+        For long-running reads such as streamed exports that should not tie
+        up the thread's pooled connection; the caller must close it.
+        """
+        return self._connect()
+
+    def _reset_after_fork(self) -> None:
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def close_all(self) -> None:
+        """Close every connection opened by this process."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return len(self._connections)
@@ -0,0 +1,48 @@
+"""
+Gunicorn settings for the Face-Recon backend.
+
+Usage (from the project root)::
+
+    gunicorn -c backend/gunicorn.conf.py "backend.wsgi:create_app()"
+
+Defaults come from ``SERVER_*`` in ``src/config.py``; the ``WEB_CONCURRENCY``
+environment variable overrides the worker count, and command-line options
+(``--workers``, ``--threads``, ``--bind``, ...) override everything here.
+
+On ``SIGTERM`` gunicorn stops accepting connections and gives in-flight
+requests ``graceful_timeout`` seconds to finish; each worker then writes its
+queued access log entries before it exits (:func:`worker_exit`).
+"""
+
+import os
+
+from src.config import (
+    SERVER_BIND,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_THREADS,
+    SERVER_WORKERS,
+)
+
+bind = SERVER_BIND
+workers = int(os.environ.get("WEB_CONCURRENCY", 0)) or SERVER_WORKERS or os.cpu_count()
+threads = SERVER_THREADS
+worker_class = "gthread"
+graceful_timeout = SERVER_GRACEFUL_TIMEOUT
+# Initialise the database once in the master; workers are forked from it.
+preload_app = True
+
+
+def post_worker_init(worker):
+    from backend.wsgi import init_worker
+
+    init_worker()
+    worker.log.info("Worker %s ready", worker.pid)
+
+
+def worker_exit(server, worker):
+    from backend.wsgi import shutdown_worker
+
+    if not shutdown_worker(SERVER_GRACEFUL_TIMEOUT):
+        worker.log.error(
+            "Worker %s exited with access log entries unwritten", worker.pid
+        )
@@ -0,0 +1,109 @@
+"""
+Streaming ``access_log`` export as NDJSON or CSV, optionally gzipped.
+
+Rows are read with ``fetchmany`` from a single ``SELECT`` (one consistent
+snapshot under WAL, without blocking writers) and encoded one chunk at a
+time, so memory use depends on the chunk size and not on how many rows are
+exported.
+"""
+
+import csv
+import io
+import json
+import logging
+import sqlite3
+import zlib
+from typing import Iterator, List
+
+from src.config import EXPORT_CHUNK_ROWS
+
+_logger = logging.getLogger(__name__)
+
+FIELDS = ("id", "user", "timestamp", "access_granted", "method")
+
+# format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def _encode_ndjson(rows: List[sqlite3.Row]) -> str:
+    dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    return "".join(
+        dumps(
+            {
+                "id": row[0],
+                "user": row[1],
+                "timestamp": row[2],
+                "access_granted": bool(row[3]),
+                "method": row[4],
+            }
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows: List[sqlite3.Row]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        (row[0], row[1], row[2], int(bool(row[3])), row[4]) for row in rows
+    )
+    return buffer.getvalue()
+
+
+def iter_export(
+    cursor: sqlite3.Cursor,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """
+    Encode the rows of an executed query as NDJSON or CSV byte chunks.
+
+    Args:
+        cursor: Executed ``SELECT id, user, timestamp, access_granted,
+            method`` query.
+        fmt: ``"ndjson"`` or ``"csv"`` (with a header row).
+        compress: Gzip the output stream.
+        chunk_rows: Rows fetched and encoded per chunk.
+
+    Raises:
+        ValueError: For an unknown *fmt* (before anything is read).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    encode = _encode_ndjson if fmt == "ndjson" else _encode_csv
+    return _chunks(cursor, encode, fmt == "csv", compress, chunk_rows)
+
+
+def _chunks(cursor, encode, header, compress, chunk_rows) -> Iterator[bytes]:
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    exported = 0
+    try:
+        data = (",".join(FIELDS) + "\n").encode() if header else b""
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            exported += len(rows)
+            data += encode(rows).encode()
+            if gzip:
+                data = gzip.compress(data)
+            if data:  # the compressor may still be buffering
+                yield data
+            data = b""
+        if gzip:
+            data = gzip.compress(data) + gzip.flush()
+        if data:
+            yield data
+    except sqlite3.Error as exc:
+        # The status line is already sent.  Re-raise so that the server
+        # aborts the connection and the client sees an incomplete download
+        # instead of a complete-looking, truncated file.
+        _logger.error("Export aborted after %d rows: %s", exported, exc)
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,167 @@
+"""
+Filtered, keyset-paginated reads of ``access_log``.
+
+Pages are newest first and continue from an opaque cursor that holds the
+position of the last row returned, so every page costs an index seek plus
+``limit`` rows, however deep into the history it is (no ``OFFSET``).
+
+Which index serves a query depends on the filters:
+
+* without a time range, rows are ordered by ``id`` and the ``user``,
+  ``access_granted`` or ``method`` index (which all end in the rowid) or the
+  primary key is walked backwards from the cursor;
+* with ``since`` / ``until``, rows are ordered by ``(timestamp, id)`` and the
+  ``timestamp`` index is walked instead, so a window deep in the past does
+  not scan the newer rows first.
+
+The two orders only differ for rows whose timestamps are out of ``id``
+order, which the access log writer keeps to at most a second or so.
+"""
+
+import base64
+import binascii
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from backend.stats import format_datetime
+
+_COLUMNS = "SELECT id, user, timestamp, access_granted, method FROM access_log"
+
+_TRUE = {"1", "true", "yes"}
+_FALSE = {"0", "false", "no"}
+
+
+class LogFilter(NamedTuple):
+    """Conditions on ``access_log`` rows; ``None`` means unfiltered."""
+
+    user: Optional[str] = None
+    method: Optional[str] = None
+    granted: Optional[bool] = None
+    since: Optional[datetime] = None  # inclusive, UTC
+    until: Optional[datetime] = None  # exclusive, UTC
+
+    @property
+    def by_time(self) -> bool:
+        return self.since is not None or self.until is not None
+
+
+class Cursor(NamedTuple):
+    """Position of the last row of a page."""
+
+    id: int
+    timestamp: str
+
+    def encode(self) -> str:
+        raw = f"{self.id}|{self.timestamp or ''}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        """
+        Raises:
+            ValueError: If *token* was not produced by :meth:`encode`.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            row_id, timestamp = raw.decode().split("|", 1)
+            return cls(int(row_id), timestamp)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValueError(f"Invalid cursor: {token!r}") from None
+
+
+def parse_bool(value: str) -> bool:
+    """
+    Parse ``true/false``, ``1/0`` or ``yes/no`` (case-insensitive).
+
+    Raises:
+        ValueError: For anything else.
+    """
+    text = value.strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"Expected true or false, got {value!r}")
+
+
+def build_log_query(
+    filters: LogFilter,
+    cursor: Optional[Cursor] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """SQL and parameters for the rows after *cursor* matching *filters*."""
+    where: List[str] = []
+    params: Dict[str, Any] = {}
+    if filters.user is not None:
+        where.append("user = :user")
+        params["user"] = filters.user
+    if filters.method is not None:
+        where.append("method = :method")
+        params["method"] = filters.method
+    if filters.granted is not None:
+        where.append("access_granted = :granted")
+        params["granted"] = int(filters.granted)
+
+    if filters.by_time:
+        if filters.since is not None:
+            where.append("timestamp >= :since")
+            params["since"] = format_datetime(filters.since)
+        until = format_datetime(filters.until) if filters.until else None
+        if cursor is not None and (until is None or cursor.timestamp < until):
+            # Give SQLite only the tighter upper bound so that it seeks to
+            # the cursor in the timestamp index; the row value breaks ties
+            # within the cursor's second.
+            where.append("timestamp <= :cursor_ts")
+            where.append("(timestamp, id) < (:cursor_ts, :cursor_id)")
+            params["cursor_ts"] = cursor.timestamp
+            params["cursor_id"] = cursor.id
+        elif until is not None:
+            where.append("timestamp < :until")
+            params["until"] = until
+        order = "timestamp DESC, id DESC"
+    else:
+        if cursor is not None:
+            where.append("id < :cursor_id")
+            params["cursor_id"] = cursor.id
+        order = "id DESC"
+
+    sql = _COLUMNS
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY " + order
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    return sql, params
+
+
+def row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """JSON-ready representation of an ``access_log`` row."""
+    return {
+        "id": row["id"],
+        "user": row["user"],
+        "timestamp": row["timestamp"],
+        "access_granted": bool(row["access_granted"]),
+        "method": row["method"],
+    }
+
+
+def fetch_page(
+    conn: sqlite3.Connection,
+    filters: LogFilter,
+    cursor: Optional[Cursor] = None,
+    limit: int = 50,
+) -> Tuple[List[sqlite3.Row], Optional[Cursor]]:
+    """
+    Return up to *limit* rows after *cursor*, and the cursor of the next page.
+
+    The next cursor is ``None`` when there are no more matching rows.
+    """
+    sql, params = build_log_query(filters, cursor, limit + 1)
+    rows = conn.execute(sql, params).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, Cursor(last["id"], last["timestamp"])
@@ -0,0 +1,268 @@
+"""
+Write-behind batching for ``access_log`` inserts.
+
+Request handlers enqueue access events and return immediately; a background
+thread writes them in multi-row transactions whenever ``batch_size`` events
+are waiting or ``flush_interval_ms`` has passed.  This takes the commit (and
+its disk latency) off the door-open path and turns thousands of single-row
+transactions into a few large ones.
+
+Guarantees:
+
+* **Bounded memory / backpressure** – the queue holds at most ``max_queue``
+  events.  When it is full, :meth:`AccessLogWriter.submit` waits up to
+  ``enqueue_timeout_ms`` and then raises :class:`queue.Full`, so the caller
+  can refuse the request instead of silently dropping the audit record.
+* **Event time** – timestamps are taken when the event is submitted, not
+  when it is written.
+* **No loss on graceful stop** – :meth:`AccessLogWriter.stop` writes
+  everything still queued before returning.  A failed write is retried; the
+  events stay queued meanwhile.
+* **One transaction per group** – the events of one
+  :meth:`AccessLogWriter.submit_many` call are always written in the same
+  batch, so they are committed together or not at all.
+* **Read-your-writes** – :meth:`AccessLogWriter.flush` waits until all
+  events submitted so far are committed, for endpoints that read the log.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from queue import Full
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from src.config import (
+    LOG_BATCH_SIZE,
+    LOG_ENQUEUE_TIMEOUT_MS,
+    LOG_FLUSH_INTERVAL_MS,
+    LOG_QUEUE_SIZE,
+)
+
+_logger = logging.getLogger(__name__)
+
+INSERT_SQL = (
+    "INSERT INTO access_log (user, access_granted, method, timestamp) "
+    "VALUES (?, ?, ?, ?)"
+)
+
+# Seconds to wait before retrying a batch that failed to write.
+_RETRY_DELAY = 0.5
+
+
+def format_timestamp(epoch: float) -> str:
+    """Format like SQLite's ``CURRENT_TIMESTAMP`` (UTC, second precision)."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+
+class AccessLogWriter:
+    """
+    Bounded queue of access events drained by a background writer thread.
+
+    Example:
+        >>> writer = AccessLogWriter(pool.connection).start()
+        >>> writer.submit("alice", True, "face")
+        >>> writer.stop()  # flushes what is left
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        max_queue: int = LOG_QUEUE_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval_ms: float = LOG_FLUSH_INTERVAL_MS,
+        enqueue_timeout_ms: float = LOG_ENQUEUE_TIMEOUT_MS,
+    ):
+        """
+        Args:
+            connect: Returns the connection to write with; called on the
+                writer thread (e.g. ``ConnectionPool.connection``).
+            max_queue: Maximum number of events waiting to be written.
+            batch_size: Maximum events written per transaction (a larger
+                :meth:`submit_many` group is written whole); a batch is
+                written as soon as this many are queued.
+            flush_interval_ms: Longest time an event waits before its batch
+                is written.
+            enqueue_timeout_ms: How long :meth:`submit` waits for space in a
+                full queue before raising :class:`queue.Full`.
+        """
+        if max_queue < 1 or batch_size < 1:
+            raise ValueError("max_queue and batch_size must be at least 1")
+        self.connect = connect
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.enqueue_timeout = enqueue_timeout_ms / 1000.0
+        self._groups: deque = deque()  # one list of events per submit_many
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._written = 0
+        self._batches = 0
+        self._rejected = 0
+        self._failures = 0
+        self._flush_waiters = 0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "AccessLogWriter":
+        """Start the writer thread (no-op if it is already running)."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="access-log-writer", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Write every queued event, then stop the writer thread.
+
+        Returns:
+            ``True`` if the queue was fully drained.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._cond:
+            return not self._queued
+
+    # -- producer API ------------------------------------------------------
+
+    def submit(self, user: str, granted: bool, method: str = "face") -> None:
+        """
+        Queue one access event.
+
+        Raises:
+            queue.Full: If the queue stayed full for ``enqueue_timeout_ms``.
+            RuntimeError: If the writer has been stopped.
+        """
+        self.submit_many([(user, granted, method)])
+
+    def submit_many(self, entries: Iterable[Tuple[str, bool, str]]) -> None:
+        """
+        Queue several ``(user, granted, method)`` events atomically: either
+        all of them are queued or, on backpressure, none.  They are written
+        in one transaction, even if there are more than ``batch_size``.
+
+        Raises:
+            queue.Full: If there was no room for all events within
+                ``enqueue_timeout_ms``.
+            RuntimeError: If the writer has been stopped.
+        """
+        stamp = format_timestamp(time.time())
+        events = [(user, granted, method, stamp) for user, granted, method in entries]
+        if len(events) > self.max_queue:
+            raise ValueError(f"Cannot queue {len(events)} events at once")
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Access log writer is stopped")
+            if not self._cond.wait_for(
+                lambda: self._queued + len(events) <= self.max_queue or self._stopping,
+                timeout=self.enqueue_timeout,
+            ):
+                self._rejected += len(events)
+                raise Full("Access log queue is full")
+            if self._stopping:
+                raise RuntimeError("Access log writer is stopped")
+            if events:
+                self._groups.append(events)
+                self._queued += len(events)
+            self._submitted += len(events)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until every event submitted before this call has been written.
+
+        Returns:
+            ``True`` on success, ``False`` on timeout or if the writer thread
+            is not running.
+        """
+        with self._cond:
+            target = self._submitted
+            if self._written >= target:
+                return True
+            if not self.running:
+                return False
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            try:
+                self._cond.wait_for(
+                    lambda: self._written >= target or not self.running,
+                    timeout=timeout,
+                )
+            finally:
+                self._flush_waiters -= 1
+            return self._written >= target
+
+    def stats(self) -> Dict[str, int]:
+        """Counters: ``queued``, ``submitted``, ``written``, ``batches``,
+        ``rejected`` (refused by backpressure) and ``failures``."""
+        with self._cond:
+            return {
+                "queued": self._queued,
+                "submitted": self._submitted,
+                "written": self._written,
+                "batches": self._batches,
+                "rejected": self._rejected,
+                "failures": self._failures,
+                "max_queue": self.max_queue,
+            }
+
+    # -- writer thread -----------------------------------------------------
+
+    def _run(self) -> None:
+        conn = None
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queued or self._stopping)
+                if not self._queued:
+                    return
+                # Let a partial batch fill for up to one interval, unless we
+                # are stopping or a reader is waiting in flush().
+                self._cond.wait_for(
+                    lambda: self._queued >= self.batch_size
+                    or self._stopping
+                    or self._flush_waiters,
+                    timeout=self.flush_interval,
+                )
+                # Whole groups only: the first one even if it is oversized.
+                batch, groups = [], 0
+                for group in self._groups:
+                    if batch and len(batch) + len(group) > self.batch_size:
+                        break
+                    batch.extend(group)
+                    groups += 1
+            try:
+                if conn is None:
+                    conn = self.connect()
+                with conn:
+                    conn.executemany(INSERT_SQL, batch)
+            except sqlite3.Error as exc:
+                _logger.error("Failed to write %d access log rows: %s", len(batch), exc)
+                with self._cond:
+                    self._failures += 1
+                    if self._stopping and self._failures > 10:
+                        return
+                time.sleep(_RETRY_DELAY)
+                continue
+            with self._cond:
+                for _ in range(groups):
+                    self._groups.popleft()
+                self._queued -= len(batch)
+                self._written += len(batch)
+                self._batches += 1
+                self._cond.notify_all()
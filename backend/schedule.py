@@ -0,0 +1,232 @@
+"""
+Access schedules compiled into minute-of-week bitmasks.
+
+A user's weekly schedule (rows of ``user_schedules``, or else the legacy
+daily ``access_start`` / ``access_end`` window) is compiled once into a
+10080-bit mask, one bit per minute of the week, and identical schedules
+share one mask.  Deciding whether a user may enter at a given time is then
+a dict lookup, a holiday set lookup and one bit test, whatever the number of
+users or intervals.
+
+Rules:
+
+* A user without weekly schedule rows and without a daily window is
+  unrestricted (the behaviour before schedules existed) and is not affected
+  by holidays.
+* An interval whose end is not after its start runs past midnight into the
+  next day (Sunday wraps to Monday).  ``24:00`` may be used as an end.
+* On a date listed in ``holidays``, scheduled users are refused all day.
+* Times are local server time; weekday 0 is Monday.
+"""
+
+import logging
+from datetime import date, datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+_logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_FULL_DAY_NAMES = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+
+# (weekday, start minute, end minute)
+Interval = Tuple[int, int, int]
+
+
+def parse_time_of_day(value: str, allow_end_of_day: bool = False) -> int:
+    """
+    Parse ``HH:MM`` or ``HH:MM:SS`` into minutes after midnight.
+
+    Args:
+        value: Time of day; seconds are ignored.
+        allow_end_of_day: Accept ``24:00`` (1440), for interval ends.
+
+    Raises:
+        ValueError: If *value* is not a valid time of day.
+    """
+    parts = str(value).strip().split(":")
+    try:
+        if len(parts) not in (2, 3) or not all(p.isdigit() for p in parts):
+            raise ValueError
+        hours, minutes = int(parts[0]), int(parts[1])
+    except ValueError:
+        raise ValueError(f"Expected HH:MM, got {value!r}") from None
+    total = hours * 60 + minutes
+    if minutes >= 60 or total > MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time of day {value!r}")
+    if total == MINUTES_PER_DAY and not allow_end_of_day:
+        raise ValueError(f"Invalid time of day {value!r}")
+    return total
+
+
+def format_time_of_day(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_weekday(value) -> int:
+    """
+    Parse a weekday given as 0-6 (Monday is 0) or a name such as ``"mon"``
+    or ``"Monday"``.
+
+    Raises:
+        ValueError: For anything else.
+    """
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 6:
+        return value
+    if isinstance(value, str):
+        name = value.strip().lower()
+        for names in (DAY_NAMES, _FULL_DAY_NAMES):
+            if name in names:
+                return names.index(name)
+    raise ValueError(f"Invalid weekday {value!r}")
+
+
+def compile_mask(intervals: Iterable[Interval]) -> bytes:
+    """Compile intervals into a bit-per-minute mask of the week."""
+    bits = bytearray(MINUTES_PER_WEEK // 8)
+    for day, start, end in intervals:
+        length = end - start if end > start else end + MINUTES_PER_DAY - start
+        begin = day * MINUTES_PER_DAY + start
+        for minute in range(begin, begin + length):
+            minute %= MINUTES_PER_WEEK
+            bits[minute >> 3] |= 1 << (minute & 7)
+    return bytes(bits)
+
+
+def minute_of_week(when: datetime) -> int:
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+def mask_allows(mask: bytes, minute: int) -> bool:
+    return bool(mask[minute >> 3] >> (minute & 7) & 1)
+
+
+def daily_intervals(access_start: str, access_end: str) -> List[Interval]:
+    """The same ``access_start``-``access_end`` window on every day.
+
+    Raises:
+        ValueError: If either time is invalid or they are equal.
+    """
+    start = parse_time_of_day(access_start)
+    end = parse_time_of_day(access_end, allow_end_of_day=True)
+    if start == end:
+        raise ValueError("access_start and access_end must differ")
+    return [(day, start, end) for day in range(7)]
+
+
+def parse_weekly(entries) -> List[Interval]:
+    """
+    Parse a weekly schedule given as JSON.
+
+    Args:
+        entries: List of ``{"days": [...], "start": "HH:MM", "end": "HH:MM"}``
+            objects; days are weekday numbers or names (see
+            :func:`parse_weekday`).
+
+    Returns:
+        One ``(weekday, start, end)`` interval per listed day, sorted and
+        without duplicates.
+
+    Raises:
+        ValueError: If an entry is malformed.
+    """
+    if not isinstance(entries, list):
+        raise ValueError("'weekly' must be a list")
+    intervals = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError("Each schedule entry must be an object")
+        days = entry.get("days")
+        if not isinstance(days, list) or not days:
+            raise ValueError("'days' must be a non-empty list")
+        start = parse_time_of_day(entry.get("start", ""))
+        end = parse_time_of_day(entry.get("end", ""), allow_end_of_day=True)
+        if start == end:
+            raise ValueError("'start' and 'end' must differ")
+        intervals.update((parse_weekday(day), start, end) for day in days)
+    return sorted(intervals)
+
+
+class AccessSchedules:
+    """
+    Compiled schedules for all users plus the holiday calendar.
+
+    Example:
+        >>> schedules = AccessSchedules.build(
+        ...     weekly={"alice": [(0, 480, 1080)]}, daily={}, holidays=[]
+        ... )
+        >>> schedules.allows("alice", datetime(2024, 1, 1, 9, 30))  # Monday
+        True
+    """
+
+    def __init__(self, masks: Dict[str, bytes], holidays: FrozenSet[date]):
+        self._masks = masks
+        self.holidays = holidays
+
+    @classmethod
+    def build(
+        cls,
+        weekly: Dict[str, List[Interval]],
+        daily: Dict[str, Tuple[str, str]],
+        holidays: Iterable[date],
+    ) -> "AccessSchedules":
+        """
+        Compile schedules, sharing one mask between identical schedules.
+
+        Args:
+            weekly: Weekly intervals per user; these take precedence.
+            daily: Legacy ``(access_start, access_end)`` per user.  A window
+                that cannot be parsed denies access (logged), rather than
+                silently granting it.
+            holidays: Dates on which scheduled users are refused.
+        """
+        interned: Dict[Tuple[Interval, ...], bytes] = {}
+        masks: Dict[str, bytes] = {}
+
+        def intern(intervals: Iterable[Interval]) -> bytes:
+            key = tuple(sorted(intervals))
+            if key not in interned:
+                interned[key] = compile_mask(key)
+            return interned[key]
+
+        for name, (access_start, access_end) in daily.items():
+            if name in weekly:
+                continue
+            try:
+                masks[name] = intern(daily_intervals(access_start, access_end))
+            except ValueError as exc:
+                _logger.warning("Invalid access window for %r: %s", name, exc)
+                masks[name] = intern([])
+        for name, intervals in weekly.items():
+            masks[name] = intern(intervals)
+        return cls(masks, frozenset(holidays))
+
+    @property
+    def distinct_schedules(self) -> int:
+        return len({id(mask) for mask in self._masks.values()})
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    def restricted(self, name: str) -> bool:
+        return name in self._masks
+
+    def allows(self, name: str, when: Optional[datetime] = None) -> bool:
+        """Whether *name* may enter at local time *when* (default: now)."""
+        mask = self._masks.get(name)
+        if mask is None:
+            return True
+        when = when or datetime.now()
+        if when.date() in self.holidays:
+            return False
+        return mask_allows(mask, minute_of_week(when))
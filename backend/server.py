@@ -5,21 +5,53 @@ This server provides API endpoints for user authentication, access control,
 access logging, and statistics, backed by an SQLite database.
 """
 
+import atexit
+import base64
+import binascii
 import logging
 import os
 import sqlite3
 import sys
+import threading
+from datetime import date, datetime
+from queue import Full
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 # Ensure the parent directory is in the path for imports to work
-# This allows the server to be run from various contexts
+# This allows the server to be run as `python backend/server.py`
 # Go up one level: backend/server.py -> backend -> project_root
-parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if parent_dir not in sys.path:
-    sys.path.insert(0, parent_dir)
+if __name__ == "__main__":
+    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 
-from src.config import DATABASE_PATH
+from backend.db import ConnectionPool
+from backend.log_export import EXPORT_FORMATS, iter_export
+from backend.log_query import (
+    Cursor,
+    LogFilter,
+    build_log_query,
+    fetch_page,
+    parse_bool,
+    row_to_dict,
+)
+from backend.log_writer import AccessLogWriter
+from backend.schedule import (
+    DAY_NAMES,
+    daily_intervals,
+    format_time_of_day,
+    parse_weekly,
+)
+from backend.stats import BACKFILL_SQL, parse_timestamp, query_stats
+from backend.user_cache import CREDENTIAL_FIELDS, UserCache
+from src.config import (
+    DATABASE_PATH,
+    LOG_READ_FLUSH_TIMEOUT_MS,
+    RECOGNIZE_MAX_BATCH,
+    UNKNOWN_NAME,
+)
 
 app = Flask(__name__)
 
@@ -38,6 +70,12 @@ CREATE TABLE IF NOT EXISTS users (
     nfc_tag TEXT DEFAULT NULL
 );
 
+-- A badge identifies at most one user; users without one are not indexed.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_rfid_code
+ON users (rfid_code) WHERE rfid_code IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_nfc_tag
+ON users (nfc_tag) WHERE nfc_tag IS NOT NULL;
+
 CREATE TABLE IF NOT EXISTS access_log (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user TEXT,
@@ -45,6 +83,142 @@ CREATE TABLE IF NOT EXISTS access_log (
     access_granted BOOLEAN,
     method TEXT DEFAULT 'face'
 );
+
+CREATE INDEX IF NOT EXISTS idx_access_log_user ON access_log (user);
+CREATE INDEX IF NOT EXISTS idx_access_log_timestamp ON access_log (timestamp);
+CREATE INDEX IF NOT EXISTS idx_access_log_granted ON access_log (access_granted);
+CREATE INDEX IF NOT EXISTS idx_access_log_method ON access_log (method);
+
+-- Per-user rollups maintained by the triggers below; /stats reads these
+-- instead of aggregating access_log.
+CREATE TABLE IF NOT EXISTS access_stats_total (
+    user TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    granted INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS access_stats_hourly (
+    user TEXT NOT NULL,
+    hour TEXT NOT NULL,  -- UTC, 'YYYY-MM-DD HH:00:00'
+    total INTEGER NOT NULL,
+    granted INTEGER NOT NULL,
+    PRIMARY KEY (hour, user)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS access_log_rollup_insert
+AFTER INSERT ON access_log
+WHEN NEW.user IS NOT NULL AND NEW.timestamp IS NOT NULL
+BEGIN
+    INSERT INTO access_stats_total (user, total, granted)
+    VALUES (NEW.user, 1, CASE WHEN NEW.access_granted THEN 1 ELSE 0 END)
+    ON CONFLICT (user) DO UPDATE SET
+        total = total + 1,
+        granted = granted + excluded.granted;
+    INSERT INTO access_stats_hourly (user, hour, total, granted)
+    VALUES (
+        NEW.user,
+        strftime('%Y-%m-%d %H:00:00', NEW.timestamp),
+        1,
+        CASE WHEN NEW.access_granted THEN 1 ELSE 0 END
+    )
+    ON CONFLICT (hour, user) DO UPDATE SET
+        total = total + 1,
+        granted = granted + excluded.granted;
+END;
+
+CREATE TRIGGER IF NOT EXISTS access_log_rollup_delete
+AFTER DELETE ON access_log
+WHEN OLD.user IS NOT NULL AND OLD.timestamp IS NOT NULL
+BEGIN
+    UPDATE access_stats_total
+    SET total = total - 1,
+        granted = granted - (CASE WHEN OLD.access_granted THEN 1 ELSE 0 END)
+    WHERE user = OLD.user;
+    UPDATE access_stats_hourly
+    SET total = total - 1,
+        granted = granted - (CASE WHEN OLD.access_granted THEN 1 ELSE 0 END)
+    WHERE hour = strftime('%Y-%m-%d %H:00:00', OLD.timestamp)
+      AND user = OLD.user;
+END;
+
+-- Bumped by triggers whenever a cached table changes, so every worker
+-- process can tell when its in-memory copy is stale.
+CREATE TABLE IF NOT EXISTS cache_version (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO cache_version (name, version) VALUES ('users', 0);
+
+CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+-- Weekly access schedules; a user without rows here falls back to the
+-- daily access_start/access_end window, or is unrestricted without one.
+CREATE TABLE IF NOT EXISTS user_schedules (
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    weekday INTEGER NOT NULL CHECK (weekday BETWEEN 0 AND 6),  -- 0 = Monday
+    start_time TEXT NOT NULL,  -- 'HH:MM', local time
+    end_time TEXT NOT NULL,  -- 'HH:MM'; not after start_time: next day
+    PRIMARY KEY (user_id, weekday, start_time)
+) WITHOUT ROWID;
+
+-- Dates (local) on which users with a schedule are refused all day.
+CREATE TABLE IF NOT EXISTS holidays (
+    date TEXT PRIMARY KEY,  -- 'YYYY-MM-DD'
+    name TEXT
+);
+
+-- Foreign keys are not enforced by default in SQLite.
+CREATE TRIGGER IF NOT EXISTS users_delete_schedules AFTER DELETE ON users
+BEGIN
+    DELETE FROM user_schedules WHERE user_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_schedules_version_insert
+AFTER INSERT ON user_schedules
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_schedules_version_update
+AFTER UPDATE ON user_schedules
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_schedules_version_delete
+AFTER DELETE ON user_schedules
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS holidays_version_insert AFTER INSERT ON holidays
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS holidays_version_update AFTER UPDATE ON holidays
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
+
+CREATE TRIGGER IF NOT EXISTS holidays_version_delete AFTER DELETE ON holidays
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'users';
+END;
 """
 
 
@@ -53,50 +227,387 @@ def init_db() -> None:
     Initialise the database, creating tables if they do not exist.
 
     The database file path is read from ``src.config.DATABASE_PATH``.
-    The parent directory is created automatically when needed.
+    The parent directory is created automatically when needed.  An existing
+    ``access_log`` is upgraded in place: indexes are added and the
+    ``/stats`` rollups are filled from the rows already logged.
     """
     db_dir = os.path.dirname(DATABASE_PATH)
     if db_dir:
         os.makedirs(db_dir, exist_ok=True)
     conn = sqlite3.connect(DATABASE_PATH)
-    conn.executescript(_SCHEMA)
-    conn.commit()
+    # WAL is a property of the database file; set it once here so that the
+    # first request does not race other workers for it.
+    conn.execute("PRAGMA journal_mode=WAL")
+    # One write transaction: the rollup triggers and the backfill of an
+    # existing log must not interleave with inserts from other workers.
+    conn.executescript("BEGIN IMMEDIATE;" + _SCHEMA + BACKFILL_SQL + "COMMIT;")
     conn.close()
 
 
+# Long-lived connections, one per thread and worker process.
+_pool = ConnectionPool(DATABASE_PATH)
+
+
 def get_db_connection() -> sqlite3.Connection:
     """
-    Create and return a database connection.
+    Return the calling thread's pooled database connection.
+
+    The connection is reused across requests and must not be closed; wrap
+    writes in ``with conn:`` so they commit, or roll back on error.
 
     Returns:
         sqlite3.Connection: Database connection with Row factory.
     """
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return _pool.connection()
+
+
+# Access events are written behind the request by a background thread.
+_log_writer = AccessLogWriter(get_db_connection)
+
+# Registered users, answered from memory; see backend/user_cache.py.
+_user_cache = UserCache(get_db_connection)
+
+
+def _get_log_writer() -> AccessLogWriter:
+    """Return the access log writer, (re)starting its thread when needed,
+    e.g. on first use in a freshly forked worker."""
+    if not _log_writer.running:
+        _log_writer.start()
+    return _log_writer
 
 
 def _log_access(user: str, granted: bool, method: str = "face") -> None:
     """
-    Write an access event to the ``access_log`` table.
+    Queue an access event for the ``access_log`` table.
 
     Args:
         user: The username that attempted access.
         granted: Whether access was granted.
         method: Authentication method used (default: ``"face"``).
+
+    Raises:
+        queue.Full: If the log queue is full (see ``LOG_QUEUE_SIZE``).
+    """
+    _get_log_writer().submit(user, granted, method)
+
+
+def _log_accesses(entries) -> None:
+    """
+    Queue several ``(user, granted, method)`` access events at once.
+
+    Raises:
+        queue.Full: If the log queue has no room for all of them.
+    """
+    _get_log_writer().submit_many(entries)
+
+
+def _flush_access_log() -> None:
+    """
+    Make queued access events visible to the read endpoints.
+
+    Waits at most ``LOG_READ_FLUSH_TIMEOUT_MS``: when the writer is behind or
+    retrying a failed batch, reads return slightly stale results instead of
+    stalling on the write path.
+    """
+    if not _log_writer.flush(LOG_READ_FLUSH_TIMEOUT_MS / 1000.0):
+        _logger.warning("Access log flush timed out; results may lag")
+
+
+# ---------------------------------------------------------------------------
+# Framework-free request handling, shared by the Flask views below and the
+# asyncio app in backend/asgi.py.  Each handler takes the decoded JSON body
+# or query parameters and returns ``(payload, status, headers)``.
+# ---------------------------------------------------------------------------
+
+Result = Tuple[Any, int, Dict[str, str]]
+
+# 503 returned when the access log cannot keep up (backpressure).
+LOG_BUSY: Result = (
+    {"error": "Access log is busy, retry shortly"},
+    503,
+    {"Retry-After": "1"},
+)
+
+
+def _error(message: str, status: int) -> Result:
+    return {"error": message}, status, {}
+
+
+def _db_error(where: str, exc: sqlite3.Error) -> Result:
+    _logger.error("Database error in %s: %s", where, exc)
+    return _error("A database error occurred", 500)
+
+
+def _respond(result: Result):
+    """Turn a handler result into a Flask response."""
+    payload, status, headers = result
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers.update(headers)
+    return response
+
+
+def _log_busy_response():
+    return _respond(LOG_BUSY)
+
+
+def handle_access(data) -> Result:
+    """``POST /access``; see :func:`check_access`."""
+    if not data:
+        return _error("No JSON data provided", 400)
+    user = data.get("user")
+    if not user or not isinstance(user, str):
+        return _error("User not provided", 400)
+    method = data.get("method", "face")
+
+    try:
+        granted = _user_cache.is_allowed(user)
+    except sqlite3.Error as exc:
+        return _db_error("check_access", exc)
+
+    try:
+        _log_access(user, granted, method)
+    except Full:
+        # Fail closed: no door decision without an audit record.
+        return LOG_BUSY
+    return {"access": granted}, 200, {}
+
+
+def handle_credential_access(data) -> Result:
+    """``POST /access/credential``; see :func:`check_credential_access`."""
+    if not data:
+        return _error("No JSON data provided", 400)
+    method = data.get("method")
+    if method not in CREDENTIAL_FIELDS:
+        methods = ", ".join(sorted(CREDENTIAL_FIELDS))
+        return _error(f"'method' must be one of: {methods}", 400)
+    code = data.get("code")
+    if not code or not isinstance(code, str) or not code.strip():
+        return _error("Valid 'code' is required", 400)
+
+    try:
+        user = _user_cache.find_credential(method, code.strip())
+        granted = user is not None and _user_cache.is_allowed(user.name)
+    except sqlite3.Error as exc:
+        return _db_error("check_credential_access", exc)
+
+    name = user.name if user is not None else None
+    try:
+        _log_access(name or UNKNOWN_NAME, granted, method)
+    except Full:
+        return LOG_BUSY
+    return {"access": granted, "user": name}, 200, {}
+
+
+def handle_stats(args: Mapping[str, str]) -> Result:
+    """``GET /stats``; see :func:`get_stats`."""
+    try:
+        window = {
+            key: parse_timestamp(args[key])
+            for key in ("since", "until")
+            if args.get(key)
+        }
+        _flush_access_log()
+        rows = query_stats(get_db_connection(), **window)
+    except ValueError as exc:
+        return _error(f"Invalid time window: {exc}", 400)
+    except sqlite3.Error as exc:
+        return _db_error("get_stats", exc)
+    return [list(row) for row in rows], 200, {}
+
+
+def _log_filter_from_args(args) -> Tuple[LogFilter, Optional[Cursor]]:
+    """
+    Parse the ``/logs`` filter and cursor query parameters.
+
+    Raises:
+        ValueError: If a parameter is malformed.
     """
+    filters = LogFilter(
+        user=args.get("user") or None,
+        method=args.get("method") or None,
+        granted=parse_bool(args["granted"]) if args.get("granted") else None,
+        since=parse_timestamp(args["since"]) if args.get("since") else None,
+        until=parse_timestamp(args["until"]) if args.get("until") else None,
+    )
+    if filters.since and filters.until and filters.since >= filters.until:
+        raise ValueError("since must be before until")
+    cursor = Cursor.decode(args["cursor"]) if args.get("cursor") else None
+    return filters, cursor
+
+
+def handle_logs(args: Mapping[str, str]) -> Result:
+    """``GET /logs``; see :func:`get_logs`."""
+    try:
+        limit = min(int(args.get("limit", 50)), 500)
+    except (ValueError, TypeError):
+        limit = 50
+    limit = max(limit, 1)
+
+    try:
+        filters, cursor = _log_filter_from_args(args)
+    except ValueError as exc:
+        return _error(str(exc), 400)
+
+    _flush_access_log()
+    try:
+        rows, next_cursor = fetch_page(get_db_connection(), filters, cursor, limit)
+    except sqlite3.Error as exc:
+        return _db_error("get_logs", exc)
+    headers = {}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor.encode()
+    return [row_to_dict(row) for row in rows], 200, headers
+
+
+def handle_list_users() -> Result:
+    """``GET /users``; see :func:`list_users`."""
     try:
-        conn = get_db_connection()
-        conn.execute(
-            "INSERT INTO access_log (user, access_granted, method) VALUES (?, ?, ?)",
-            (user, granted, method),
+        rows = (
+            get_db_connection()
+            .execute(
+                "SELECT id, name, access_start, access_end, rfid_code, nfc_tag "
+                "FROM users"
+            )
+            .fetchall()
         )
-        conn.commit()
-        conn.close()
     except sqlite3.Error as exc:
-        # Log to server-side output so administrators can investigate without
-        # exposing internal details to API callers.
-        _logger.error("Failed to write access log entry: %s", exc)
+        return _db_error("list_users", exc)
+    return [dict(zip(row.keys(), tuple(row))) for row in rows], 200, {}
+
+
+def handle_create_user(data) -> Result:
+    """``POST /users``; see :func:`create_user`."""
+    if not data:
+        return _error("No JSON data provided", 400)
+
+    name = data.get("name")
+    if not name or not isinstance(name, str) or not name.strip():
+        return _error("Valid 'name' is required", 400)
+
+    name = name.strip()
+    access_start = data.get("access_start")
+    access_end = data.get("access_end")
+    credentials = {}
+    for field in CREDENTIAL_FIELDS.values():
+        code = data.get(field)
+        if code is not None and not isinstance(code, str):
+            return _error(f"'{field}' must be a string", 400)
+        credentials[field] = (code or "").strip() or None
+    if access_start or access_end:
+        try:
+            daily_intervals(access_start or "00:00", access_end or "24:00")
+        except ValueError as exc:
+            return _error(f"Invalid access window: {exc}", 400)
+
+    conn = get_db_connection()
+    try:
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO users (name, access_start, access_end, rfid_code, "
+                "nfc_tag) VALUES (?, ?, ?, ?, ?)",
+                (
+                    name,
+                    access_start,
+                    access_end,
+                    credentials["rfid_code"],
+                    credentials["nfc_tag"],
+                ),
+            )
+        _user_cache.invalidate()
+        return {"id": cursor.lastrowid, "name": name}, 201, {}
+    except sqlite3.IntegrityError as exc:
+        for field in CREDENTIAL_FIELDS.values():
+            if f"users.{field}" in str(exc):
+                return _error(f"'{field}' is already assigned", 409)
+        return _error(f"User '{name}' already exists", 409)
+    except sqlite3.Error as exc:
+        return _db_error("create_user", exc)
+
+
+def handle_delete_user(user_id: int) -> Result:
+    """``DELETE /users/<id>``; see :func:`delete_user`."""
+    conn = get_db_connection()
+    try:
+        with conn:
+            cursor = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    except sqlite3.Error as exc:
+        return _db_error("delete_user", exc)
+    if cursor.rowcount == 0:
+        return _error("User not found", 404)
+    _user_cache.invalidate()
+    return {"deleted": True}, 200, {}
+
+
+@atexit.register
+def _stop_log_writer() -> None:
+    if not _log_writer.stop():
+        _logger.error("Access log writer stopped with events still queued")
+
+
+# ---------------------------------------------------------------------------
+# Recognition gallery
+# ---------------------------------------------------------------------------
+
+_gallery = None
+_gallery_lock = threading.Lock()
+
+
+def load_gallery(*args, **kwargs):
+    """:func:`src.utils.encodings_store.load_gallery`, imported on first use."""
+    from src.utils.encodings_store import load_gallery
+
+    return load_gallery(*args, **kwargs)
+
+
+def load_recognition_gallery(*args, **kwargs):
+    """
+    Load (or reload) the gallery used by ``POST /recognize``.
+
+    Arguments are passed to :func:`src.utils.encodings_store.load_gallery`.
+    The encodings store is memory-mapped, so this is cheap even for large
+    galleries and is normally done once at startup.
+
+    Returns:
+        The loaded :class:`~src.utils.matcher.FaceMatcher`.
+    """
+    global _gallery
+    matcher = load_gallery(*args, **kwargs)
+    with _gallery_lock:
+        _gallery = matcher
+    return matcher
+
+
+def _get_gallery():
+    """Return the loaded gallery, loading it on first use."""
+    global _gallery
+    if _gallery is None:
+        with _gallery_lock:
+            if _gallery is None:
+                _gallery = load_gallery()
+    return _gallery
+
+
+def _encode_crop(image_bytes: bytes):
+    """
+    Encode a JPEG/PNG face crop; the whole image is taken as the face box.
+
+    Returns:
+        The 128-d encoding.
+
+    Raises:
+        ValueError: If the image cannot be decoded.
+    """
+    import cv2
+    import face_recognition
+    import numpy as np
+
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Image could not be decoded")
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    height, width = rgb.shape[:2]
+    return face_recognition.face_encodings(rgb, [(0, width, height, 0)])[0]
 
 
 # ---------------------------------------------------------------------------
@@ -109,41 +620,205 @@ def check_access():
     """
     Check whether a user has access to the system.
 
+    Users are looked up in the in-memory user cache; the database is only
+    read when the users table has changed.
+
     Expected JSON payload::
 
         {"user": "username"}
 
     Returns:
         JSON response:
-        - ``{"access": true}``  – user exists and is allowed.
-        - ``{"access": false}`` – user is not registered.
+        - ``{"access": true}``  – user exists and its schedule allows access
+          now (see ``backend/schedule.py``).
+        - ``{"access": false}`` – user is not registered, or is outside its
+          schedule or it is a holiday.
         - ``{"error": "..."}`` 400 – malformed request.
         - ``{"error": "..."}`` 500 – database error.
+        - ``{"error": "..."}`` 503 – access log queue full; retry later.
     """
-    data = request.json
-    if not data:
+    return _respond(handle_access(request.json))
+
+
+@app.route("/access/credential", methods=["POST"])
+def check_credential_access():
+    """
+    Check access for an RFID badge or NFC tag.
+
+    The code is resolved to a user through the user cache's credential map,
+    so a tap costs two dict lookups and a schedule bit test; the event is
+    logged with ``method`` set to ``"rfid"`` or ``"nfc"`` and, for an
+    unknown code, the user ``"Unknown"`` (the code itself is not logged).
+
+    Expected JSON payload::
+
+        {"method": "rfid", "code": "AABBCCDD"}
+
+    Returns:
+        JSON response:
+        - ``{"access": true, "user": "name"}`` – the code belongs to a user
+          whose schedule allows access now.
+        - ``{"access": false, "user": "name" | null}`` – unknown code, or the
+          user is outside its schedule.
+        - ``{"error": "..."}`` 400 – malformed request.
+        - ``{"error": "..."}`` 500 – database error.
+        - ``{"error": "..."}`` 503 – access log queue full; retry later.
+    """
+    return _respond(handle_credential_access(request.json))
+
+
+@app.route("/recognize", methods=["POST"])
+def recognize():
+    """
+    Identify a batch of faces and decide access for each of them.
+
+    Faces are matched against the in-process gallery in one batched distance
+    computation; access is granted when the matched identity is a registered
+    user.  All resulting ``access_log`` rows are written in one transaction.
+
+    Expected JSON payload (one of the two keys)::
+
+        {"encodings": [[128 floats], ...]}
+        {"images": ["<base64 JPEG face crop>", ...]}
+
+    Returns:
+        JSON response:
+        - ``{"results": [{"name": ..., "distance": ..., "access": ...}]}``
+          with one entry per face, in request order.
+        - ``{"error": "..."}`` 400 – malformed request or batch too large.
+        - ``{"error": "..."}`` 501 – image decoding is not available.
+        - ``{"error": "..."}`` 503 – no gallery has been built yet, or the
+          access log queue is full.
+        - ``{"error": "..."}`` 500 – database error.
+    """
+    import numpy as np
+
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
         return jsonify({"error": "No JSON data provided"}), 400
 
-    user = data.get("user")
-    if not user or not isinstance(user, str):
-        return jsonify({"error": "User not provided"}), 400
+    encodings = data.get("encodings")
+    images = data.get("images")
+    if (encodings is None) == (images is None):
+        return jsonify({"error": "Provide exactly one of 'encodings' or 'images'"}), 400
+    batch = encodings if encodings is not None else images
+    if not isinstance(batch, list) or not batch:
+        return jsonify({"error": "Batch must be a non-empty list"}), 400
+    if len(batch) > RECOGNIZE_MAX_BATCH:
+        return (
+            jsonify({"error": f"Batch larger than {RECOGNIZE_MAX_BATCH} faces"}),
+            400,
+        )
 
-    method = data.get("method", "face")
+    try:
+        matcher = _get_gallery()
+    except FileNotFoundError:
+        return jsonify({"error": "No face gallery available"}), 503
 
-    conn = get_db_connection()
+    if images is not None:
+        try:
+            crops = [base64.b64decode(item, validate=True) for item in images]
+        except (binascii.Error, TypeError, ValueError):
+            return jsonify({"error": "Images must be base64 strings"}), 400
+        try:
+            encodings = [_encode_crop(crop) for crop in crops]
+        except ImportError:
+            return jsonify({"error": "Image recognition is not available"}), 501
+        except (ValueError, IndexError):
+            return jsonify({"error": "Image could not be decoded"}), 400
+
+    try:
+        probes = np.asarray(encodings, dtype=np.float32)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Encodings must be lists of numbers"}), 400
+    if probes.ndim != 2 or probes.shape[1] != matcher.encodings.shape[1]:
+        return (
+            jsonify(
+                {"error": f"Encodings must have {matcher.encodings.shape[1]} values"}
+            ),
+            400,
+        )
+
+    matches = matcher.match(probes)
+    now = datetime.now()
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE name = ?", (user,))
-        user_row = cursor.fetchone()
-        granted = user_row is not None
+        allowed = {
+            m.name
+            for m in matches
+            if m.name != UNKNOWN_NAME and _user_cache.is_allowed(m.name, now)
+        }
     except sqlite3.Error as exc:
-        _logger.error("Database error in check_access: %s", exc)
+        _logger.error("Database error in recognize: %s", exc)
         return jsonify({"error": "A database error occurred"}), 500
-    finally:
+
+    results = [
+        {
+            "name": m.name,
+            "distance": None if m.name == UNKNOWN_NAME else round(float(m.distance), 4),
+            "access": m.name in allowed,
+        }
+        for m in matches
+    ]
+    try:
+        _log_accesses([(r["name"], r["access"], "face") for r in results])
+    except Full:
+        return _log_busy_response()
+    return jsonify({"results": results})
+
+
+@app.route("/logs/export", methods=["GET"])
+def export_logs():
+    """
+    Stream access log entries, newest first, as NDJSON or CSV.
+
+    Rows are read and encoded in chunks of ``EXPORT_CHUNK_ROWS``, so memory
+    use is flat however many rows are exported.
+
+    Query parameters:
+        format (str): ``ndjson`` (default) or ``csv``.
+        gzip (bool): Gzip the download (``access_log.<format>.gz``).
+        user, method, granted, since, until: Filters as for ``/logs``.
+
+    Returns:
+        A streamed attachment; one JSON object per line for NDJSON, or a
+        header row followed by one row per entry for CSV.
+    """
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt not in EXPORT_FORMATS:
+        return (
+            jsonify({"error": f"format must be one of {sorted(EXPORT_FORMATS)}"}),
+            400,
+        )
+    try:
+        filters, _ = _log_filter_from_args(request.args)
+        compress = parse_bool(request.args.get("gzip", "false"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    _flush_access_log()
+    sql, params = build_log_query(filters)
+    try:
+        # A connection of its own: the export can outlive the request
+        # handler and must not hold the thread's pooled connection.
+        conn = _pool.open()
+    except sqlite3.Error as exc:
+        _logger.error("Database error in export_logs: %s", exc)
+        return jsonify({"error": "A database error occurred"}), 500
+    try:
+        cursor = conn.execute(sql, params)
+    except sqlite3.Error as exc:
         conn.close()
+        _logger.error("Database error in export_logs: %s", exc)
+        return jsonify({"error": "A database error occurred"}), 500
 
-    _log_access(user, granted, method)
-    return jsonify({"access": granted})
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"access_log.{extension}"
+    if compress:
+        mimetype, filename = "application/gzip", filename + ".gz"
+    response = Response(iter_export(cursor, fmt, compress), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    response.call_on_close(conn.close)
+    return response
 
 
 @app.route("/stats", methods=["GET"])
@@ -151,71 +826,41 @@ def get_stats():
     """
     Return per-user access statistics.
 
+    Counts come from rollup tables maintained as the log is written, so the
+    cost grows with the number of users rather than log entries.
+
+    Query parameters:
+        since (str): Only count accesses at or after this ISO 8601 time.
+        until (str): Only count accesses before this ISO 8601 time.
+
     Returns:
         JSON list of ``[username, total_accesses, granted_accesses]`` tuples,
         ordered by total accesses descending.
     """
-    conn = get_db_connection()
-    try:
-        rows = conn.execute(
-            """
-            SELECT user,
-                   COUNT(*) AS total,
-                   SUM(CASE WHEN access_granted THEN 1 ELSE 0 END) AS granted
-            FROM access_log
-            GROUP BY user
-            ORDER BY total DESC
-            """
-        ).fetchall()
-        return jsonify([[row["user"], row["total"], row["granted"]] for row in rows])
-    except sqlite3.Error as exc:
-        _logger.error("Database error in get_stats: %s", exc)
-        return jsonify({"error": "A database error occurred"}), 500
-    finally:
-        conn.close()
+    return _respond(handle_stats(request.args))
 
 
 @app.route("/logs", methods=["GET"])
 def get_logs():
     """
-    Return the most recent access log entries.
+    Return access log entries, newest first, one page at a time.
 
     Query parameters:
         limit (int): Maximum number of entries to return (default 50, max 500).
+        cursor (str): ``X-Next-Cursor`` of the previous page.
+        user (str): Only entries for this user.
+        method (str): Only entries with this authentication method.
+        granted (bool): Only granted (``true``) or denied (``false``) entries.
+        since (str): Only entries at or after this ISO 8601 time.
+        until (str): Only entries before this ISO 8601 time.
 
     Returns:
         JSON list of log entry objects with keys:
         ``id``, ``user``, ``timestamp``, ``access_granted``, ``method``.
+        If more entries match, the ``X-Next-Cursor`` response header holds
+        the cursor for the next page; pass it back with the same filters.
     """
-    try:
-        limit = min(int(request.args.get("limit", 50)), 500)
-    except (ValueError, TypeError):
-        limit = 50
-
-    conn = get_db_connection()
-    try:
-        rows = conn.execute(
-            "SELECT id, user, timestamp, access_granted, method "
-            "FROM access_log ORDER BY id DESC LIMIT ?",
-            (limit,),
-        ).fetchall()
-        return jsonify(
-            [
-                {
-                    "id": row["id"],
-                    "user": row["user"],
-                    "timestamp": row["timestamp"],
-                    "access_granted": bool(row["access_granted"]),
-                    "method": row["method"],
-                }
-                for row in rows
-            ]
-        )
-    except sqlite3.Error as exc:
-        _logger.error("Database error in get_logs: %s", exc)
-        return jsonify({"error": "A database error occurred"}), 500
-    finally:
-        conn.close()
+    return _respond(handle_logs(request.args))
 
 
 @app.route("/users", methods=["GET"])
@@ -227,29 +872,7 @@ def list_users():
         JSON list of user objects with keys: ``id``, ``name``,
         ``access_start``, ``access_end``, ``rfid_code``, ``nfc_tag``.
     """
-    conn = get_db_connection()
-    try:
-        rows = conn.execute(
-            "SELECT id, name, access_start, access_end, rfid_code, nfc_tag FROM users"
-        ).fetchall()
-        return jsonify(
-            [
-                {
-                    "id": row["id"],
-                    "name": row["name"],
-                    "access_start": row["access_start"],
-                    "access_end": row["access_end"],
-                    "rfid_code": row["rfid_code"],
-                    "nfc_tag": row["nfc_tag"],
-                }
-                for row in rows
-            ]
-        )
-    except sqlite3.Error as exc:
-        _logger.error("Database error in list_users: %s", exc)
-        return jsonify({"error": "A database error occurred"}), 500
-    finally:
-        conn.close()
+    return _respond(handle_list_users())
 
 
 @app.route("/users", methods=["POST"])
@@ -271,64 +894,199 @@ def create_user():
         - ``{"id": <new_id>, "name": "username"}`` 201 on success.
         - ``{"error": "..."}`` 400 / 409 / 500 on failure.
     """
+    return _respond(handle_create_user(request.json))
+
+
+@app.route("/users/<int:user_id>", methods=["DELETE"])
+def delete_user(user_id: int):
+    """
+    Remove a user from the system.
+
+    Args:
+        user_id: The integer primary key of the user to remove.
+
+    Returns:
+        - ``{"deleted": true}`` 200 if the user was removed.
+        - ``{"error": "User not found"}`` 404 if no such user exists.
+        - ``{"error": "..."}`` 500 on database error.
+    """
+    return _respond(handle_delete_user(user_id))
+
+
+@app.route("/users/<int:user_id>/schedule", methods=["GET"])
+def get_user_schedule(user_id: int):
+    """
+    Return a user's weekly schedule.
+
+    Returns:
+        ``{"weekly": [{"day": "mon", "start": "08:00", "end": "18:00"}, ...]}``
+        200; an empty list means the user is unrestricted unless it has an
+        ``access_start`` / ``access_end`` window.  404 if no such user exists.
+    """
+    conn = get_db_connection()
+    try:
+        if not conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,)).fetchone():
+            return jsonify({"error": "User not found"}), 404
+        rows = conn.execute(
+            "SELECT weekday, start_time, end_time FROM user_schedules "
+            "WHERE user_id = ? ORDER BY weekday, start_time",
+            (user_id,),
+        ).fetchall()
+    except sqlite3.Error as exc:
+        _logger.error("Database error in get_user_schedule: %s", exc)
+        return jsonify({"error": "A database error occurred"}), 500
+    return jsonify(
+        {
+            "weekly": [
+                {"day": DAY_NAMES[row[0]], "start": row[1], "end": row[2]}
+                for row in rows
+            ]
+        }
+    )
+
+
+@app.route("/users/<int:user_id>/schedule", methods=["PUT"])
+def set_user_schedule(user_id: int):
+    """
+    Replace a user's weekly schedule.
+
+    Expected JSON payload::
+
+        {
+            "weekly": [
+                {"days": ["mon", "tue"], "start": "08:00", "end": "18:00"},
+                {"days": ["fri"], "start": "22:00", "end": "06:00"}
+            ]
+        }
+
+    An interval whose end is not after its start runs past midnight.  An
+    empty list removes the schedule.  Scheduled users are refused outside
+    their intervals and on holidays.
+
+    Returns:
+        - ``{"id": <user_id>, "intervals": <count>}`` 200 on success.
+        - ``{"error": "..."}`` 400 / 404 / 500 on failure.
+    """
     data = request.json
     if not data:
         return jsonify({"error": "No JSON data provided"}), 400
+    try:
+        intervals = parse_weekly(data.get("weekly"))
+    except ValueError as exc:
+        return jsonify({"error": f"Invalid schedule: {exc}"}), 400
 
-    name = data.get("name")
-    if not name or not isinstance(name, str) or not name.strip():
-        return jsonify({"error": "Valid 'name' is required"}), 400
+    conn = get_db_connection()
+    try:
+        with conn:
+            if not conn.execute(
+                "SELECT 1 FROM users WHERE id = ?", (user_id,)
+            ).fetchone():
+                return jsonify({"error": "User not found"}), 404
+            conn.execute("DELETE FROM user_schedules WHERE user_id = ?", (user_id,))
+            conn.executemany(
+                "INSERT INTO user_schedules (user_id, weekday, start_time, "
+                "end_time) VALUES (?, ?, ?, ?)",
+                [
+                    (user_id, day, format_time_of_day(start), format_time_of_day(end))
+                    for day, start, end in intervals
+                ],
+            )
+        _user_cache.invalidate()
+        return jsonify({"id": user_id, "intervals": len(intervals)})
+    except sqlite3.Error as exc:
+        _logger.error("Database error in set_user_schedule: %s", exc)
+        return jsonify({"error": "A database error occurred"}), 500
 
-    name = name.strip()
-    access_start = data.get("access_start")
-    access_end = data.get("access_end")
-    rfid_code = data.get("rfid_code")
-    nfc_tag = data.get("nfc_tag")
 
-    conn = get_db_connection()
+@app.route("/holidays", methods=["GET"])
+def list_holidays():
+    """
+    List holidays, on which scheduled users are refused.
+
+    Returns:
+        JSON list of ``{"date": "YYYY-MM-DD", "name": ...}`` objects, by date.
+    """
     try:
-        cursor = conn.execute(
-            "INSERT INTO users (name, access_start, access_end, rfid_code, nfc_tag) "
-            "VALUES (?, ?, ?, ?, ?)",
-            (name, access_start, access_end, rfid_code, nfc_tag),
+        rows = (
+            get_db_connection()
+            .execute("SELECT date, name FROM holidays ORDER BY date")
+            .fetchall()
         )
-        conn.commit()
-        new_id = cursor.lastrowid
-        return jsonify({"id": new_id, "name": name}), 201
-    except sqlite3.IntegrityError:
-        return jsonify({"error": f"User '{name}' already exists"}), 409
     except sqlite3.Error as exc:
-        _logger.error("Database error in create_user: %s", exc)
+        _logger.error("Database error in list_holidays: %s", exc)
         return jsonify({"error": "A database error occurred"}), 500
-    finally:
-        conn.close()
+    return jsonify([{"date": row[0], "name": row[1]} for row in rows])
 
 
-@app.route("/users/<int:user_id>", methods=["DELETE"])
-def delete_user(user_id: int):
+@app.route("/holidays", methods=["POST"])
+def create_holiday():
     """
-    Remove a user from the system.
+    Add a holiday.
 
-    Args:
-        user_id: The integer primary key of the user to remove.
+    Expected JSON payload::
+
+        {"date": "2024-12-25", "name": "Christmas"}  (name optional)
 
     Returns:
-        - ``{"deleted": true}`` 200 if the user was removed.
-        - ``{"error": "User not found"}`` 404 if no such user exists.
-        - ``{"error": "..."}`` 500 on database error.
+        - ``{"date": ..., "name": ...}`` 201 on success.
+        - ``{"error": "..."}`` 400 / 409 / 500 on failure.
+    """
+    data = request.json
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+    try:
+        day = date.fromisoformat(str(data.get("date", ""))).isoformat()
+    except ValueError:
+        return jsonify({"error": "Valid 'date' (YYYY-MM-DD) is required"}), 400
+    name = data.get("name")
+
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.execute("INSERT INTO holidays (date, name) VALUES (?, ?)", (day, name))
+        _user_cache.invalidate()
+        return jsonify({"date": day, "name": name}), 201
+    except sqlite3.IntegrityError:
+        return jsonify({"error": f"Holiday '{day}' already exists"}), 409
+    except sqlite3.Error as exc:
+        _logger.error("Database error in create_holiday: %s", exc)
+        return jsonify({"error": "A database error occurred"}), 500
+
+
+@app.route("/holidays/<day>", methods=["DELETE"])
+def delete_holiday(day: str):
+    """
+    Remove a holiday.
+
+    Returns:
+        - ``{"deleted": true}`` 200 if the holiday was removed.
+        - ``{"error": "Holiday not found"}`` 404 if there is no such holiday.
     """
     conn = get_db_connection()
     try:
-        cursor = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        conn.commit()
+        with conn:
+            cursor = conn.execute("DELETE FROM holidays WHERE date = ?", (day,))
         if cursor.rowcount == 0:
-            return jsonify({"error": "User not found"}), 404
+            return jsonify({"error": "Holiday not found"}), 404
+        _user_cache.invalidate()
         return jsonify({"deleted": True})
     except sqlite3.Error as exc:
-        _logger.error("Database error in delete_user: %s", exc)
+        _logger.error("Database error in delete_holiday: %s", exc)
         return jsonify({"error": "A database error occurred"}), 500
-    finally:
-        conn.close()
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """
+    Report the in-memory caches of this worker process.
+
+    Returns:
+        ``{"users": {...}}`` with the user cache's ``size``, ``credentials``,
+        ``scheduled``, ``distinct_schedules``, ``holidays``, ``version``,
+        ``hits``, ``misses``, ``hit_rate``, ``checks``, ``reloads`` and
+        ``errors``.
+    """
+    return jsonify({"users": _user_cache.stats()})
 
 
 @app.route("/health", methods=["GET"])
@@ -346,6 +1104,11 @@ def health_check():
 # Application entry point
 # ---------------------------------------------------------------------------
 
+# Development server only; see backend/wsgi.py for production serving.
 if __name__ == "__main__":
     init_db()
-    app.run(debug=True)
+    try:
+        load_recognition_gallery()
+    except FileNotFoundError as exc:
+        _logger.warning("POST /recognize disabled until a gallery exists: %s", exc)
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1")
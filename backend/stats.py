@@ -0,0 +1,144 @@
+"""
+Access statistics from the pre-aggregated rollup tables.
+
+Triggers on ``access_log`` (see ``_SCHEMA`` in ``backend/server.py`` and
+``backend/database.sql``) keep two rollups up to date as rows are written:
+
+* ``access_stats_total`` – one row per user with all-time totals, so the
+  unbounded ``/stats`` reads O(users) rows.
+* ``access_stats_hourly`` – one row per user and UTC hour, for time windows.
+
+A window ``[since, until)`` is answered from the hourly rollup for the whole
+hours it covers plus the raw ``access_log`` rows in the partial hours at
+either end, found through the ``timestamp`` index.  The result is exact
+and never scans more than two hours of raw log.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+# Fills empty rollups from an existing log.  Run in the same transaction that
+# creates the triggers so that no row is counted twice or missed.
+BACKFILL_SQL = """
+INSERT INTO access_stats_hourly (user, hour, total, granted)
+SELECT user,
+       strftime('%Y-%m-%d %H:00:00', timestamp),
+       COUNT(*),
+       SUM(CASE WHEN access_granted THEN 1 ELSE 0 END)
+FROM access_log
+WHERE user IS NOT NULL AND timestamp IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM access_stats_hourly)
+GROUP BY 1, 2;
+
+INSERT INTO access_stats_total (user, total, granted)
+SELECT user, SUM(total), SUM(granted)
+FROM access_stats_hourly
+WHERE NOT EXISTS (SELECT 1 FROM access_stats_total)
+GROUP BY user;
+"""
+
+_TOTALS_SQL = """
+SELECT user, total, granted
+FROM access_stats_total
+WHERE total > 0
+ORDER BY total DESC, user
+"""
+
+_WINDOW_SQL = """
+SELECT user, SUM(total) AS total, SUM(granted) AS granted
+FROM (
+    SELECT user, total, granted
+    FROM access_stats_hourly
+    WHERE hour >= :hours_from AND hour < :hours_to
+    UNION ALL
+    SELECT user, 1, CASE WHEN access_granted THEN 1 ELSE 0 END
+    FROM access_log
+    WHERE user IS NOT NULL
+      AND ((timestamp >= :since AND timestamp < :hours_from)
+           OR (timestamp >= :hours_to AND timestamp < :until))
+)
+GROUP BY user
+HAVING SUM(total) > 0
+ORDER BY total DESC, user
+"""
+
+# Open window ends; formatted like CURRENT_TIMESTAMP so strings compare in
+# time order.
+_MIN_TIME = datetime(1, 1, 1)
+_MAX_TIME = datetime(9999, 12, 31, 23)
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse an ISO 8601 date or date-time into a naive UTC ``datetime``.
+
+    ``2024-05-01``, ``2024-05-01 08:30``, ``2024-05-01T08:30:00Z`` and
+    ``2024-05-01T10:30:00+02:00`` are accepted; times without an offset are
+    taken as UTC, like the stored timestamps.
+
+    Raises:
+        ValueError: If *value* is not a valid date or date-time.
+    """
+    text = value.strip()
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.replace(microsecond=0)
+
+
+def format_datetime(moment: datetime) -> str:
+    """Format like the stored ``timestamp`` column: ``YYYY-MM-DD HH:MM:SS``."""
+    # isoformat() zero-pads years before 1000, unlike strftime("%Y").
+    return moment.isoformat(sep=" ")
+
+
+def _floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0)
+
+
+def _ceil_hour(moment: datetime) -> datetime:
+    floor = _floor_hour(moment)
+    return floor if floor == moment else floor + timedelta(hours=1)
+
+
+def query_stats(
+    conn: sqlite3.Connection,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Tuple[str, int, int]]:
+    """
+    Per-user ``(user, total, granted)`` access counts, most active first.
+
+    Args:
+        conn: Connection to the backend database.
+        since: Only count accesses at or after this UTC time.
+        until: Only count accesses before this UTC time.
+
+    Raises:
+        ValueError: If *since* is not before *until*.
+    """
+    if since is None and until is None:
+        rows = conn.execute(_TOTALS_SQL).fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    since = since or _MIN_TIME
+    until = until or _MAX_TIME
+    if since >= until:
+        raise ValueError("since must be before until")
+    hours_from, hours_to = _ceil_hour(since), _floor_hour(until)
+    if hours_from > hours_to:
+        # Window inside a single hour: raw rows only.
+        hours_from = hours_to = until
+    rows = conn.execute(
+        _WINDOW_SQL,
+        {
+            "since": format_datetime(since),
+            "until": format_datetime(until),
+            "hours_from": format_datetime(hours_from),
+            "hours_to": format_datetime(hours_to),
+        },
+    ).fetchall()
+    return [(row[0], row[1], row[2]) for row in rows]
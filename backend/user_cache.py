@@ -0,0 +1,239 @@
+"""
+In-process cache of the ``users`` table for the access decision path.
+
+The table changes a few times a day, but ``/access`` reads it on every
+request.  :class:`UserCache` keeps an immutable snapshot of all user records
+in a dict, with a second dict from RFID / NFC code to user for badge
+readers and with their schedules and the holidays compiled into
+:class:`~backend.schedule.AccessSchedules`, and answers lookups and access
+decisions from memory.
+
+Invalidation works across worker processes through a version counter in
+the database: triggers on ``users``, ``user_schedules`` and ``holidays``
+bump ``cache_version`` on every insert, update and delete (whoever makes
+the change), and each cache compares the
+counter with the version of its snapshot at most once per
+``check_interval_ms``.  A worker that changes users itself calls
+:meth:`UserCache.invalidate` so that its own next lookup sees the change.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from backend.schedule import AccessSchedules, Interval, parse_time_of_day
+from src.config import USER_CACHE_CHECK_INTERVAL_MS
+
+_logger = logging.getLogger(__name__)
+
+_VERSION_SQL = "SELECT version FROM cache_version WHERE name = 'users'"
+_USERS_SQL = "SELECT id, name, access_start, access_end, rfid_code, nfc_tag FROM users"
+_SCHEDULES_SQL = (
+    "SELECT u.name, s.weekday, s.start_time, s.end_time "
+    "FROM user_schedules s JOIN users u ON u.id = s.user_id"
+)
+_HOLIDAYS_SQL = "SELECT date FROM holidays"
+
+# credential method -> UserRecord field holding the code
+CREDENTIAL_FIELDS = {"rfid": "rfid_code", "nfc": "nfc_tag"}
+
+
+class UserRecord(NamedTuple):
+    id: int
+    name: str
+    access_start: Optional[str]
+    access_end: Optional[str]
+    rfid_code: Optional[str]
+    nfc_tag: Optional[str]
+
+
+class UserCache:
+    """
+    Snapshot of the ``users`` table, refreshed when its version changes.
+
+    Example:
+        >>> cache = UserCache(pool.connection)
+        >>> cache.get("alice")
+        UserRecord(id=1, name='alice', access_start=None, ...)
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        check_interval_ms: float = USER_CACHE_CHECK_INTERVAL_MS,
+    ):
+        """
+        Args:
+            connect: Returns a connection for the calling thread
+                (e.g. ``ConnectionPool.connection``).
+            check_interval_ms: How often the database version is compared
+                with the snapshot; changes made by other processes show up
+                within this interval.
+        """
+        self.connect = connect
+        self.check_interval = check_interval_ms / 1000.0
+        self._lock = threading.Lock()
+        self._users: Dict[str, UserRecord] = {}
+        self._credentials: Dict[Tuple[str, str], UserRecord] = {}
+        self._schedules = AccessSchedules({}, frozenset())
+        self._version: Optional[int] = None  # None: reload on next check
+        self._loaded = False
+        self._next_check = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._checks = 0
+        self._reloads = 0
+        self._errors = 0
+
+    def get(self, name: str) -> Optional[UserRecord]:
+        """
+        Return the record for *name*, or ``None`` if there is no such user.
+
+        Raises:
+            sqlite3.Error: If nothing has been loaded yet and the database
+                cannot be read.  Once a snapshot exists, failed refreshes
+                are logged and the previous snapshot keeps being served.
+        """
+        with self._lock:
+            self._check()
+            return self._users.get(name)
+
+    def find_credential(self, method: str, code: str) -> Optional[UserRecord]:
+        """
+        Return the user holding RFID or NFC *code*, or ``None``.
+
+        Args:
+            method: A key of :data:`CREDENTIAL_FIELDS` (``"rfid"``, ``"nfc"``).
+            code: The code read from the badge.
+
+        Raises:
+            sqlite3.Error: As for :meth:`get`.
+        """
+        with self._lock:
+            self._check()
+            return self._credentials.get((method, code))
+
+    def is_allowed(self, name: str, when: Optional[datetime] = None) -> bool:
+        """
+        Whether *name* is a registered user whose schedule allows access at
+        local time *when* (default: now).
+
+        Raises:
+            sqlite3.Error: As for :meth:`get`.
+        """
+        with self._lock:
+            self._check()
+            users, schedules = self._users, self._schedules
+        return name in users and schedules.allows(name, when)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def invalidate(self) -> None:
+        """Reload the snapshot on the next lookup (call after changing users)."""
+        with self._lock:
+            self._version = None
+            self._next_check = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Counters: ``size``, ``credentials`` (RFID and NFC codes),
+        ``scheduled`` (users with a schedule), ``distinct_schedules``,
+        ``holidays``, ``version``, ``hits``, ``misses`` (lookups that reloaded
+        the snapshot first), ``hit_rate``, ``checks``, ``reloads`` and
+        ``errors``."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._users),
+                "credentials": len(self._credentials),
+                "scheduled": len(self._schedules),
+                "distinct_schedules": self._schedules.distinct_schedules,
+                "holidays": len(self._schedules.holidays),
+                "version": self._version,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "checks": self._checks,
+                "reloads": self._reloads,
+                "errors": self._errors,
+            }
+
+    def _check(self) -> None:
+        """Refresh if the check interval has passed.  Lock held."""
+        if time.monotonic() >= self._next_check and self._refresh():
+            self._misses += 1
+        else:
+            self._hits += 1
+
+    def _refresh(self) -> bool:
+        """Reload if the database version changed; return whether it did.
+        Lock held."""
+        self._next_check = time.monotonic() + self.check_interval
+        self._checks += 1
+        try:
+            conn = self.connect()
+            row = conn.execute(_VERSION_SQL).fetchone()
+            version = row[0] if row else 0
+            if version == self._version:
+                return False
+            # Version first: a change that lands while the tables are read
+            # bumps it again and is picked up by the next check.
+            users = {row[1]: UserRecord(*row) for row in conn.execute(_USERS_SQL)}
+            weekly = _load_weekly(conn)
+            holidays = _load_holidays(conn)
+        except sqlite3.Error as exc:
+            self._errors += 1
+            if not self._loaded:
+                self._next_check = 0.0  # never answer from an empty cache
+                raise
+            _logger.warning("User cache refresh failed, serving old data: %s", exc)
+            return False
+        daily = {
+            user.name: (user.access_start or "00:00", user.access_end or "24:00")
+            for user in users.values()
+            if user.access_start or user.access_end
+        }
+        self._users = users
+        self._credentials = {
+            (method, getattr(user, field)): user
+            for method, field in CREDENTIAL_FIELDS.items()
+            for user in users.values()
+            if getattr(user, field)
+        }
+        self._schedules = AccessSchedules.build(weekly, daily, holidays)
+        self._version = version
+        self._loaded = True
+        self._reloads += 1
+        return True
+
+
+def _load_weekly(conn: sqlite3.Connection) -> Dict[str, List[Interval]]:
+    """Weekly intervals per user name.  A row that cannot be parsed is
+    dropped (logged), which can only narrow the user's schedule."""
+    weekly: Dict[str, List[Interval]] = {}
+    for name, weekday, start, end in conn.execute(_SCHEDULES_SQL):
+        intervals = weekly.setdefault(name, [])
+        try:
+            interval: Tuple[int, int, int] = (
+                int(weekday),
+                parse_time_of_day(start),
+                parse_time_of_day(end, allow_end_of_day=True),
+            )
+        except ValueError as exc:
+            _logger.warning("Invalid schedule row for %r: %s", name, exc)
+            continue
+        intervals.append(interval)
+    return weekly
+
+
+def _load_holidays(conn: sqlite3.Connection) -> List[date]:
+    holidays = []
+    for (value,) in conn.execute(_HOLIDAYS_SQL):
+        try:
+            holidays.append(date.fromisoformat(value))
+        except (TypeError, ValueError):
+            _logger.warning("Ignoring invalid holiday date %r", value)
+    return holidays
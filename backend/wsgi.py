@@ -0,0 +1,86 @@
+"""
+Production entry point for the Face-Recon backend.
+
+``python backend/server.py`` and ``flask run`` start the single-process
+development server.  In production, serve the app factory with a
+multi-process WSGI server instead::
+
+    gunicorn -c backend/gunicorn.conf.py "backend.wsgi:create_app()"
+
+``backend/gunicorn.conf.py`` calls :func:`init_worker` in every worker
+after it has been forked and :func:`shutdown_worker` before it exits.  With
+another WSGI server, call them from its equivalent hooks.
+
+Process model: the database is initialised once by :func:`create_app` (in
+the gunicorn master with ``preload_app``), and each worker then opens its
+own SQLite connections, starts its own access log writer thread and maps
+the gallery itself, since neither connections nor threads survive ``fork``.
+"""
+
+import logging
+import sqlite3
+from typing import Optional
+
+from flask import Flask
+
+from backend import server
+
+_logger = logging.getLogger(__name__)
+
+
+def create_app(init_database: bool = True) -> Flask:
+    """
+    Return the WSGI application.
+
+    Args:
+        init_database: Create or upgrade the database schema first (see
+            :func:`backend.server.init_db`).
+    """
+    if init_database:
+        server.init_db()
+    return server.app
+
+
+def init_worker(load_gallery: bool = True) -> None:
+    """
+    Prepare a freshly forked worker process to serve requests.
+
+    Starts the access log writer thread, loads the recognition gallery and
+    fills the user cache, so that the first requests do not pay for it.  A
+    missing gallery only disables ``POST /recognize``.
+
+    Args:
+        load_gallery: Load the gallery (not needed by ``backend/asgi.py``,
+            which does not serve ``/recognize``).
+    """
+    server._get_log_writer()
+    if load_gallery:
+        try:
+            server.load_recognition_gallery()
+        except FileNotFoundError as exc:
+            _logger.warning("POST /recognize disabled until a gallery exists: %s", exc)
+    try:
+        server._user_cache.get("")
+    except sqlite3.Error as exc:
+        _logger.warning("User cache not loaded at startup: %s", exc)
+
+
+def shutdown_worker(timeout: Optional[float] = 10.0) -> bool:
+    """
+    Drain background work before a worker exits.
+
+    Call once the server has stopped accepting requests and the in-flight
+    ones have finished: every queued access log entry is written, then the
+    worker's database connections are closed.
+
+    Args:
+        timeout: Longest time to wait for the access log writer, in seconds.
+
+    Returns:
+        ``True`` if the access log queue was fully written.
+    """
+    drained = server._log_writer.stop(timeout)
+    if not drained:
+        _logger.error("Access log writer stopped with events still queued")
+    server._pool.close_all()
+    return drained
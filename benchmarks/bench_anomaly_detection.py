@@ -0,0 +1,138 @@
+"""
+Anomaly scoring throughput: row by row vs. batch vs. streaming from SQLite.
+
+Builds a temporary database with ``--rows`` synthetic ``access_log`` rows,
+fits an :class:`utils.anomaly_detection.AnomalyDetector` on their
+``ACCESS_FEATURES`` and reports rows per second for:
+
+* ``per-row``   – one ``model.predict`` call per row, as ``detect`` does
+  (only the first ``--per-row`` rows; it is slow);
+* ``batch``     – ``detect_batch`` over the whole feature matrix;
+* ``streaming`` – ``score_access_log`` reading, featurizing and scoring the
+  log in chunks of ``--chunk-rows``, with its peak Python memory next to
+  that of loading every row first.
+
+Usage:
+    python benchmarks/bench_anomaly_detection.py
+    python benchmarks/bench_anomaly_detection.py --rows 1000000 --chunk-rows 20000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import ANOMALY_CHUNK_ROWS  # noqa: E402
+from utils.anomaly_detection import (  # noqa: E402
+    AccessFeatures,
+    AnomalyDetector,
+    iter_access_features,
+)
+
+
+def build_log(path, rows, users=200):
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+        conn.executescript(f.read())
+    at = datetime(2024, 1, 1)
+    methods = ("face",) * 8 + ("rfid", "nfc")
+    batch = []
+    for _ in range(rows):
+        at += timedelta(seconds=rng.expovariate(1 / 30))
+        batch.append(
+            (
+                f"user{rng.randrange(users)}",
+                at.strftime("%Y-%m-%d %H:%M:%S"),
+                int(rng.random() > 0.05),
+                rng.choice(methods),
+            )
+        )
+        if len(batch) == 10000:
+            insert(conn, batch)
+    insert(conn, batch)
+    return conn
+
+
+def insert(conn, batch):
+    with conn:
+        conn.executemany(
+            "INSERT INTO access_log (user, timestamp, access_granted, method) "
+            "VALUES (?, ?, ?, ?)",
+            batch,
+        )
+    batch.clear()
+
+
+def timed(label, rows, run):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<10} {rows:9d} rows  {elapsed:7.2f} s  {rows / elapsed:11,.0f} rows/s"
+    )
+
+
+def peak_memory(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--per-row", type=int, default=500)
+    parser.add_argument("--chunk-rows", type=int, default=ANOMALY_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_log(os.path.join(tmp, "access.db"), args.rows)
+        matrix = np.vstack([m for _, m in iter_access_features(conn)])
+        detector = AnomalyDetector(contamination=0.01)
+        detector.fit(matrix)
+        print(f"{args.rows} access_log rows, chunks of {args.chunk_rows}")
+
+        per_row = matrix[: args.per_row]
+        timed(
+            "per-row",
+            len(per_row),
+            lambda: [detector.detect_batch(row[None]) for row in per_row],
+        )
+        timed("batch", len(matrix), lambda: detector.detect_batch(matrix))
+
+        def stream():
+            for _ in detector.score_access_log(conn, args.chunk_rows):
+                pass
+
+        def load_all():
+            rows = conn.execute(
+                "SELECT id, user, timestamp, access_granted, method "
+                "FROM access_log ORDER BY id"
+            ).fetchall()
+            detector.score_batch(AccessFeatures().transform(rows))
+
+        timed("streaming", len(matrix), stream)
+        streamed, loaded = peak_memory(stream), peak_memory(load_all)
+        print(
+            f"peak Python memory: streaming {streamed / 2**20:.1f} MiB, "
+            f"all rows at once {loaded / 2**20:.1f} MiB"
+        )
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
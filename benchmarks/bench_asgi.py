@@ -0,0 +1,256 @@
+"""
+Many long-lived connections: Flask under gunicorn vs. the asyncio app.
+
+Models door controllers: ``--connections`` clients each keep one HTTP/1.1
+connection open and, ``--rounds`` times, send a burst of ``--burst``
+``POST /access`` requests and then go quiet for up to ``--pause`` seconds.
+The load generator is a single asyncio process.  Each server gets its own
+temporary database seeded with ``--users`` users and is measured for
+requests/s, latency percentiles, failed requests, and the peak resident
+memory and thread count of all its processes (Linux only):
+
+* ``flask``   – ``backend.wsgi:create_app()`` under gunicorn (gthread),
+  ``--workers`` x ``--threads``;
+* ``asgi``    – ``backend.asgi:create_app`` under uvicorn, ``--workers``.
+
+Usage:
+    python benchmarks/bench_asgi.py
+    python benchmarks/bench_asgi.py --connections 2000 --workers 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.utils.metrics import summarize  # noqa: E402
+
+
+def seed(db_path, users):
+    conn = sqlite3.connect(db_path)
+    with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+        conn.executescript(f.read())
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (name) VALUES (?)",
+            [(f"user_{i}",) for i in range(users)],
+        )
+    conn.close()
+
+
+def server_command(kind, args, port):
+    if kind == "flask":
+        return [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "backend/gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            str(args.workers),
+            "--threads",
+            str(args.threads),
+            # gthread closes idle keep-alive connections after this long
+            "--keep-alive",
+            str(int(args.pause) + 5),
+            "--worker-connections",
+            str(args.connections + 100),
+            "backend.wsgi:create_app()",
+        ]
+    return [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "--factory",
+        "backend.asgi:create_app",
+        "--port",
+        str(port),
+        "--workers",
+        str(args.workers),
+        "--log-level",
+        "warning",
+        "--timeout-keep-alive",
+        str(int(args.pause) + 5),
+        "--backlog",
+        str(args.connections + 100),
+    ]
+
+
+def process_tree(pid):
+    """*pid* and its descendants (Linux)."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:
+                continue
+    tree, frontier = [pid], [pid]
+    while frontier:
+        frontier = [p for p, parent in parents.items() if parent in frontier]
+        tree += frontier
+    return tree
+
+
+def memory_and_threads(pid):
+    """Total resident MiB and threads of the process tree at *pid*."""
+    rss_kb = threads = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+                    elif line.startswith("Threads:"):
+                        threads += int(line.split()[1])
+        except OSError:
+            continue
+    return rss_kb / 1024, threads
+
+
+async def request(reader, writer, body):
+    writer.write(
+        b"POST /access HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+        b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(slot, port, args, latencies, failures, ready):
+    rng = random.Random(slot)
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError:
+        failures.append("connect")
+        ready.release()
+        return
+    ready.release()
+    try:
+        await asyncio.sleep(rng.uniform(0, args.pause))
+        for _ in range(args.rounds):
+            for _ in range(args.burst):
+                body = json.dumps({"user": f"user_{rng.randrange(args.users)}"})
+                start = time.perf_counter()
+                status = await request(reader, writer, body.encode())
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    failures.append(status)
+            await asyncio.sleep(rng.uniform(0, args.pause))
+    except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+        failures.append(type(exc).__name__)
+    finally:
+        writer.close()
+
+
+async def load(port, args, pid):
+    latencies, failures = [], []
+    ready = asyncio.Semaphore(200)  # pace new connections
+    peak = [0.0, 0]
+
+    async def sample():
+        while True:
+            rss, threads = memory_and_threads(pid)
+            peak[0], peak[1] = max(peak[0], rss), max(peak[1], threads)
+            await asyncio.sleep(0.2)
+
+    sampler = asyncio.ensure_future(sample())
+    tasks = []
+    start = time.perf_counter()
+    for slot in range(args.connections):
+        await ready.acquire()
+        tasks.append(
+            asyncio.ensure_future(client(slot, port, args, latencies, failures, ready))
+        )
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    return latencies, failures, elapsed, peak
+
+
+def wait_ready(port, proc, timeout=30.0):
+    import urllib.request
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not become ready")
+
+
+def run(kind, args, port):
+    db_path = os.path.join(tempfile.mkdtemp(prefix=f"bench_asgi_{kind}_"), "a.db")
+    seed(db_path, args.users)
+    proc = subprocess.Popen(
+        server_command(kind, args, port),
+        cwd=ROOT,
+        env=dict(os.environ, FACE_RECON_DB=db_path),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port, proc)
+        idle_rss, idle_threads = memory_and_threads(proc.pid)
+        latencies, failures, elapsed, peak = asyncio.run(load(port, args, proc.pid))
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+    s = summarize(latencies) if latencies else None
+    print(
+        f"{kind:<6} {len(latencies) / elapsed:>7,.0f} req/s  "
+        + (f"p50 {s['p50_ms']:7.2f} ms  p99 {s['p99_ms']:8.2f} ms  " if s else "")
+        + f"failed {len(failures)}  "
+        f"RSS {idle_rss:.0f} -> {peak[0]:.0f} MiB  threads {idle_threads} -> {peak[1]}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--pause", type=float, default=1.0, help="seconds")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn gthread")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--port", type=int, default=5096)
+    parser.add_argument("--only", choices=("flask", "asgi"))
+    args = parser.parse_args()
+
+    total = args.connections * args.rounds * args.burst
+    print(
+        f"{args.connections} connections x {args.rounds} bursts of {args.burst} "
+        f"= {total} requests, {args.workers} worker(s)"
+    )
+    for kind in ("flask", "asgi"):
+        if args.only in (None, kind):
+            run(kind, args, args.port)
+
+
+if __name__ == "__main__":
+    main()
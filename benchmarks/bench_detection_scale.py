@@ -0,0 +1,115 @@
+"""
+Accuracy vs. speed of downscaled face detection over a recorded clip.
+
+For every frame, detections at full resolution are the reference.  Each
+candidate scale is timed end to end (resize + detect + full-resolution
+encoding) and scored by detection recall/precision (IoU >= 0.5 against the
+reference boxes).  With ``--gallery`` the recognized identities are also
+compared with the full-resolution result.
+
+Requires ``face_recognition`` (dlib) and OpenCV.
+
+Usage:
+    python benchmarks/bench_detection_scale.py --video door_cam.mp4
+    python benchmarks/bench_detection_scale.py --video door_cam.mp4 \\
+        --scales 1.0 0.75 0.5 0.33 0.25 --every 5 --gallery
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2  # noqa: E402
+import face_recognition  # noqa: E402
+
+from src.config import DETECTION_MODEL  # noqa: E402
+from src.utils.encodings_store import load_gallery  # noqa: E402
+from src.utils.face_utils import detect_faces  # noqa: E402
+from src.utils.geometry import match_boxes  # noqa: E402
+
+
+def read_frames(path, every, limit):
+    """Return every *every*-th RGB frame of the clip, up to *limit* frames."""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Cannot open video {path}")
+    frames = []
+    index = 0
+    while len(frames) < limit:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        if index % every == 0:
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        index += 1
+    capture.release()
+    return frames
+
+
+def run_scale(frames, scale, matcher):
+    """Detect + encode (+ match) every frame; return boxes, names, seconds."""
+    boxes, names = [], []
+    start = time.perf_counter()
+    for rgb in frames:
+        locations = detect_faces(rgb, scale, DETECTION_MODEL)
+        encodings = face_recognition.face_encodings(rgb, locations)
+        boxes.append(locations)
+        if matcher is not None and encodings:
+            names.append([m.name for m in matcher.match(encodings)])
+        else:
+            names.append([])
+    return boxes, names, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--video", required=True, help="recorded clip")
+    parser.add_argument(
+        "--scales", type=float, nargs="+", default=[1.0, 0.75, 0.5, 0.25]
+    )
+    parser.add_argument("--every", type=int, default=1, help="use every Nth frame")
+    parser.add_argument("--limit", type=int, default=300, help="max frames used")
+    parser.add_argument(
+        "--gallery", action="store_true", help="also compare recognized names"
+    )
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.every, args.limit)
+    if not frames:
+        raise SystemExit("No frames read from the clip")
+    height, width = frames[0].shape[:2]
+    matcher = load_gallery() if args.gallery else None
+    print(f"{len(frames)} frames at {width}x{height}, model={DETECTION_MODEL}")
+
+    ref_boxes, ref_names, ref_s = run_scale(frames, 1.0, matcher)
+    ref_total = sum(len(b) for b in ref_boxes)
+
+    header = f"{'scale':>6} {'ms/frame':>9} {'speedup':>8} {'recall':>7} {'prec':>6}"
+    print(header + (f" {'ids agree':>9}" if matcher else ""))
+    for scale in args.scales:
+        if scale == 1.0:
+            boxes, names, seconds = ref_boxes, ref_names, ref_s
+        else:
+            boxes, names, seconds = run_scale(frames, scale, matcher)
+        hits = agree = 0
+        for ref, found, ref_n, found_n in zip(ref_boxes, boxes, ref_names, names):
+            pairs = match_boxes(ref, found)
+            hits += len(pairs)
+            agree += sum(1 for i, j in pairs if matcher and ref_n[i] == found_n[j])
+        found_total = sum(len(b) for b in boxes)
+        recall = hits / ref_total if ref_total else 1.0
+        precision = hits / found_total if found_total else 1.0
+        line = (
+            f"{scale:>6.2f} {1000 * seconds / len(frames):>9.1f} "
+            f"{ref_s / seconds:>7.1f}x {recall:>7.3f} {precision:>6.3f}"
+        )
+        if matcher:
+            line += f" {agree / ref_total if ref_total else 1.0:>9.3f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
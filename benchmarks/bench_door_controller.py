@@ -0,0 +1,136 @@
+"""
+Timed door unlocks: a timer thread per grant vs. DoorController.
+
+Both modes receive ``--grants`` unlock grants spread over ``--doors``
+doors at ``--rate`` grants per second, each holding its door open for
+``--hold`` seconds, with simulated pins:
+
+* ``timer``      – what ``timed_unlock`` used to do: set the pin and start
+  a ``threading.Timer`` that clears it after the hold;
+* ``controller`` – one :class:`rpi_controller.DoorController`, which
+  extends an open door's window and relocks from one scheduler thread.
+
+Reported per mode: the time an unlock call takes, how late relocks are,
+the peak number of live threads and how many relocks were *early*, i.e.
+locked a door while a later grant for it was still running.
+
+Usage:
+    python benchmarks/bench_door_controller.py
+    python benchmarks/bench_door_controller.py --doors 4 --rate 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rpi_controller import DoorController  # noqa: E402
+from src.utils.metrics import summarize  # noqa: E402
+
+EARLY_TOLERANCE_S = 0.001
+
+
+def timer_per_grant(schedule, args):
+    lock = threading.Lock()
+    latest = {}  # door -> deadline of its latest grant
+    lateness, early = [], [0]
+
+    def close(door, deadline):
+        now = time.monotonic()
+        with lock:
+            lateness.append(max(now - deadline, 0.0))
+            if latest[door] > now + EARLY_TOLERANCE_S:
+                early[0] += 1
+
+    def unlock(door):
+        deadline = time.monotonic() + args.hold
+        with lock:
+            latest[door] = deadline
+        timer = threading.Timer(args.hold, close, (door, deadline))
+        timer.daemon = True
+        timer.start()
+
+    calls, peak = drive(schedule, unlock)
+    while threading.active_count() > 1:
+        time.sleep(0.01)
+    return calls, lateness, peak, early[0]
+
+
+def controller(schedule, args):
+    pins = {f"door{i}": i for i in range(args.doors)}
+    lock = threading.Lock()
+    latest = {}  # pin -> deadline of its door's latest grant
+    lateness, early = [], [0]
+
+    def set_pin(pin, high):
+        if not high:
+            now = time.monotonic()
+            with lock:
+                lateness.append(max(now - latest[pin], 0.0))
+                if latest[pin] > now + EARLY_TOLERANCE_S:
+                    early[0] += 1
+
+    doors = DoorController(pins, hold=args.hold, set_pin=set_pin, setup_pin=None)
+    doors.start()
+
+    def unlock(door):
+        deadline = doors.unlock(door)
+        with lock:
+            latest[pins[door]] = deadline
+
+    calls, peak = drive(schedule, unlock)
+    while doors.stats()["open"]:
+        time.sleep(0.01)
+    doors.stop()
+    return calls, lateness, peak, early[0]
+
+
+def drive(schedule, unlock):
+    """Call *unlock* on the *schedule* (seconds from start, door)."""
+    calls, peak = [], threading.active_count()
+    start = time.perf_counter()
+    for offset, door in schedule:
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        t0 = time.perf_counter()
+        unlock(door)
+        calls.append(time.perf_counter() - t0)
+        peak = max(peak, threading.active_count())
+    return calls, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--grants", type=int, default=2000)
+    parser.add_argument("--doors", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=1000.0, help="grants/s")
+    parser.add_argument("--hold", type=float, default=0.2, help="seconds")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    schedule = [
+        (i / args.rate, f"door{rng.randrange(args.doors)}") for i in range(args.grants)
+    ]
+    print(
+        f"{args.grants} grants over {args.doors} doors at {args.rate:g}/s, "
+        f"hold {args.hold:g} s"
+    )
+    for name, run in (("timer", timer_per_grant), ("controller", controller)):
+        calls, lateness, peak, early = run(schedule, args)
+        c, late = summarize(calls), summarize(lateness)
+        print(
+            f"{name:<10} unlock p99 {c['p99_ms']:6.3f} ms  "
+            f"relocks {late['count']:5d}  late p50 {late['p50_ms']:6.2f} ms  "
+            f"p99 {late['p99_ms']:6.2f} ms  peak threads {peak:5d}  "
+            f"early relocks {early}"
+        )
+
+
+if __name__ == "__main__":
+    main()
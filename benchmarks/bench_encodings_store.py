@@ -0,0 +1,60 @@
+"""
+Gallery load time: legacy pickle vs. memory-mapped encodings store.
+
+Measures the time until a ready-to-query FaceMatcher exists, which is what
+each recognition worker pays at startup.
+
+Usage:
+    python benchmarks/bench_encodings_store.py
+    python benchmarks/bench_encodings_store.py --sizes 10000 100000 500000
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.encodings_store import (  # noqa: E402
+    load_gallery,
+    open_encodings,
+    save_encodings,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'gallery':>10} {'pickle ms':>12} {'open ms':>10} {'matcher ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            encodings = list(rng.normal(0.0, 0.1, size=(size, 128)))
+            names = [f"person_{i}" for i in range(size)]
+            pickle_path = os.path.join(tmp, f"{size}.pickle")
+            store_path = os.path.join(tmp, f"{size}.frenc")
+            with open(pickle_path, "wb") as f:
+                pickle.dump({"encodings": encodings, "names": names}, f)
+            save_encodings(store_path, encodings, names)
+
+            start = time.perf_counter()
+            load_gallery(os.path.join(tmp, "missing"), pickle_path)
+            pickle_ms = (time.perf_counter() - start) * 1000.0
+
+            start = time.perf_counter()
+            store = open_encodings(store_path)
+            open_ms = (time.perf_counter() - start) * 1000.0
+            store.to_matcher()
+            matcher_ms = (time.perf_counter() - start) * 1000.0
+            print(f"{size:>10} {pickle_ms:>12.2f} {open_ms:>10.3f} {matcher_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
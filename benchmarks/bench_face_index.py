@@ -0,0 +1,78 @@
+"""
+Recall@1 and latency of the IVF-PQ index against the brute-force baseline.
+
+The synthetic gallery mimics dlib face encodings: identities sit roughly
+0.9 apart and queries are enrolled encodings perturbed by ~0.25, so the
+brute-force answer is the ground truth for recall@1.
+
+Usage:
+    python benchmarks/bench_face_index.py
+    python benchmarks/bench_face_index.py --size 500000 --nprobe 4 8 16 32 64
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.face_index import BruteForceIndex, IVFPQIndex  # noqa: E402
+
+
+def synthetic_gallery(size, queries, seed=0):
+    """Return ``(gallery, probes)`` float32 arrays of 128-d encodings."""
+    rng = np.random.default_rng(seed)
+    gallery = rng.normal(0.0, 0.056, size=(size, 128)).astype(np.float32)
+    picks = rng.integers(0, size, queries)
+    probes = gallery[picks] + rng.normal(0.0, 0.022, size=(queries, 128))
+    return gallery, probes.astype(np.float32)
+
+
+def timed_search(index, probes, batch):
+    """Search *probes* in frame-sized batches; return (ids, ms per query)."""
+    ids = []
+    start = time.perf_counter()
+    for i in range(0, len(probes), batch):
+        ids.append(index.search(probes[i : i + batch], k=1)[1][:, 0])
+    elapsed = time.perf_counter() - start
+    return np.concatenate(ids), elapsed * 1000.0 / len(probes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=4, help="faces per frame")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--rerank", type=int, nargs="+", default=[0, 64])
+    args = parser.parse_args()
+
+    gallery, probes = synthetic_gallery(args.size, args.queries)
+
+    brute = BruteForceIndex()
+    brute.add(gallery)
+    truth, brute_ms = timed_search(brute, probes, args.batch)
+    print(f"gallery={args.size} queries={args.queries} batch={args.batch}")
+    print(f"brute force: recall@1=1.000  {brute_ms:.3f} ms/query")
+
+    for rerank in args.rerank:
+        start = time.perf_counter()
+        index = IVFPQIndex(nlist=args.nlist, rerank=rerank)
+        index.train(gallery)
+        index.add(gallery)
+        build_s = time.perf_counter() - start
+        print(f"\nivfpq nlist={index.nlist} rerank={rerank} (built in {build_s:.1f}s)")
+        print(f"{'nprobe':>8} {'recall@1':>10} {'ms/query':>10} {'speedup':>9}")
+        for nprobe in args.nprobe:
+            index.nprobe = nprobe
+            found, ms = timed_search(index, probes, args.batch)
+            recall = float(np.mean(found == truth))
+            print(f"{nprobe:>8} {recall:>10.3f} {ms:>10.3f} {brute_ms / ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
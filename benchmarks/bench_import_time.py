@@ -0,0 +1,56 @@
+"""
+Startup time: how long importing each entry module takes.
+
+Every module in ``IMPORT_TIME_BUDGETS_MS`` is imported ``--repeats`` times
+in a fresh ``python -X importtime`` interpreter; the fastest run is
+reported next to its budget, together with the heavy packages
+(``IMPORT_DEFERRED_MODULES``) the import pulled in and whether it printed
+anything.  Exits non-zero when a module is over budget.
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --module backend.server --repeats 10
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import IMPORT_TIME_BUDGETS_MS  # noqa: E402
+from src.utils.import_time import eager_imports, profile_import  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--module",
+        action="append",
+        dest="modules",
+        help="module to import (default: every module with a budget)",
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    over = 0
+    print(f"{'module':32} {'ms':>8} {'budget':>8}  heavy imports / output")
+    for module in args.modules or IMPORT_TIME_BUDGETS_MS:
+        profile = profile_import(module, args.repeats)
+        budget = IMPORT_TIME_BUDGETS_MS.get(module)
+        ms = 1000.0 * profile.seconds
+        notes = eager_imports(profile)
+        if profile.stdout:
+            notes.append("prints")
+        flag = "" if budget is None or ms <= budget else "  OVER"
+        over += bool(flag)
+        print(
+            f"{module:32} {ms:8.1f} {budget or '-':>8}  "
+            f"{', '.join(notes) or '-'}{flag}"
+        )
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Throughput and memory of ``GET /logs/export`` on a large access log.
+
+Fills a temporary database, then downloads the whole log through the Flask
+test client as NDJSON and CSV, plain and gzipped, consuming the response as
+a stream.  Peak Python heap (``tracemalloc``, measured in a second pass) is
+compared with building the full list and ``jsonify``-ing it, which is what
+``/logs`` would need to return every row at once.
+
+Usage:
+    python benchmarks/bench_log_export.py
+    python benchmarks/bench_log_export.py --rows 5000000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.config as cfg  # noqa: E402
+
+
+def consume(client, url):
+    """Stream *url* and return the number of bytes received."""
+    res = client.get(url, buffered=False)
+    assert res.status_code == 200, res.status
+    size = 0
+    for chunk in res.response:
+        size += len(chunk)
+    res.close()
+    return size
+
+
+def peak_mib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument(
+        "--full-list-rows",
+        type=int,
+        default=200_000,
+        help="rows for the build-a-list baseline",
+    )
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_export_")
+    cfg.DATABASE_PATH = os.path.join(tmp, "export.db")
+    from backend import server
+
+    server.init_db()
+    conn = sqlite3.connect(cfg.DATABASE_PATH)
+    with conn:
+        conn.executemany(
+            "INSERT INTO access_log (user, access_granted, method) VALUES (?, ?, ?)",
+            ((f"user_{i % args.users}", i % 5 != 0, "face") for i in range(args.rows)),
+        )
+    conn.close()
+    client = server.app.test_client()
+    print(f"{args.rows} rows, chunks of {cfg.EXPORT_CHUNK_ROWS}")
+    print(f"{'export':<14} {'rows/s':>10} {'MB':>8} {'peak heap MiB':>14}")
+
+    for fmt in ("ndjson", "csv"):
+        for compress in (False, True):
+            url = f"/logs/export?format={fmt}&gzip={str(compress).lower()}"
+            start = time.perf_counter()
+            size = consume(client, url)
+            seconds = time.perf_counter() - start
+            peak = peak_mib(lambda: consume(client, url))
+            label = fmt + (" + gzip" if compress else "")
+            print(
+                f"{label:<14} {args.rows / seconds:>10.0f} {size / 1e6:>8.1f} "
+                f"{peak:>14.1f}"
+            )
+
+    rows = min(args.full_list_rows, args.rows)
+
+    def full_list():
+        with server.app.app_context():
+            cursor = server.get_db_connection().execute(
+                "SELECT id, user, timestamp, access_granted, method FROM access_log "
+                "ORDER BY id DESC LIMIT ?",
+                (rows,),
+            )
+            server.jsonify([server.row_to_dict(row) for row in cursor])
+
+    start = time.perf_counter()
+    full_list()
+    seconds = time.perf_counter() - start
+    print(
+        f"{'list+jsonify':<14} {rows / seconds:>10.0f} {'':>8} "
+        f"{peak_mib(full_list):>14.1f}  ({rows} rows)"
+    )
+
+
+if __name__ == "__main__":
+    main()
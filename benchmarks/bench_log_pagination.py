@@ -0,0 +1,103 @@
+"""
+Page latency by depth for ``/logs``: ``LIMIT/OFFSET`` vs. keyset cursors.
+
+Fills a temporary database with a synthetic ``access_log`` and times one
+page at increasing depths.  OFFSET paging has to step over every earlier
+row, so walking the whole log costs O(n^2); a keyset cursor seeks straight
+to the page.  Both plain and filtered (user, time window) pages are shown.
+
+Usage:
+    python benchmarks/bench_log_pagination.py
+    python benchmarks/bench_log_pagination.py --rows 5000000 --page 500
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.log_query import Cursor, LogFilter, fetch_page  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START = datetime(2024, 1, 1)
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return 1000 * best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_logs_"), "logs.db")
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+        conn.executescript(f.read())
+    rng = random.Random(0)
+    with conn:
+        conn.executemany(
+            "INSERT INTO access_log (user, access_granted, method, timestamp) "
+            "VALUES (?, ?, 'face', ?)",
+            (
+                (
+                    f"user_{rng.randrange(args.users)}",
+                    rng.random() < 0.8,
+                    str(START + timedelta(seconds=i * 3)),
+                )
+                for i in range(args.rows)
+            ),
+        )
+    print(f"{args.rows} rows, page size {args.page}")
+    print(f"{'depth':>10} {'OFFSET ms':>10} {'keyset ms':>10} {'window ms':>10}")
+
+    top = args.rows
+    window = LogFilter(since=START, until=START + timedelta(seconds=3 * args.rows))
+    for fraction in (0, 0.01, 0.1, 0.5, 0.99):
+        depth = int(fraction * args.rows)
+        offset_ms = best_of(
+            lambda: conn.execute(
+                "SELECT id, user, timestamp, access_granted, method FROM access_log "
+                "ORDER BY id DESC LIMIT ? OFFSET ?",
+                (args.page, depth),
+            ).fetchall()
+        )
+        # The cursor a client would hold after *depth* rows.
+        cursor = Cursor(
+            top - depth + 1, str(START + timedelta(seconds=3 * (top - depth)))
+        )
+        keyset_ms = best_of(lambda: fetch_page(conn, LogFilter(), cursor, args.page))
+        window_ms = best_of(lambda: fetch_page(conn, window, cursor, args.page))
+        print(f"{depth:>10} {offset_ms:>10.2f} {keyset_ms:>10.2f} {window_ms:>10.2f}")
+
+    start = time.perf_counter()
+    rows, cursor, pages = 0, None, 0
+    while True:
+        page, cursor = fetch_page(conn, LogFilter(user="user_7"), cursor, args.page)
+        rows += len(page)
+        pages += 1
+        if cursor is None:
+            break
+    print(
+        f"walked user_7: {rows} rows in {pages} pages, "
+        f"{1000 * (time.perf_counter() - start):.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Access log insert throughput: one commit per event vs. write-behind batches.
+
+"per-event" is the previous ``_log_access``: one INSERT and one commit on
+the calling thread for every access event.  "write-behind" submits the same
+events to :class:`backend.log_writer.AccessLogWriter` from the same number
+of producer threads and stops it, so the time includes writing every event.
+Both use pooled WAL connections on a temporary database.  Submit latency is
+what a request handler waits for before it can answer the door.
+
+Usage:
+    python benchmarks/bench_log_writer.py
+    python benchmarks/bench_log_writer.py --events 50000 --threads 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import ConnectionPool  # noqa: E402
+from backend.log_writer import AccessLogWriter  # noqa: E402
+from src.utils.metrics import summarize  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE access_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    access_granted BOOLEAN,
+    method TEXT DEFAULT 'face'
+);
+"""
+
+
+def new_pool(directory, name):
+    pool = ConnectionPool(os.path.join(directory, name))
+    pool.connection().executescript(SCHEMA)
+    return pool
+
+
+def run(log_event, threads, events):
+    """Call ``log_event(user)`` *events* times spread over *threads* threads."""
+    per_thread = events // threads
+    latencies = [[] for _ in range(threads)]
+
+    def worker(slot):
+        for i in range(per_thread):
+            start = time.perf_counter()
+            log_event(f"user_{i % 100}")
+            latencies[slot].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(s,)) for s in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return summarize([x for per in latencies for x in per])
+
+
+def count(pool):
+    return pool.connection().execute("SELECT COUNT(*) FROM access_log").fetchone()[0]
+
+
+def report(label, rows, seconds, summary):
+    print(
+        f"{label:<13} {rows / seconds:>10.0f} rows/s  submit p50 "
+        f"{summary['p50_ms']:6.3f} ms  p99 {summary['p99_ms']:6.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-interval-ms", type=float, default=50)
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp(prefix="bench_log_writer_")
+    print(f"{args.events} events from {args.threads} threads")
+
+    pool = new_pool(tmp, "per_event.db")
+
+    def insert_now(user):
+        conn = pool.connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO access_log (user, access_granted, method) "
+                "VALUES (?, ?, ?)",
+                (user, True, "face"),
+            )
+
+    start = time.perf_counter()
+    summary = run(insert_now, args.threads, args.events)
+    report("per-event", count(pool), time.perf_counter() - start, summary)
+    pool.close_all()
+
+    pool = new_pool(tmp, "write_behind.db")
+    writer = AccessLogWriter(
+        pool.connection,
+        max_queue=args.events,
+        batch_size=args.batch_size,
+        flush_interval_ms=args.flush_interval_ms,
+    ).start()
+    start = time.perf_counter()
+    summary = run(lambda user: writer.submit(user, True), args.threads, args.events)
+    writer.stop()
+    report("write-behind", count(pool), time.perf_counter() - start, summary)
+    print(f"  {writer.stats()['batches']} transactions")
+    pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark gallery matching: legacy per-face scan vs. batched FaceMatcher.
+
+The legacy path mirrors ``recognize_faces_in_frame`` before vectorization:
+one ``face_recognition.compare_faces`` call per detected face, each of which
+converts the Python list of known encodings to an array and takes the first
+match.  ``face_recognition`` itself is not required; its distance formula is
+reproduced with NumPy.
+
+Usage:
+    python benchmarks/bench_matcher.py
+    python benchmarks/bench_matcher.py --sizes 100 1000 10000 100000 --faces 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import FACE_TOLERANCE  # noqa: E402
+from src.utils.matcher import FaceMatcher  # noqa: E402
+
+
+def legacy_match(known_encodings, known_names, face_encodings):
+    """Per-face linear scan returning the first match, as compare_faces does."""
+    names = []
+    for encoding in face_encodings:
+        distances = np.linalg.norm(np.array(known_encodings) - encoding, axis=1)
+        matches = list(distances <= FACE_TOLERANCE)
+        name = "Unknown"
+        if True in matches:
+            name = known_names[matches.index(True)]
+        names.append(name)
+    return names
+
+
+def time_call(func, repeat):
+    """Return the best wall-clock time of *repeat* calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--faces", type=int, default=4, help="faces per frame")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'gallery':>10} {'legacy ms':>12} {'matcher ms':>12} {'speedup':>9}")
+    for size in args.sizes:
+        gallery = rng.normal(0.0, 0.1, size=(size, 128))
+        known_encodings = list(gallery)
+        known_names = [f"person_{i}" for i in range(size)]
+        probes = gallery[rng.integers(0, size, args.faces)] + rng.normal(
+            0.0, 0.01, size=(args.faces, 128)
+        )
+        matcher = FaceMatcher(gallery, known_names)
+
+        legacy_ms = time_call(
+            lambda: legacy_match(known_encodings, known_names, probes), args.repeat
+        )
+        matcher_ms = time_call(lambda: matcher.match(probes), args.repeat)
+        print(
+            f"{size:>10} {legacy_ms:>12.3f} {matcher_ms:>12.3f} "
+            f"{legacy_ms / matcher_ms:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Door command latency: a new MQTT connection per command vs. MqttPublisher.
+
+Both modes send ``--commands`` commands, ``--interval`` seconds apart, to
+the in-process broker in ``src/utils/mqtt_loopback.py`` and time each one
+from the call until it is published (written for QoS 0, acknowledged by
+the broker for QoS 1/2):
+
+* ``per-command`` – what ``publish_access_command`` used to do: create a
+  client, connect, publish, wait, disconnect;
+* ``persistent``  – one started :class:`mqtt_client.MqttPublisher`.
+
+``--latency-ms`` delays every packet from the broker to model a broker
+across a network.  Loopback does not model TCP or TLS handshake round
+trips, which a new connection per command pays on top of these numbers.
+
+Usage:
+    python benchmarks/bench_mqtt_publisher.py
+    python benchmarks/bench_mqtt_publisher.py --qos 1 --latency-ms 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mqtt_client import MqttPublisher, _new_client  # noqa: E402
+from src.utils.metrics import summarize  # noqa: E402
+from src.utils.mqtt_loopback import LoopbackBroker  # noqa: E402
+
+
+def per_command(broker, args):
+    latencies = []
+    for i in range(args.commands):
+        start = time.perf_counter()
+        client = _new_client()
+        client.connect("127.0.0.1", broker.port, 60)
+        client.loop_start()
+        info = client.publish(f"access_control/door{i % 4}", "OpenDoor", args.qos)
+        info.wait_for_publish(5)
+        latencies.append(time.perf_counter() - start)
+        client.disconnect()
+        client.loop_stop()
+        time.sleep(args.interval)
+    return latencies
+
+
+def persistent(broker, args):
+    publisher = MqttPublisher("127.0.0.1", broker.port, qos=args.qos).start()
+    while not publisher.connected:
+        time.sleep(0.01)
+    for i in range(args.commands):
+        publisher.publish_command("OpenDoor", door=f"door{i % 4}")
+        publisher.flush()
+        time.sleep(args.interval)
+    samples = publisher.latency.summary()
+    publisher.stop()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds")
+    parser.add_argument("--qos", type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.commands} commands, QoS {args.qos}, "
+        f"broker latency {args.latency_ms:g} ms"
+    )
+    for name in ("per-command", "persistent"):
+        broker = LoopbackBroker(latency=args.latency_ms / 1000.0).start()
+        try:
+            start = time.perf_counter()
+            if name == "per-command":
+                s = summarize(per_command(broker, args))
+            else:
+                s = persistent(broker, args)
+            elapsed = time.perf_counter() - start
+            broker.wait_for(args.commands)
+        finally:
+            broker.stop()
+        print(
+            f"{name:<12} p50 {s['p50_ms']:7.2f} ms  p99 {s['p99_ms']:7.2f} ms  "
+            f"max {s['max_ms']:7.2f} ms  {elapsed:6.2f} s  "
+            f"broker connections {broker.connects}"
+        )
+
+
+if __name__ == "__main__":
+    main()
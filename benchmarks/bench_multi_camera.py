@@ -0,0 +1,119 @@
+"""
+Per-camera fairness and latency of the shared multi-camera service.
+
+``--cameras`` paced fake cameras feed a simulated recognizer that spends
+``--work-ms`` per frame on a host with ``--cores`` cores (a semaphore models
+CPU contention; the work sleeps, like native code that releases the GIL).
+The shared service runs them all on one pool of ``--workers`` threads with
+one gallery; the baseline runs one independent pipeline per camera, as one
+``main_realtime_recognition`` process per camera did, each with its own
+worker and its own copy of the gallery.
+
+Usage:
+    python benchmarks/bench_multi_camera.py
+    python benchmarks/bench_multi_camera.py --cameras 12 --cores 4 --max-fps 5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.multi_camera import (  # noqa: E402
+    CameraSpec,
+    MultiCameraService,
+    format_camera_stats,
+)
+from src.utils.pipeline import FakeVideoSource, RecognitionPipeline  # noqa: E402
+
+GALLERY_BYTES = 100_000 * 128 * 4  # 100k float32 encodings
+
+
+def summarize(label, fps_per_camera, p95_ms, gallery_copies, threads):
+    print(
+        f"{label:<22} total {sum(fps_per_camera):6.1f} fps  "
+        f"per camera min/max {min(fps_per_camera):5.1f}/{max(fps_per_camera):5.1f}  "
+        f"worst p95 {max(p95_ms):7.1f} ms  "
+        f"gallery {gallery_copies * GALLERY_BYTES / 2**20:6.0f} MiB  "
+        f"recognizer threads {threads}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cameras", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cores", type=int, default=4)
+    parser.add_argument("--camera-fps", type=float, default=15.0)
+    parser.add_argument("--max-fps", type=float, default=0.0)
+    parser.add_argument("--work-ms", type=float, default=60.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    frames = int(args.camera_fps * args.seconds)
+
+    cpu = threading.Semaphore(args.cores)
+
+    def recognize(frame):
+        with cpu:
+            time.sleep(args.work_ms / 1000.0)
+        return []
+
+    def source():
+        return FakeVideoSource(count=frames, shape=(48, 64, 3), fps=args.camera_fps)
+
+    print(
+        f"{args.cameras} cameras at {args.camera_fps:g} FPS, "
+        f"{args.work_ms:g} ms/frame, {args.seconds:g} s"
+    )
+
+    pipelines = [
+        RecognitionPipeline(source(), recognize, 1) for _ in range(args.cameras)
+    ]
+    threads = [
+        threading.Thread(target=lambda p=p: [None for _ in p.results()])
+        for p in pipelines
+    ]
+    for pipeline, thread in zip(pipelines, threads):
+        pipeline.start()
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = [p.stats() for p in pipelines]
+    for pipeline in pipelines:
+        pipeline.stop()
+    summarize(
+        "one pipeline/camera",
+        [s["fps"] for s in stats],
+        [s["latency"]["end_to_end"]["p95_ms"] for s in stats],
+        args.cameras,
+        args.cameras,
+    )
+
+    specs = [
+        CameraSpec(f"cam{i}", source(), args.max_fps or None)
+        for i in range(args.cameras)
+    ]
+    service = MultiCameraService(
+        specs, lambda spec: recognize, workers=args.workers, max_fps=args.max_fps
+    )
+    with service:
+        for _ in service.results():
+            pass
+        stats = service.stats()
+    cameras = stats["cameras"].values()
+    summarize(
+        f"shared pool ({args.workers} workers)",
+        [c["fps"] for c in cameras],
+        [c["latency"]["end_to_end"]["p95_ms"] for c in cameras],
+        1,
+        args.workers,
+    )
+    print(format_camera_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Throughput of the threaded recognition pipeline vs. the old serial loop.
+
+A paced fake camera produces frames at ``--camera-fps`` while a simulated
+recognizer spends ``--work-ms`` per frame (sleeping, like native code that
+releases the GIL).  The serial loop reads and processes on one thread, as
+``main_realtime_recognition`` did before the pipeline.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --work-ms 120 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.pipeline import (  # noqa: E402
+    FakeVideoSource,
+    RecognitionPipeline,
+    format_stats,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--camera-fps", type=float, default=30.0)
+    parser.add_argument("--work-ms", type=float, default=80.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    def recognize(frame):
+        time.sleep(args.work_ms / 1000.0)
+        return []
+
+    def source():
+        return FakeVideoSource(
+            count=args.frames, shape=(720, 1280, 3), fps=args.camera_fps
+        )
+
+    capture = source()
+    start = time.perf_counter()
+    processed = 0
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        recognize(frame)
+        processed += 1
+    serial_s = time.perf_counter() - start
+    print(f"serial loop: {processed / serial_s:.1f} FPS ({serial_s:.1f}s)")
+
+    for workers in args.workers:
+        pipeline = RecognitionPipeline(source(), recognize, workers=workers)
+        with pipeline:
+            for _ in pipeline.results():
+                pass
+        print(f"\npipeline, {workers} worker(s):")
+        print(format_stats(pipeline.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Throughput of ``POST /recognize`` batches vs. one request per face.
+
+Runs the Flask app in-process with its test client against a temporary
+database and a synthetic gallery, so HTTP/network overhead is excluded and
+the numbers show the server-side cost only.  The per-request baseline sends
+one face per ``/recognize`` call (one matcher call, one lookup and one log
+transaction per face); ``/access`` with a precomputed username is shown for
+reference.
+
+Usage:
+    python benchmarks/bench_recognize_endpoint.py
+    python benchmarks/bench_recognize_endpoint.py --faces 4096 --batch 1 16 64
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.config as cfg  # noqa: E402
+from src.utils.encodings_store import save_encodings  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--faces", type=int, default=2048)
+    parser.add_argument("--gallery", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8, 32, 64])
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_recognize_")
+    cfg.DATABASE_PATH = os.path.join(tmp, "bench.db")
+    from backend import server
+
+    server.init_db()
+    rng = np.random.default_rng(0)
+    gallery = rng.normal(0, 0.1, (args.gallery, 128)).astype(np.float32)
+    names = [f"person_{i}" for i in range(args.gallery)]
+    store = os.path.join(tmp, "encodings.frenc")
+    save_encodings(store, gallery, names)
+    server.load_recognition_gallery(store)
+
+    conn = server.get_db_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (name) VALUES (?)", [(n,) for n in names[: args.users]]
+        )
+
+    picks = rng.integers(0, args.gallery, args.faces)
+    probes = gallery[picks] + rng.normal(0, 0.01, (args.faces, 128)).astype(np.float32)
+    probes = probes.tolist()
+    client = server.app.test_client()
+    print(f"{args.faces} faces, gallery {args.gallery}, {args.users} registered users")
+    print(f"{'path':>22} {'faces/s':>10} {'ms/request':>11}")
+
+    start = time.perf_counter()
+    for i in picks:
+        client.post("/access", json={"user": names[i]})
+    seconds = time.perf_counter() - start
+    print(
+        f"{'/access (reference)':>22} {args.faces / seconds:>10.0f} "
+        f"{1000 * seconds / args.faces:>11.2f}"
+    )
+
+    for batch in args.batch:
+        requests = 0
+        start = time.perf_counter()
+        for offset in range(0, args.faces, batch):
+            res = client.post(
+                "/recognize", json={"encodings": probes[offset : offset + batch]}
+            )
+            assert res.status_code == 200, res.get_json()
+            requests += 1
+        seconds = time.perf_counter() - start
+        label = "/recognize per face" if batch == 1 else f"/recognize batch {batch}"
+        print(
+            f"{label:>22} {args.faces / seconds:>10.0f} "
+            f"{1000 * seconds / requests:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
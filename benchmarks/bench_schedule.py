@@ -0,0 +1,148 @@
+"""
+Schedule-aware access decisions: SQL and time arithmetic vs. compiled masks.
+
+Fills a temporary database with ``--users`` users, a third with a daily
+``access_start`` / ``access_end`` window, a third with one of a handful of
+weekly schedules (several intervals each, some overnight) and the rest
+unrestricted, plus a few holidays.  Random (user, time) pairs across a week
+are then decided either by reading the user's rows per request and checking
+each interval, or with :meth:`backend.user_cache.UserCache.is_allowed`.
+Both must agree on every decision.
+
+Usage:
+    python benchmarks/bench_schedule.py
+    python benchmarks/bench_schedule.py --users 50000 --decisions 500000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import ConnectionPool  # noqa: E402
+from backend.schedule import MINUTES_PER_DAY, parse_time_of_day  # noqa: E402
+from backend.user_cache import UserCache  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEMPLATES = [
+    [(day, "08:00", "18:00") for day in range(5)],
+    [(day, "06:00", "14:00") for day in range(6)]
+    + [(day, "22:00", "06:00") for day in (4, 5)],
+    [(day, "09:00", "12:00") for day in range(5)]
+    + [(day, "13:00", "17:00") for day in range(5)],
+    [(5, "10:00", "16:00"), (6, "23:00", "02:00")],
+]
+HOLIDAYS = [date(2024, 1, 1), date(2024, 1, 3)]  # Monday, Wednesday
+
+_USER_SQL = "SELECT id, access_start, access_end FROM users WHERE name = ?"
+_SCHEDULE_SQL = (
+    "SELECT weekday, start_time, end_time FROM user_schedules WHERE user_id = ?"
+)
+_HOLIDAY_SQL = "SELECT 1 FROM holidays WHERE date = ?"
+
+
+def in_interval(weekday, minute, day, start, end):
+    """Whether *minute* of *weekday* falls in one (possibly overnight) interval."""
+    if start < end:
+        return weekday == day and start <= minute < end
+    if weekday == day:
+        return minute >= start
+    return weekday == (day + 1) % 7 and minute < end
+
+
+def decide_sql(conn, name, when):
+    """The per-request way: fetch the user's rows and evaluate them."""
+    user = conn.execute(_USER_SQL, (name,)).fetchone()
+    if user is None:
+        return False
+    rows = conn.execute(_SCHEDULE_SQL, (user[0],)).fetchall()
+    if not rows and (user[1] or user[2]):
+        start = parse_time_of_day(user[1] or "00:00")
+        end = parse_time_of_day(user[2] or "24:00", allow_end_of_day=True)
+        rows = [(day, start, end) for day in range(7)]
+    else:
+        rows = [
+            (day, parse_time_of_day(s), parse_time_of_day(e, allow_end_of_day=True))
+            for day, s, e in rows
+        ]
+    if not rows:
+        return True
+    if conn.execute(_HOLIDAY_SQL, (when.date().isoformat(),)).fetchone():
+        return False
+    minute = when.hour * 60 + when.minute
+    return any(in_interval(when.weekday(), minute, *row) for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--decisions", type=int, default=200_000)
+    args = parser.parse_args()
+
+    pool = ConnectionPool(os.path.join(tempfile.mkdtemp(), "schedule.db"))
+    conn = pool.connection()
+    with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+        conn.executescript(f.read())
+    rng = random.Random(0)
+    with conn:
+        users = []
+        for i in range(args.users):
+            window = (None, None)
+            if i % 3 == 0:
+                window = (f"{rng.randrange(5, 10):02d}:00", "18:00")
+            users.append((f"user_{i}",) + window)
+        conn.executemany(
+            "INSERT INTO users (name, access_start, access_end) VALUES (?, ?, ?)",
+            users,
+        )
+        conn.executemany(
+            "INSERT INTO user_schedules VALUES (?, ?, ?, ?)",
+            [
+                (uid, day, start, end)
+                for uid in range(2, args.users + 1, 3)
+                for day, start, end in TEMPLATES[uid % len(TEMPLATES)]
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO holidays (date) VALUES (?)",
+            [(day.isoformat(),) for day in HOLIDAYS],
+        )
+
+    monday = datetime(2024, 1, 1)
+    requests = [
+        (
+            f"user_{rng.randrange(args.users + args.users // 10)}",
+            monday + timedelta(minutes=rng.randrange(7 * MINUTES_PER_DAY)),
+        )
+        for _ in range(args.decisions)
+    ]
+
+    start = time.perf_counter()
+    expected = [decide_sql(conn, name, when) for name, when in requests]
+    sql_rate = len(requests) / (time.perf_counter() - start)
+
+    cache = UserCache(pool.connection)
+    start = time.perf_counter()
+    cache.get("user_0")
+    compile_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    actual = [cache.is_allowed(name, when) for name, when in requests]
+    cache_rate = len(requests) / (time.perf_counter() - start)
+    assert actual == expected, "compiled schedules disagree with the SQL path"
+
+    granted = sum(actual) / len(actual)
+    print(f"{args.users} users, {args.decisions} decisions, {granted:.0%} granted")
+    print(f"{'SQL + arithmetic':<16} {sql_rate:>12,.0f} decisions/s")
+    print(f"{'compiled masks':<16} {cache_rate:>12,.0f} decisions/s")
+    print(f"snapshot load and compile: {compile_ms:.0f} ms; cache: {cache.stats()}")
+    pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
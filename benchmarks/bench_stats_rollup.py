@@ -0,0 +1,158 @@
+"""
+``/stats`` on a multi-million-row access log: GROUP BY vs. rollup tables.
+
+Builds a synthetic ``access_log`` with the original schema (no indexes),
+times the original ``GROUP BY user`` query, upgrades the database with
+``init_db`` (indexes, rollup tables, triggers and backfill) and then times
+the rollup-backed queries, all-time and for time windows.  The last block
+shows what the triggers and indexes cost on the write path, as rows/s for
+batched inserts.
+
+Usage:
+    python benchmarks/bench_stats_rollup.py
+    python benchmarks/bench_stats_rollup.py --rows 30000000 --users 5000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.config as cfg  # noqa: E402
+
+LEGACY_SCHEMA = """
+CREATE TABLE access_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    access_granted BOOLEAN,
+    method TEXT DEFAULT 'face'
+);
+"""
+
+LEGACY_STATS_SQL = """
+SELECT user,
+       COUNT(*) AS total,
+       SUM(CASE WHEN access_granted THEN 1 ELSE 0 END) AS granted
+FROM access_log
+GROUP BY user
+ORDER BY total DESC
+"""
+
+INSERT_SQL = (
+    "INSERT INTO access_log (user, access_granted, method, timestamp) "
+    "VALUES (?, ?, 'face', ?)"
+)
+
+START = datetime(2024, 1, 1)
+
+
+def synthetic_rows(count, users, days, seed=0):
+    """Access events spread uniformly over *days*, in time order."""
+    rng = random.Random(seed)
+    step = days * 86400 / count
+    for i in range(count):
+        yield (
+            f"user_{rng.randrange(users)}",
+            rng.random() < 0.8,
+            (START + timedelta(seconds=int(i * step))).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+
+def timed(fn, repeat=3):
+    """Best wall time of *repeat* calls, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def insert_rate(path, schema, rows, batch=500):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    start = time.perf_counter()
+    for offset in range(0, len(rows), batch):
+        with conn:
+            conn.executemany(INSERT_SQL, rows[offset : offset + batch])
+    seconds = time.perf_counter() - start
+    conn.close()
+    return len(rows) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--insert-rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_stats_")
+    cfg.DATABASE_PATH = os.path.join(tmp, "stats.db")
+    from backend import server
+    from backend.stats import query_stats
+
+    conn = sqlite3.connect(cfg.DATABASE_PATH)
+    conn.executescript(LEGACY_SCHEMA)
+    start = time.perf_counter()
+    with conn:
+        conn.executemany(INSERT_SQL, synthetic_rows(args.rows, args.users, args.days))
+    print(
+        f"{args.rows} rows, {args.users} users over {args.days} days "
+        f"(generated in {time.perf_counter() - start:.1f} s)"
+    )
+
+    seconds, legacy = timed(lambda: conn.execute(LEGACY_STATS_SQL).fetchall())
+    print(f"{'GROUP BY access_log':<34} {1000 * seconds:>10.1f} ms")
+    conn.close()
+
+    start = time.perf_counter()
+    server.init_db()
+    print(f"{'init_db upgrade + backfill':<34} {time.perf_counter() - start:>10.1f} s")
+
+    conn = server.get_db_connection()
+    seconds, totals = timed(lambda: query_stats(conn))
+    print(f"{'rollup, all time':<34} {1000 * seconds:>10.2f} ms")
+    assert {row[0]: (row[1], row[2]) for row in legacy} == {
+        row[0]: (row[1], row[2]) for row in totals
+    }, "rollup disagrees with the raw log"
+
+    end = START + timedelta(days=args.days)
+    windows = [
+        ("rollup, last 24 h", end - timedelta(days=1), None),
+        (
+            "rollup, 14 days (partial hours)",
+            end - timedelta(days=20, minutes=13),
+            end - timedelta(days=6, minutes=47),
+        ),
+    ]
+    for label, since, until in windows:
+        seconds, rows = timed(lambda: query_stats(conn, since, until))
+        print(f"{label:<34} {1000 * seconds:>10.2f} ms  ({len(rows)} users)")
+    seconds, _ = timed(
+        lambda: conn.execute(
+            "SELECT user, COUNT(*) FROM access_log WHERE timestamp >= ? "
+            "AND timestamp < ? GROUP BY user",
+            (str(windows[1][1]), str(windows[1][2])),
+        ).fetchall()
+    )
+    print(f"{'raw log, 14 days (timestamp index)':<34} {1000 * seconds:>10.2f} ms")
+
+    rows = list(synthetic_rows(args.insert_rows, args.users, 30, seed=1))
+    before = insert_rate(os.path.join(tmp, "plain.db"), LEGACY_SCHEMA, rows)
+    after = insert_rate(os.path.join(tmp, "rollup.db"), server._SCHEMA, rows)
+    print(f"inserts: {before:,.0f} rows/s plain, {after:,.0f} rows/s with rollups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+CPU cost per frame: per-frame recognition vs. tracking between detections.
+
+By default detection and encoding are simulated with busy loops of a fixed
+CPU cost (HOG detection of a 640x480 frame and one dlib encoding take
+roughly 60 ms and 15 ms on a Raspberry Pi 4-class core) on a scripted scene
+of people walking up to the door, so the benchmark runs without dlib.  With
+``--video`` the real detector and encoder from ``face_utils`` are used on a
+recorded clip.
+
+Usage:
+    python benchmarks/bench_tracking.py
+    python benchmarks/bench_tracking.py --detect-every 1 3 5 10 --frames 600
+    python benchmarks/bench_tracking.py --video door_cam.mp4 --gallery
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.matcher import FaceMatcher  # noqa: E402
+from src.utils.tracking import FaceTracker  # noqa: E402
+
+
+def burn(ms):
+    """Spin the CPU for *ms* milliseconds of process time."""
+    end = time.process_time() + ms / 1000.0
+    while time.process_time() < end:
+        pass
+
+
+class SimulatedScene:
+    """
+    People enter every *gap* frames, drift a few pixels per frame, stay for
+    *dwell* frames and leave.
+    """
+
+    def __init__(self, rng, gallery, detect_ms, encode_ms, dwell=300, gap=120):
+        self.rng = rng
+        self.gallery = gallery
+        self.detect_ms = detect_ms
+        self.encode_ms = encode_ms
+        self.dwell = dwell
+        self.gap = gap
+        self.frame = 0
+
+    def faces(self):
+        faces = []
+        for start in range(0, self.frame + 1, self.gap):
+            age = self.frame - start
+            if age < self.dwell:
+                person = start // self.gap % len(self.gallery)
+                x = 40 + (start // self.gap % 4) * 140 + age // 10
+                faces.append(((120, x + 100, 220, x), self.gallery[person]))
+        return faces
+
+    def detect(self, rgb_frame):
+        burn(self.detect_ms)
+        return [box for box, _ in self.faces()]
+
+    def encode(self, rgb_frame, boxes):
+        lookup = dict(self.faces())
+        burn(self.encode_ms * len(boxes))
+        return [lookup[box] + self.rng.normal(0, 0.01, 128) for box in boxes]
+
+
+def simulated(args):
+    rng = np.random.default_rng(0)
+    gallery = rng.normal(0, 0.1, (50, 128))
+    matcher = FaceMatcher(gallery, [f"person_{i}" for i in range(50)])
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    print(
+        f"Simulated scene: {args.frames} frames, detect {args.detect_ms} ms, "
+        f"encode {args.encode_ms} ms/face"
+    )
+
+    baseline = None
+    header = f"{'mode':>16} {'cpu ms/frame':>12} {'speedup':>8}"
+    print(f"{header} {'detects':>8} {'encodes':>8}")
+    for every in [0] + args.detect_every:
+        scene = SimulatedScene(rng, gallery, args.detect_ms, args.encode_ms)
+        tracker = FaceTracker(matcher, scene.detect, scene.encode, max(every, 1))
+        detects = encodes = 0
+        start = time.process_time()
+        for i in range(args.frames):
+            scene.frame = i
+            if every == 0:
+                # Per-frame recognition: detect, encode and match everything.
+                boxes = scene.detect(frame)
+                if boxes:
+                    matcher.match(scene.encode(frame, boxes))
+                detects += 1
+                encodes += len(boxes)
+            else:
+                tracker.update(frame)
+        cpu = (time.process_time() - start) / args.frames * 1000
+        if every:
+            detects, encodes = tracker.detections, tracker.encodings
+        baseline = baseline or cpu
+        label = "per-frame" if every == 0 else f"track every {every}"
+        print(
+            f"{label:>16} {cpu:>12.2f} {baseline / cpu:>7.1f}x "
+            f"{detects:>8} {encodes:>8}"
+        )
+
+
+def real(args):
+    import cv2
+
+    from src.utils.encodings_store import load_gallery
+    from src.utils.face_utils import detect_faces, encode_faces
+
+    capture = cv2.VideoCapture(args.video)
+    frames = []
+    while len(frames) < args.frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    capture.release()
+    if not frames:
+        raise SystemExit(f"No frames read from {args.video}")
+    matcher = load_gallery() if args.gallery else FaceMatcher([], [])
+
+    baseline = None
+    print(f"{len(frames)} frames from {args.video}")
+    print(f"{'mode':>16} {'cpu ms/frame':>12} {'speedup':>8}")
+    for every in [1] + args.detect_every:
+        tracker = FaceTracker(matcher, detect_faces, encode_faces, every)
+        start = time.process_time()
+        for rgb in frames:
+            tracker.update(rgb)
+        cpu = (time.process_time() - start) / len(frames) * 1000
+        baseline = baseline or cpu
+        print(f"{'every ' + str(every):>16} {cpu:>12.2f} {baseline / cpu:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--detect-every", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--detect-ms", type=float, default=60.0)
+    parser.add_argument("--encode-ms", type=float, default=15.0)
+    parser.add_argument("--video", help="recorded clip; uses real face_recognition")
+    parser.add_argument("--gallery", action="store_true", help="match against it")
+    args = parser.parse_args()
+    if args.video:
+        real(args)
+    else:
+        simulated(args)
+
+
+if __name__ == "__main__":
+    main()
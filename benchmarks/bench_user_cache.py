@@ -0,0 +1,81 @@
+"""
+User lookups for ``/access``: SQLite query per request vs. the user cache.
+
+Fills a temporary database with ``--users`` users and resolves random names
+(half of them unknown) from ``--threads`` threads, either with the indexed
+``SELECT`` on a pooled connection that ``/access`` used to run or with
+:class:`backend.user_cache.UserCache`.
+
+Usage:
+    python benchmarks/bench_user_cache.py
+    python benchmarks/bench_user_cache.py --users 50000 --threads 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import ConnectionPool  # noqa: E402
+from backend.user_cache import UserCache  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(lookup, names, threads):
+    per_thread = len(names) // threads
+
+    def worker(slot):
+        for name in names[slot * per_thread : (slot + 1) * per_thread]:
+            lookup(name)
+
+    workers = [threading.Thread(target=worker, args=(s,)) for s in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    pool = ConnectionPool(os.path.join(tempfile.mkdtemp(), "users.db"))
+    conn = pool.connection()
+    with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+        conn.executescript(f.read())
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (name) VALUES (?)",
+            [(f"user_{i}",) for i in range(args.users)],
+        )
+    rng = random.Random(0)
+    names = [f"user_{rng.randrange(2 * args.users)}" for _ in range(args.lookups)]
+
+    def query(name):
+        return (
+            pool.connection()
+            .execute("SELECT 1 FROM users WHERE name = ?", (name,))
+            .fetchone()
+        )
+
+    cache = UserCache(pool.connection)
+    print(f"{args.users} users, {args.lookups} lookups from {args.threads} threads")
+    print(f"{'SQLite query':<12} {run(query, names, args.threads):>12,.0f} lookups/s")
+    print(f"{'user cache':<12} {run(cache.get, names, args.threads):>12,.0f} lookups/s")
+    print(f"cache: {cache.stats()}")
+    pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
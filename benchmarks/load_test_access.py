@@ -0,0 +1,168 @@
+"""
+Load test for ``POST /access``: p50/p99 latency before and after pooling.
+
+"before" is the original request path, reproduced here: a fresh
+``sqlite3.connect`` for the user lookup, a second connection for the log
+insert, and the default rollback journal with a full fsync per commit.
+"after" is the current ``/access`` on pooled WAL connections.  Both run
+in-process through Flask test clients from ``--concurrency`` threads, each
+against its own temporary database.
+
+With ``--url`` the current endpoint of a running server is loaded over HTTP
+instead (e.g. gunicorn with several workers).
+
+Usage:
+    python benchmarks/load_test_access.py
+    python benchmarks/load_test_access.py --concurrency 16 --requests 500
+    python benchmarks/load_test_access.py --url http://127.0.0.1:5000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.config as cfg  # noqa: E402
+from src.utils.metrics import summarize  # noqa: E402
+
+
+def legacy_check_access(db_path, user, method="face"):
+    """The pre-pool ``check_access`` database work."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        granted = (
+            conn.execute("SELECT * FROM users WHERE name = ?", (user,)).fetchone()
+            is not None
+        )
+    finally:
+        conn.close()
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "INSERT INTO access_log (user, access_granted, method) VALUES (?, ?, ?)",
+            (user, granted, method),
+        )
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        return granted, True
+    return granted, False
+
+
+def run_load(send, concurrency, requests):
+    """Call ``send(i)`` *requests* times from each of *concurrency* threads."""
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(slot):
+        for i in range(requests):
+            start = time.perf_counter()
+            ok = send(slot * requests + i)
+            latencies[slot].append(time.perf_counter() - start)
+            errors[slot] += not ok
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    samples = [x for per_thread in latencies for x in per_thread]
+    return summarize(samples), len(samples) / elapsed, sum(errors)
+
+
+def report(label, summary, rate, errors):
+    print(
+        f"{label:<8} {rate:>8.0f} req/s  p50 {summary['p50_ms']:7.2f} ms  "
+        f"p99 {summary['p99_ms']:7.2f} ms  max {summary['max_ms']:7.2f} ms  "
+        f"errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=300, help="per thread")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--url", help="load a running server instead")
+    args = parser.parse_args()
+    total = args.concurrency * args.requests
+    print(f"{args.concurrency} threads x {args.requests} requests")
+
+    if args.url:
+
+        def send_http(i):
+            body = json.dumps({"user": f"user_{i % (2 * args.users)}"}).encode()
+            req = urllib.request.Request(
+                args.url.rstrip("/") + "/access",
+                data=body,
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                with urllib.request.urlopen(req, timeout=10) as res:
+                    return res.status == 200
+            except OSError:
+                return False
+
+        report("http", *run_load(send_http, args.concurrency, args.requests))
+        return
+
+    tmp = tempfile.mkdtemp(prefix="load_test_access_")
+    cfg.DATABASE_PATH = os.path.join(tmp, "after.db")
+    from backend import server
+
+    server.init_db()
+    legacy_db = os.path.join(tmp, "before.db")
+    conn = sqlite3.connect(legacy_db)
+    conn.executescript(server._SCHEMA)
+    conn.close()
+    users = [(f"user_{i}",) for i in range(args.users)]
+    for path in (legacy_db, cfg.DATABASE_PATH):
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.executemany("INSERT INTO users (name) VALUES (?)", users)
+        conn.close()
+
+    def legacy_view():
+        user = server.request.json["user"]
+        granted, failed = legacy_check_access(legacy_db, user)
+        return server.jsonify({"access": granted}), 500 if failed else 200
+
+    server.app.add_url_rule(
+        "/access_legacy", "access_legacy", legacy_view, methods=["POST"]
+    )
+
+    local = threading.local()
+
+    def sender(path):
+        def send(i):
+            if not hasattr(local, "client"):
+                local.client = server.app.test_client()
+            res = local.client.post(path, json={"user": f"user_{i % (2 * args.users)}"})
+            return res.status_code == 200
+
+        return send
+
+    report(
+        "before", *run_load(sender("/access_legacy"), args.concurrency, args.requests)
+    )
+    report("after", *run_load(sender("/access"), args.concurrency, args.requests))
+    server._log_writer.stop()  # write what is still queued before counting
+    for path in (legacy_db, cfg.DATABASE_PATH):
+        conn = sqlite3.connect(path)
+        logged = conn.execute("SELECT COUNT(*) FROM access_log").fetchone()[0]
+        conn.close()
+        print(f"{os.path.basename(path)}: {logged}/{total} access_log rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Load test for ``POST /access/credential``: badge tap decision latency.
+
+Registers ``--users`` users with an RFID code and an NFC tag, then measures:
+
+* the decision alone (code -> user -> schedule), p50/p99 per tap, as a
+  ``SELECT`` on the unindexed column (before the unique indexes), a
+  ``SELECT`` on the indexed column, and the user cache's credential map;
+* the full endpoint through Flask test clients from ``--concurrency``
+  threads, including JSON handling and queueing the access log entry.
+
+A tenth of the taps use unknown codes.  With ``--url`` the endpoint of a
+running server is loaded over HTTP instead; its users must already exist
+(``rfid_code`` ``RF000000``, ``RF000001``, ...).
+
+Usage:
+    python benchmarks/load_test_credential.py
+    python benchmarks/load_test_credential.py --users 50000 --concurrency 16
+    python benchmarks/load_test_credential.py --url http://127.0.0.1:5000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.config as cfg  # noqa: E402
+from src.utils.metrics import summarize  # noqa: E402
+
+_LOOKUP_SQL = "SELECT id, name FROM users WHERE rfid_code = ?"
+
+
+def tap(i, users):
+    """The (method, code) of tap *i*; one in ten codes is unknown."""
+    n = i * 7919 % (users + users // 9)
+    return ("rfid", f"RF{n:06d}") if i % 2 else ("nfc", f"NF{n:06d}")
+
+
+def time_calls(decide, codes):
+    """Per-call latency of ``decide(method, code)`` over *codes*."""
+    samples = []
+    for method, code in codes:
+        start = time.perf_counter()
+        decide(method, code)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def run_load(send, concurrency, requests):
+    """Call ``send(i)`` *requests* times from each of *concurrency* threads."""
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(slot):
+        for i in range(requests):
+            start = time.perf_counter()
+            ok = send(slot * requests + i)
+            latencies[slot].append(time.perf_counter() - start)
+            errors[slot] += not ok
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    samples = [x for per_thread in latencies for x in per_thread]
+    return summarize(samples), len(samples) / elapsed, sum(errors)
+
+
+def report(label, summary, rate=None, errors=None):
+    line = (
+        f"{label:<16} p50 {summary['p50_ms']:7.3f} ms  "
+        f"p99 {summary['p99_ms']:7.3f} ms  max {summary['max_ms']:7.3f} ms"
+    )
+    if rate is not None:
+        line += f"  {rate:>7.0f} taps/s  errors {errors}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--taps", type=int, default=5_000, help="decision samples")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=300, help="per thread")
+    parser.add_argument("--url", help="load a running server instead")
+    args = parser.parse_args()
+
+    if args.url:
+
+        def send_http(i):
+            method, code = tap(i, args.users)
+            req = urllib.request.Request(
+                args.url.rstrip("/") + "/access/credential",
+                data=json.dumps({"method": method, "code": code}).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                with urllib.request.urlopen(req, timeout=10) as res:
+                    return res.status == 200
+            except OSError:
+                return False
+
+        print(f"{args.concurrency} threads x {args.requests} requests")
+        report("http", *run_load(send_http, args.concurrency, args.requests))
+        return
+
+    tmp = tempfile.mkdtemp(prefix="load_test_credential_")
+    cfg.DATABASE_PATH = os.path.join(tmp, "after.db")
+    from backend import server
+
+    server.init_db()
+    rows = [(f"user_{i}", f"RF{i:06d}", f"NF{i:06d}") for i in range(args.users)]
+    insert = "INSERT INTO users (name, rfid_code, nfc_tag) VALUES (?, ?, ?)"
+    conn = server.get_db_connection()
+    with conn:
+        conn.executemany(insert, rows)
+    legacy = sqlite3.connect(os.path.join(tmp, "before.db"))
+    legacy.executescript(
+        server._SCHEMA + "DROP INDEX idx_users_rfid_code; DROP INDEX idx_users_nfc_tag;"
+    )
+    with legacy:
+        legacy.executemany(insert, rows)
+
+    rng = random.Random(0)
+    codes = [tap(rng.randrange(1 << 30), args.users) for _ in range(args.taps)]
+    rfid_codes = [("rfid", code[1].replace("NF", "RF")) for code in codes]
+    cache = server._user_cache
+
+    def cached(method, code):
+        user = cache.find_credential(method, code)
+        return user is not None and cache.is_allowed(user.name)
+
+    cache.get("")  # load the snapshot outside the measurement
+    print(f"{args.users} users, {args.taps} decisions")
+    report(
+        "unindexed SQL",
+        time_calls(
+            lambda m, c: legacy.execute(_LOOKUP_SQL, (c,)).fetchone(), rfid_codes
+        ),
+    )
+    report(
+        "indexed SQL",
+        time_calls(lambda m, c: conn.execute(_LOOKUP_SQL, (c,)).fetchone(), rfid_codes),
+    )
+    report("credential map", time_calls(cached, codes))
+
+    local = threading.local()
+
+    def send(i):
+        if not hasattr(local, "client"):
+            local.client = server.app.test_client()
+        method, code = tap(i, args.users)
+        res = local.client.post(
+            "/access/credential", json={"method": method, "code": code}
+        )
+        return res.status_code == 200
+
+    print(f"endpoint: {args.concurrency} threads x {args.requests} requests")
+    report("request", *run_load(send, args.concurrency, args.requests))
+    server._log_writer.stop()
+    logged = conn.execute(
+        "SELECT COUNT(*) FROM access_log WHERE method IN ('rfid', 'nfc')"
+    ).fetchone()[0]
+    print(f"access_log rows: {logged}/{args.concurrency * args.requests}")
+    legacy.close()
+
+
+if __name__ == "__main__":
+    main()
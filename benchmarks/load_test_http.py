@@ -0,0 +1,236 @@
+"""
+HTTP load test of the production server, with a graceful-shutdown check.
+
+Seeds a temporary database with ``--users`` users (with RFID codes), starts
+the backend as a subprocess, either under gunicorn with ``--workers`` x
+``--threads`` (``backend/gunicorn.conf.py``) or as the single-process Flask
+development server, and sends a mix of requests over keep-alive
+connections from ``--concurrency`` threads for ``--duration`` seconds:
+
+    70% POST /access, 20% POST /access/credential, 5% GET /logs, 5% GET /stats
+
+It reports requests/s and p50/p99 latency per endpoint, then sends
+``SIGTERM`` and checks that every access decision answered with 200 was
+written to ``access_log`` before the server exited.  The development server
+is only a baseline: it does not drain the access log queue on ``SIGTERM``
+and handles keep-alive connections poorly under load.
+
+With ``--url`` a server that is already running is loaded instead (no
+seeding and no shutdown check).
+
+Usage:
+    python benchmarks/load_test_http.py
+    python benchmarks/load_test_http.py --workers 4 --threads 8 --concurrency 32
+    python benchmarks/load_test_http.py --server flask
+    python benchmarks/load_test_http.py --url http://127.0.0.1:5000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.utils.metrics import summarize  # noqa: E402
+
+MIX = (
+    (70, "POST", "/access"),
+    (20, "POST", "/access/credential"),
+    (5, "GET", "/logs"),
+    (5, "GET", "/stats"),
+)
+LOGGED = ("/access", "/access/credential")
+
+
+def seed(db_path, users):
+    conn = sqlite3.connect(db_path)
+    with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+        conn.executescript(f.read())
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (name, rfid_code) VALUES (?, ?)",
+            [(f"user_{i}", f"RF{i:06d}") for i in range(users)],
+        )
+    conn.close()
+
+
+def start_server(args, db_path, port):
+    env = dict(os.environ, FACE_RECON_DB=db_path)
+    if args.server == "gunicorn":
+        cmd = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "backend/gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            str(args.workers),
+            "--threads",
+            str(args.threads),
+            "backend.wsgi:create_app()",
+        ]
+    else:
+        cmd = [
+            sys.executable,
+            "-m",
+            "flask",
+            "--app",
+            "backend.server",
+            "run",
+            "--port",
+            str(port),
+        ]
+    return subprocess.Popen(
+        cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+
+
+def wait_ready(host, port, proc, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(proc.stderr.read().decode(errors="replace"))
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not become ready")
+
+
+def request_body(path, rng, users):
+    n = rng.randrange(users + users // 9)  # one in ten unknown
+    if path == "/access":
+        return {"user": f"user_{n}"}
+    if path == "/access/credential":
+        return {"method": "rfid", "code": f"RF{n:06d}"}
+    return None
+
+
+def run_load(host, port, args):
+    paths = [(method, path) for weight, method, path in MIX for _ in range(weight)]
+    samples = defaultdict(list)
+    counts = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    stop_at = time.monotonic() + args.duration
+
+    def worker(slot):
+        rng = random.Random(slot)
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        local_samples = defaultdict(list)
+        local_counts = defaultdict(lambda: defaultdict(int))
+        while time.monotonic() < stop_at:
+            method, path = rng.choice(paths)
+            body = request_body(path, rng, args.users)
+            headers = {"Content-Type": "application/json"} if body else {}
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, json.dumps(body) if body else None, headers)
+                res = conn.getresponse()
+                res.read()
+                status = res.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                status = "error"
+            local_samples[path].append(time.perf_counter() - start)
+            local_counts[path][status] += 1
+        conn.close()
+        with lock:
+            for path, values in local_samples.items():
+                samples[path].extend(values)
+            for path, by_status in local_counts.items():
+                for status, count in by_status.items():
+                    counts[path][status] += count
+
+    threads = [
+        threading.Thread(target=worker, args=(s,)) for s in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, counts, time.perf_counter() - start
+
+
+def report(samples, counts, elapsed):
+    total = sum(len(v) for v in samples.values())
+    print(f"{total / elapsed:,.0f} req/s over {elapsed:.1f} s")
+    for _, _, path in MIX:
+        if not samples[path]:
+            continue
+        s = summarize(samples[path])
+        statuses = ", ".join(
+            f"{k}: {v}" for k, v in sorted(counts[path].items(), key=str)
+        )
+        print(
+            f"  {path:<20} {len(samples[path]) / elapsed:>8,.0f} req/s  "
+            f"p50 {s['p50_ms']:7.2f} ms  p99 {s['p99_ms']:7.2f} ms  ({statuses})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--server", choices=("gunicorn", "flask"), default="gunicorn")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--url", help="load a running server instead")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        wait_ready(url.hostname, url.port or 80, None)
+        report(*run_load(url.hostname, url.port or 80, args))
+        return
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="load_test_http_"), "load.db")
+    seed(db_path, args.users)
+    proc = start_server(args, db_path, args.port)
+    try:
+        wait_ready("127.0.0.1", args.port, proc)
+        label = args.server
+        if args.server == "gunicorn":
+            label += f" {args.workers} workers x {args.threads} threads"
+        print(f"{label}, {args.concurrency} clients, {args.users} users")
+        samples, counts, elapsed = run_load("127.0.0.1", args.port, args)
+        report(samples, counts, elapsed)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            raise
+
+    decided = sum(counts[path][200] for path in LOGGED)
+    conn = sqlite3.connect(db_path)
+    logged = conn.execute("SELECT COUNT(*) FROM access_log").fetchone()[0]
+    conn.close()
+    # Requests whose response was lost to a connection error may be logged too.
+    result = "ok" if logged >= decided else "MISSING ROWS"
+    print(f"after SIGTERM: {logged}/{decided} access decisions logged ({result})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Face capture demonstration script.
+
+Simple script to capture a face image from webcam.
+For production use, see src/main_build_database.py and
+src/main_realtime_recognition.py
+
+Usage:
+    python capture_face.py
+"""
+
+import cv2
+
+
+def capture_face(path: str = "face.jpg", camera: int = 0) -> bool:
+    """
+    Show the webcam and save a frame to *path* when 's' is pressed.
+
+    Returns:
+        True if an image was saved, False if cancelled or capture failed.
+    """
+    # Initialize video capture from default camera
+    video_capture = cv2.VideoCapture(camera)
+
+    print("Press 's' to save a face image, or 'q' to quit")
+
+    saved = False
+    while True:
+        ret, frame = video_capture.read()
+        if not ret:
+            print("Failed to capture frame")
+            break
+
+        cv2.imshow("Register Face - Press 's' to save", frame)
+
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord("s"):
+            cv2.imwrite(path, frame)
+            print(f"Face image saved as {path}")
+            saved = True
+            break
+        elif key == ord("q"):
+            print("Cancelled")
+            break
+
+    video_capture.release()
+    cv2.destroyAllWindows()
+    return saved
+
+
+if __name__ == "__main__":
+    capture_face()
@@ -1,15 +1,11 @@
 #!/usr/bin/env sh
-# docker-entrypoint.sh – initialise the database then start the Flask server
+# docker-entrypoint.sh – start the Face-Recon backend under gunicorn
+#
+# The app factory initialises the database once in the gunicorn master
+# before the workers are forked (see backend/wsgi.py).  Extra arguments are
+# passed to gunicorn, e.g. `docker run ... face-recon-backend --workers 8`;
+# WEB_CONCURRENCY also sets the worker count.
 set -e
 
-echo "Initialising database…"
-python - <<'EOF'
-import sys
-sys.path.insert(0, "")
-from backend.server import init_db
-init_db()
-print("Database ready.")
-EOF
-
 echo "Starting Face-Recon backend on 0.0.0.0:5000…"
-exec python -m flask --app backend.server run --host=0.0.0.0 --port=5000
+exec gunicorn -c backend/gunicorn.conf.py "$@" "backend.wsgi:create_app()"
@@ -2,29 +2,47 @@
 Quantum-safe encryption module using Kyber KEM.
 
 This module demonstrates post-quantum cryptography for securing
-sensitive data in the Face-Recon system.
+sensitive data in the Face-Recon system.  The key exchange runs when
+:func:`establish_shared_secret` is called (or the module is run as a
+script), not at import.
 
 Note: Requires pqcrypto package: pip install pqcrypto
 """
 
-try:
-    from pqcrypto.kem.kyber import decrypt, encrypt, generate_keypair
+from utils.encryption import decrypt_message, encrypt_message, generate_keys
 
+
+def establish_shared_secret() -> bytes:
+    """
+    Run a Kyber key exchange and check both sides agree.
+
+    Returns:
+        The shared secret.
+
+    Raises:
+        ImportError: If pqcrypto is not installed.
+    """
     # Generate quantum-safe key pair
-    public_key, private_key = generate_keypair()
+    public_key, private_key = generate_keys()
 
     # Encrypt: generates ciphertext and shared secret
-    ciphertext, shared_secret = encrypt(public_key)
+    ciphertext, shared_secret = encrypt_message(public_key)
 
     # Decrypt: recovers the shared secret
-    decrypted_secret = decrypt(ciphertext, private_key)
+    decrypted_secret = decrypt_message(ciphertext, private_key)
 
     # Verify encryption works
-    assert shared_secret == decrypted_secret, "Encryption/decryption failed!"
-
-    print(f"Secure key established: {len(decrypted_secret)} bytes")
-    print("Quantum-safe encryption ready!")
-
-except ImportError:
-    print("Warning: pqcrypto not installed. Install with: pip install pqcrypto")
-    print("Quantum-safe encryption unavailable.")
+    if shared_secret != decrypted_secret:
+        raise RuntimeError("Encryption/decryption failed!")
+    return decrypted_secret
+
+
+if __name__ == "__main__":
+    try:
+        secret = establish_shared_secret()
+    except ImportError:
+        print("Warning: pqcrypto not installed. Install with: pip install pqcrypto")
+        print("Quantum-safe encryption unavailable.")
+    else:
+        print(f"Secure key established: {len(secret)} bytes")
+        print("Quantum-safe encryption ready!")
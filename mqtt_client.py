@@ -3,10 +3,44 @@ MQTT client for IoT integration.
 
 This module connects to an MQTT broker to publish and receive
 messages for smart home and IoT device control.
+
+Door commands go through :class:`MqttPublisher`, which keeps one
+connection open instead of connecting for every command.  Each door has
+its own topic, ``<MQTT_TOPIC>/<door>``; commands without a door go to
+``MQTT_TOPIC`` itself.
 """
 
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, NamedTuple, Optional, Set, Union
+
 import paho.mqtt.client as mqtt
 
+from src.config import (
+    MQTT_BROKER,
+    MQTT_KEEPALIVE,
+    MQTT_MAX_INFLIGHT,
+    MQTT_MESSAGE_MAX_AGE_S,
+    MQTT_PORT,
+    MQTT_QOS,
+    MQTT_QUEUE_SIZE,
+    MQTT_RECONNECT_MAX_S,
+    MQTT_RECONNECT_MIN_S,
+    MQTT_TOPIC,
+)
+from src.utils.metrics import LatencyRecorder
+
+_logger = logging.getLogger(__name__)
+
+
+def _new_client(client_id: str = "") -> mqtt.Client:
+    if hasattr(mqtt, "CallbackAPIVersion"):  # paho-mqtt >= 2.0
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+    return mqtt.Client(client_id=client_id)
+
 
 def create_mqtt_client(
     broker: str = "mqtt.example.com", port: int = 1883, keepalive: int = 60
@@ -22,25 +56,358 @@ def create_mqtt_client(
     Returns:
         Connected MQTT client
     """
-    client = mqtt.Client()
+    client = _new_client()
     client.connect(broker, port, keepalive)
     return client
 
 
-def publish_access_command(command: str, broker: str = "mqtt.example.com") -> None:
+def door_topic(door: Optional[str] = None, base: str = MQTT_TOPIC) -> str:
+    """Topic for commands to *door*, or the shared *base* topic without one."""
+    if door is None:
+        return base
+    if not door or any(c in door for c in "/+#"):
+        raise ValueError(f"Invalid door name: {door!r}")
+    return f"{base}/{door}"
+
+
+class OutgoingMessage(NamedTuple):
+    """A message waiting to be handed to the MQTT client."""
+
+    topic: str
+    payload: bytes
+    qos: int
+    queued_at: float  # time.monotonic()
+
+
+class MqttPublisher:
+    """
+    Long-lived MQTT publisher for door commands.
+
+    :meth:`start` opens one connection that is reused for every message.
+    paho-mqtt's network thread keeps it alive and, after a failure,
+    reconnects with exponential backoff from ``reconnect_min`` to
+    ``reconnect_max`` seconds.  :meth:`publish` only queues the message; a
+    sender thread hands queued messages to the client in bursts, and QoS 1
+    and 2 messages are pipelined up to ``max_inflight`` unacknowledged ones
+    instead of waiting for each acknowledgement.
+
+    While disconnected, messages wait in a queue of at most ``queue_size``
+    (the oldest are dropped first) and are sent in order once the
+    connection is back.  Messages older than ``max_age`` by then are
+    dropped instead: a door should not unlock long after the person who
+    asked for it has left.
+
+    Example:
+        >>> publisher = MqttPublisher("broker.local").start()
+        >>> publisher.publish_command("OpenDoor", door="front_door")
+        >>> publisher.stop()  # sends what is left
+    """
+
+    def __init__(
+        self,
+        broker: str = MQTT_BROKER,
+        port: int = MQTT_PORT,
+        keepalive: int = MQTT_KEEPALIVE,
+        qos: int = MQTT_QOS,
+        topic: str = MQTT_TOPIC,
+        queue_size: int = MQTT_QUEUE_SIZE,
+        max_age: Optional[float] = MQTT_MESSAGE_MAX_AGE_S,
+        max_inflight: int = MQTT_MAX_INFLIGHT,
+        reconnect_min: float = MQTT_RECONNECT_MIN_S,
+        reconnect_max: float = MQTT_RECONNECT_MAX_S,
+        client_id: str = "",
+        client_factory: Callable[[str], mqtt.Client] = _new_client,
+    ):
+        """
+        Args:
+            broker: MQTT broker address.
+            port: MQTT broker port.
+            keepalive: Keep-alive interval in seconds.
+            qos: Default QoS level (0, 1 or 2).
+            topic: Base topic; see :func:`door_topic`.
+            queue_size: Most messages waiting to be sent.
+            max_age: Seconds after which a message that has not been sent is
+                dropped (``None`` keeps messages until sent).
+            max_inflight: Most unacknowledged QoS 1/2 messages at once.
+            reconnect_min: First reconnect delay in seconds.
+            reconnect_max: Longest reconnect delay in seconds.
+            client_id: MQTT client identifier ("" lets the client pick one).
+            client_factory: Creates the paho-mqtt client from *client_id*.
+        """
+        if qos not in (0, 1, 2):
+            raise ValueError("qos must be 0, 1 or 2")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.broker = broker
+        self.port = port
+        self.keepalive = keepalive
+        self.qos = qos
+        self.topic = topic
+        self.queue_size = queue_size
+        self.max_age = max_age
+        self.max_inflight = max_inflight
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.client_id = client_id
+        self.client_factory = client_factory
+        self.latency = LatencyRecorder()
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._connected = False
+        self._stopping = False
+        self._client: Optional[mqtt.Client] = None
+        self._thread: Optional[threading.Thread] = None
+        # mid -> queued_at of messages handed to the client but not yet
+        # published; mids the client reported before we recorded them.
+        self._unacked: Dict[int, float] = {}
+        self._early: Set[int] = set()
+        self._sending = 0  # taken from the queue, not yet handed over
+        self._queued = 0
+        self._published = 0
+        self._dropped = 0
+        self._expired = 0
+        self._connects = 0
+        self._disconnects = 0
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "MqttPublisher":
+        """Connect in the background and start sending (no-op if running)."""
+        with self._cond:
+            if self.running:
+                return self
+            self._stopping = False
+            client = self.client_factory(self.client_id)
+            client.on_connect = self._on_connect
+            client.on_disconnect = self._on_disconnect
+            client.on_publish = self._on_publish
+            client.reconnect_delay_set(self.reconnect_min, self.reconnect_max)
+            client.max_inflight_messages_set(self.max_inflight)
+            self._client = client
+            self._thread = threading.Thread(
+                target=self._run, name="mqtt-publisher", daemon=True
+            )
+            self._thread.start()
+        client.connect_async(self.broker, self.port, self.keepalive)
+        client.loop_start()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def stop(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Send what is queued (see :meth:`flush`), then disconnect.
+
+        Returns:
+            ``True`` if every message was sent and acknowledged.
+        """
+        drained = self.flush(timeout) if self.running else False
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        client, self._client = self._client, None
+        if client is not None:
+            client.disconnect()
+            client.loop_stop()
+        with self._cond:
+            self._connected = False
+            return drained and not self._queue and not self._unacked
+
+    # -- producer API ------------------------------------------------------
+
+    def publish(
+        self, topic: str, payload: Union[str, bytes], qos: Optional[int] = None
+    ) -> None:
+        """
+        Queue *payload* for *topic*.
+
+        Raises:
+            RuntimeError: If the publisher has been stopped.
+        """
+        qos = self.qos if qos is None else qos
+        if qos not in (0, 1, 2):
+            raise ValueError("qos must be 0, 1 or 2")
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        message = OutgoingMessage(topic, payload, qos, time.monotonic())
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("MQTT publisher is stopped")
+            if len(self._queue) >= self.queue_size:
+                self._queue.popleft()
+                self._dropped += 1
+            self._queue.append(message)
+            self._queued += 1
+            self._cond.notify_all()
+
+    def publish_command(
+        self, command: str, door: Optional[str] = None, qos: Optional[int] = None
+    ) -> None:
+        """Queue an access control *command* (e.g. "OpenDoor") for *door*."""
+        self.publish(door_topic(door, self.topic), command, qos)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until the queue is empty and every message handed to the client
+        has been published (written for QoS 0, acknowledged for QoS 1/2).
+
+        Returns:
+            ``True`` on success, ``False`` on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not (self._queue or self._sending or self._unacked),
+                timeout=timeout,
+            )
+
+    def stats(self) -> Dict[str, Union[int, float, bool]]:
+        """Counters and the latency from :meth:`publish` until published."""
+        with self._cond:
+            stats = {
+                "connected": self._connected,
+                "queued": len(self._queue),
+                "in_flight": len(self._unacked),
+                "submitted": self._queued,
+                "published": self._published,
+                "dropped": self._dropped,
+                "expired": self._expired,
+                "reconnects": max(self._connects - 1, 0),
+                "disconnects": self._disconnects,
+            }
+        stats.update(self.latency.summary())
+        return stats
+
+    # -- client callbacks (paho-mqtt network thread) -----------------------
+
+    def _on_connect(self, client, userdata, flags, reason_code, *args) -> None:
+        if reason_code != 0:
+            _logger.warning(
+                "MQTT broker %s refused connection: %s", self.broker, reason_code
+            )
+            return
+        with self._cond:
+            self._connected = True
+            self._connects += 1
+            self._cond.notify_all()
+
+    def _on_disconnect(self, client, userdata, *args) -> None:
+        with self._cond:
+            if self._connected:
+                self._disconnects += 1
+                if not self._stopping:
+                    _logger.warning("Lost connection to MQTT broker %s", self.broker)
+            self._connected = False
+
+    def _on_publish(self, client, userdata, mid, *args) -> None:
+        with self._cond:
+            queued_at = self._unacked.pop(mid, None)
+            if queued_at is None:
+                self._early.add(mid)
+                return
+            self._published += 1
+            self._cond.notify_all()
+        self.latency.record(time.monotonic() - queued_at)
+
+    # -- sender thread -----------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: (self._queue and self._connected) or self._stopping
+                )
+                if self._stopping:
+                    return
+                batch = list(self._queue)
+                self._queue.clear()
+                self._sending = len(batch)
+                client = self._client
+            self._send(client, batch)
+
+    def _send(self, client: mqtt.Client, batch) -> None:
+        now = time.monotonic()
+        for i, message in enumerate(batch):
+            if self.max_age is not None and now - message.queued_at > self.max_age:
+                with self._cond:
+                    self._sending -= 1
+                    self._expired += 1
+                    self._cond.notify_all()
+                continue
+            info = client.publish(message.topic, message.payload, message.qos)
+            with self._cond:
+                if info.rc == mqtt.MQTT_ERR_NO_CONN and message.qos == 0:
+                    # Lost the connection; keep the rest for the next one.
+                    # QoS 1/2 messages stay with the client, which resends them.
+                    self._queue.extendleft(reversed(batch[i:]))
+                    self._sending = 0
+                    return
+                self._sending -= 1
+                if info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_NO_CONN):
+                    _logger.error(
+                        "MQTT publish to %s failed: %s", message.topic, info.rc
+                    )
+                    self._dropped += 1
+                elif info.mid in self._early:
+                    self._early.discard(info.mid)
+                    self._published += 1
+                    self.latency.record(time.monotonic() - message.queued_at)
+                else:
+                    self._unacked[info.mid] = message.queued_at
+                self._cond.notify_all()
+
+
+_publishers: Dict[str, MqttPublisher] = {}
+_publishers_lock = threading.Lock()
+
+
+def get_publisher(broker: str = MQTT_BROKER) -> MqttPublisher:
+    """The shared, started publisher for *broker*, created on first use."""
+    with _publishers_lock:
+        publisher = _publishers.get(broker)
+        if publisher is None or not publisher.running:
+            publisher = _publishers[broker] = MqttPublisher(broker).start()
+        return publisher
+
+
+@atexit.register
+def _stop_publishers() -> None:
+    with _publishers_lock:
+        publishers = list(_publishers.values())
+        _publishers.clear()
+    for publisher in publishers:
+        publisher.stop()
+
+
+def publish_access_command(
+    command: str,
+    broker: str = MQTT_BROKER,
+    door: Optional[str] = None,
+    qos: Optional[int] = None,
+) -> None:
     """
     Publish an access control command via MQTT.
 
+    The command is queued on the shared publisher for *broker* (see
+    :func:`get_publisher`) and sent over its open connection.
+
     Args:
         command: Command to publish (e.g., "OpenDoor", "CloseDoor")
         broker: MQTT broker address
+        door: Door to address; ``None`` uses the shared ``MQTT_TOPIC``
+        qos: QoS level; ``None`` uses ``MQTT_QOS``
     """
-    client = create_mqtt_client(broker)
-    client.publish("access_control", command)
-    print(f"Published command: {command}")
-    client.disconnect()
+    get_publisher(broker).publish_command(command, door, qos)
 
 
 # Example usage
 if __name__ == "__main__":
     publish_access_command("OpenDoor")
+    print("Published command: OpenDoor" if get_publisher().stop() else "Not sent")
@@ -4,49 +4,288 @@ Raspberry Pi GPIO controller for physical access control.
 Controls GPIO pins to trigger physical devices like door locks,
 lights, and alarms.
 
+:class:`DoorController` drives the locks of many doors: ``unlock``
+returns at once and one scheduler thread relocks each door when its open
+window ends.  Without RPi.GPIO the pins are simulated in
+``SIMULATED_PINS``.  Nothing touches the pins at import: GPIO is set up
+on first use.
+
 Note: Requires RPi.GPIO package and Raspberry Pi hardware.
 """
 
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.config import DOOR_OPEN_SECONDS, DOOR_PINS
+from src.utils.metrics import LatencyRecorder
+
 try:
     import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
 
-    # Use BCM pin numbering
-    GPIO.setmode(GPIO.BCM)
+GPIO_AVAILABLE = GPIO is not None
 
-    # Configure GPIO pin 18 as output for door control
-    DOOR_PIN = 18
-    GPIO.setup(DOOR_PIN, GPIO.OUT)
+# GPIO pin 18 drives the door lock of the single-door helpers below
+DOOR_PIN = 18
 
-    def open_door() -> None:
-        """Activate door lock to open."""
-        GPIO.output(DOOR_PIN, GPIO.HIGH)
-        print("Door opened")
+# Simulated pin levels when GPIO is unavailable: pin -> high
+SIMULATED_PINS: Dict[int, bool] = {}
 
-    def close_door() -> None:
-        """Deactivate door lock to close."""
-        GPIO.output(DOOR_PIN, GPIO.LOW)
-        print("Door closed")
+_gpio_ready = False
+_gpio_lock = threading.Lock()
 
-    def cleanup() -> None:
-        """Clean up GPIO resources."""
-        GPIO.cleanup()
 
-    # Example usage
-    if __name__ == "__main__":
-        open_door()
+def _setup_gpio() -> None:
+    """Select BCM numbering and configure ``DOOR_PIN`` on first use."""
+    global _gpio_ready
+    with _gpio_lock:
+        if not _gpio_ready:
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(DOOR_PIN, GPIO.OUT)
+            _gpio_ready = True
 
-except ImportError:
-    print("Warning: RPi.GPIO not available. Running on non-Raspberry Pi system.")
-    print("GPIO control disabled.")
 
-    def open_door() -> None:
-        """Stub function when GPIO unavailable."""
+def open_door() -> None:
+    """Activate door lock to open."""
+    if not GPIO_AVAILABLE:
         print("Simulated: Door would open")
+        return
+    _setup_gpio()
+    GPIO.output(DOOR_PIN, GPIO.HIGH)
+    print("Door opened")
+
 
-    def close_door() -> None:
-        """Stub function when GPIO unavailable."""
+def close_door() -> None:
+    """Deactivate door lock to close."""
+    if not GPIO_AVAILABLE:
         print("Simulated: Door would close")
+        return
+    _setup_gpio()
+    GPIO.output(DOOR_PIN, GPIO.LOW)
+    print("Door closed")
+
+
+def cleanup() -> None:
+    """Clean up GPIO resources."""
+    if GPIO_AVAILABLE and _gpio_ready:
+        GPIO.cleanup()
+
+
+def gpio_setup(pin: int) -> None:
+    """Configure *pin* as an output, initially low (locked)."""
+    if not GPIO_AVAILABLE:
+        SIMULATED_PINS[pin] = False
+        return
+    _setup_gpio()
+    GPIO.setup(pin, GPIO.OUT, initial=GPIO.LOW)
+
+
+def gpio_write(pin: int, high: bool) -> None:
+    """Drive *pin* high (unlocked) or low (locked)."""
+    if not GPIO_AVAILABLE:
+        SIMULATED_PINS[pin] = high
+        return
+    GPIO.output(pin, GPIO.HIGH if high else GPIO.LOW)
+
+
+class DoorController:
+    """
+    Timed unlocks for many doors, relocked by one scheduler thread.
+
+    :meth:`unlock` drives the door's pin high and returns at once; the
+    scheduler thread drives it low again when the open window ends.
+    Granting an open door again extends its window instead of adding a
+    timer, so an earlier grant can never relock the door under a later one.
+    Relock deadlines are kept in a heap; entries superseded by an extension
+    are skipped when they come up.  Every method is thread-safe and none of
+    them blocks on the open window.
+
+    Example:
+        >>> doors = DoorController({"front_door": 18, "garage": 23})
+        >>> doors.unlock("front_door")  # returns immediately
+        >>> doors.unlock("front_door", 10)  # now open until 10 s from now
+        >>> doors.stop()  # locks every door
+    """
+
+    def __init__(
+        self,
+        pins: Optional[Dict[str, int]] = None,
+        hold: float = DOOR_OPEN_SECONDS,
+        set_pin: Callable[[int, bool], None] = gpio_write,
+        setup_pin: Optional[Callable[[int], None]] = gpio_setup,
+    ):
+        """
+        Args:
+            pins: Door name -> GPIO (BCM) pin of its lock (default:
+                ``DOOR_PINS``).
+            hold: Default open window in seconds.
+            set_pin: Writes a pin level, ``True`` for unlocked; called with
+                the controller's lock held, so it must be quick.
+            setup_pin: Prepares each pin once, or ``None``.
+        """
+        self.pins = dict(DOOR_PINS if pins is None else pins)
+        self.hold = hold
+        self.set_pin = set_pin
+        self.relock_lateness = LatencyRecorder()
+        if setup_pin is not None:
+            for pin in self.pins.values():
+                setup_pin(pin)
+        self._deadlines: Dict[str, float] = {}  # open doors -> relock time
+        self._heap: List[Tuple[float, int, str]] = []  # (deadline, seq, door)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._counts = dict.fromkeys(("unlocks", "extensions", "relocks"), 0)
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "DoorController":
+        """Start the scheduler thread (done by the first :meth:`unlock`)."""
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Door controller is stopped")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="door-scheduler", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Lock every open door and stop the scheduler thread."""
+        with self._cond:
+            self._stopping = True
+            for door in list(self._deadlines):
+                self._relock(door)
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __enter__(self) -> "DoorController":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # -- API ---------------------------------------------------------------
+
+    def __contains__(self, door: str) -> bool:
+        return door in self.pins
+
+    def unlock(self, door: str, seconds: Optional[float] = None) -> float:
+        """
+        Unlock *door* for *seconds* (default: ``hold``) from now, or keep an
+        open door open at least that long.
+
+        Returns:
+            The ``time.monotonic()`` at which the door will relock.
+
+        Raises:
+            KeyError: If *door* has no pin.
+            RuntimeError: If the controller has been stopped.
+        """
+        if self._thread is None:
+            self.start()
+        pin = self.pins[door]
+        seconds = self.hold if seconds is None else seconds
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Door controller is stopped")
+            deadline = time.monotonic() + seconds
+            current = self._deadlines.get(door)
+            if current is None:
+                self.set_pin(pin, True)
+                self._counts["unlocks"] += 1
+            else:
+                self._counts["extensions"] += 1
+                if deadline <= current:
+                    return current
+            self._deadlines[door] = deadline
+            if not self._heap or deadline < self._heap[0][0]:
+                self._cond.notify_all()
+            heapq.heappush(self._heap, (deadline, next(self._seq), door))
+            return deadline
+
+    def lock(self, door: str) -> bool:
+        """
+        Lock *door* now, ending its open window.
+
+        Returns:
+            ``True`` if the door was open.
+        """
+        with self._cond:
+            if door not in self._deadlines:
+                return False
+            self._relock(door)
+            return True
+
+    def is_open(self, door: str) -> bool:
+        with self._cond:
+            return door in self._deadlines
+
+    def remaining(self, door: str) -> float:
+        """Seconds until *door* relocks (0 if it is locked)."""
+        with self._cond:
+            deadline = self._deadlines.get(door)
+        return max(deadline - time.monotonic(), 0.0) if deadline else 0.0
+
+    def stats(self) -> Dict[str, object]:
+        """Counters (``unlocks`` of locked doors, ``extensions`` of open
+        ones, ``relocks``), ``open`` doors, ``scheduled`` heap entries and
+        ``relock_lateness`` (deadline to pin write) in milliseconds."""
+        with self._cond:
+            stats: Dict[str, object] = dict(self._counts)
+            stats["open"] = len(self._deadlines)
+            stats["scheduled"] = len(self._heap)
+        stats["relock_lateness"] = self.relock_lateness.summary()
+        return stats
+
+    # -- scheduler thread --------------------------------------------------
+
+    def _relock(self, door: str) -> None:
+        del self._deadlines[door]
+        self.set_pin(self.pins[door], False)
+        self._counts["relocks"] += 1
+
+    def _run(self) -> None:
+        while True:
+            lateness = []
+            with self._cond:
+                if self._stopping:
+                    return
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    deadline, _, door = heapq.heappop(self._heap)
+                    if self._deadlines.get(door) == deadline:
+                        self._relock(door)
+                        lateness.append(now - deadline)
+                if len(self._heap) > 4 * len(self._deadlines) + 64:
+                    # Mostly superseded entries: keep one per open door.
+                    self._heap = [
+                        entry
+                        for entry in self._heap
+                        if self._deadlines.get(entry[2]) == entry[0]
+                    ]
+                    heapq.heapify(self._heap)
+                timeout = self._heap[0][0] - now if self._heap else None
+                if not lateness:
+                    self._cond.wait(timeout)
+            for seconds in lateness:
+                self.relock_lateness.record(seconds)
+
 
-    def cleanup() -> None:
-        """Stub function when GPIO unavailable."""
-        pass
+# Example usage
+if __name__ == "__main__":
+    if not GPIO_AVAILABLE:
+        print("Warning: RPi.GPIO not available. Running on non-Raspberry Pi system.")
+        print("GPIO control disabled.")
+    open_door()
@@ -12,12 +12,134 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 KNOWN_FACES_DIR = os.path.join(DATA_DIR, "known_faces")
 UNKNOWN_FACES_DIR = os.path.join(DATA_DIR, "unknown_faces")
-ENCODINGS_PATH = os.path.join(DATA_DIR, "encodings.pickle")
-DATABASE_PATH = os.path.join(BASE_DIR, "backend", "face_recon.db")  # SQLite DB file
+ENCODINGS_PATH = os.path.join(DATA_DIR, "encodings.pickle")  # Legacy format
+ENCODINGS_STORE_PATH = os.path.join(DATA_DIR, "encodings.frenc")  # Memory-mapped
+ENCODINGS_MANIFEST_PATH = os.path.join(DATA_DIR, "encodings.manifest.json")
+# SQLite DB file; FACE_RECON_DB overrides it, e.g. for a deployment volume
+DATABASE_PATH = os.environ.get(
+    "FACE_RECON_DB", os.path.join(BASE_DIR, "backend", "face_recon.db")
+)
 
 # Face recognition settings
 DETECTION_MODEL = "hog"  # or "cnn" for GPU-accelerated detection
 FACE_TOLERANCE = 0.6  # Lower is more strict (0.0-1.0)
+UNKNOWN_NAME = "Unknown"  # Name reported for faces that match nobody
+# Resize factor applied before face detection; boxes are mapped back and faces
+# are encoded at full resolution.  0.5 detects on a quarter of the pixels.
+# Pick per camera with benchmarks/bench_detection_scale.py.
+DETECTION_SCALE = 1.0
+BUILD_WORKERS = None  # Encoding processes for the database build (None = all CPUs)
+
+# Real-time pipeline (capture -> worker pool -> ordered output)
+PIPELINE_WORKERS = 2  # Detection/encoding worker threads
+PIPELINE_QUEUE_SIZE = 4  # Frames waiting for a worker before the drop policy applies
+PIPELINE_DROP_POLICY = "drop_oldest"  # "drop_oldest", "drop_newest" or "block"
+
+# Multi-camera service (src/main_multi_camera.py).  Each entry is
+# "[name=]source[;fps=N]" with a device index, RTSP URL or video file.
+CAMERA_SOURCES = ["front_door=0"]
+CAMERA_MAX_FPS = 10.0  # Default per-camera FPS cap (0 = uncapped)
+MULTI_CAMERA_WORKERS = None  # Shared recognition workers (None = all CPUs)
+
+# Face tracking between detections (src/utils/tracking.py)
+TRACKING_ENABLED = True  # Carry identities along tracks, not per-frame matching
+TRACKING_DETECT_EVERY = 5  # Full detection every Nth frame
+TRACKING_MIN_IOU = 0.3  # Minimum box overlap for a detection to continue a track
+TRACKING_MAX_MISSES = 2  # Detection passes a track survives without a match
+TRACKING_REIDENTIFY_EVERY = 150  # Re-encode known tracks after N frames (0 = never)
+TRACKING_CV_TRACKER = None  # OpenCV tracker between detections, e.g. "mil" or "kcf"
+
+# Gallery search index ("brute" = exact scan, "ivfpq" = approximate IVF-PQ)
+INDEX_BACKEND = "brute"
+INDEX_MIN_TRAIN_SIZE = 10000  # Smaller galleries always use brute force
+IVF_NLIST = 1024  # Number of inverted lists (coarse clusters)
+IVF_NPROBE = 16  # Lists visited per query; raise for recall, lower for speed
+IVF_RERANK = 64  # Candidates re-scored with exact distances (0 disables)
+PQ_SUBQUANTIZERS = 16  # Must divide the 128-d encoding size
+PQ_BITS = 8  # Bits per sub-quantizer code
+
+# Backend API
+DB_BUSY_TIMEOUT_MS = 5000  # Wait this long for a write lock before failing
+DB_SYNCHRONOUS = "NORMAL"  # SQLite synchronous level; NORMAL is safe with WAL
+DB_STATEMENT_CACHE = 256  # Prepared statements cached per connection
+LOG_QUEUE_SIZE = 10000  # Access events buffered before requests get 503
+LOG_BATCH_SIZE = 500  # Access log rows written per transaction
+LOG_FLUSH_INTERVAL_MS = 50  # Longest an access event waits to be written
+LOG_ENQUEUE_TIMEOUT_MS = 100  # Wait for queue space before applying backpressure
+LOG_READ_FLUSH_TIMEOUT_MS = 50  # Most a log read waits for queued events
+RECOGNIZE_MAX_BATCH = 64  # Faces accepted per POST /recognize request
+EXPORT_CHUNK_ROWS = 1000  # Rows fetched and encoded per chunk by /logs/export
+USER_CACHE_CHECK_INTERVAL_MS = 1000  # How stale other workers' user edits may be
+
+# Production serving (backend/wsgi.py, backend/gunicorn.conf.py)
+SERVER_BIND = "0.0.0.0:5000"
+SERVER_WORKERS = None  # Worker processes (None = number of CPUs)
+SERVER_THREADS = 4  # Request threads per worker
+SERVER_GRACEFUL_TIMEOUT = 30  # Seconds to finish in-flight requests on shutdown
+ASYNC_DB_THREADS = 8  # Threads running handlers for the asyncio app (backend/asgi.py)
+ASYNC_MAX_BODY_BYTES = 64 * 1024  # Larger request bodies are refused with 413
+
+# MQTT door commands (mqtt_client.py)
+MQTT_BROKER = os.environ.get("FACE_RECON_MQTT_BROKER", "mqtt.example.com")
+MQTT_PORT = 1883
+MQTT_KEEPALIVE = 60  # Seconds between keep-alive pings on an idle connection
+MQTT_TOPIC = "access_control"  # Commands for a door go to "<topic>/<door>"
+MQTT_QOS = 1  # 0 = at most once, 1 = at least once, 2 = exactly once
+MQTT_QUEUE_SIZE = 1000  # Commands buffered while disconnected; oldest dropped first
+MQTT_MESSAGE_MAX_AGE_S = 10.0  # Buffered commands older than this are not sent
+MQTT_MAX_INFLIGHT = 20  # Unacknowledged QoS 1/2 messages on the wire at once
+MQTT_RECONNECT_MIN_S = 0.5  # First reconnect delay; doubles up to the maximum
+MQTT_RECONNECT_MAX_S = 30.0
+
+# Recognition-driven door control (src/utils/access_pipeline.py)
+EVENT_QUEUE_SIZE = 1000  # Events waiting for the bus dispatcher before new ones drop
+ACCESS_COOLDOWN_S = 5.0  # Same person is not let through the same door again sooner
+DOOR_OPEN_SECONDS = 5.0  # How long a granted door stays unlocked
+
+# Door locks driven by rpi_controller.DoorController: door name -> GPIO (BCM)
+# pin.  Door names are the camera names in CAMERA_SOURCES.
+DOOR_PINS = {"front_door": 18}
+
+# Access-pattern anomaly detection (utils/anomaly_detection.py)
+ANOMALY_CHUNK_ROWS = 5000  # access_log rows fetched and scored per chunk
+ANOMALY_FREQUENCY_WINDOW_S = 86400.0  # "user frequency" counts this far back
+ANOMALY_WINDOW_ROWS = 50000  # Latest access_log rows the model is fitted on
+ANOMALY_REFIT_ROWS = 5000  # New rows after which the model is refitted
+
+# Trained model artifacts (utils/model_store.py), one directory per model
+MODEL_DIR = os.environ.get("FACE_RECON_MODEL_DIR", os.path.join(BASE_DIR, "models"))
+MODEL_KEEP_VERSIONS = 5  # Older versions are deleted when a new one is saved
+
+# Startup-time budget (src/utils/import_time.py): entry module -> the most its
+# import may take, in ms, measured with `python -X importtime`.  Roughly 3x the
+# time on a development machine, so only a newly eager heavy import trips it.
+# tests/test_import_time.py checks it only when FACE_RECON_IMPORT_BUDGET=1.
+IMPORT_TIME_BUDGETS_MS = {
+    "backend.server": 600,
+    "backend.wsgi": 600,
+    "backend.asgi": 600,
+    "src.main_access_control": 150,
+    "src.main_realtime_recognition": 400,
+    "src.main_multi_camera": 400,
+    "src.main_train_models": 100,
+    "src.utils.face_utils": 50,
+    "ai_model": 100,
+    "anomaly_detection": 50,
+    "utils.anomaly_detection": 400,
+    "encryption": 50,
+    "rpi_controller": 50,
+    "voice_auth": 50,
+}
+# Heavy packages none of the entry modules may import until first use
+IMPORT_DEFERRED_MODULES = (
+    "cv2",
+    "dlib",
+    "face_recognition",
+    "pqcrypto",
+    "scipy",
+    "sklearn",
+    "speech_recognition",
+)
 
 # Other config
 LOG_FILE = os.path.join(BASE_DIR, "logs", "app.log")
@@ -0,0 +1,248 @@
+"""
+Recognition-driven access control: camera -> access decision -> door.
+
+Faces identified by the multi-camera service are checked in this process
+against the backend database's users, schedules and holidays, every
+decision is written to ``access_log``, and granted ones unlock the
+camera's door through ``rpi_controller.DoorController`` (the lock pin
+from ``DOOR_PINS`` or ``--door``; simulated without RPi.GPIO) and, with
+``--mqtt-broker``, an MQTT command to ``access_control/<door>``.
+
+``--simulate N`` replaces the cameras by N synthetic recognitions of the
+database's users (and some unknown faces), so the whole path runs on any
+Linux box without cameras, dlib or GPIO::
+
+    python -m src.main_access_control --simulate 500 --rate 50
+    python -m src.main_access_control --camera front_door=0
+"""
+
+import os
+import sys
+
+# Ensure the parent directory is in the path for imports to work
+# This allows running both as `python src/main_access_control.py`
+# and as `python -m src.main_access_control`
+if __name__ == "__main__":
+    # Add parent directory to path if running as script
+    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+
+import argparse
+import random
+import sqlite3
+import time
+
+from src.config import (
+    ACCESS_COOLDOWN_S,
+    CAMERA_MAX_FPS,
+    CAMERA_SOURCES,
+    DATABASE_PATH,
+    DETECTION_SCALE,
+    DOOR_OPEN_SECONDS,
+    DOOR_PINS,
+    MQTT_PORT,
+    MULTI_CAMERA_WORKERS,
+    TRACKING_CV_TRACKER,
+    TRACKING_DETECT_EVERY,
+    UNKNOWN_NAME,
+)
+from src.utils.access_pipeline import (
+    TOPIC_DECISION,
+    AccessPipeline,
+    format_access_stats,
+)
+from src.utils.error_handling import log_error, safe_run
+from src.utils.events import EventBus
+from src.utils.multi_camera import parse_camera_spec
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Recognition-driven access control")
+    parser.add_argument(
+        "--camera",
+        action="append",
+        dest="cameras",
+        metavar="[NAME=]SOURCE[;fps=N]",
+        help="camera to serve; its name is the door it controls "
+        "(default: CAMERA_SOURCES)",
+    )
+    parser.add_argument("--workers", type=int, default=MULTI_CAMERA_WORKERS)
+    parser.add_argument("--max-fps", type=float, default=CAMERA_MAX_FPS)
+    parser.add_argument("--detection-scale", type=float, default=DETECTION_SCALE)
+    parser.add_argument("--detect-every", type=int, default=TRACKING_DETECT_EVERY)
+    parser.add_argument("--cv-tracker", default=TRACKING_CV_TRACKER)
+    parser.add_argument("--database", default=DATABASE_PATH)
+    parser.add_argument(
+        "--door",
+        action="append",
+        dest="doors",
+        metavar="NAME=PIN",
+        help="GPIO (BCM) pin of a door's lock (default: DOOR_PINS)",
+    )
+    parser.add_argument("--hold", type=float, default=DOOR_OPEN_SECONDS)
+    parser.add_argument("--cooldown", type=float, default=ACCESS_COOLDOWN_S)
+    parser.add_argument("--mqtt-broker", help="also publish door commands via MQTT")
+    parser.add_argument("--mqtt-port", type=int, default=MQTT_PORT)
+    parser.add_argument(
+        "--simulate",
+        type=int,
+        metavar="N",
+        help="feed N synthetic recognitions instead of reading cameras",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=20.0, help="simulated recognitions per second"
+    )
+    parser.add_argument(
+        "--unknown-ratio",
+        type=float,
+        default=0.2,
+        help="share of simulated recognitions that are unknown faces",
+    )
+    parser.add_argument(
+        "--stats-every", type=float, default=30.0, help="print stats every N seconds"
+    )
+    parser.set_defaults(track=True)
+    return parser.parse_args(argv)
+
+
+def parse_door_pins(specs, doors, simulated):
+    """
+    Door name -> lock pin from ``--door NAME=PIN`` *specs* (default:
+    ``DOOR_PINS``).  Without GPIO, camera *doors* that have no pin get an
+    unused simulated one, so every door is actuated in a simulation.
+    """
+    pins = dict(DOOR_PINS)
+    if specs:
+        pins = {}
+        for spec in specs:
+            name, sep, pin = spec.partition("=")
+            if not sep or not name or not pin.isdigit():
+                raise ValueError(f"Invalid door {spec!r}: expected NAME=PIN")
+            pins[name] = int(pin)
+    if simulated:
+        spare = max(pins.values(), default=0) + 1
+        for door in doors:
+            if door not in pins:
+                pins[door] = spare
+                spare += 1
+    return pins
+
+
+def simulate(pipeline, names, args, doors):
+    """Publish ``args.simulate`` recognitions at ``args.rate`` per second."""
+    rng = random.Random(0)
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    next_at = time.perf_counter()
+    for track_id in range(args.simulate):
+        unknown = not names or rng.random() < args.unknown_ratio
+        name = UNKNOWN_NAME if unknown else rng.choice(names)
+        pipeline.recognized(rng.choice(doors), name, track_id)
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def run_cameras(pipeline, args):
+    """Serve the cameras until interrupted, feeding tracker events to
+    *pipeline*."""
+    # Imported here so that --simulate needs neither OpenCV nor dlib.
+    from src.main_multi_camera import make_process_factory
+    from src.utils.encodings_store import load_gallery
+    from src.utils.multi_camera import MultiCameraService
+
+    specs = [
+        parse_camera_spec(text, i)
+        for i, text in enumerate(args.cameras or CAMERA_SOURCES)
+    ]
+    service = MultiCameraService(
+        specs,
+        make_process_factory(args, load_gallery()),
+        workers=args.workers,
+        max_fps=args.max_fps,
+    )
+    last_report = time.perf_counter()
+    with service:
+        for item in service.results():
+            if item.result is not None:
+                pipeline.track_events(item.camera, item.result.events, item.captured_at)
+            now = time.perf_counter()
+            if args.stats_every and now - last_report >= args.stats_every:
+                print(format_access_stats(pipeline.stats()))
+                last_report = now
+
+
+@safe_run
+def main(argv=None):
+    args = parse_args(argv)
+    import rpi_controller
+    from backend.db import ConnectionPool
+    from backend.log_writer import AccessLogWriter
+    from backend.user_cache import UserCache
+
+    pool = ConnectionPool(args.database)
+    users = UserCache(pool.connection)
+    log_writer = AccessLogWriter(pool.connection).start()
+    camera_doors = [
+        parse_camera_spec(text, i).name
+        for i, text in enumerate(args.cameras or CAMERA_SOURCES)
+    ]
+    pins = parse_door_pins(
+        args.doors, camera_doors, simulated=not rpi_controller.GPIO_AVAILABLE
+    )
+    for door in camera_doors:
+        if door not in pins:
+            print(f"No lock pin for door {door!r}: it is not actuated via GPIO")
+    door_controller = rpi_controller.DoorController(pins, hold=args.hold)
+
+    def gpio_unlock(door):
+        if door in door_controller:
+            door_controller.unlock(door)
+
+    actuators = [gpio_unlock]
+    publisher = None
+    if args.mqtt_broker:
+        from mqtt_client import MqttPublisher
+
+        publisher = MqttPublisher(args.mqtt_broker, args.mqtt_port).start()
+        actuators.append(lambda door: publisher.publish_command("OpenDoor", door))
+
+    bus = EventBus().start()
+    pipeline = AccessPipeline(bus, users.is_allowed, actuators, cooldown=args.cooldown)
+    bus.subscribe(
+        TOPIC_DECISION,
+        lambda event: log_writer.submit(
+            event.data.recognition.name, event.data.granted, "face"
+        ),
+    )
+    try:
+        if args.simulate:
+            try:
+                rows = pool.connection().execute("SELECT name FROM users").fetchall()
+            except sqlite3.Error:
+                rows = []
+            if not rows:
+                print(f"No users in {args.database}: every recognition is denied")
+            simulate(pipeline, sorted(name for (name,) in rows), args, camera_doors)
+        else:
+            run_cameras(pipeline, args)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bus.stop()
+        door_controller.stop()
+        if publisher is not None:
+            publisher.stop()
+        log_writer.stop()
+        pool.close_all()
+        print(format_access_stats(pipeline.stats()))
+        print("Face-to-unlock latency:")
+        print(pipeline.histogram.format())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        log_error(e)
@@ -14,20 +14,37 @@ if __name__ == "__main__":
     if parent_dir not in sys.path:
         sys.path.insert(0, parent_dir)
 
-import pickle
+import argparse
 
-from src.config import ENCODINGS_PATH, KNOWN_FACES_DIR
+from src.config import BUILD_WORKERS, ENCODINGS_STORE_PATH, KNOWN_FACES_DIR
+from src.utils.database_builder import build_database
 from src.utils.error_handling import log_error, safe_run
-from src.utils.face_utils import encode_faces_in_directory
 
 
 @safe_run
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the face encodings database")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=BUILD_WORKERS,
+        help="encoding processes (default: all CPUs; 1 disables the pool)",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="re-encode every image, ignoring cache"
+    )
+    args = parser.parse_args(argv)
+
     print("Building face encodings database...")
-    encodings, names = encode_faces_in_directory(KNOWN_FACES_DIR)
-    with open(ENCODINGS_PATH, "wb") as f:
-        pickle.dump({"encodings": encodings, "names": names}, f)
-    print(f"Database created at {ENCODINGS_PATH}")
+    stats = build_database(KNOWN_FACES_DIR, workers=args.workers, full=args.full)
+    rate = stats.encoded / stats.seconds if stats.seconds > 0 else 0.0
+    print(
+        f"{stats.total} images: {stats.encoded} encoded, "
+        f"{stats.no_face} without a face, {stats.reused} unchanged, "
+        f"{stats.deleted} removed, {stats.failed} failed "
+        f"in {stats.seconds:.1f}s ({rate:.1f} images/s)"
+    )
+    print(f"Database created at {ENCODINGS_STORE_PATH}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+"""
+Runs face recognition for several cameras in one process.
+
+All cameras share one worker pool and one copy of the encodings gallery.
+Cameras come from ``CAMERA_SOURCES`` in ``src/config.py`` or from repeated
+``--camera`` options, e.g.::
+
+    python -m src.main_multi_camera \\
+        --camera lobby=rtsp://10.0.0.5/stream;fps=5 --camera dock=1
+"""
+
+import os
+import sys
+
+# Ensure the parent directory is in the path for imports to work
+# This allows running both as `python src/main_multi_camera.py`
+# and as `python -m src.main_multi_camera`
+if __name__ == "__main__":
+    # Add parent directory to path if running as script
+    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+
+import argparse
+import time
+
+from src.config import (
+    CAMERA_MAX_FPS,
+    CAMERA_SOURCES,
+    DETECTION_SCALE,
+    MULTI_CAMERA_WORKERS,
+    TRACKING_CV_TRACKER,
+    TRACKING_DETECT_EVERY,
+    TRACKING_ENABLED,
+)
+from src.utils.encodings_store import load_gallery
+from src.utils.error_handling import log_error, safe_run
+from src.utils.face_utils import detect_faces, encode_faces, recognize_faces_in_frame
+from src.utils.multi_camera import (
+    MultiCameraService,
+    format_camera_stats,
+    parse_camera_spec,
+)
+from src.utils.tracking import FaceTracker, opencv_tracker_factory
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-camera face recognition")
+    parser.add_argument(
+        "--camera",
+        action="append",
+        dest="cameras",
+        metavar="[NAME=]SOURCE[;fps=N]",
+        help="camera to serve; repeat for each camera (default: CAMERA_SOURCES)",
+    )
+    parser.add_argument("--workers", type=int, default=MULTI_CAMERA_WORKERS)
+    parser.add_argument(
+        "--max-fps",
+        type=float,
+        default=CAMERA_MAX_FPS,
+        help="default per-camera FPS cap (0 = uncapped)",
+    )
+    parser.add_argument("--detection-scale", type=float, default=DETECTION_SCALE)
+    parser.add_argument(
+        "--no-track", dest="track", action="store_false", default=TRACKING_ENABLED
+    )
+    parser.add_argument("--detect-every", type=int, default=TRACKING_DETECT_EVERY)
+    parser.add_argument("--cv-tracker", default=TRACKING_CV_TRACKER)
+    parser.add_argument(
+        "--stats-every", type=float, default=30.0, help="print stats every N seconds"
+    )
+    return parser.parse_args(argv)
+
+
+def make_process_factory(args, matcher):
+    """Build the per-camera frame processor; every camera shares *matcher*."""
+    import cv2
+
+    cv_factory = opencv_tracker_factory(args.cv_tracker) if args.cv_tracker else None
+
+    def factory(camera):
+        if not args.track:
+            return lambda frame: recognize_faces_in_frame(
+                frame, matcher, detection_scale=args.detection_scale
+            )
+        # Each camera keeps its own tracks; the service never runs two frames
+        # of one camera at once, so the tracker sees them in order.
+        tracker = FaceTracker(
+            matcher,
+            lambda rgb: detect_faces(rgb, args.detection_scale),
+            encode_faces,
+            detect_every=args.detect_every,
+            cv_tracker_factory=cv_factory,
+        )
+        return lambda frame: tracker.update(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    return factory
+
+
+@safe_run
+def main(argv=None):
+    args = parse_args(argv)
+    specs = [
+        parse_camera_spec(text, i)
+        for i, text in enumerate(args.cameras or CAMERA_SOURCES)
+    ]
+    print(f"Starting recognition for {len(specs)} camera(s)...")
+    matcher = load_gallery()
+    service = MultiCameraService(
+        specs,
+        make_process_factory(args, matcher),
+        workers=args.workers,
+        max_fps=args.max_fps,
+    )
+    last_report = time.perf_counter()
+    try:
+        with service:
+            for item in service.results():
+                if args.track and item.result is not None:
+                    for event in item.result.events:
+                        if event.kind == "identified":
+                            print(
+                                f"[{item.camera}] Recognized: {event.name} "
+                                f"(track {event.track_id})"
+                            )
+                elif item.result:
+                    for name in item.result:
+                        print(f"[{item.camera}] Recognized: {name}")
+                now = time.perf_counter()
+                if args.stats_every and now - last_report >= args.stats_every:
+                    print(format_camera_stats(service.stats()))
+                    last_report = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(format_camera_stats(service.stats()))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        log_error(e)
@@ -14,45 +14,127 @@ if __name__ == "__main__":
     if parent_dir not in sys.path:
         sys.path.insert(0, parent_dir)
 
-import pickle
+import argparse
 
-import cv2
-
-from src.config import ENCODINGS_PATH
+from src.config import (
+    DETECTION_SCALE,
+    PIPELINE_DROP_POLICY,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_WORKERS,
+    TRACKING_CV_TRACKER,
+    TRACKING_DETECT_EVERY,
+    TRACKING_ENABLED,
+)
+from src.utils.encodings_store import load_gallery
 from src.utils.error_handling import log_error, safe_run
-from src.utils.face_utils import recognize_faces_in_frame
+from src.utils.face_utils import detect_faces, encode_faces, recognize_faces_in_frame
+from src.utils.pipeline import DROP_POLICIES, RecognitionPipeline, format_stats
+from src.utils.tracking import FaceTracker, opencv_tracker_factory
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Real-time face recognition")
+    parser.add_argument(
+        "--source",
+        default="0",
+        help="camera index, video file, RTSP URL or 'fake[:frames]' (default: 0)",
+    )
+    parser.add_argument("--headless", action="store_true", help="do not open a window")
+    parser.add_argument(
+        "--detection-scale",
+        type=float,
+        default=DETECTION_SCALE,
+        help="resize factor for face detection (default from config)",
+    )
+    parser.add_argument(
+        "--no-track",
+        dest="track",
+        action="store_false",
+        default=TRACKING_ENABLED,
+        help="recognize every frame instead of tracking faces between detections",
+    )
+    parser.add_argument(
+        "--detect-every",
+        type=int,
+        default=TRACKING_DETECT_EVERY,
+        help="with tracking, run full detection every N frames",
+    )
+    parser.add_argument(
+        "--cv-tracker",
+        default=TRACKING_CV_TRACKER,
+        help="OpenCV tracker used between detections (e.g. mil, kcf)",
+    )
+    parser.add_argument("--workers", type=int, default=PIPELINE_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE)
+    parser.add_argument(
+        "--drop-policy", choices=DROP_POLICIES, default=PIPELINE_DROP_POLICY
+    )
+    parser.add_argument(
+        "--stats-every", type=int, default=100, help="print stats every N frames"
+    )
+    return parser.parse_args(argv)
 
 
 @safe_run
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+    import cv2
+
     print("Starting real-time face recognition...")
-    with open(ENCODINGS_PATH, "rb") as f:
-        db = pickle.load(f)
-        known_encodings = db["encodings"]
-        known_names = db["names"]
+    matcher = load_gallery()
+    if args.track:
+        tracker = FaceTracker(
+            matcher,
+            lambda rgb: detect_faces(rgb, args.detection_scale),
+            encode_faces,
+            detect_every=args.detect_every,
+            cv_tracker_factory=(
+                opencv_tracker_factory(args.cv_tracker) if args.cv_tracker else None
+            ),
+        )
 
-    video_capture = cv2.VideoCapture(0)
-    if not video_capture.isOpened():
-        raise IOError("Webcam not accessible.")
+        def process(frame):
+            return tracker.update(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
 
-    try:
-        while True:
-            ret, frame = video_capture.read()
-            if not ret:
-                print("Failed to grab frame.")
-                break
+        # The tracker needs frames in order, so it runs on a single worker.
+        workers = 1
+    else:
 
-            names = recognize_faces_in_frame(frame, known_encodings, known_names)
-            for name in names:
-                print(f"Recognized: {name}")
+        def process(frame):
+            return recognize_faces_in_frame(
+                frame, matcher, detection_scale=args.detection_scale
+            )
 
-            cv2.imshow("Face Recognition", frame)
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
+        workers = args.workers
+    pipeline = RecognitionPipeline(
+        args.source,
+        process,
+        workers=workers,
+        queue_size=args.queue_size,
+        drop_policy=args.drop_policy,
+    )
+    try:
+        with pipeline:
+            for item in pipeline.results():
+                if args.track and item.result is not None:
+                    # One line per identified track, not per frame.
+                    for event in item.result.events:
+                        if event.kind == "identified":
+                            print(f"Recognized: {event.name} (track {event.track_id})")
+                elif item.result:
+                    for name in item.result:
+                        print(f"Recognized: {name}")
+                if args.stats_every and (item.seq + 1) % args.stats_every == 0:
+                    print(format_stats(pipeline.stats()))
 
+                if not args.headless:
+                    cv2.imshow("Face Recognition", item.frame)
+                    if cv2.waitKey(1) & 0xFF == ord("q"):
+                        break
     finally:
-        video_capture.release()
-        cv2.destroyAllWindows()
+        print(format_stats(pipeline.stats()))
+        if not args.headless:
+            cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+"""
+Train the access models offline from the backend database's access_log.
+
+Fits the access-pattern anomaly model
+(:class:`utils.anomaly_detection.AccessAnomalyModel`) and the smart-access
+classifier (``ai_model.py``) on the latest ``--window-rows`` rows and saves
+each as a new version under ``--model-dir``, where the services load them
+on first use::
+
+    python -m src.main_train_models
+    python -m src.main_train_models --model anomaly --window-rows 100000
+"""
+
+import os
+import sys
+
+# Ensure the parent directory is in the path for imports to work
+# This allows running both as `python src/main_train_models.py`
+# and as `python -m src.main_train_models`
+if __name__ == "__main__":
+    # Add parent directory to path if running as script
+    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+
+import argparse
+import sqlite3
+
+from src.config import ANOMALY_WINDOW_ROWS, DATABASE_PATH, MODEL_DIR
+from src.utils.error_handling import log_error, safe_run
+
+MODELS = ("anomaly", "smart_access")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the access models")
+    parser.add_argument("--database", default=DATABASE_PATH)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--window-rows", type=int, default=ANOMALY_WINDOW_ROWS)
+    parser.add_argument(
+        "--model",
+        action="append",
+        dest="models",
+        choices=MODELS,
+        help="model to train (default: all)",
+    )
+    return parser.parse_args(argv)
+
+
+@safe_run
+def main(argv=None):
+    args = parse_args(argv)
+    import ai_model
+    from utils.anomaly_detection import AccessAnomalyModel
+    from utils.model_store import ModelStore
+
+    store = ModelStore(args.model_dir)
+    conn = sqlite3.connect(args.database)
+    trained = 0
+    try:
+        for name in args.models or MODELS:
+            try:
+                if name == "anomaly":
+                    model = AccessAnomalyModel(
+                        lambda: conn, store, window_rows=args.window_rows
+                    )
+                    version = model.train()
+                    metadata = model.metadata
+                else:
+                    version = ai_model.train_from_access_log(
+                        conn, store, args.window_rows
+                    )
+                    _, metadata = store.load(ai_model.MODEL_NAME, version)
+            except ValueError as exc:
+                print(f"{name}: not trained: {exc}")
+                continue
+            trained += 1
+            print(
+                f"{name}: version {version}, {metadata['rows']} rows, "
+                f"{metadata['train_seconds']:.2f} s"
+            )
+    finally:
+        conn.close()
+    return trained
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        log_error(e)
@@ -0,0 +1,44 @@
+"""
+Converts a legacy encodings.pickle into the memory-mapped encodings store.
+
+Usage:
+    python -m src.migrate_encodings
+    python src/migrate_encodings.py --pickle old.pickle --output encodings.frenc
+"""
+
+import os
+import sys
+
+# Ensure the parent directory is in the path for imports to work
+# This allows running both as `python src/migrate_encodings.py`
+# and as `python -m src.migrate_encodings`
+if __name__ == "__main__":
+    # Add parent directory to path if running as script
+    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+
+import argparse
+
+from src.config import ENCODINGS_PATH, ENCODINGS_STORE_PATH
+from src.utils.encodings_store import migrate_pickle
+from src.utils.error_handling import log_error, safe_run
+
+
+@safe_run
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pickle", default=ENCODINGS_PATH, help="legacy pickle")
+    parser.add_argument("--output", default=ENCODINGS_STORE_PATH, help="new store")
+    args = parser.parse_args(argv)
+
+    print(f"Migrating {args.pickle} -> {args.output}...")
+    count = migrate_pickle(args.pickle, args.output)
+    print(f"Migrated {count} encodings.")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        log_error(e)
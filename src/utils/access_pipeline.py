@@ -0,0 +1,244 @@
+"""
+Event-driven path from a recognized face to an unlocked door.
+
+:class:`AccessPipeline` connects three stages through an
+:class:`~src.utils.events.EventBus`, all in one process:
+
+1. ``face.recognized`` – a camera identified a face (a
+   :class:`Recognition`, usually from a tracker's ``"identified"`` event,
+   so once per track rather than once per frame);
+2. ``access.decision`` – the name was checked locally by ``decide`` (for
+   example :meth:`backend.user_cache.UserCache.is_allowed`) and an
+   :class:`AccessDecision` for the camera's door was published;
+3. ``door.unlock`` – for a granted decision the actuators were called
+   (GPIO, MQTT, ...) and a :class:`DoorCommand` was published.
+
+Every stage adds a ``time.perf_counter()`` timestamp, starting with the
+frame's capture time, so :meth:`AccessPipeline.stats` can report the
+latency of each stage and a histogram of the face-to-unlock latency.
+Decisions fail closed: unknown faces and lookup errors are denied.  A
+person who was let through a door is not let through it again within
+``cooldown`` seconds, so a face that is lost and re-tracked does not
+trigger a second unlock.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from src.config import ACCESS_COOLDOWN_S, UNKNOWN_NAME
+from src.utils.events import Event, EventBus
+from src.utils.metrics import LatencyHistogram, LatencyRecorder
+
+_logger = logging.getLogger(__name__)
+
+TOPIC_RECOGNIZED = "face.recognized"
+TOPIC_DECISION = "access.decision"
+TOPIC_UNLOCK = "door.unlock"
+
+STAGES = ("recognition", "decision", "actuation", "face_to_unlock")
+
+
+class Recognition(NamedTuple):
+    """A face identified by a camera."""
+
+    camera: str
+    name: str
+    track_id: int
+    captured_at: float  # frame capture, time.perf_counter()
+    recognized_at: float
+
+
+class AccessDecision(NamedTuple):
+    """The local access decision for one :class:`Recognition`."""
+
+    recognition: Recognition
+    door: str
+    granted: bool
+    decided_at: float
+
+
+class DoorCommand(NamedTuple):
+    """A door unlocked for a granted :class:`AccessDecision`."""
+
+    decision: AccessDecision
+    actuated_at: float
+
+    @property
+    def face_to_unlock(self) -> float:
+        """Seconds from frame capture until the actuators were called."""
+        return self.actuated_at - self.decision.recognition.captured_at
+
+
+# Unlocks the named door; must not block for long (such as
+# rpi_controller.DoorController.unlock, which relocks on its own thread).
+Actuator = Callable[[str], None]
+
+
+class AccessPipeline:
+    """
+    Recognition -> access decision -> door command, on an event bus.
+
+    Example:
+        >>> bus = EventBus().start()
+        >>> pipeline = AccessPipeline(bus, cache.is_allowed, [gpio_unlock])
+        >>> pipeline.recognized("front_door", "alice", track_id=7)
+        >>> bus.stop()
+    """
+
+    def __init__(
+        self,
+        bus: EventBus,
+        decide: Callable[[str], bool],
+        actuators: Sequence[Actuator],
+        doors: Optional[Dict[str, str]] = None,
+        cooldown: float = ACCESS_COOLDOWN_S,
+    ):
+        """
+        Args:
+            bus: Event bus the stages are connected through.
+            decide: Whether a recognized name may enter (runs on the bus's
+                dispatcher thread).
+            actuators: Called with the door name for every granted decision.
+            doors: Camera name -> door name; cameras not listed control the
+                door of the same name.
+            cooldown: Seconds during which the same person is not let
+                through the same door again (0 disables).
+        """
+        self.bus = bus
+        self.decide = decide
+        self.actuators = list(actuators)
+        self.doors = dict(doors or {})
+        self.cooldown = cooldown
+        self.latency = {stage: LatencyRecorder() for stage in STAGES}
+        self.histogram = LatencyHistogram()
+        self._lock = threading.Lock()
+        self._last_unlock: Dict[Tuple[str, str], float] = {}
+        self._counts = dict.fromkeys(
+            ("recognized", "granted", "denied", "unlocks", "suppressed", "errors"),
+            0,
+        )
+        bus.subscribe(TOPIC_RECOGNIZED, self._on_recognized)
+        bus.subscribe(TOPIC_DECISION, self._on_decision)
+
+    # -- producer API ------------------------------------------------------
+
+    def recognized(
+        self,
+        camera: str,
+        name: str,
+        track_id: int = 0,
+        captured_at: Optional[float] = None,
+    ) -> bool:
+        """
+        Publish a recognized face.
+
+        Args:
+            camera: Camera that saw the face.
+            name: Recognized identity (``"Unknown"`` is denied).
+            track_id: Tracker track the face belongs to.
+            captured_at: ``time.perf_counter()`` at frame capture (default:
+                now).
+
+        Returns:
+            ``False`` if the bus dropped the event because it is full.
+        """
+        now = time.perf_counter()
+        recognition = Recognition(
+            camera, name, track_id, now if captured_at is None else captured_at, now
+        )
+        self._count("recognized")
+        return self.bus.publish(TOPIC_RECOGNIZED, recognition)
+
+    def track_events(self, camera: str, events, captured_at: float) -> int:
+        """
+        Publish the ``"identified"`` events of a tracker frame (see
+        :class:`~src.utils.tracking.TrackEvent`).
+
+        Returns:
+            Number of recognitions published.
+        """
+        published = 0
+        for event in events:
+            if event.kind == "identified":
+                self.recognized(camera, event.name, event.track_id, captured_at)
+                published += 1
+        return published
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters (``recognized``, ``granted``, ``denied``, ``unlocks``,
+        ``suppressed`` by the cooldown, ``errors`` from ``decide`` or the
+        actuators), and per-stage ``latency`` summaries in milliseconds:
+        ``recognition`` (capture to identity), ``decision`` (identity to
+        decision, including bus queueing), ``actuation`` (decision to door
+        command) and ``face_to_unlock`` (capture to door command).
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counts)
+        stats["latency"] = {stage: rec.summary() for stage, rec in self.latency.items()}
+        return stats
+
+    # -- stages (bus dispatcher thread) ------------------------------------
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._counts[key] += n
+
+    def _on_recognized(self, event: Event) -> None:
+        recognition: Recognition = event.data
+        granted = False
+        if recognition.name != UNKNOWN_NAME:
+            try:
+                granted = bool(self.decide(recognition.name))
+            except Exception:
+                _logger.exception("Access decision failed for %r", recognition.name)
+                self._count("errors")
+        door = self.doors.get(recognition.camera, recognition.camera)
+        decision = AccessDecision(recognition, door, granted, time.perf_counter())
+        self._count("granted" if granted else "denied")
+        self.latency["recognition"].record(
+            recognition.recognized_at - recognition.captured_at
+        )
+        self.latency["decision"].record(decision.decided_at - recognition.recognized_at)
+        self.bus.publish(TOPIC_DECISION, decision)
+
+    def _on_decision(self, event: Event) -> None:
+        decision: AccessDecision = event.data
+        if not decision.granted:
+            return
+        key = (decision.door, decision.recognition.name)
+        with self._lock:
+            last = self._last_unlock.get(key)
+            if last is not None and decision.decided_at - last < self.cooldown:
+                self._counts["suppressed"] += 1
+                return
+            self._last_unlock[key] = decision.decided_at
+        for actuator in self.actuators:
+            try:
+                actuator(decision.door)
+            except Exception:
+                _logger.exception("Actuator failed for door %r", decision.door)
+                self._count("errors")
+        command = DoorCommand(decision, time.perf_counter())
+        self._count("unlocks")
+        self.latency["actuation"].record(command.actuated_at - decision.decided_at)
+        self.latency["face_to_unlock"].record(command.face_to_unlock)
+        self.histogram.record(command.face_to_unlock)
+        self.bus.publish(TOPIC_UNLOCK, command)
+
+
+def format_access_stats(stats: Dict[str, Any]) -> str:
+    """Render :meth:`AccessPipeline.stats` as a counter line and one line
+    per stage."""
+    lines = [
+        "Recognized: {recognized}  granted: {granted}  denied: {denied}  "
+        "unlocks: {unlocks}  suppressed: {suppressed}  errors: {errors}".format(**stats)
+    ]
+    for stage, s in stats["latency"].items():
+        lines.append(
+            f"  {stage:<15} p50 {s['p50_ms']:7.2f} ms  p95 {s['p95_ms']:7.2f} ms  "
+            f"p99 {s['p99_ms']:7.2f} ms  max {s['max_ms']:7.2f} ms"
+        )
+    return "\n".join(lines)
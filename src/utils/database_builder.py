@@ -0,0 +1,257 @@
+"""
+Parallel, incremental construction of the face encodings store.
+
+A JSON manifest records the path, mtime, size and SHA-256 of every image that
+was encoded.  On rerun only new or changed images are encoded (across a
+process pool); encodings for unchanged images are copied from the previous
+store and images that were deleted from ``KNOWN_FACES_DIR`` are dropped.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from src.config import BUILD_WORKERS, ENCODINGS_MANIFEST_PATH, ENCODINGS_STORE_PATH
+from src.utils.encodings_store import open_encodings, save_encodings
+
+MANIFEST_VERSION = 1
+
+# Images sent to a worker per task; large enough to amortise IPC, small
+# enough to keep progress reporting smooth.
+_BATCH_SIZE = 16
+
+
+class ImageFile(NamedTuple):
+    """An image found under the known-faces directory."""
+
+    person: str
+    path: str
+    mtime_ns: int
+    size: int
+
+
+class BuildStats(NamedTuple):
+    """Summary of a database build."""
+
+    total: int
+    encoded: int  # images encoded on this run
+    no_face: int  # images processed on this run with no face found
+    reused: int
+    deleted: int
+    failed: int
+    seconds: float
+
+
+def scan_directory(directory: str) -> Dict[str, ImageFile]:
+    """
+    List images under *directory*, keyed by ``person/filename``.
+
+    Each subdirectory name is the person's name, as for
+    :func:`~src.utils.face_utils.encode_faces_in_directory`.  Hidden files
+    are ignored.
+    """
+    files = {}
+    for person in sorted(os.listdir(directory)):
+        person_folder = os.path.join(directory, person)
+        if not os.path.isdir(person_folder):
+            continue
+        for img_name in sorted(os.listdir(person_folder)):
+            if img_name.startswith("."):
+                continue
+            img_path = os.path.join(person_folder, img_name)
+            stat = os.stat(img_path)
+            files[f"{person}/{img_name}"] = ImageFile(
+                person, img_path, stat.st_mtime_ns, stat.st_size
+            )
+    return files
+
+
+def file_digest(path: str) -> str:
+    """Return the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path: str = ENCODINGS_MANIFEST_PATH) -> Dict[str, dict]:
+    """
+    Read the build manifest, returning an empty one if none exists.
+
+    A manifest from an unknown version is ignored, which forces a full
+    rebuild rather than trusting stale entries.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(files: Dict[str, dict], path: str = ENCODINGS_MANIFEST_PATH) -> None:
+    """Atomically write the build manifest."""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _encode_batch(encode_fn: Callable, paths: List[str]) -> List[tuple]:
+    """
+    Worker task: hash and encode each image.
+
+    Returns:
+        One ``(encoding, sha256, error)`` tuple per path.
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append((encode_fn(path), file_digest(path), None))
+        except Exception as exc:  # a bad image must not abort the build
+            results.append((None, None, f"{type(exc).__name__}: {exc}"))
+    return results
+
+
+def _is_unchanged(entry: dict, image: ImageFile) -> bool:
+    if entry["mtime_ns"] == image.mtime_ns and entry["size"] == image.size:
+        return True
+    # Touched but possibly identical (e.g. re-copied): compare content.
+    return entry["size"] == image.size and entry["sha256"] == file_digest(image.path)
+
+
+def print_progress(done: int, total: int, elapsed: float) -> None:
+    """Default progress reporter: one line with count and throughput."""
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"Encoded {done}/{total} images ({rate:.1f} images/s)")
+
+
+def _default_encode_fn(path: str):
+    from src.utils.face_utils import encode_image
+
+    return encode_image(path)
+
+
+def build_database(
+    directory: str,
+    store_path: str = ENCODINGS_STORE_PATH,
+    manifest_path: str = ENCODINGS_MANIFEST_PATH,
+    workers: Optional[int] = BUILD_WORKERS,
+    encode_fn: Callable = _default_encode_fn,
+    progress: Optional[Callable[[int, int, float], None]] = print_progress,
+    progress_interval: float = 2.0,
+    full: bool = False,
+) -> BuildStats:
+    """
+    Incrementally (re)build the encodings store for *directory*.
+
+    Args:
+        directory: Known-faces directory with one subdirectory per person.
+        store_path: Encodings store to update.
+        manifest_path: Manifest describing the images behind the store.
+        workers: Encoding processes; ``None`` uses every CPU, ``0`` or ``1``
+            encodes in the calling process.
+        encode_fn: Picklable callable mapping an image path to its first face
+            encoding, or ``None`` when no face is found.
+        progress: Called as ``progress(done, total, elapsed_seconds)`` at most
+            every *progress_interval* seconds and once at the end.
+        progress_interval: Minimum seconds between progress reports.
+        full: Ignore the manifest and re-encode every image.
+
+    Returns:
+        A :class:`BuildStats` summary.
+    """
+    start = time.perf_counter()
+    files = scan_directory(directory)
+    manifest = {} if full else load_manifest(manifest_path)
+
+    previous: Dict[str, int] = {}
+    old_encodings = None
+    if manifest and os.path.exists(store_path):
+        store = open_encodings(store_path)
+        previous = {key: row for row, key in enumerate(store.ids)}
+        old_encodings = store.encodings
+
+    new_manifest: Dict[str, dict] = {}
+    reused: Dict[str, np.ndarray] = {}
+    pending: List[str] = []
+    for key, image in files.items():
+        entry = manifest.get(key)
+        if (
+            entry is not None
+            and (key in previous or not entry["has_face"])
+            and _is_unchanged(entry, image)
+        ):
+            new_manifest[key] = dict(entry, mtime_ns=image.mtime_ns)
+            if entry["has_face"]:
+                reused[key] = old_encodings[previous[key]]
+        else:
+            pending.append(key)
+
+    encoded: Dict[str, np.ndarray] = {}
+    failed = no_face = 0
+    total = len(pending)
+    done = 0
+    last_report = start
+
+    def record(keys, results):
+        nonlocal done, failed, no_face, last_report
+        for key, (encoding, digest, error) in zip(keys, results):
+            image = files[key]
+            if error is not None:
+                failed += 1
+                print(f"Skipping {image.path}: {error}")
+                continue
+            new_manifest[key] = {
+                "mtime_ns": image.mtime_ns,
+                "size": image.size,
+                "sha256": digest,
+                "has_face": encoding is not None,
+            }
+            if encoding is not None:
+                encoded[key] = encoding
+            else:
+                no_face += 1
+        done += len(keys)
+        now = time.perf_counter()
+        if progress and (now - last_report >= progress_interval or done == total):
+            progress(done, total, now - start)
+            last_report = now
+
+    batches = [pending[i : i + _BATCH_SIZE] for i in range(0, total, _BATCH_SIZE)]
+    if workers is not None and workers <= 1:
+        for keys in batches:
+            record(keys, _encode_batch(encode_fn, [files[k].path for k in keys]))
+    elif batches:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    _encode_batch, encode_fn, [files[k].path for k in keys]
+                ): keys
+                for keys in batches
+            }
+            for future in as_completed(futures):
+                record(futures[future], future.result())
+
+    keys = sorted(set(reused) | set(encoded))
+    vectors = [reused[k] if k in reused else encoded[k] for k in keys]
+    save_encodings(store_path, vectors, [files[k].person for k in keys], ids=keys)
+    save_manifest(new_manifest, manifest_path)
+
+    deleted = sum(1 for key in manifest if key not in files)
+    return BuildStats(
+        total=len(files),
+        encoded=len(encoded),
+        no_face=no_face,
+        reused=len(files) - total,
+        deleted=deleted,
+        failed=failed,
+        seconds=time.perf_counter() - start,
+    )
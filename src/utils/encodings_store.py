@@ -0,0 +1,286 @@
+"""
+Versioned, memory-mappable on-disk store for face encodings.
+
+Replaces the ``encodings.pickle`` file written by ``main_build_database``.
+Readers map the file with ``np.memmap`` instead of unpickling it, so opening
+a gallery costs the same regardless of its size and every recognition worker
+on a host shares one page-cached copy of the data.
+
+File layout (all integers little-endian, sections 64-byte aligned)::
+
+    header    64 bytes   magic, format version, dim, count, section offsets
+    matrix    float32    (count, dim) encodings, C order
+    norms     float32    (count,) squared L2 norms of each encoding
+    names     string table: uint64 offsets (count + 1) + UTF-8 blob
+    ids       string table: per-encoding source id (e.g. image path)
+
+Use :func:`save_encodings` to write, :func:`open_encodings` to map, and
+:func:`migrate_pickle` to convert a legacy pickle.
+"""
+
+import os
+import pickle
+import struct
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from src.config import ENCODINGS_PATH, ENCODINGS_STORE_PATH, FACE_TOLERANCE
+from src.utils.matcher import FaceMatcher
+
+MAGIC = b"FRENC\x00\x00\x00"
+FORMAT_VERSION = 1
+
+# magic, version, dim, count, then offsets of matrix, norms, names, ids and
+# the end of the ids table.
+_HEADER = struct.Struct("<8sIIQQQQQQ")
+_HEADER_SIZE = 64
+_ALIGN = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class StringTable(Sequence[str]):
+    """
+    Read-only sequence of strings backed by an offsets array and a blob.
+
+    Strings are decoded on access, so opening a table with a million entries
+    does no per-entry work.
+    """
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return max(len(self._offsets) - 1, 0)
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("string table index out of range")
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _encode_strings(values: Sequence[str]) -> bytes:
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets.tobytes() + b"".join(encoded)
+
+
+class EncodingStore:
+    """
+    An opened encodings file.
+
+    Attributes:
+        path: File the store was read from.
+        version: On-disk format version.
+        encodings: ``(count, dim)`` float32 array (an ``np.memmap`` when the
+            store was opened with ``mmap=True``).
+        sq_norms: ``(count,)`` float32 squared norms of ``encodings``.
+        names: Person name per encoding.
+        ids: Source identifier per encoding (empty strings when unknown).
+    """
+
+    def __init__(self, path, version, encodings, sq_norms, names, ids):
+        self.path = path
+        self.version = version
+        self.encodings = encodings
+        self.sq_norms = sq_norms
+        self.names = names
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return self.encodings.shape[0]
+
+    def to_matcher(self, tolerance: float = FACE_TOLERANCE) -> FaceMatcher:
+        """Build a :class:`~src.utils.matcher.FaceMatcher` over this store."""
+        return FaceMatcher(
+            self.encodings, self.names, tolerance, sq_norms=self.sq_norms
+        )
+
+
+def save_encodings(
+    path: str,
+    encodings,
+    names: Sequence[str],
+    ids: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Write encodings to *path* in the binary store format.
+
+    The file is written next to *path* and atomically renamed into place,
+    so processes that already mapped the previous version keep a consistent
+    view until they reopen it.
+
+    Args:
+        path: Destination file.
+        encodings: Encodings, shape ``(n, d)`` or a list of ``n`` vectors.
+        names: Person name per encoding.
+        ids: Optional source identifier per encoding.
+
+    Raises:
+        ValueError: If the lengths of the inputs disagree.
+    """
+    matrix = np.ascontiguousarray(encodings, dtype="<f4")
+    if matrix.size == 0:
+        matrix = matrix.reshape(0, 128)
+    count, dim = matrix.shape
+    ids = list(ids) if ids is not None else [""] * count
+    if len(names) != count or len(ids) != count:
+        raise ValueError(
+            f"Got {count} encodings, {len(names)} names and {len(ids)} ids"
+        )
+
+    norms = np.einsum("ij,ij->i", matrix, matrix).astype("<f4")
+    names_blob = _encode_strings(names)
+    ids_blob = _encode_strings(ids)
+
+    matrix_off = _align(_HEADER_SIZE)
+    norms_off = _align(matrix_off + matrix.nbytes)
+    names_off = _align(norms_off + norms.nbytes)
+    ids_off = _align(names_off + len(names_blob))
+    end = ids_off + len(ids_blob)
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        dim,
+        count,
+        matrix_off,
+        norms_off,
+        names_off,
+        ids_off,
+        end,
+    )
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        for offset, chunk in (
+            (0, header),
+            (matrix_off, matrix.tobytes()),
+            (norms_off, norms.tobytes()),
+            (names_off, names_blob),
+            (ids_off, ids_blob),
+        ):
+            f.seek(offset)
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def _string_table(raw: np.ndarray, start: int, end: int, count: int) -> StringTable:
+    offsets_end = start + (count + 1) * 8
+    offsets = raw[start:offsets_end].view("<u8")
+    return StringTable(offsets, raw[offsets_end:end])
+
+
+def open_encodings(
+    path: str = ENCODINGS_STORE_PATH, mmap: bool = True
+) -> EncodingStore:
+    """
+    Open an encodings store.
+
+    Args:
+        path: Store file to open.
+        mmap: Map the file read-only (default).  With ``False`` the whole
+            file is read into private memory instead.
+
+    Returns:
+        An :class:`EncodingStore`.
+
+    Raises:
+        ValueError: If the file is not an encodings store or was written
+            by an unsupported format version.
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HEADER_SIZE)
+    if len(header) < _HEADER.size or header[:8] != MAGIC:
+        raise ValueError(f"{path} is not a Face-Recon encodings store")
+    (_, version, dim, count, matrix_off, norms_off, names_off, ids_off, end) = (
+        _HEADER.unpack_from(header)
+    )
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"{path} uses encodings format v{version}; "
+            f"this build reads v{FORMAT_VERSION}"
+        )
+
+    if mmap:
+        raw = np.memmap(path, dtype=np.uint8, mode="r", shape=(end,))
+    else:
+        raw = np.fromfile(path, dtype=np.uint8, count=end)
+    matrix = raw[matrix_off : matrix_off + count * dim * 4].view("<f4")
+    encodings = matrix.reshape(count, dim)
+    sq_norms = raw[norms_off : norms_off + count * 4].view("<f4")
+    return EncodingStore(
+        path,
+        version,
+        encodings,
+        sq_norms,
+        _string_table(raw, names_off, ids_off, count),
+        _string_table(raw, ids_off, end, count),
+    )
+
+
+def load_legacy_pickle(path: str = ENCODINGS_PATH):
+    """
+    Read an ``encodings.pickle`` written by older builds.
+
+    Returns:
+        Tuple of ``(encodings, names)`` lists.
+    """
+    with open(path, "rb") as f:
+        db = pickle.load(f)
+    return db["encodings"], db["names"]
+
+
+def migrate_pickle(
+    pickle_path: str = ENCODINGS_PATH, store_path: str = ENCODINGS_STORE_PATH
+) -> int:
+    """
+    Convert a legacy pickle into the binary store format.
+
+    Returns:
+        Number of encodings migrated.
+    """
+    encodings, names = load_legacy_pickle(pickle_path)
+    save_encodings(store_path, encodings, names)
+    return len(names)
+
+
+def load_gallery(
+    store_path: str = ENCODINGS_STORE_PATH,
+    pickle_path: str = ENCODINGS_PATH,
+    tolerance: float = FACE_TOLERANCE,
+) -> FaceMatcher:
+    """
+    Load the known-faces gallery as a :class:`~src.utils.matcher.FaceMatcher`.
+
+    The binary store is preferred; a legacy pickle is used only when no store
+    exists yet (run ``python -m src.migrate_encodings`` to convert it).
+
+    Raises:
+        FileNotFoundError: If neither file exists.
+    """
+    if os.path.exists(store_path):
+        return open_encodings(store_path).to_matcher(tolerance)
+    if os.path.exists(pickle_path):
+        encodings, names = load_legacy_pickle(pickle_path)
+        return FaceMatcher(encodings, names, tolerance)
+    raise FileNotFoundError(
+        f"No encodings found at {store_path} or {pickle_path}; "
+        "run main_build_database first"
+    )
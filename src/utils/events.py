@@ -0,0 +1,211 @@
+"""
+In-process publish/subscribe event bus.
+
+Producers such as the recognition service call :meth:`EventBus.publish`
+and return at once; a dispatcher thread calls the handlers subscribed to
+the event's topic, in publish order.  A slow or failing handler therefore
+never stalls a camera, and a handler exception is logged and counted
+instead of reaching the producer.
+
+The queue is bounded: when ``max_queue`` events are waiting, new events
+are dropped (and counted) rather than blocking the producer.  With
+``threaded=False`` handlers run inline in :meth:`EventBus.publish`, which
+is convenient in tests.
+
+Example:
+    >>> bus = EventBus().start()
+    >>> bus.subscribe("door.unlock", lambda event: print(event.data))
+    >>> bus.publish("door.unlock", "front_door")
+    >>> bus.stop()  # delivers what is still queued
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from src.config import EVENT_QUEUE_SIZE
+
+_logger = logging.getLogger(__name__)
+
+ALL_TOPICS = "*"
+
+
+class Event(NamedTuple):
+    """One published event."""
+
+    topic: str
+    data: Any
+    published_at: float  # time.perf_counter()
+
+
+Handler = Callable[[Event], None]
+
+
+class EventBus:
+    """Topic-based event bus with one dispatcher thread."""
+
+    def __init__(self, max_queue: int = EVENT_QUEUE_SIZE, threaded: bool = True):
+        """
+        Args:
+            max_queue: Most events waiting for delivery; later ones are
+                dropped until there is room again.
+            threaded: Deliver on a dispatcher thread (see :meth:`start`);
+                ``False`` runs the handlers inside :meth:`publish`.
+        """
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        self.max_queue = max_queue
+        self.threaded = threaded
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._events: deque = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+        self._errors = 0
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "EventBus":
+        """Start the dispatcher thread (no-op if running or not threaded)."""
+        with self._cond:
+            if not self.threaded or self.running:
+                return self
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="event-bus", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Deliver the queued events (and those their handlers publish), then
+        stop the dispatcher thread.
+
+        Returns:
+            ``True`` if every queued event was delivered.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._cond:
+            return not self._events
+
+    def __enter__(self) -> "EventBus":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # -- API ---------------------------------------------------------------
+
+    def subscribe(self, topic: str, handler: Handler) -> Callable[[], None]:
+        """
+        Call *handler* with every event published on *topic* (``"*"`` for
+        all topics).
+
+        Returns:
+            A function that removes the subscription.
+        """
+        with self._cond:
+            # Copy on write, so the dispatcher can iterate without the lock.
+            handlers = dict(self._handlers)
+            handlers[topic] = handlers.get(topic, []) + [handler]
+            self._handlers = handlers
+
+        def unsubscribe() -> None:
+            with self._cond:
+                handlers = dict(self._handlers)
+                remaining = [h for h in handlers.get(topic, []) if h is not handler]
+                handlers[topic] = remaining
+                self._handlers = handlers
+
+        return unsubscribe
+
+    def publish(self, topic: str, data: Any = None) -> bool:
+        """
+        Queue an event for the handlers of *topic*.
+
+        Returns:
+            ``False`` if the event was dropped because the queue is full.
+
+        Raises:
+            RuntimeError: If the bus has been stopped.
+        """
+        event = Event(topic, data, time.perf_counter())
+        if not self.threaded:
+            with self._cond:
+                self._published += 1
+            self._deliver(event)
+            return True
+        with self._cond:
+            # Handlers may still publish while stop() drains the queue.
+            if self._stopping and threading.current_thread() is not self._thread:
+                raise RuntimeError("Event bus is stopped")
+            if len(self._events) >= self.max_queue:
+                self._dropped += 1
+                return False
+            self._events.append(event)
+            self._published += 1
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until every event published so far has been delivered,
+        including events published by handlers meanwhile."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._events and not self._busy, timeout=timeout
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Counters: ``queued``, ``published``, ``delivered`` (handler
+        calls), ``dropped`` (queue full) and ``errors`` (handler exceptions)."""
+        with self._cond:
+            return {
+                "queued": len(self._events),
+                "published": self._published,
+                "delivered": self._delivered,
+                "dropped": self._dropped,
+                "errors": self._errors,
+            }
+
+    # -- dispatcher --------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+                self._cond.wait_for(lambda: self._events or self._stopping)
+                if not self._events:
+                    return
+                event = self._events.popleft()
+                self._busy = True
+            self._deliver(event)
+
+    def _deliver(self, event: Event) -> None:
+        handlers = self._handlers
+        delivered = errors = 0
+        for handler in handlers.get(event.topic, []) + handlers.get(ALL_TOPICS, []):
+            try:
+                handler(event)
+                delivered += 1
+            except Exception:
+                _logger.exception("Event handler failed for %r", event.topic)
+                errors += 1
+        with self._cond:
+            self._delivered += delivered
+            self._errors += errors
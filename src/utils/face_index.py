@@ -0,0 +1,432 @@
+"""
+Pluggable nearest-neighbour index backends for face encoding galleries.
+
+Two backends are provided, both in pure NumPy:
+
+- ``"brute"`` – :class:`BruteForceIndex`, an exact scan over a float32
+  matrix.  Cost grows linearly with gallery size.
+- ``"ivfpq"`` – :class:`IVFPQIndex`, an inverted file with product-quantized
+  residuals (IVF-PQ).  Encodings are bucketed around ``nlist`` k-means
+  centroids; a query only visits the ``nprobe`` closest buckets and scores
+  compressed codes through per-query lookup tables.  The best candidates can
+  optionally be re-ranked with exact distances.
+
+Recall vs. latency is tuned with ``nprobe`` (buckets visited) and ``rerank``
+(candidates re-scored exactly).  Defaults come from ``src/config.py``; use
+:func:`create_index` to build whichever backend is configured.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.config import (
+    INDEX_BACKEND,
+    INDEX_MIN_TRAIN_SIZE,
+    IVF_NLIST,
+    IVF_NPROBE,
+    IVF_RERANK,
+    PQ_BITS,
+    PQ_SUBQUANTIZERS,
+)
+
+# Rows scored per block when assigning many vectors to centroids, which keeps
+# the temporary distance matrix to a few tens of megabytes.
+_ASSIGN_BLOCK = 8192
+
+
+def squared_distances(
+    queries: np.ndarray, matrix: np.ndarray, matrix_sq_norms: np.ndarray
+) -> np.ndarray:
+    """
+    Squared Euclidean distances between every query and every matrix row.
+
+    Args:
+        queries: Float32 array, shape ``(f, d)``.
+        matrix: Float32 array, shape ``(n, d)``.
+        matrix_sq_norms: Precomputed ``|row|^2`` for *matrix*, shape ``(n,)``.
+
+    Returns:
+        Float32 array of shape ``(f, n)``, clipped at zero.
+    """
+    sq = queries @ matrix.T
+    sq *= -2.0
+    sq += matrix_sq_norms
+    sq += np.einsum("ij,ij->i", queries, queries)[:, None]
+    # Rounding can push near-identical vectors slightly below zero.
+    np.maximum(sq, 0.0, out=sq)
+    return sq
+
+
+def _row_sq_norms(matrix: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", matrix, matrix)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the index of the nearest centroid for every vector."""
+    norms = _row_sq_norms(centroids)
+    labels = np.empty(vectors.shape[0], dtype=np.intp)
+    for start in range(0, vectors.shape[0], _ASSIGN_BLOCK):
+        block = vectors[start : start + _ASSIGN_BLOCK]
+        labels[start : start + len(block)] = np.argmin(
+            squared_distances(block, centroids, norms), axis=1
+        )
+    return labels
+
+
+def kmeans(vectors: np.ndarray, k: int, n_iter: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Lloyd's k-means in NumPy.
+
+    Args:
+        vectors: Float32 training data, shape ``(n, d)`` with ``n >= k``.
+        k: Number of centroids.
+        n_iter: Number of assignment/update rounds.
+        seed: Random seed used for initialisation and empty-cluster reseeding.
+
+    Returns:
+        Float32 centroid matrix of shape ``(k, d)``.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(vectors.shape[0], k, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _assign(vectors, centroids)
+        counts = np.bincount(labels, minlength=k)
+        filled = np.flatnonzero(counts)
+        starts = (np.cumsum(counts) - counts)[filled]
+        sums = np.add.reduceat(vectors[np.argsort(labels, kind="stable")], starts)
+        centroids[filled] = sums / counts[filled, None]
+        empty = counts == 0
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(vectors.shape[0], empty.sum())]
+    return centroids
+
+
+class FaceIndex:
+    """
+    Base class for gallery indexes.
+
+    Vectors are identified by their insertion position, so ids returned by
+    :meth:`search` index directly into the gallery's names list.
+    """
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def add(self, encodings) -> None:
+        """Append encodings to the index."""
+        raise NotImplementedError
+
+    def search(self, queries, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the *k* nearest gallery entries for each query.
+
+        Args:
+            queries: Query encodings, shape ``(f, d)``.
+            k: Number of neighbours to return per query.
+
+        Returns:
+            Tuple ``(distances, ids)``, each of shape ``(f, k)``, sorted by
+            increasing Euclidean distance.  Missing neighbours are reported
+            as id ``-1`` with distance ``inf``.
+        """
+        raise NotImplementedError
+
+
+def _empty_result(count: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    return (
+        np.full((count, k), np.inf, dtype=np.float32),
+        np.full((count, k), -1, dtype=np.intp),
+    )
+
+
+def _top_k(sq: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Select the *k* smallest squared distances per row, sorted."""
+    count, n = sq.shape
+    if n == 0:
+        return _empty_result(count, k)
+    kk = min(k, n)
+    if kk < n:
+        ids = np.argpartition(sq, kk - 1, axis=1)[:, :kk]
+    else:
+        ids = np.broadcast_to(np.arange(n), (count, n)).copy()
+    part = np.take_along_axis(sq, ids, axis=1)
+    order = np.argsort(part, axis=1)
+    ids = np.take_along_axis(ids, order, axis=1)
+    dist = np.sqrt(np.take_along_axis(part, order, axis=1))
+    if kk < k:
+        pad_dist, pad_ids = _empty_result(count, k - kk)
+        dist = np.hstack([dist, pad_dist])
+        ids = np.hstack([ids, pad_ids])
+    return dist, ids
+
+
+class BruteForceIndex(FaceIndex):
+    """Exact search over a contiguous float32 matrix."""
+
+    def __init__(self, dim: int = 128):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def add(self, encodings, sq_norms: Optional[np.ndarray] = None) -> None:
+        """
+        Append encodings to the index.
+
+        Args:
+            encodings: Encodings to add, shape ``(n, d)``.  A float32
+                C-contiguous array (including an ``np.memmap``) added to an
+                empty index is used in place without copying.
+            sq_norms: Optional precomputed squared norms of *encodings*.
+        """
+        vectors = np.ascontiguousarray(encodings, dtype=np.float32)
+        if sq_norms is None:
+            sq_norms = _row_sq_norms(vectors)
+        if len(self) == 0:
+            self.vectors = vectors
+            self._sq_norms = np.asarray(sq_norms, dtype=np.float32)
+        else:
+            self.vectors = np.vstack([self.vectors, vectors])
+            self._sq_norms = np.concatenate([self._sq_norms, sq_norms])
+
+    def search(self, queries, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if len(self) == 0 or queries.shape[0] == 0:
+            return _empty_result(queries.shape[0], k)
+        return _top_k(squared_distances(queries, self.vectors, self._sq_norms), k)
+
+
+class IVFPQIndex(FaceIndex):
+    """
+    Inverted-file index with product-quantized residuals.
+
+    Each encoding is stored as ``m`` one-byte codes (for the default 8-bit
+    quantizers), i.e. 16 bytes instead of 512 for a 128-d float32 vector.
+    When ``rerank`` is non-zero the float32 vectors are also kept so the best
+    ``rerank`` approximate candidates can be re-scored exactly, which lifts
+    recall@1 close to brute force at a small extra cost.
+    """
+
+    def __init__(
+        self,
+        nlist: int = IVF_NLIST,
+        nprobe: int = IVF_NPROBE,
+        m: int = PQ_SUBQUANTIZERS,
+        nbits: int = PQ_BITS,
+        rerank: int = IVF_RERANK,
+        n_iter: int = 20,
+        train_size: int = 65536,
+        seed: int = 0,
+    ):
+        """
+        Configure an untrained index.
+
+        Args:
+            nlist: Number of inverted lists (coarse k-means centroids).
+            nprobe: Lists visited per query; higher is slower but more exact.
+            m: Number of PQ sub-quantizers; must divide the encoding size.
+            nbits: Bits per sub-quantizer code (at most 8).
+            rerank: Approximate candidates re-scored exactly (0 disables).
+            n_iter: k-means iterations used during :meth:`train`.
+            train_size: Maximum number of vectors sampled for training.
+            seed: Random seed for training.
+        """
+        if not 1 <= nbits <= 8:
+            raise ValueError("nbits must be between 1 and 8")
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.m = m
+        self.ksub = 2**nbits
+        self.rerank = rerank
+        self.n_iter = n_iter
+        self.train_size = train_size
+        self.seed = seed
+        self.coarse: Optional[np.ndarray] = None
+        self.codebooks: Optional[np.ndarray] = None
+        self._codebook_norms: Optional[np.ndarray] = None
+        self._codes = np.empty((0, m), dtype=np.uint8)
+        self._list_ids = np.empty(0, dtype=np.intp)
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._vector_norms = np.empty(0, dtype=np.float32)
+        self._sorted_ids = np.empty(0, dtype=np.intp)
+        self._sorted_codes = self._codes
+        self._offsets = np.zeros(1, dtype=np.intp)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.coarse is not None
+
+    def __len__(self) -> int:
+        return self._codes.shape[0]
+
+    def train(self, encodings) -> None:
+        """
+        Learn the coarse centroids and PQ codebooks.
+
+        At most ``train_size`` randomly sampled encodings are used.  ``nlist``
+        and the codebook size are clamped to the amount of training data, so
+        small galleries still produce a usable (if coarse) index.
+        """
+        vectors = np.ascontiguousarray(encodings, dtype=np.float32)
+        if vectors.shape[0] > self.train_size:
+            rng = np.random.default_rng(self.seed)
+            sample = rng.choice(vectors.shape[0], self.train_size, replace=False)
+            vectors = vectors[sample]
+        n, dim = vectors.shape
+        if dim % self.m:
+            raise ValueError(f"m={self.m} must divide the encoding size {dim}")
+        self.nlist = max(1, min(self.nlist, n))
+        self.ksub = max(1, min(self.ksub, n))
+        self.coarse = kmeans(vectors, self.nlist, self.n_iter, self.seed)
+        residuals = vectors - self.coarse[_assign(vectors, self.coarse)]
+        sub = residuals.reshape(n, self.m, dim // self.m)
+        self.codebooks = np.stack(
+            [
+                kmeans(
+                    np.ascontiguousarray(sub[:, j]), self.ksub, self.n_iter, self.seed
+                )
+                for j in range(self.m)
+            ]
+        )
+        self._codebook_norms = np.einsum("jkd,jkd->jk", self.codebooks, self.codebooks)
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        n = residuals.shape[0]
+        sub = residuals.reshape(n, self.m, -1)
+        codes = np.empty((n, self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = _assign(np.ascontiguousarray(sub[:, j]), self.codebooks[j])
+        return codes
+
+    def add(self, encodings) -> None:
+        """
+        Quantize and append encodings.
+
+        Raises:
+            RuntimeError: If the index has not been trained.
+        """
+        if not self.is_trained:
+            raise RuntimeError("IVFPQIndex must be trained before adding vectors")
+        vectors = np.ascontiguousarray(encodings, dtype=np.float32)
+        lists = _assign(vectors, self.coarse)
+        codes = self._encode(vectors - self.coarse[lists])
+        self._codes = np.vstack([self._codes, codes])
+        self._list_ids = np.concatenate([self._list_ids, lists])
+        if self.rerank:
+            if self._vectors.size == 0:
+                self._vectors = vectors
+            else:
+                self._vectors = np.vstack([self._vectors, vectors])
+            self._vector_norms = _row_sq_norms(self._vectors)
+        # Group codes by inverted list so each probe reads one contiguous run.
+        self._sorted_ids = np.argsort(self._list_ids, kind="stable")
+        self._sorted_codes = self._codes[self._sorted_ids]
+        self._offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(self._list_ids, minlength=self.nlist))]
+        )
+
+    def _lookup_tables(self, query: np.ndarray, probes: np.ndarray) -> np.ndarray:
+        """Distances from each probed residual to every codeword, flattened."""
+        residuals = (query - self.coarse[probes]).reshape(len(probes), self.m, -1)
+        # (m, p, ds) @ (m, ds, ksub) -> (m, p, ksub), one small GEMM per
+        # sub-quantizer.
+        cross = np.matmul(
+            residuals.transpose(1, 0, 2), self.codebooks.transpose(0, 2, 1)
+        ).transpose(1, 0, 2)
+        tables = self._codebook_norms - 2.0 * cross
+        tables += np.einsum("pjd,pjd->pj", residuals, residuals)[:, :, None]
+        return tables.reshape(len(probes), -1)
+
+    def search(self, queries, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        count = queries.shape[0]
+        distances, ids = _empty_result(count, k)
+        if len(self) == 0 or count == 0:
+            return distances, ids
+
+        nprobe = min(self.nprobe, self.nlist)
+        coarse_sq = squared_distances(queries, self.coarse, _row_sq_norms(self.coarse))
+        probe_lists = np.argpartition(coarse_sq, nprobe - 1, axis=1)[:, :nprobe]
+        code_offsets = np.arange(self.m) * self.ksub
+        shortlist = max(k, self.rerank)
+
+        for row in range(count):
+            tables = self._lookup_tables(queries[row], probe_lists[row])
+            starts = self._offsets[probe_lists[row]]
+            sizes = self._offsets[probe_lists[row] + 1] - starts
+            if not sizes.any():
+                continue
+            # Flat positions of every code in the probed lists, plus the
+            # probe each one came from (to pick its lookup table).
+            probe_of = np.repeat(np.arange(nprobe), sizes)
+            positions = np.arange(sizes.sum()) + np.repeat(
+                starts - (np.cumsum(sizes) - sizes), sizes
+            )
+            codes = self._sorted_codes[positions] + code_offsets
+            cand_sq = tables[probe_of[:, None], codes].sum(axis=1)[None, :]
+            cand_ids = self._sorted_ids[positions]
+
+            if self.rerank:
+                _, best = _top_k(cand_sq, shortlist)
+                cand_ids = cand_ids[best[0][best[0] >= 0]]
+                cand_sq = squared_distances(
+                    queries[row : row + 1],
+                    self._vectors[cand_ids],
+                    self._vector_norms[cand_ids],
+                )
+            row_dist, row_pos = _top_k(cand_sq, k)
+            found = row_pos[0] >= 0
+            distances[row, found] = row_dist[0][found]
+            ids[row, found] = cand_ids[row_pos[0][found]]
+        return distances, ids
+
+
+INDEX_BACKENDS = {
+    "brute": BruteForceIndex,
+    "ivfpq": IVFPQIndex,
+}
+
+
+def create_index(
+    encodings,
+    backend: Optional[str] = None,
+    sq_norms: Optional[np.ndarray] = None,
+    **params,
+) -> FaceIndex:
+    """
+    Build and populate an index over *encodings*.
+
+    Args:
+        encodings: Gallery encodings, shape ``(n, d)``.
+        backend: ``"brute"`` or ``"ivfpq"``; defaults to
+            ``src.config.INDEX_BACKEND``.
+        sq_norms: Optional precomputed squared norms, used by brute force.
+        **params: Backend-specific keyword arguments (e.g. ``nprobe``).
+
+    Returns:
+        A populated :class:`FaceIndex`.  Galleries smaller than
+        ``INDEX_MIN_TRAIN_SIZE`` always use brute force, which is both exact
+        and faster at that size.
+
+    Raises:
+        ValueError: If *backend* is not a known backend name.
+    """
+    backend = backend or INDEX_BACKEND
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(
+            f"Unknown index backend '{backend}'; "
+            f"expected one of {sorted(INDEX_BACKENDS)}"
+        )
+    vectors = np.ascontiguousarray(encodings, dtype=np.float32)
+    if vectors.size == 0:
+        vectors = vectors.reshape(0, 128)
+    if backend == "brute" or vectors.shape[0] < INDEX_MIN_TRAIN_SIZE:
+        index = BruteForceIndex(vectors.shape[1])
+        index.add(vectors, sq_norms=sq_norms)
+        return index
+    index = INDEX_BACKENDS[backend](**params)
+    index.train(vectors)
+    index.add(vectors)
+    return index
@@ -1,23 +1,31 @@
 """
 Face recognition utility functions for encoding and recognizing faces.
+
+OpenCV, dlib (``face_recognition``) and NumPy are imported on first use,
+so importing this module is cheap, e.g. for ``--help`` or in a process
+that never sees a frame.
 """
 
 import os
-import sys
 
-# Ensure the parent directory is in the path for imports to work
-# This allows the module to be imported from various contexts
-# Go up three levels: src/utils/face_utils.py -> src/utils -> src -> project_root
-parent_dir = os.path.dirname(
-    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-)
-if parent_dir not in sys.path:
-    sys.path.insert(0, parent_dir)
+from src.config import DETECTION_MODEL, DETECTION_SCALE
+
+
+def encode_image(img_path):
+    """
+    Encode the first face found in an image file.
+
+    Args:
+        img_path: Path to the image.
 
-import cv2
+    Returns:
+        The 128-d face encoding, or ``None`` if no face was found.
+    """
+    import face_recognition
 
-import face_recognition
-from src.config import DETECTION_MODEL, FACE_TOLERANCE
+    image = face_recognition.load_image_file(img_path)
+    enc = face_recognition.face_encodings(image)
+    return enc[0] if len(enc) > 0 else None
 
 
 def encode_faces_in_directory(directory):
@@ -40,38 +48,96 @@ def encode_faces_in_directory(directory):
             continue
         for img_name in os.listdir(person_folder):
             img_path = os.path.join(person_folder, img_name)
-            image = face_recognition.load_image_file(img_path)
-            enc = face_recognition.face_encodings(image)
-            if len(enc) > 0:
-                encodings.append(enc[0])
+            enc = encode_image(img_path)
+            if enc is not None:
+                encodings.append(enc)
                 names.append(person_name)
     return encodings, names
 
 
-def recognize_faces_in_frame(frame, known_encodings, known_names):
+def detect_faces(rgb_frame, scale=None, model=DETECTION_MODEL):
+    """
+    Detect faces, optionally on a downscaled copy of the frame.
+
+    Detection cost grows with pixel count, so running HOG on a frame resized
+    by ``scale`` (e.g. 0.5 for a quarter of the pixels) is much cheaper.  The
+    boxes are mapped back to full-resolution coordinates, so encodings can
+    still be computed on the full-resolution face regions.
+
+    Args:
+        rgb_frame: RGB frame as a NumPy array.
+        scale: Resize factor for detection; defaults to
+            ``src.config.DETECTION_SCALE``.  ``1.0`` detects at full size.
+        model: ``"hog"`` or ``"cnn"``.
+
+    Returns:
+        List of ``(top, right, bottom, left)`` boxes in full-frame pixels.
+    """
+    import cv2
+    import face_recognition
+
+    scale = DETECTION_SCALE if scale is None else scale
+    if scale == 1.0:
+        return face_recognition.face_locations(rgb_frame, model=model)
+    small = cv2.resize(
+        rgb_frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+    )
+    locations = face_recognition.face_locations(small, model=model)
+    from src.utils.geometry import scale_face_locations
+
+    return scale_face_locations(locations, scale, rgb_frame.shape)
+
+
+def encode_faces(rgb_frame, locations):
+    """
+    Encode the faces at *locations* in an RGB frame.
+
+    Args:
+        rgb_frame: RGB frame as a NumPy array.
+        locations: ``(top, right, bottom, left)`` boxes in frame pixels.
+
+    Returns:
+        One 128-d encoding per box.
+    """
+    if not locations:
+        return []
+    import face_recognition
+
+    return face_recognition.face_encodings(rgb_frame, list(locations))
+
+
+def recognize_faces_in_frame(
+    frame, known_encodings, known_names=None, detection_scale=None
+):
     """
     Recognize faces in a video frame.
 
+    Faces are detected on a frame downscaled by ``DETECTION_SCALE`` and then
+    encoded from the full-resolution face regions only.  All faces in the
+    frame are matched against the gallery in one batched distance
+    computation, and each face takes the identity of its *closest* known
+    encoding within ``FACE_TOLERANCE``.
+
     Args:
         frame: OpenCV BGR format video frame
-        known_encodings: List of known face encodings
-        known_names: List of names corresponding to known encodings
+        known_encodings: A prebuilt :class:`~src.utils.matcher.FaceMatcher`,
+            or a list of known face encodings
+        known_names: List of names corresponding to known encodings (not
+            needed when a ``FaceMatcher`` is passed)
+        detection_scale: Override for ``DETECTION_SCALE`` (e.g. per camera)
 
     Returns:
         List of recognized names for each face found in frame.
         Returns "Unknown" for unrecognized faces.
     """
+    import cv2
+
+    from src.utils.matcher import as_matcher
+
+    matcher = as_matcher(known_encodings, known_names)
     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    face_locations = face_recognition.face_locations(rgb_frame, model=DETECTION_MODEL)
-    face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-    names = []
-    for encoding in face_encodings:
-        matches = face_recognition.compare_faces(
-            known_encodings, encoding, tolerance=FACE_TOLERANCE
-        )
-        name = "Unknown"
-        if True in matches:
-            first_match_index = matches.index(True)
-            name = known_names[first_match_index]
-        names.append(name)
-    return names
+    face_locations = detect_faces(rgb_frame, detection_scale)
+    face_encodings = encode_faces(rgb_frame, face_locations)
+    if not face_encodings:
+        return []
+    return [match.name for match in matcher.match(face_encodings)]
@@ -0,0 +1,97 @@
+"""
+Bounding-box helpers for face locations.
+
+Boxes use the ``face_recognition`` convention ``(top, right, bottom, left)``
+in pixel coordinates.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Box = Tuple[int, int, int, int]
+
+
+def scale_face_locations(
+    locations: Sequence[Box],
+    scale: float,
+    frame_shape: Optional[Tuple[int, ...]] = None,
+) -> List[Box]:
+    """
+    Map boxes found on a frame resized by *scale* back to the original frame.
+
+    Args:
+        locations: Boxes detected on the resized frame.
+        scale: Factor the frame was resized by before detection (e.g. 0.5).
+        frame_shape: Shape of the original frame; when given, boxes are
+            clamped to its bounds.
+
+    Returns:
+        Boxes in original-frame coordinates.
+    """
+    if scale <= 0:
+        raise ValueError("scale must be positive")
+    boxes = []
+    for top, right, bottom, left in locations:
+        box = [int(round(v / scale)) for v in (top, right, bottom, left)]
+        if frame_shape is not None:
+            height, width = frame_shape[:2]
+            box = [
+                min(max(box[0], 0), height),
+                min(max(box[1], 0), width),
+                min(max(box[2], 0), height),
+                min(max(box[3], 0), width),
+            ]
+        boxes.append(tuple(box))
+    return boxes
+
+
+def iou_matrix(boxes_a: Sequence[Box], boxes_b: Sequence[Box]) -> np.ndarray:
+    """
+    Intersection-over-union between every box in *boxes_a* and *boxes_b*.
+
+    Returns:
+        Float array of shape ``(len(boxes_a), len(boxes_b))``.
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(bottom - top, 0, None) * np.clip(right - left, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 1] - a[:, 3])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 1] - b[:, 3])
+    union = area_a[:, None] + area_b[None, :] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        iou = np.where(union > 0, inter / union, 0.0)
+    return iou
+
+
+def match_boxes(
+    boxes_a: Sequence[Box], boxes_b: Sequence[Box], min_iou: float = 0.5
+) -> List[Tuple[int, int]]:
+    """
+    Greedily pair boxes by highest IoU.
+
+    Args:
+        boxes_a: First set of boxes.
+        boxes_b: Second set of boxes.
+        min_iou: Minimum IoU for two boxes to be paired.
+
+    Returns:
+        List of ``(index_in_a, index_in_b)`` pairs; each box appears at most
+        once.
+    """
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return []
+    iou = iou_matrix(boxes_a, boxes_b)
+    pairs = []
+    for flat in np.argsort(-iou, axis=None):
+        i, j = divmod(int(flat), iou.shape[1])
+        if iou[i, j] < min_iou:
+            break
+        if any(i == p[0] or j == p[1] for p in pairs):
+            continue
+        pairs.append((i, j))
+    return pairs
@@ -0,0 +1,85 @@
+"""
+Import-time profiling for the startup-time budget.
+
+Each module is imported in a fresh interpreter under
+``python -X importtime``, so the measurement covers exactly what a cold
+worker pays before it can serve anything.  The report gives the module's
+cumulative import time, every module it pulled in and anything it printed,
+which is how the benchmark and the tests check ``IMPORT_TIME_BUDGETS_MS``
+and ``IMPORT_DEFERRED_MODULES``.
+"""
+
+import subprocess
+import sys
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional
+
+from src.config import BASE_DIR, IMPORT_DEFERRED_MODULES
+
+
+class ImportProfile(NamedTuple):
+    """Result of importing one module in a fresh interpreter."""
+
+    module: str
+    seconds: float  # Cumulative import time of the module itself
+    modules: FrozenSet[str]  # Every module imported after interpreter startup
+    stdout: str  # What the import printed
+
+
+def parse_importtime(stderr: str, module: str) -> ImportProfile:
+    """
+    Parse ``-X importtime`` output for an ``import module`` statement.
+
+    Raises:
+        ValueError: If *module* does not appear in the output.
+    """
+    seconds = None
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        modules.add(name)
+        if name == module:
+            seconds = int(cumulative) / 1e6
+    if seconds is None:
+        raise ValueError(f"{module} was not imported")
+    return ImportProfile(module, seconds, frozenset(modules), "")
+
+
+def profile_import(
+    module: str, repeats: int = 3, python: Optional[str] = None
+) -> ImportProfile:
+    """
+    Import *module* in *repeats* fresh interpreters and keep the fastest.
+
+    The first run may also compile bytecode, so the minimum is the stable
+    number.  Interpreters start in the repository root.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    best = None
+    for _ in range(max(repeats, 1)):
+        result = subprocess.run(
+            [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+        profile = parse_importtime(result.stderr, module)._replace(stdout=result.stdout)
+        if best is None or profile.seconds < best.seconds:
+            best = profile
+    return best
+
+
+def eager_imports(
+    profile: ImportProfile, deferred: Iterable[str] = IMPORT_DEFERRED_MODULES
+) -> List[str]:
+    """The packages in *deferred* that importing the module pulled in."""
+    top_level = {name.partition(".")[0] for name in profile.modules}
+    return sorted(set(deferred) & top_level)
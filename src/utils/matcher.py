@@ -0,0 +1,175 @@
+"""
+Vectorized nearest-neighbour matching of face encodings.
+
+``face_recognition.compare_faces`` compares one probe against a Python list
+of known encodings, converting the list to an array on every call.  The
+:class:`FaceMatcher` keeps the whole gallery in a single contiguous float32
+matrix and scores every face of a frame against it with one matrix product,
+returning the *closest* identity rather than the first one within tolerance.
+"""
+
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import FACE_TOLERANCE, UNKNOWN_NAME
+from src.utils.face_index import FaceIndex, create_index, squared_distances
+
+
+class MatchResult(NamedTuple):
+    """Best gallery match for a single probe encoding."""
+
+    name: str
+    distance: float
+    index: int
+
+
+class FaceMatcher:
+    """
+    Nearest-neighbour matcher over a float32 encoding matrix.
+
+    Squared Euclidean distances are computed for a whole batch of probes as
+    ``|q|^2 + |k|^2 - 2 q.k^T``, so the cost per frame is one BLAS matrix
+    product instead of one Python-level scan per detected face.  Searches go
+    through a :class:`~src.utils.face_index.FaceIndex`, which is exact brute
+    force unless ``INDEX_BACKEND`` selects an approximate backend.
+
+    Example:
+        >>> matcher = FaceMatcher(known_encodings, known_names)
+        >>> [m.name for m in matcher.match(frame_encodings)]
+        ['alice', 'Unknown']
+    """
+
+    def __init__(
+        self,
+        encodings: Sequence[np.ndarray],
+        names: Sequence[str],
+        tolerance: float = FACE_TOLERANCE,
+        index: Optional[FaceIndex] = None,
+        sq_norms: Optional[np.ndarray] = None,
+    ):
+        """
+        Build the gallery matrix.
+
+        Args:
+            encodings: Known face encodings, shape ``(n, d)`` or a list of
+                ``n`` vectors of length ``d``.
+            names: Person name for each encoding.
+            tolerance: Maximum Euclidean distance accepted as a match.
+            index: Prebuilt index over *encodings*; by default one is built
+                with :func:`~src.utils.face_index.create_index`.
+            sq_norms: Precomputed squared norms of *encodings*, e.g. from an
+                encodings store, so building the matcher does not touch
+                every row.
+
+        Raises:
+            ValueError: If encodings and names differ in length.
+        """
+        matrix = np.ascontiguousarray(encodings, dtype=np.float32)
+        if matrix.size == 0:
+            matrix = matrix.reshape(0, 128)
+        if matrix.ndim != 2:
+            raise ValueError("encodings must be a 2-D array of face encodings")
+        if len(names) != matrix.shape[0]:
+            raise ValueError(f"Got {matrix.shape[0]} encodings but {len(names)} names")
+        self.encodings = matrix
+        self.names = names
+        self.tolerance = tolerance
+        self.index = (
+            index if index is not None else create_index(matrix, sq_norms=sq_norms)
+        )
+        self._sq_norms = sq_norms
+
+    def __len__(self) -> int:
+        return self.encodings.shape[0]
+
+    def _as_probes(self, face_encodings) -> np.ndarray:
+        probes = np.asarray(face_encodings, dtype=np.float32)
+        if probes.ndim == 1:
+            probes = probes.reshape(1, -1)
+        return probes
+
+    def distances(self, face_encodings) -> np.ndarray:
+        """
+        Compute Euclidean distances from every probe to every known face.
+
+        Args:
+            face_encodings: Probe encodings, shape ``(f, d)`` or ``(d,)``.
+
+        Returns:
+            Float32 array of shape ``(f, n)``.
+        """
+        probes = self._as_probes(face_encodings)
+        if self._sq_norms is None:
+            self._sq_norms = np.einsum("ij,ij->i", self.encodings, self.encodings)
+        sq = squared_distances(probes, self.encodings, self._sq_norms)
+        return np.sqrt(sq, out=sq)
+
+    def nearest(self, face_encodings) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the closest known encoding for each probe.
+
+        Args:
+            face_encodings: Probe encodings, shape ``(f, d)`` or ``(d,)``.
+
+        Returns:
+            Tuple ``(indices, distances)`` of length ``f``.  When the gallery
+            is empty every index is ``-1`` and every distance is ``inf``.
+        """
+        distances, indices = self.index.search(self._as_probes(face_encodings), k=1)
+        return indices[:, 0], distances[:, 0]
+
+    def match(self, face_encodings) -> List[MatchResult]:
+        """
+        Identify each probe as its nearest known person, if within tolerance.
+
+        Args:
+            face_encodings: Probe encodings, shape ``(f, d)`` or ``(d,)``.
+
+        Returns:
+            One :class:`MatchResult` per probe.  ``name`` is ``"Unknown"``
+            when the nearest distance exceeds ``tolerance``; ``index`` and
+            ``distance`` still describe the nearest known encoding.
+        """
+        indices, best = self.nearest(face_encodings)
+        results = []
+        for index, distance in zip(indices.tolist(), best.tolist()):
+            if index >= 0 and distance <= self.tolerance:
+                name = self.names[index]
+            else:
+                name = UNKNOWN_NAME
+            results.append(MatchResult(name, distance, index))
+        return results
+
+
+# (encodings, names, len(encodings), matcher) of the last legacy gallery
+_last_built: Optional[tuple] = None
+
+
+def as_matcher(
+    known_encodings, known_names: Optional[Sequence[str]] = None
+) -> FaceMatcher:
+    """
+    Return *known_encodings* as a :class:`FaceMatcher`.
+
+    Lets callers pass either a prebuilt matcher or the legacy
+    ``(encodings, names)`` lists loaded from ``ENCODINGS_PATH``.  The matcher
+    built for the lists is reused while the caller keeps passing the same
+    objects, so a per-frame caller does not rebuild (or, with an approximate
+    ``INDEX_BACKEND``, retrain) the index every frame.  The lists are
+    treated as read-only; appending to them builds a new matcher.
+    """
+    global _last_built
+    if isinstance(known_encodings, FaceMatcher):
+        return known_encodings
+    last = _last_built
+    if (
+        last is not None
+        and last[0] is known_encodings
+        and last[1] is known_names
+        and last[2] == len(known_encodings)
+    ):
+        return last[3]
+    matcher = FaceMatcher(known_encodings, known_names or [])
+    _last_built = (known_encodings, known_names, len(known_encodings), matcher)
+    return matcher
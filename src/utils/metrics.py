@@ -0,0 +1,147 @@
+"""
+Lightweight, thread-safe latency and throughput metrics.
+
+Used by the recognition pipeline and the benchmarks to report FPS and
+per-stage latency without pulling in a metrics library.
+"""
+
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values: Values in ascending order.
+        pct: Percentile between 0 and 100.
+
+    Returns:
+        The percentile value, or ``0.0`` for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(math.ceil(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples: Iterable[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples given in seconds.
+
+    Returns:
+        Dict with ``count`` and ``mean_ms``/``p50_ms``/``p95_ms``/``p99_ms``/
+        ``max_ms`` in milliseconds.
+    """
+    values = sorted(samples)
+    count = len(values)
+    if not values:
+        values = [0.0]
+    return {
+        "count": count,
+        "mean_ms": 1000.0 * sum(values) / len(values),
+        "p50_ms": 1000.0 * percentile(values, 50),
+        "p95_ms": 1000.0 * percentile(values, 95),
+        "p99_ms": 1000.0 * percentile(values, 99),
+        "max_ms": 1000.0 * values[-1],
+    }
+
+
+class LatencyRecorder:
+    """Rolling window of latency samples, safe to share between threads."""
+
+    def __init__(self, window: int = 1024):
+        """
+        Args:
+            window: Number of most recent samples kept for percentiles.
+        """
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def record(self, seconds: float) -> None:
+        """Add one latency sample, in seconds."""
+        with self._lock:
+            self._samples.append(seconds)
+            self.total += 1
+
+    def summary(self) -> Dict[str, float]:
+        """Summary of the samples in the current window (see :func:`summarize`)."""
+        with self._lock:
+            samples = list(self._samples)
+        return summarize(samples)
+
+
+class RateMeter:
+    """Counts events and reports their average rate since creation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.started_at = time.perf_counter()
+
+    def mark(self, n: int = 1) -> None:
+        """Count *n* events."""
+        with self._lock:
+            self.count += n
+
+    def rate(self) -> float:
+        """Events per second since the meter was created."""
+        elapsed = time.perf_counter() - self.started_at
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+
+# Upper bucket bounds of LatencyHistogram, in milliseconds.
+DEFAULT_HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """Latency counts in fixed buckets since creation, safe to share between
+    threads.  Unlike :class:`LatencyRecorder` it keeps every sample's bucket,
+    not a window of recent samples."""
+
+    def __init__(self, bounds_ms: Sequence[float] = DEFAULT_HISTOGRAM_BOUNDS_MS):
+        """
+        Args:
+            bounds_ms: Ascending upper bounds of the buckets, in milliseconds;
+                one more bucket collects everything above the last bound.
+        """
+        self.bounds_ms = list(bounds_ms)
+        if self.bounds_ms != sorted(self.bounds_ms):
+            raise ValueError("Histogram bounds must be ascending")
+        self._counts = [0] * (len(self.bounds_ms) + 1)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def record(self, seconds: float) -> None:
+        """Add one latency sample, in seconds."""
+        index = bisect.bisect_left(self.bounds_ms, seconds * 1000.0)
+        with self._lock:
+            self._counts[index] += 1
+            self.total += 1
+
+    def buckets(self) -> List[Tuple[str, int]]:
+        """``(label, count)`` per bucket, e.g. ``("<= 20 ms", 3)``."""
+        with self._lock:
+            counts = list(self._counts)
+        labels = [f"<= {bound:g} ms" for bound in self.bounds_ms]
+        labels.append(f"> {self.bounds_ms[-1]:g} ms" if self.bounds_ms else "all")
+        return list(zip(labels, counts))
+
+    def format(self, width: int = 40) -> str:
+        """Text histogram with one bar per non-empty range of buckets."""
+        buckets = self.buckets()
+        filled = [i for i, (_, count) in enumerate(buckets) if count]
+        if not filled:
+            return "(no samples)"
+        peak = max(count for _, count in buckets)
+        lines = []
+        for label, count in buckets[filled[0] : filled[-1] + 1]:
+            bar = "#" * max(round(width * count / peak), 1 if count else 0)
+            lines.append(f"{label:>12} {count:>8} {bar}")
+        return "\n".join(lines)
@@ -0,0 +1,352 @@
+"""
+Minimal in-process MQTT 3.1.1 broker for tests, benchmarks and development.
+
+:class:`LoopbackBroker` listens on a local TCP port and speaks enough of
+MQTT 3.1.1 for real clients (such as paho-mqtt) to connect, publish at QoS
+0, 1 and 2, subscribe and keep the connection alive.  Every publish it
+receives is recorded in :attr:`LoopbackBroker.messages`, and it forwards
+publishes to matching subscribers at QoS 0.  There is no authentication,
+persistence, retained messages or session state.
+
+``latency`` is a one-way network delay in seconds, so that a benchmark on
+localhost can model a broker across a network: every packet is handled,
+and every reply sent, that long after it was read or produced, and a new
+connection's first packet waits one round trip more for the TCP handshake.
+:meth:`LoopbackBroker.stop` followed by :meth:`LoopbackBroker.start` on
+the same port simulates a broker outage.
+
+Example:
+    >>> broker = LoopbackBroker().start()
+    >>> # ... connect a client to ("127.0.0.1", broker.port) ...
+    >>> broker.wait_for(1)
+    >>> broker.stop()
+"""
+
+import heapq
+import itertools
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# MQTT control packet types
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+PUBCOMP = 7
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+
+class ReceivedMessage(NamedTuple):
+    """A PUBLISH received by the broker."""
+
+    topic: str
+    payload: bytes
+    qos: int
+    received_at: float  # time.perf_counter()
+
+
+def encode_packet(packet_type: int, body: bytes = b"", flags: int = 0) -> bytes:
+    """Fixed header (type, flags, variable-length remaining length) + body."""
+    header = bytearray([packet_type << 4 | flags])
+    length = len(body)
+    while True:
+        byte, length = length % 128, length // 128
+        header.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(header) + body
+
+
+def encode_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack("!H", len(data)) + data
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """MQTT topic filter matching with ``+`` and ``#`` wildcards."""
+    filter_levels = topic_filter.split("/")
+    levels = topic.split("/")
+    for i, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if i >= len(levels) or level not in ("+", levels[i]):
+            return False
+    return len(filter_levels) == len(levels)
+
+
+def _read_exactly(sock: socket.socket, n: int) -> bytes:
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def _read_packet(sock: socket.socket) -> Tuple[int, int, bytes]:
+    """One packet as ``(type, flags, body)``."""
+    first = _read_exactly(sock, 1)[0]
+    length, shift = 0, 0
+    while True:
+        byte = _read_exactly(sock, 1)[0]
+        length += (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+    return first >> 4, first & 0x0F, _read_exactly(sock, length)
+
+
+class _Connection:
+    """
+    One client connection: a reader thread timestamps incoming packets and
+    an event thread handles them and sends replies, each once ``latency``
+    has passed.
+    """
+
+    def __init__(self, broker: "LoopbackBroker", sock: socket.socket):
+        self.broker = broker
+        self.sock = sock
+        self.subscriptions: Set[str] = set()
+        self._pending_qos2: Dict[int, ReceivedMessage] = {}
+        self._events: List[tuple] = []  # heap of (due, seq, kind, data)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def start(self) -> None:
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        threading.Thread(target=self._event_loop, daemon=True).start()
+
+    def send(self, data: bytes) -> None:
+        self._schedule(time.monotonic() + self.broker.latency, "send", data)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.broker._forget(self)
+
+    def _schedule(self, due: float, kind: str, data) -> None:
+        with self._cond:
+            heapq.heappush(self._events, (due, next(self._seq), kind, data))
+            self._cond.notify()
+
+    def _event_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._events or self._closed)
+                if self._closed:
+                    return
+                delay = self._events[0][0] - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                _, _, kind, data = heapq.heappop(self._events)
+            try:
+                if kind == "send":
+                    self.sock.sendall(data)
+                elif kind == "eof" or not self._handle(*data):
+                    break
+            except (OSError, IndexError, struct.error):
+                break
+        self.close()
+
+    def _read_loop(self) -> None:
+        latency = self.broker.latency
+        # A new connection's first packet also waits out the TCP handshake,
+        # and no packet is handled before the ones read earlier.
+        due = time.monotonic() + 3 * latency
+        try:
+            while True:
+                packet = _read_packet(self.sock)
+                due = max(due, time.monotonic() + latency)
+                self._schedule(due, "packet", packet)
+        except (OSError, ConnectionError, IndexError):
+            pass
+        self._schedule(max(due, time.monotonic() + latency), "eof", None)
+
+    def _handle(self, packet_type: int, flags: int, body: bytes) -> bool:
+        if packet_type == CONNECT:
+            self.broker._count_connect()
+            self.send(encode_packet(CONNACK, b"\x00\x00"))
+        elif packet_type == PUBLISH:
+            qos = (flags >> 1) & 0x03
+            (topic_length,) = struct.unpack_from("!H", body)
+            topic = body[2 : 2 + topic_length].decode("utf-8")
+            offset = 2 + topic_length
+            packet_id = b""
+            if qos:
+                packet_id = body[offset : offset + 2]
+                offset += 2
+            message = ReceivedMessage(topic, body[offset:], qos, time.perf_counter())
+            if qos == 2:
+                # Recorded on PUBREL, so a re-sent PUBLISH is not counted twice.
+                self._pending_qos2[struct.unpack("!H", packet_id)[0]] = message
+                self.send(encode_packet(PUBREC, packet_id))
+            else:
+                self.broker._deliver(message)
+                if qos == 1:
+                    self.send(encode_packet(PUBACK, packet_id))
+        elif packet_type == PUBREL:
+            message = self._pending_qos2.pop(struct.unpack("!H", body[:2])[0], None)
+            if message is not None:
+                self.broker._deliver(message)
+            self.send(encode_packet(PUBCOMP, body[:2]))
+        elif packet_type == SUBSCRIBE:
+            granted, offset = bytearray(), 2
+            while offset < len(body):
+                (length,) = struct.unpack_from("!H", body, offset)
+                topic_filter = body[offset + 2 : offset + 2 + length].decode("utf-8")
+                offset += 3 + length  # skip the requested QoS byte
+                self.subscriptions.add(topic_filter)
+                granted.append(0)
+            self.send(encode_packet(SUBACK, body[:2] + bytes(granted)))
+        elif packet_type == UNSUBSCRIBE:
+            offset = 2
+            while offset < len(body):
+                (length,) = struct.unpack_from("!H", body, offset)
+                self.subscriptions.discard(
+                    body[offset + 2 : offset + 2 + length].decode("utf-8")
+                )
+                offset += 2 + length
+            self.send(encode_packet(UNSUBACK, body[:2]))
+        elif packet_type == PINGREQ:
+            self.send(encode_packet(PINGRESP))
+        elif packet_type == DISCONNECT:
+            return False
+        return True
+
+
+class LoopbackBroker:
+    """
+    Threaded MQTT 3.1.1 broker on a local port.
+
+    Attributes:
+        messages: Every PUBLISH received, in arrival order.
+        connects: Number of CONNECT packets received since creation.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        """
+        Args:
+            host: Interface to listen on.
+            port: TCP port; 0 picks a free one on the first :meth:`start`,
+                which later restarts reuse.
+            latency: One-way delay in seconds added to every packet.
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.messages: List[ReceivedMessage] = []
+        self.connects = 0
+        self._connections: Set[_Connection] = set()
+        self._cond = threading.Condition()
+        self._listener: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "LoopbackBroker":
+        """Start listening (no-op if already running)."""
+        if self.running:
+            return self
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.host, self.port))
+        listener.listen(128)
+        listener.settimeout(0.05)
+        self.port = listener.getsockname()[1]
+        self._listener = listener
+        self._thread = threading.Thread(
+            target=self._accept_loop,
+            args=(listener,),
+            name="mqtt-loopback",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop listening and drop every client connection."""
+        listener, self._listener = self._listener, None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if listener is not None:
+            listener.close()
+        with self._cond:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+
+    def wait_for(self, count: int, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until at least *count* messages have been received."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: len(self.messages) >= count, timeout=timeout
+            )
+
+    def __enter__(self) -> "LoopbackBroker":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _accept_loop(self, listener: socket.socket) -> None:
+        while self._listener is listener:
+            try:
+                sock, _ = listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = _Connection(self, sock)
+            with self._cond:
+                self._connections.add(connection)
+            connection.start()
+
+    def _count_connect(self) -> None:
+        with self._cond:
+            self.connects += 1
+
+    def _forget(self, connection: _Connection) -> None:
+        with self._cond:
+            self._connections.discard(connection)
+
+    def _deliver(self, message: ReceivedMessage) -> None:
+        with self._cond:
+            self.messages.append(message)
+            self._cond.notify_all()
+            subscribers = [
+                c
+                for c in self._connections
+                if any(topic_matches(f, message.topic) for f in tuple(c.subscriptions))
+            ]
+        if subscribers:
+            packet = encode_packet(
+                PUBLISH, encode_string(message.topic) + message.payload
+            )
+            for connection in subscribers:
+                connection.send(packet)
@@ -0,0 +1,377 @@
+"""
+Single-process recognition service for many cameras.
+
+Every camera gets its own :class:`~src.utils.pipeline.LatestFrameCapture`
+reader thread, but all cameras share one worker pool and one gallery
+(matcher).  A scheduler thread hands frames to the pool:
+
+* **Fairness** – cameras are served round-robin and each camera has at most
+  one frame in flight, so a busy camera cannot starve the others and results
+  for a camera come out in capture order (which also lets each camera keep
+  its own :class:`~src.utils.tracking.FaceTracker`).
+* **FPS caps** – a camera is not scheduled again until ``1 / max_fps``
+  seconds after its previous frame was dispatched; frames captured in
+  between are simply overwritten by newer ones.
+* **No backlog** – frames are only dispatched when a worker is free, so
+  under overload each camera's latest frame is processed instead of a queue
+  of stale ones.
+
+Per-camera FPS, drops, errors and latency are reported by
+:meth:`MultiCameraService.stats`.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from src.config import CAMERA_MAX_FPS, MULTI_CAMERA_WORKERS
+from src.utils.metrics import LatencyRecorder, RateMeter
+from src.utils.pipeline import LatestFrameCapture, open_video_source
+
+_logger = logging.getLogger(__name__)
+
+_CLOSED = object()
+
+
+class CameraSpec(NamedTuple):
+    """A camera served by :class:`MultiCameraService`."""
+
+    name: str
+    source: Any
+    max_fps: Optional[float] = None
+
+
+def parse_camera_spec(text: str, index: int = 0) -> CameraSpec:
+    """
+    Parse ``[name=]source[;fps=N]``.
+
+    Examples: ``"0"``, ``"lobby=rtsp://10.0.0.5/stream;fps=5"``,
+    ``"test=fake:300"``.  Cameras without a name are called ``cam<index>``.
+
+    Raises:
+        ValueError: If the FPS cap is not a positive number.
+    """
+    body, _, fps = text.partition(";fps=")
+    name, sep, source = body.partition("=")
+    if not sep or "://" in name or not name:
+        name, source = f"cam{index}", body
+    max_fps = None
+    if fps:
+        max_fps = float(fps)
+        if max_fps <= 0:
+            raise ValueError(f"FPS cap must be positive in camera spec {text!r}")
+    return CameraSpec(name, source, max_fps)
+
+
+class CameraResult(NamedTuple):
+    """Output of the service for one processed frame."""
+
+    camera: str
+    seq: int
+    frame: Any
+    result: Any
+    captured_at: float
+    completed_at: float
+
+
+class _Camera:
+    """Scheduler-side state of one camera."""
+
+    def __init__(self, spec: CameraSpec, capture, process_fn, default_fps):
+        self.spec = spec
+        self.max_fps = spec.max_fps or default_fps
+        self.process_fn = process_fn
+        self.capture = capture
+        self.last_seq = 0
+        self.seq = 0
+        self.in_flight = False
+        self.done = False
+        self.next_due = 0.0
+        self.errors = 0
+        self.rate = RateMeter()
+        self.latency = {
+            "queue_wait": LatencyRecorder(),
+            "process": LatencyRecorder(),
+            "end_to_end": LatencyRecorder(),
+        }
+
+
+class MultiCameraService:
+    """
+    Schedules frames from several cameras onto one shared worker pool.
+
+    Example:
+        >>> matcher = load_gallery()
+        >>> service = MultiCameraService(
+        ...     [CameraSpec("lobby", "rtsp://..."), CameraSpec("dock", 1, 5)],
+        ...     lambda camera: lambda frame: recognize_faces_in_frame(frame, matcher),
+        ... )
+        >>> with service:
+        ...     for item in service.results():
+        ...         print(item.camera, item.result)
+    """
+
+    def __init__(
+        self,
+        cameras: List[CameraSpec],
+        process_factory: Callable[[CameraSpec], Callable[[Any], Any]],
+        workers: Optional[int] = MULTI_CAMERA_WORKERS,
+        max_fps: Optional[float] = CAMERA_MAX_FPS,
+        output_size: int = 64,
+    ):
+        """
+        Args:
+            cameras: Cameras to serve; names must be unique.
+            process_factory: Called once per camera and returns the callable
+                that processes that camera's frames on a worker thread.
+                Resources shared by all cameras (the matcher) should be
+                captured by the factory; per-camera state such as a tracker
+                can be created inside it.
+            workers: Size of the shared worker pool (``None`` = CPU count).
+            max_fps: Default FPS cap for cameras without their own
+                (``None`` or ``0`` = uncapped).
+            output_size: Capacity of the results queue.
+
+        Raises:
+            ValueError: If no cameras are given or names repeat.
+            IOError: If a camera source cannot be opened.
+        """
+        if not cameras:
+            raise ValueError("At least one camera is required")
+        names = [spec.name for spec in cameras]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Camera names must be unique, got {names}")
+        self.workers = workers or os.cpu_count() or 1
+        self._cond = threading.Condition()
+        self._free = self.workers
+        self._stopping = threading.Event()
+        self._output: queue.Queue = queue.Queue(maxsize=output_size)
+        self._cameras = [
+            _Camera(
+                spec,
+                LatestFrameCapture(
+                    open_video_source(spec.source),
+                    name=f"capture-{spec.name}",
+                    on_frame=self._wake,
+                ),
+                process_factory(spec),
+                max_fps,
+            )
+            for spec in cameras
+        ]
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="recognize")
+        self._scheduler = threading.Thread(
+            target=self._schedule, name="camera-scheduler", daemon=True
+        )
+        self._rr = 0
+        self._fps = RateMeter()
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "MultiCameraService":
+        self._fps = RateMeter()
+        for camera in self._cameras:
+            camera.rate = RateMeter()
+            camera.capture.start()
+        self._scheduler.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop all captures, let in-flight frames finish and join threads."""
+        self._stopping.set()
+        for camera in self._cameras:
+            camera.capture.stop()
+        self._wake()
+        if self._scheduler.ident is not None:
+            self._scheduler.join(timeout)
+        self._pool.shutdown(wait=True)
+        for camera in self._cameras:
+            camera.capture.join(timeout)
+
+    def __enter__(self) -> "MultiCameraService":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # -- scheduling --------------------------------------------------------
+
+    def _wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def _next_frame(self, now: float):
+        """
+        Pick the next camera with a frame to process, round-robin.
+
+        Returns:
+            ``(camera, (seq, frame, captured_at), None)``, or
+            ``(None, None, wait)`` where *wait* is the time until the next
+            FPS cap expires (``None`` if no camera is waiting on its cap).
+        """
+        wait = None
+        count = len(self._cameras)
+        for k in range(count):
+            camera = self._cameras[(self._rr + k) % count]
+            if camera.in_flight or camera.done:
+                continue
+            if now < camera.next_due:
+                delay = camera.next_due - now
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            item = camera.capture.latest(camera.last_seq, timeout=0)
+            if item is None:
+                camera.done = camera.capture.closed
+                continue
+            self._rr = (self._rr + k + 1) % count
+            return camera, item, None
+        return None, None, wait
+
+    def _idle(self) -> bool:
+        return self._free == self.workers
+
+    def _schedule(self) -> None:
+        try:
+            with self._cond:
+                while not self._stopping.is_set():
+                    camera = item = wait = None
+                    if self._free > 0:
+                        camera, item, wait = self._next_frame(time.perf_counter())
+                    if camera is None:
+                        if self._idle() and all(c.done for c in self._cameras):
+                            break
+                        self._cond.wait(timeout=wait)
+                        continue
+                    camera.last_seq, frame, captured_at = item
+                    now = time.perf_counter()
+                    if camera.max_fps:
+                        # Pace from the previous slot so scheduling jitter does
+                        # not lower the effective rate, but never bank more
+                        # than one interval of credit.
+                        interval = 1.0 / camera.max_fps
+                        camera.next_due = (
+                            max(camera.next_due, now - interval) + interval
+                        )
+                    camera.in_flight = True
+                    self._free -= 1
+                    self._pool.submit(
+                        self._process, camera, camera.seq, frame, captured_at, now
+                    )
+                    camera.seq += 1
+        except Exception:
+            _logger.exception("Camera scheduler failed")
+        finally:
+            with self._cond:
+                self._cond.wait_for(self._idle, timeout=5.0)
+            self._put(_CLOSED)
+
+    def _process(self, camera: _Camera, seq, frame, captured_at, dispatched_at):
+        started = time.perf_counter()
+        camera.latency["queue_wait"].record(started - dispatched_at)
+        try:
+            result = camera.process_fn(frame)
+        except Exception:
+            _logger.exception("Camera %s frame %d failed", camera.spec.name, seq)
+            camera.errors += 1
+            result = None
+        completed = time.perf_counter()
+        camera.latency["process"].record(completed - started)
+        camera.latency["end_to_end"].record(completed - captured_at)
+        camera.rate.mark()
+        self._fps.mark()
+        # Delivered before the camera is released, so per-camera output
+        # stays in capture order.
+        self._put(
+            CameraResult(camera.spec.name, seq, frame, result, captured_at, completed)
+        )
+        with self._cond:
+            camera.in_flight = False
+            self._free += 1
+            self._cond.notify_all()
+
+    def _put(self, item) -> None:
+        while True:
+            try:
+                self._output.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self._stopping.is_set():
+                    try:
+                        self._output.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    # -- consumer API ------------------------------------------------------
+
+    def results(self, timeout: Optional[float] = None) -> Iterator[CameraResult]:
+        """
+        Yield processed frames from all cameras until every source has ended
+        or the service is stopped.
+
+        Args:
+            timeout: Maximum seconds to wait for each result; ``None`` waits
+                indefinitely.
+        """
+        while True:
+            try:
+                item = self._output.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if item is _CLOSED:
+                return
+            yield item
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report overall and per-camera throughput, drops and latency.
+
+        Returns:
+            Dict with total ``fps``, ``frames_processed`` and ``workers``,
+            and ``cameras`` mapping each camera name to its ``fps``,
+            ``max_fps``, ``frames_captured``, ``frames_processed``,
+            ``dropped`` (captured frames never processed, including those
+            skipped by the FPS cap), ``errors``, ``closed`` and a
+            ``latency`` dict of summaries in milliseconds.
+        """
+        cameras = {}
+        for camera in self._cameras:
+            cameras[camera.spec.name] = {
+                "fps": camera.rate.rate(),
+                "max_fps": camera.max_fps,
+                "frames_captured": camera.capture.frames_read,
+                "frames_processed": camera.rate.count,
+                "dropped": camera.capture.dropped,
+                "errors": camera.errors,
+                "closed": camera.capture.closed,
+                "latency": {
+                    name: rec.summary() for name, rec in camera.latency.items()
+                },
+            }
+        return {
+            "fps": self._fps.rate(),
+            "frames_processed": self._fps.count,
+            "workers": self.workers,
+            "cameras": cameras,
+        }
+
+
+def format_camera_stats(stats: Dict[str, Any]) -> str:
+    """Render :meth:`MultiCameraService.stats` as one line per camera."""
+    lines = [
+        f"Total FPS: {stats['fps']:.1f}  processed: {stats['frames_processed']}  "
+        f"workers: {stats['workers']}"
+    ]
+    for name, cam in stats["cameras"].items():
+        e2e = cam["latency"]["end_to_end"]
+        cap = f"{cam['max_fps']:g}" if cam["max_fps"] else "-"
+        lines.append(
+            f"  {name:<12} fps {cam['fps']:5.1f} (cap {cap})  "
+            f"processed {cam['frames_processed']:>6}  dropped {cam['dropped']:>6}  "
+            f"errors {cam['errors']}  e2e p50 {e2e['p50_ms']:6.1f} ms  "
+            f"p95 {e2e['p95_ms']:6.1f} ms" + ("  [closed]" if cam["closed"] else "")
+        )
+    return "\n".join(lines)
@@ -0,0 +1,521 @@
+"""
+Multi-threaded capture / recognize / output pipeline for video sources.
+
+Stages:
+
+1. **Capture** – :class:`LatestFrameCapture` reads the source on its own
+   thread and keeps only the most recent frame, so the camera driver buffer
+   never fills up while recognition is busy.
+2. **Workers** – a pool of threads runs the (detection + encoding + matching)
+   callable on frames taken from a bounded work queue.  When the queue is
+   full, ``drop_policy`` decides whether the oldest queued frame is dropped,
+   the incoming frame is dropped, or capture dispatch blocks.
+3. **Ordered output** – results are re-sequenced so consumers see frames in
+   capture order even though workers finish out of order.
+
+The pipeline works headless with any object exposing ``read()`` /
+``release()``, including :class:`FakeVideoSource`, so it can be exercised
+without a webcam.  FPS and per-stage latency are available from
+:meth:`RecognitionPipeline.stats`.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional
+
+from src.config import PIPELINE_DROP_POLICY, PIPELINE_QUEUE_SIZE, PIPELINE_WORKERS
+from src.utils.metrics import LatencyRecorder, RateMeter
+
+_logger = logging.getLogger(__name__)
+
+DROP_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+# Sentinels passed between stages.
+_CLOSED = object()
+_DROPPED = object()
+
+
+class FakeVideoSource:
+    """
+    ``cv2.VideoCapture`` stand-in that yields synthetic or preloaded frames.
+
+    Example:
+        >>> source = FakeVideoSource(count=3, shape=(4, 4, 3))
+        >>> source.read()[0]
+        True
+    """
+
+    def __init__(self, frames=None, count: int = 100, shape=(480, 640, 3), fps=None):
+        """
+        Args:
+            frames: Optional sequence of frames to play back.  When omitted,
+                *count* frames are generated, each filled with its index.
+            count: Number of synthetic frames to produce.
+            shape: Shape of synthetic frames.
+            fps: If set, ``read()`` is paced to this rate like a live camera.
+        """
+        self._frames = list(frames) if frames is not None else None
+        self._count = len(self._frames) if self._frames is not None else count
+        self._shape = shape
+        self._interval = 1.0 / fps if fps else 0.0
+        self._next_at = time.perf_counter()
+        self._index = 0
+        self._released = False
+
+    def isOpened(self) -> bool:  # noqa: N802 – mirrors cv2.VideoCapture
+        return not self._released
+
+    def read(self):
+        if self._released or self._index >= self._count:
+            return False, None
+        if self._interval:
+            delay = self._next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_at = max(self._next_at, time.perf_counter()) + self._interval
+        if self._frames is not None:
+            frame = self._frames[self._index]
+        else:
+            import numpy as np
+
+            frame = np.full(self._shape, self._index % 256, dtype=np.uint8)
+        self._index += 1
+        return True, frame
+
+    def release(self) -> None:
+        self._released = True
+
+
+def open_video_source(source):
+    """
+    Open a video source.
+
+    Args:
+        source: A device index (``0`` or ``"0"``), a file path or RTSP URL,
+            ``"fake"`` / ``"fake:<frames>"`` for a paced synthetic 30 FPS
+            source, or an already-open capture object.
+
+    Returns:
+        An object with ``read()`` and ``release()`` methods.
+
+    Raises:
+        IOError: If the source cannot be opened.
+    """
+    if not isinstance(source, (int, str)):
+        return source
+    if isinstance(source, str) and source.startswith("fake"):
+        _, _, count = source.partition(":")
+        return FakeVideoSource(count=int(count or 300), fps=30)
+
+    import cv2
+
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise IOError(f"Video source {source!r} not accessible.")
+    return capture
+
+
+class LatestFrameCapture:
+    """
+    Reads a capture source on a background thread, keeping only the newest
+    frame.  Frames overwritten before anyone took them are counted as
+    dropped.
+    """
+
+    def __init__(
+        self,
+        capture,
+        name: str = "capture",
+        on_frame: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            capture: Object with ``read()`` and ``release()``.
+            name: Name of the reader thread.
+            on_frame: Optional callback run on the reader thread after each
+                new frame (and once when the source closes), e.g. to wake a
+                scheduler that watches several captures.
+        """
+        self.capture = capture
+        self.on_frame = on_frame
+        self.frames_read = 0
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._frame = None
+        self._captured_at = 0.0
+        self._seq = 0
+        self._taken = 0
+        self._closed = False
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> "LatestFrameCapture":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                ok, frame = self.capture.read()
+                if not ok:
+                    break
+                with self._cond:
+                    if self._seq > self._taken:
+                        self.dropped += 1
+                    self._seq += 1
+                    self.frames_read += 1
+                    self._frame = frame
+                    self._captured_at = time.perf_counter()
+                    self._cond.notify_all()
+                if self.on_frame is not None:
+                    self.on_frame()
+        except Exception:
+            _logger.exception("Video capture failed")
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self.capture.release()
+            if self.on_frame is not None:
+                self.on_frame()
+
+    def latest(self, after_seq: int = 0, timeout: Optional[float] = None):
+        """
+        Wait for a frame newer than *after_seq*.
+
+        Returns:
+            ``(seq, frame, captured_at)``, or ``None`` once the source is
+            exhausted or stopped (or *timeout* expires).
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._seq > after_seq or self._closed, timeout=timeout
+            )
+            if self._seq <= after_seq:
+                return None
+            self._taken = self._seq
+            return self._seq, self._frame, self._captured_at
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
+
+
+class BoundedWorkQueue:
+    """FIFO with a fixed capacity and an explicit policy for when it is full."""
+
+    def __init__(self, maxsize: int, drop_policy: str):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(
+                f"Unknown drop policy '{drop_policy}'; expected one of {DROP_POLICIES}"
+            )
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item):
+        """
+        Enqueue *item*.
+
+        Returns:
+            The item that was dropped to respect the capacity (the oldest
+            queued item, or *item* itself under ``"drop_newest"``), or
+            ``None`` if nothing was dropped.
+        """
+        with self._cond:
+            if self.drop_policy == "block":
+                self._cond.wait_for(
+                    lambda: len(self._items) < self.maxsize or self._closed
+                )
+            dropped = None
+            if self._closed:
+                return item
+            if len(self._items) >= self.maxsize:
+                if self.drop_policy == "drop_newest":
+                    return item
+                dropped = self._items.popleft()
+            self._items.append(item)
+            self._cond.notify_all()
+            return dropped
+
+    def get(self):
+        """Dequeue the oldest item, blocking; returns ``_CLOSED`` once drained."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed)
+            if not self._items:
+                return _CLOSED
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self) -> None:
+        """Stop accepting items; consumers drain what is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class FrameResult(NamedTuple):
+    """Output of the pipeline for one processed frame."""
+
+    seq: int
+    frame: Any
+    result: Any
+    captured_at: float
+    completed_at: float
+
+
+class RecognitionPipeline:
+    """
+    Staged, multi-threaded frame processing pipeline.
+
+    Example:
+        >>> pipeline = RecognitionPipeline("fake:30", lambda frame: frame.mean())
+        >>> with pipeline:
+        ...     for item in pipeline.results():
+        ...         print(item.seq, item.result)
+    """
+
+    def __init__(
+        self,
+        source,
+        process_fn: Callable[[Any], Any],
+        workers: int = PIPELINE_WORKERS,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        drop_policy: str = PIPELINE_DROP_POLICY,
+    ):
+        """
+        Args:
+            source: Anything accepted by :func:`open_video_source`.
+            process_fn: Called with each frame on a worker thread; its return
+                value becomes :attr:`FrameResult.result`.
+            workers: Number of worker threads.
+            queue_size: Capacity of the work queue and of the output queue.
+            drop_policy: ``"drop_oldest"``, ``"drop_newest"`` or ``"block"``.
+
+        Raises:
+            ValueError: On an unknown drop policy or a non-positive size.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.process_fn = process_fn
+        self.workers = workers
+        self._work = BoundedWorkQueue(queue_size, drop_policy)
+        self._output: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._capture = LatestFrameCapture(open_video_source(source))
+        self._stopping = threading.Event()
+
+        self._pending: Dict[int, Any] = {}
+        self._pending_cond = threading.Condition()
+        self._dispatched: Optional[int] = None
+        self._workers_left = workers
+
+        self.queue_dropped = 0
+        self.latency = {
+            "queue_wait": LatencyRecorder(),
+            "process": LatencyRecorder(),
+            "reorder": LatencyRecorder(),
+            "end_to_end": LatencyRecorder(),
+        }
+        self._fps = RateMeter()
+        self._threads = [
+            threading.Thread(target=self._dispatch, name="dispatch", daemon=True),
+            threading.Thread(target=self._reorder, name="reorder", daemon=True),
+        ] + [
+            threading.Thread(target=self._work_loop, name=f"worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "RecognitionPipeline":
+        self._fps = RateMeter()
+        self._capture.start()
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop capture, discard queued work and wait for threads to exit."""
+        self._stopping.set()
+        self._capture.stop()
+        self._work.close()
+        with self._pending_cond:
+            self._pending_cond.notify_all()
+        for thread in self._threads:
+            if thread.ident is not None:
+                thread.join(timeout)
+        self._capture.join(timeout)
+
+    def __enter__(self) -> "RecognitionPipeline":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # -- stages ------------------------------------------------------------
+
+    def _dispatch(self) -> None:
+        last_seen = 0
+        seq = 0
+        try:
+            while not self._stopping.is_set():
+                item = self._capture.latest(last_seen)
+                if item is None:
+                    break
+                last_seen, frame, captured_at = item
+                dropped = self._work.put((seq, frame, captured_at, time.perf_counter()))
+                if dropped is not None:
+                    self.queue_dropped += 1
+                    self._complete(dropped[0], _DROPPED)
+                seq += 1
+        finally:
+            with self._pending_cond:
+                self._dispatched = seq
+                self._pending_cond.notify_all()
+            self._work.close()
+
+    def _work_loop(self) -> None:
+        try:
+            while True:
+                item = self._work.get()
+                if item is _CLOSED:
+                    break
+                seq, frame, captured_at, queued_at = item
+                started = time.perf_counter()
+                self.latency["queue_wait"].record(started - queued_at)
+                try:
+                    result = self.process_fn(frame)
+                except Exception:
+                    _logger.exception("Frame %d failed in process_fn", seq)
+                    result = None
+                completed = time.perf_counter()
+                self.latency["process"].record(completed - started)
+                self._complete(
+                    seq, FrameResult(seq, frame, result, captured_at, completed)
+                )
+        finally:
+            with self._pending_cond:
+                self._workers_left -= 1
+                self._pending_cond.notify_all()
+
+    def _complete(self, seq: int, value) -> None:
+        with self._pending_cond:
+            self._pending[seq] = value
+            self._pending_cond.notify_all()
+
+    def _finished(self, next_seq: int) -> bool:
+        if self._stopping.is_set():
+            return True
+        return (
+            self._workers_left == 0
+            and self._dispatched is not None
+            and next_seq >= self._dispatched
+        )
+
+    def _reorder(self) -> None:
+        next_seq = 0
+        try:
+            while True:
+                with self._pending_cond:
+                    self._pending_cond.wait_for(
+                        lambda: next_seq in self._pending or self._finished(next_seq)
+                    )
+                    if next_seq not in self._pending:
+                        break
+                    value = self._pending.pop(next_seq)
+                next_seq += 1
+                if value is _DROPPED:
+                    continue
+                emitted = time.perf_counter()
+                self.latency["reorder"].record(emitted - value.completed_at)
+                self.latency["end_to_end"].record(emitted - value.captured_at)
+                self._fps.mark()
+                while not self._stopping.is_set():
+                    try:
+                        self._output.put(value, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        finally:
+            while True:
+                try:
+                    self._output.put(_CLOSED, timeout=0.1)
+                    break
+                except queue.Full:
+                    if self._stopping.is_set():
+                        try:
+                            self._output.get_nowait()
+                        except queue.Empty:
+                            pass
+
+    # -- consumer API ------------------------------------------------------
+
+    def results(self, timeout: Optional[float] = None) -> Iterator[FrameResult]:
+        """
+        Yield processed frames in capture order until the source ends.
+
+        Args:
+            timeout: Maximum seconds to wait for each result; ``None`` waits
+                indefinitely.
+        """
+        while True:
+            try:
+                item = self._output.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if item is _CLOSED:
+                return
+            yield item
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report throughput, drops and per-stage latency.
+
+        Returns:
+            Dict with ``fps``, frame counters and a ``latency`` dict mapping
+            each stage (``queue_wait``, ``process``, ``reorder``,
+            ``end_to_end``) to a latency summary in milliseconds.
+        """
+        return {
+            "fps": self._fps.rate(),
+            "frames_captured": self._capture.frames_read,
+            "frames_processed": self._fps.count,
+            "dropped_at_capture": self._capture.dropped,
+            "dropped_at_queue": self.queue_dropped,
+            "latency": {name: rec.summary() for name, rec in self.latency.items()},
+        }
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """Render :meth:`RecognitionPipeline.stats` as a short multi-line report."""
+    lines = [
+        f"FPS: {stats['fps']:.1f}  processed: {stats['frames_processed']}  "
+        f"captured: {stats['frames_captured']}  "
+        f"dropped (capture/queue): {stats['dropped_at_capture']}/"
+        f"{stats['dropped_at_queue']}"
+    ]
+    for stage, summary in stats["latency"].items():
+        lines.append(
+            f"  {stage:<11} p50 {summary['p50_ms']:7.2f} ms  "
+            f"p95 {summary['p95_ms']:7.2f} ms  max {summary['max_ms']:7.2f} ms"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,327 @@
+"""
+Face tracking between detections.
+
+Running detection, encoding and matching on every frame is wasteful when the
+same person stands in front of the door for several seconds.
+:class:`FaceTracker` runs full detection only every ``detect_every`` frames,
+associates the detected boxes with existing tracks by IoU, and encodes only
+faces that start a new track (or whose identity is still unknown or due for a
+refresh).  Identities carry forward along tracks in between.  Optionally an
+OpenCV single-object tracker follows each face on the frames without
+detection.
+
+Each track has a stable ``track_id`` and the tracker emits
+:class:`TrackEvent` records (``"new"``, ``"identified"``, ``"lost"``), so
+downstream access decisions can fire once per track instead of once per
+frame.
+"""
+
+import itertools
+import threading
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from src.config import (
+    TRACKING_DETECT_EVERY,
+    TRACKING_MAX_MISSES,
+    TRACKING_MIN_IOU,
+    TRACKING_REIDENTIFY_EVERY,
+)
+from src.utils.geometry import Box, match_boxes
+from src.utils.matcher import UNKNOWN_NAME, FaceMatcher
+
+EVENT_KINDS = ("new", "identified", "lost")
+
+# Lower-case tracker name -> OpenCV class-name infix.
+_CV_TRACKERS = {
+    "mil": "MIL",
+    "kcf": "KCF",
+    "csrt": "CSRT",
+    "nano": "Nano",
+    "vit": "Vit",
+}
+
+
+class TrackState(NamedTuple):
+    """Immutable snapshot of a :class:`Track` at one frame."""
+
+    track_id: int
+    name: str
+    distance: float
+    box: Box
+
+
+class Track:
+    """
+    A face followed across frames.
+
+    Attributes:
+        track_id: Identifier, unique for the lifetime of the tracker.
+        box: Latest ``(top, right, bottom, left)`` box in frame pixels.
+        name: Identity carried along the track (``"Unknown"`` until matched;
+            a re-identification that matches nobody does not clear it).
+        distance: Gallery distance of the last match.
+        first_frame: Frame index the track was created on.
+        last_seen: Frame index of the last detection associated with it.
+        last_encoded: Frame index the face was last encoded and matched.
+        misses: Consecutive detection passes without an associated box.
+    """
+
+    __slots__ = (
+        "track_id",
+        "box",
+        "name",
+        "distance",
+        "first_frame",
+        "last_seen",
+        "last_encoded",
+        "misses",
+        "cv_tracker",
+    )
+
+    def __init__(self, track_id: int, box: Box, frame_index: int):
+        self.track_id = track_id
+        self.box = box
+        self.name = UNKNOWN_NAME
+        self.distance = float("inf")
+        self.first_frame = frame_index
+        self.last_seen = frame_index
+        self.last_encoded = -1
+        self.misses = 0
+        self.cv_tracker = None
+
+    @property
+    def identified(self) -> bool:
+        return self.name != UNKNOWN_NAME
+
+    def state(self) -> TrackState:
+        return TrackState(self.track_id, self.name, self.distance, self.box)
+
+    def __repr__(self) -> str:
+        return f"Track(id={self.track_id}, name={self.name!r}, box={self.box})"
+
+
+class TrackEvent(NamedTuple):
+    """A change in the set of tracks, emitted at most once per occurrence."""
+
+    kind: str
+    track_id: int
+    name: str
+    box: Box
+    frame_index: int
+
+
+class TrackedFrame(NamedTuple):
+    """Output of :meth:`FaceTracker.update` for one frame."""
+
+    frame_index: int
+    tracks: List[TrackState]
+    events: List[TrackEvent]
+    detected: bool
+    encoded: int
+
+    @property
+    def names(self) -> List[str]:
+        """Names of the faces currently tracked, like ``recognize_faces_in_frame``."""
+        return [track.name for track in self.tracks]
+
+
+def _to_xywh(box: Box):
+    top, right, bottom, left = box
+    return (int(left), int(top), int(right - left), int(bottom - top))
+
+
+def _from_xywh(rect) -> Box:
+    x, y, w, h = (int(round(v)) for v in rect)
+    return (y, x + w, y + h, x)
+
+
+def opencv_tracker_factory(name: str = "mil") -> Callable[[], object]:
+    """
+    Return a constructor for an OpenCV single-object tracker.
+
+    Args:
+        name: Tracker algorithm, e.g. ``"mil"`` (in every OpenCV build) or
+            ``"kcf"`` / ``"csrt"`` (``opencv-contrib-python``).
+
+    Raises:
+        ValueError: If the installed OpenCV does not provide the tracker.
+    """
+    import cv2
+
+    attr = f"Tracker{_CV_TRACKERS.get(name.lower(), name)}_create"
+    for namespace in (cv2, getattr(cv2, "legacy", None)):
+        create = getattr(namespace, attr, None) if namespace is not None else None
+        if create is not None:
+            return create
+    raise ValueError(f"OpenCV tracker '{name}' is not available in this build")
+
+
+class FaceTracker:
+    """
+    Detect-every-N-frames face tracker with identity carry-over.
+
+    The tracker is stateful and must see frames in order; run it on a single
+    pipeline worker.
+
+    Example:
+        >>> tracker = FaceTracker(matcher, detect_fn, encode_fn, detect_every=5)
+        >>> for rgb_frame in frames:
+        ...     out = tracker.update(rgb_frame)
+        ...     for event in out.events:
+        ...         if event.kind == "identified":
+        ...             grant_access(event.name)
+    """
+
+    def __init__(
+        self,
+        matcher: FaceMatcher,
+        detect_fn: Callable[[np.ndarray], List[Box]],
+        encode_fn: Callable[[np.ndarray, List[Box]], Sequence[np.ndarray]],
+        detect_every: int = TRACKING_DETECT_EVERY,
+        min_iou: float = TRACKING_MIN_IOU,
+        max_misses: int = TRACKING_MAX_MISSES,
+        reidentify_every: int = TRACKING_REIDENTIFY_EVERY,
+        cv_tracker_factory: Optional[Callable[[], object]] = None,
+    ):
+        """
+        Args:
+            matcher: Gallery used to name new tracks.
+            detect_fn: Maps an RGB frame to face boxes in frame pixels, e.g.
+                :func:`~src.utils.face_utils.detect_faces`.
+            encode_fn: Maps ``(rgb_frame, boxes)`` to one encoding per box,
+                e.g. :func:`~src.utils.face_utils.encode_faces`.
+            detect_every: Run full detection on every Nth frame (``1``
+                detects on every frame).
+            min_iou: Minimum IoU for a detection to continue a track.
+            max_misses: Detection passes a track may go unmatched before it
+                is dropped.
+            reidentify_every: Re-encode tracks whose face was last matched
+                this many frames ago, so a wrong early match is corrected;
+                ``0`` disables.  Unknown tracks are re-encoded on every
+                detection pass.
+            cv_tracker_factory: Optional constructor from
+                :func:`opencv_tracker_factory`; when set, boxes are updated
+                by the OpenCV tracker on frames without detection.
+
+        Raises:
+            ValueError: If *detect_every* is less than 1.
+        """
+        if detect_every < 1:
+            raise ValueError("detect_every must be at least 1")
+        self.matcher = matcher
+        self.detect_fn = detect_fn
+        self.encode_fn = encode_fn
+        self.detect_every = detect_every
+        self.min_iou = min_iou
+        self.max_misses = max_misses
+        self.reidentify_every = reidentify_every
+        self.cv_tracker_factory = cv_tracker_factory
+        self.tracks: List[Track] = []
+        self.frame_index = -1
+        self.detections = 0
+        self.encodings = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Forget all tracks (e.g. after a camera reconnect)."""
+        with self._lock:
+            self.tracks = []
+
+    def update(self, rgb_frame: np.ndarray) -> TrackedFrame:
+        """
+        Advance the tracker by one frame.
+
+        Returns:
+            A :class:`TrackedFrame` with the live tracks and the events this
+            frame produced.
+        """
+        with self._lock:
+            self.frame_index += 1
+            index = self.frame_index
+            events: List[TrackEvent] = []
+            detect = index % self.detect_every == 0 or not self.tracks
+            encoded = 0
+            if detect:
+                encoded = self._detect(rgb_frame, index, events)
+            elif self.cv_tracker_factory is not None:
+                self._follow(rgb_frame, index, events)
+            tracks = [track.state() for track in self.tracks]
+            return TrackedFrame(index, tracks, events, detect, encoded)
+
+    def _detect(self, rgb_frame, index: int, events: List[TrackEvent]) -> int:
+        self.detections += 1
+        boxes = [tuple(int(v) for v in box) for box in self.detect_fn(rgb_frame)]
+        pairs = match_boxes([t.box for t in self.tracks], boxes, self.min_iou)
+        matched_tracks = {i for i, _ in pairs}
+        matched_boxes = {j for _, j in pairs}
+
+        for i, j in pairs:
+            track = self.tracks[i]
+            track.box = boxes[j]
+            track.last_seen = index
+            track.misses = 0
+        kept = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    events.append(self._event("lost", track, index))
+                    continue
+            kept.append(track)
+        for j, box in enumerate(boxes):
+            if j not in matched_boxes:
+                track = Track(next(self._ids), box, index)
+                kept.append(track)
+                events.append(self._event("new", track, index))
+        self.tracks = kept
+
+        due = [
+            t
+            for t in self.tracks
+            if t.last_seen == index
+            and (
+                t.last_encoded < 0
+                or not t.identified
+                or (
+                    self.reidentify_every
+                    and index - t.last_encoded >= self.reidentify_every
+                )
+            )
+        ]
+        if due:
+            encodings = self.encode_fn(rgb_frame, [t.box for t in due])
+            self.encodings += len(due)
+            for track, match in zip(due, self.matcher.match(encodings)):
+                track.last_encoded = index
+                if match.name == UNKNOWN_NAME and track.identified:
+                    continue  # a missed re-identification keeps the identity
+                track.distance = match.distance
+                if match.name != track.name:
+                    track.name = match.name
+                    if track.identified:
+                        events.append(self._event("identified", track, index))
+        if self.cv_tracker_factory is not None:
+            for track in self.tracks:
+                if track.last_seen == index:
+                    track.cv_tracker = self.cv_tracker_factory()
+                    track.cv_tracker.init(rgb_frame, _to_xywh(track.box))
+        return len(due)
+
+    def _follow(self, rgb_frame, index: int, events: List[TrackEvent]) -> None:
+        kept = []
+        for track in self.tracks:
+            if track.cv_tracker is not None:
+                ok, rect = track.cv_tracker.update(rgb_frame)
+                if not ok:
+                    events.append(self._event("lost", track, index))
+                    continue
+                track.box = _from_xywh(rect)
+            kept.append(track)
+        self.tracks = kept
+
+    @staticmethod
+    def _event(kind: str, track: Track, index: int) -> TrackEvent:
+        return TrackEvent(kind, track.track_id, track.name, track.box, index)
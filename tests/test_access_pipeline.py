@@ -0,0 +1,177 @@
+"""
+Tests for the recognition -> decision -> door pipeline
+(src/utils/access_pipeline.py, src/main_access_control.py).
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.access_pipeline import (
+    TOPIC_DECISION,
+    TOPIC_UNLOCK,
+    AccessPipeline,
+    format_access_stats,
+)
+from src.utils.events import EventBus
+from src.utils.metrics import LatencyHistogram
+from src.utils.tracking import TrackEvent
+
+
+def make_pipeline(allowed=("alice",), threaded=False, **kwargs):
+    bus = EventBus(threaded=threaded).start()
+    unlocked = []
+    pipeline = AccessPipeline(
+        bus, lambda name: name in allowed, [unlocked.append], **kwargs
+    )
+    return bus, pipeline, unlocked
+
+
+class TestAccessPipeline:
+    def test_granted_face_unlocks_its_door(self):
+        bus, pipeline, unlocked = make_pipeline(doors={"cam0": "front_door"})
+        commands = []
+        bus.subscribe(TOPIC_UNLOCK, lambda e: commands.append(e.data))
+        captured = time.perf_counter()
+        pipeline.recognized("cam0", "alice", track_id=3, captured_at=captured)
+        assert unlocked == ["front_door"]
+        (command,) = commands
+        recognition = command.decision.recognition
+        assert recognition.track_id == 3 and command.decision.granted
+        assert (
+            captured
+            <= recognition.recognized_at
+            <= command.decision.decided_at
+            <= command.actuated_at
+        )
+        assert command.face_to_unlock == command.actuated_at - captured
+
+    def test_denied_and_unknown_faces_do_not_unlock(self):
+        bus, pipeline, unlocked = make_pipeline()
+        decisions = []
+        bus.subscribe(TOPIC_DECISION, lambda e: decisions.append(e.data))
+        pipeline.recognized("door", "mallory")
+        pipeline.recognized("door", "Unknown")
+        assert unlocked == []
+        assert [d.granted for d in decisions] == [False, False]
+        stats = pipeline.stats()
+        assert stats["denied"] == 2 and stats["unlocks"] == 0
+
+    def test_decision_errors_fail_closed(self):
+        def broken(name):
+            raise sqlite3.OperationalError("database is locked")
+
+        unlocked = []
+        bus = EventBus(threaded=False)
+        pipeline = AccessPipeline(bus, broken, [unlocked.append])
+        pipeline.recognized("door", "alice")
+        assert unlocked == []
+        assert pipeline.stats()["errors"] == 1 and pipeline.stats()["denied"] == 1
+
+    def test_cooldown_per_door_and_person(self):
+        _, pipeline, unlocked = make_pipeline(allowed=("alice", "bob"), cooldown=60)
+        for camera, name in [
+            ("front", "alice"),
+            ("front", "alice"),
+            ("front", "bob"),
+            ("back", "alice"),
+        ]:
+            pipeline.recognized(camera, name)
+        assert unlocked == ["front", "front", "back"]
+        assert pipeline.stats()["suppressed"] == 1
+
+    def test_track_events_publish_identified_only(self):
+        _, pipeline, unlocked = make_pipeline(cooldown=0)
+        events = [
+            TrackEvent("new", 1, "Unknown", (0, 10, 10, 0), 5),
+            TrackEvent("identified", 1, "alice", (0, 10, 10, 0), 5),
+            TrackEvent("lost", 2, "bob", (0, 10, 10, 0), 5),
+        ]
+        assert pipeline.track_events("door", events, time.perf_counter()) == 1
+        assert unlocked == ["door"]
+
+    def test_threaded_latency_stats_and_histogram(self):
+        bus, pipeline, unlocked = make_pipeline(threaded=True, cooldown=0)
+        for i in range(50):
+            pipeline.recognized("door", "alice", i, time.perf_counter() - 0.01)
+        assert bus.flush()
+        bus.stop()
+        stats = pipeline.stats()
+        assert stats["unlocks"] == len(unlocked) == 50
+        assert stats["latency"]["face_to_unlock"]["count"] == 50
+        assert stats["latency"]["face_to_unlock"]["p50_ms"] >= 10
+        assert pipeline.histogram.total == 50
+        assert "face_to_unlock" in format_access_stats(stats)
+
+    def test_actuator_errors_do_not_stop_other_actuators(self):
+        def broken(door):
+            raise OSError("GPIO busy")
+
+        calls = []
+        bus = EventBus(threaded=False)
+        pipeline = AccessPipeline(bus, lambda n: True, [broken, calls.append])
+        pipeline.recognized("door", "alice")
+        assert calls == ["door"]
+        assert pipeline.stats()["errors"] == 1 and pipeline.stats()["unlocks"] == 1
+
+
+class TestLatencyHistogram:
+    def test_buckets_and_format(self):
+        histogram = LatencyHistogram(bounds_ms=(1, 10, 100))
+        for seconds in (0.0005, 0.001, 0.005, 0.05, 0.05, 2.0):
+            histogram.record(seconds)
+        assert histogram.buckets() == [
+            ("<= 1 ms", 2),
+            ("<= 10 ms", 1),
+            ("<= 100 ms", 2),
+            ("> 100 ms", 1),
+        ]
+        assert histogram.total == 6
+        assert len(histogram.format().splitlines()) == 4
+        assert LatencyHistogram().format() == "(no samples)"
+
+    def test_bounds_must_ascend(self):
+        with pytest.raises(ValueError):
+            LatencyHistogram(bounds_ms=(10, 1))
+
+
+class TestSimulatedRun:
+    def test_simulation_logs_every_decision(self, tmp_path, capsys):
+        from src.main_access_control import main
+
+        db_path = str(tmp_path / "access.db")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with sqlite3.connect(db_path) as conn:
+            with open(os.path.join(root, "backend", "database.sql")) as f:
+                conn.executescript(f.read())
+            conn.executemany(
+                "INSERT INTO users (name) VALUES (?)", [("alice",), ("bob",)]
+            )
+        main(
+            [
+                "--simulate",
+                "40",
+                "--rate",
+                "0",
+                "--database",
+                db_path,
+                "--camera",
+                "front=0",
+                "--hold",
+                "0",
+                "--cooldown",
+                "0",
+            ]
+        )
+        out = capsys.readouterr().out
+        assert "Recognized: 40" in out and "Face-to-unlock latency:" in out
+        with sqlite3.connect(db_path) as conn:
+            total, granted = conn.execute(
+                "SELECT COUNT(*), SUM(access_granted) FROM access_log"
+            ).fetchone()
+        assert total == 40 and 0 < granted < 40
@@ -0,0 +1,127 @@
+"""
+Tests for batch and streaming anomaly scoring (utils/anomaly_detection.py).
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("sklearn")
+
+from utils.anomaly_detection import (  # noqa: E402
+    ACCESS_FEATURES,
+    AccessFeatures,
+    AnomalyDetector,
+    iter_access_features,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_log(rows):
+    conn = sqlite3.connect(":memory:")
+    with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+        conn.executescript(f.read())
+    conn.executemany(
+        "INSERT INTO access_log (user, timestamp, access_granted, method) "
+        "VALUES (?, ?, ?, ?)",
+        rows,
+    )
+    return conn
+
+
+def office_hours_log(days=30, seed=0):
+    """Users coming in on weekdays between 8 and 18 h by face or badge,
+    now and then denied once."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)  # a Monday
+    rows = []
+    for day in range(days):
+        date = start + timedelta(days=day)
+        if date.weekday() >= 5:
+            continue
+        for user in ("alice", "bob", "carol"):
+            for _ in range(3):
+                at = date + timedelta(hours=rng.uniform(8, 18))
+                method = "rfid" if rng.random() < 0.2 else "face"
+                rows.append((user, str(at)[:19], int(rng.random() > 0.05), method))
+    rows.sort(key=lambda row: row[1])
+    return rows
+
+
+class TestAccessFeatures:
+    def test_features_per_row(self):
+        rows = [
+            (1, "alice", "2024-01-01 08:00:00", 1, "face"),
+            (2, "alice", "2024-01-01 09:00:00", 0, "face"),
+            (3, "alice", "2024-01-02 08:30:00", 0, "rfid"),
+            (4, "bob", "2024-01-06 23:15:00", 1, "pin"),
+        ]
+        features = AccessFeatures().transform(rows)
+        assert features.shape == (4, len(ACCESS_FEATURES))
+        np.testing.assert_array_equal(
+            features,
+            [
+                [8, 0, 0, 0, 0],
+                [9, 0, 1, 0, 1],
+                [8, 1, 1, 1, 2],  # the 08:00 access is 24.5 h old
+                [23, 5, 0, 3, 0],
+            ],
+        )
+
+    def test_chunked_extraction_matches_one_batch(self):
+        conn = make_log(office_hours_log())
+        whole = np.vstack([m for _, m in iter_access_features(conn, 10**6)])
+        chunks = list(iter_access_features(conn, 7))
+        assert len(chunks) > 1
+        np.testing.assert_array_equal(whole, np.vstack([m for _, m in chunks]))
+        ids = np.concatenate([i for i, _ in chunks])
+        assert list(ids) == list(range(1, len(whole) + 1))
+
+
+class TestAnomalyDetector:
+    def test_batch_matches_single_value_detection(self):
+        detector = AnomalyDetector(contamination=0.25)
+        detector.fit(np.array([[8], [12], [15], [50]]))
+        values = [8, 12, 15, 50, 3, 23]
+        labels = detector.detect_batch(values)
+        assert list(labels) == [detector.detect(v) for v in values]
+        assert detector.is_anomaly(50)
+        scores = detector.score_batch(values)
+        assert ((scores < 0) == (labels == -1)).all()
+
+    def test_streaming_flags_off_hours_and_denial_streaks(self):
+        conn = make_log(office_hours_log())
+        detector = AnomalyDetector(contamination=0.01)
+        detector.fit(np.vstack([m for _, m in iter_access_features(conn)]))
+        last_id = conn.execute("SELECT MAX(id) FROM access_log").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO access_log (user, timestamp, access_granted, method) "
+            "VALUES (?, ?, ?, ?)",
+            [("alice", "2024-02-01 10:00:00", 1, "face")]
+            + [("mallory", f"2024-02-03 03:0{i}:00", 0, "nfc") for i in range(5)],
+        )
+        (chunk,) = detector.score_access_log(conn, since_id=last_id)
+        assert list(chunk.labels) == [1, -1, -1, -1, -1, -1]
+        np.testing.assert_array_equal(
+            chunk.labels, detector.detect_batch(chunk.features)
+        )
+        assert chunk.scores[0] > chunk.scores[1:].max()
+
+    def test_streaming_scores_equal_batch_scores(self):
+        conn = make_log(office_hours_log())
+        matrix = np.vstack([m for _, m in iter_access_features(conn)])
+        detector = AnomalyDetector()
+        detector.fit(matrix)
+        chunks = list(detector.score_access_log(conn, chunk_rows=50))
+        assert len(chunks) > 1
+        np.testing.assert_allclose(
+            np.concatenate([c.scores for c in chunks]), detector.score_batch(matrix)
+        )
@@ -0,0 +1,223 @@
+"""
+Tests for the asyncio (ASGI) access API (backend/asgi.py).
+
+The app is driven directly through the ASGI interface, so no server is
+needed; one test runs it under uvicorn when that is installed.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An :class:`AccessApp` on a fresh database, with its own pool, log
+    writer and user cache."""
+    import src.config as cfg
+
+    monkeypatch.setattr(cfg, "DATABASE_PATH", str(tmp_path / "asgi.db"))
+    from backend import server
+    from backend.asgi import create_app
+    from backend.db import ConnectionPool
+    from backend.log_writer import AccessLogWriter
+    from backend.user_cache import UserCache
+
+    monkeypatch.setattr(server, "DATABASE_PATH", cfg.DATABASE_PATH)
+    monkeypatch.setattr(server, "_pool", ConnectionPool(cfg.DATABASE_PATH))
+    monkeypatch.setattr(server, "_log_writer", AccessLogWriter(server._pool.connection))
+    monkeypatch.setattr(server, "_user_cache", UserCache(server._pool.connection))
+    app = create_app(threads=2)
+    yield app
+    server._log_writer.stop()
+    server._pool.close_all()
+
+
+async def call(app, method, path, body=None, query=b"", chunks=None):
+    """Send one request to *app*; return ``(status, headers, json)``."""
+    if chunks is None:
+        chunks = [json.dumps(body).encode() if body is not None else b""]
+    messages = [
+        {"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+        for i, c in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query}
+    await app(scope, receive, send)
+    headers = {k.decode(): v.decode() for k, v in sent[0]["headers"]}
+    return sent[0]["status"], headers, json.loads(sent[1]["body"])
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestAccessApp:
+    def test_health_and_routing(self, app):
+        async def scenario():
+            assert (await call(app, "GET", "/health"))[2] == {"status": "ok"}
+            assert (await call(app, "GET", "/nope"))[0] == 404
+            assert (await call(app, "PUT", "/access"))[0] == 405
+            assert (await call(app, "GET", "/users/1"))[0] == 405
+
+        run(scenario())
+
+    def test_users_and_access(self, app):
+        async def scenario():
+            status, _, created = await call(app, "POST", "/users", {"name": "alice"})
+            assert status == 201
+            assert (await call(app, "POST", "/users", {"name": "alice"}))[0] == 409
+            users = (await call(app, "GET", "/users"))[2]
+            assert [u["name"] for u in users] == ["alice"]
+            granted = await call(app, "POST", "/access", {"user": "alice"})
+            assert granted[2] == {"access": True}
+            denied = await call(app, "POST", "/access", {"user": "mallory"})
+            assert denied[2] == {"access": False}
+            path = f"/users/{created['id']}"
+            assert (await call(app, "DELETE", path))[2] == {"deleted": True}
+            assert (await call(app, "DELETE", path))[0] == 404
+            again = await call(app, "POST", "/access", {"user": "alice"})
+            assert again[2] == {"access": False}
+
+        run(scenario())
+
+    def test_concurrent_requests_are_all_logged(self, app):
+        async def scenario():
+            await call(app, "POST", "/users", {"name": "bob"})
+            results = await asyncio.gather(
+                *(call(app, "POST", "/access", {"user": "bob"}) for _ in range(100))
+            )
+            assert all(r[2] == {"access": True} for r in results)
+            status, _, stats = await call(app, "GET", "/stats")
+            assert stats == [["bob", 100, 100]]
+
+        run(scenario())
+
+    def test_logs_pagination_and_filters(self, app):
+        async def scenario():
+            for user in ("a", "b", "a"):
+                await call(app, "POST", "/access", {"user": user})
+            status, headers, page = await call(
+                app, "GET", "/logs", query=b"user=a&limit=1"
+            )
+            assert status == 200 and len(page) == 1
+            cursor = headers["x-next-cursor"].encode()
+            _, headers, page = await call(
+                app, "GET", "/logs", query=b"user=a&limit=1&cursor=" + cursor
+            )
+            assert page[0]["user"] == "a" and "x-next-cursor" not in headers
+            assert (await call(app, "GET", "/logs", query=b"granted=maybe"))[0] == 400
+
+        run(scenario())
+
+    def test_bad_bodies(self, app):
+        async def scenario():
+            assert (await call(app, "POST", "/access", chunks=[b"{bad"]))[0] == 400
+            assert (await call(app, "POST", "/access"))[0] == 400
+            big = [b"x" * 40_000, b"x" * 40_000]
+            assert (await call(app, "POST", "/access", chunks=big))[0] == 413
+            body = [b'{"user":', b' "carol"}']
+            assert (await call(app, "POST", "/access", chunks=body))[0] == 200
+
+        run(scenario())
+
+    def test_lifespan_shutdown_drains_access_log(self, app):
+        from backend import server
+
+        async def scenario():
+            messages = [{"type": "lifespan.startup"}]
+            sent = []
+            shutdown = asyncio.Event()
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await shutdown.wait()
+                return {"type": "lifespan.shutdown"}
+
+            async def send(message):
+                sent.append(message["type"])
+
+            lifespan = asyncio.ensure_future(app({"type": "lifespan"}, receive, send))
+            await asyncio.sleep(0.1)
+            assert sent == ["lifespan.startup.complete"]
+            for i in range(20):
+                await call(app, "POST", "/access", {"user": f"user_{i}"})
+            shutdown.set()
+            await lifespan
+            assert sent[-1] == "lifespan.shutdown.complete"
+
+        run(scenario())
+        assert not server._log_writer.running
+        with sqlite3.connect(server.DATABASE_PATH) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM access_log").fetchone()[0] == 20
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestUvicorn:
+    def test_serves_and_drains_on_sigterm(self, tmp_path):
+        pytest.importorskip("uvicorn")
+        db_path = str(tmp_path / "uvicorn.db")
+        port = free_port()
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "--factory",
+                "backend.asgi:create_app",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+            ],
+            cwd=ROOT,
+            env=dict(os.environ, FACE_RECON_DB=db_path),
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    urllib.request.urlopen(base + "/health", timeout=1)
+                    break
+                except OSError:
+                    assert proc.poll() is None and time.monotonic() < deadline
+                    time.sleep(0.1)
+            for i in range(50):
+                req = urllib.request.Request(
+                    base + "/access",
+                    data=f'{{"user": "user_{i}"}}'.encode(),
+                    headers={"Content-Type": "application/json"},
+                )
+                assert urllib.request.urlopen(req, timeout=5).status == 200
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            # Recent uvicorn versions re-raise the signal after a clean shutdown.
+            assert proc.wait(timeout=30) in (0, -signal.SIGTERM)
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM access_log").fetchone()[0] == 50
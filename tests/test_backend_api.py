@@ -7,6 +7,7 @@ required.  A temporary SQLite database is used for each test session.
 
 import os
 import sys
+from datetime import date, datetime
 
 import pytest
 
@@ -138,6 +139,20 @@ class TestAccess:
         assert res.status_code == 200
         assert res.get_json()["access"] is True
 
+    def test_access_refused_when_log_queue_full(self, client, monkeypatch):
+        from queue import Full
+
+        from backend import server
+
+        def full(entries):
+            raise Full()
+
+        monkeypatch.setattr(server._log_writer, "submit_many", full)
+        res = client.post("/access", json={"user": "granted_user"})
+        assert res.status_code == 503
+        assert res.headers["Retry-After"] == "1"
+        assert "access" not in res.get_json()
+
 
 # ---------------------------------------------------------------------------
 # /logs
@@ -150,6 +165,20 @@ class TestLogs:
         assert res.status_code == 200
         assert isinstance(res.get_json(), list)
 
+    def test_logs_do_not_wait_long_on_a_stalled_writer(self, client, monkeypatch):
+        from backend import server
+
+        timeouts = []
+
+        def stalled(timeout=5.0):
+            timeouts.append(timeout)
+            return False
+
+        monkeypatch.setattr(server._log_writer, "flush", stalled)
+        assert client.get("/logs").status_code == 200
+        assert client.get("/stats").status_code == 200
+        assert len(timeouts) == 2 and max(timeouts) <= 0.1
+
     def test_logs_records_access_attempts(self, client):
         client.post("/users", json={"name": "log_test_user"})
         client.post("/access", json={"user": "log_test_user"})
@@ -187,6 +216,56 @@ class TestLogs:
         logs = client.get("/logs?limit=1").get_json()
         assert logs[0]["method"] == "voice"
 
+    def test_logs_cursor_pages_through_everything(self, client):
+        for _ in range(5):
+            client.post("/access", json={"user": "paged_user", "method": "pin"})
+        ids, url = [], "/logs?limit=2&user=paged_user"
+        while url:
+            res = client.get(url)
+            ids.extend(entry["id"] for entry in res.get_json())
+            cursor = res.headers.get("X-Next-Cursor")
+            url = f"/logs?limit=2&user=paged_user&cursor={cursor}" if cursor else None
+        assert len(ids) == 5
+        assert ids == sorted(ids, reverse=True)
+
+    def test_logs_filters(self, client):
+        logs = client.get("/logs?method=pin&granted=false&since=2000-01-01").get_json()
+        assert logs
+        assert all(e["method"] == "pin" and not e["access_granted"] for e in logs)
+        assert client.get("/logs?until=2000-01-01").get_json() == []
+
+    def test_logs_invalid_filters(self, client):
+        assert client.get("/logs?granted=maybe").status_code == 400
+        assert client.get("/logs?since=soon").status_code == 400
+        assert client.get("/logs?cursor=%25%25").status_code == 400
+
+    def test_export_ndjson(self, client):
+        import json
+
+        res = client.get("/logs/export?user=paged_user")
+        assert res.status_code == 200
+        assert res.mimetype == "application/x-ndjson"
+        assert "attachment" in res.headers["Content-Disposition"]
+        records = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+        assert len(records) == 5
+        assert {r["user"] for r in records} == {"paged_user"}
+
+    def test_export_csv_gzip(self, client):
+        import gzip
+
+        res = client.get("/logs/export?format=csv&gzip=true&user=paged_user")
+        assert res.status_code == 200
+        assert res.mimetype == "application/gzip"
+        assert "access_log.csv.gz" in res.headers["Content-Disposition"]
+        lines = gzip.decompress(res.get_data()).decode().splitlines()
+        assert lines[0] == "id,user,timestamp,access_granted,method"
+        assert len(lines) == 6
+
+    def test_export_invalid_parameters(self, client):
+        assert client.get("/logs/export?format=xml").status_code == 400
+        assert client.get("/logs/export?gzip=maybe").status_code == 400
+        assert client.get("/logs/export?since=soon").status_code == 400
+
 
 # ---------------------------------------------------------------------------
 # /stats
@@ -208,3 +287,259 @@ class TestStats:
             assert isinstance(total, int)
             assert isinstance(granted, int)
             assert total >= granted >= 0
+
+    def test_stats_counts_new_accesses(self, client):
+        client.post("/users", json={"name": "stats_user"})
+        for _ in range(3):
+            client.post("/access", json={"user": "stats_user"})
+        stats = {
+            user: (total, granted)
+            for user, total, granted in client.get("/stats").get_json()
+        }
+        assert stats["stats_user"] == (3, 3)
+
+    def test_stats_time_window(self, client):
+        client.post("/access", json={"user": "window_user"})
+        everything = client.get("/stats?since=2000-01-01&until=2999-01-01").get_json()
+        assert ["window_user", 1, 0] in everything
+        assert client.get("/stats?until=2000-01-01").get_json() == []
+
+    def test_stats_invalid_window(self, client):
+        assert client.get("/stats?since=not-a-date").status_code == 400
+        res = client.get("/stats?since=2024-02-01&until=2024-01-01")
+        assert res.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# /cache/stats
+# ---------------------------------------------------------------------------
+
+
+class TestUserCache:
+    def test_user_changes_visible_to_access_immediately(self, client):
+        assert client.post("/access", json={"user": "cached"}).get_json() == {
+            "access": False
+        }
+        uid = client.post("/users", json={"name": "cached"}).get_json()["id"]
+        assert client.post("/access", json={"user": "cached"}).get_json()["access"]
+        client.delete(f"/users/{uid}")
+        assert not client.post("/access", json={"user": "cached"}).get_json()["access"]
+
+    def test_cache_stats(self, client):
+        client.post("/access", json={"user": "cached"})
+        stats = client.get("/cache/stats").get_json()["users"]
+        assert stats["size"] >= 1
+        assert stats["hits"] + stats["misses"] > 0
+        assert 0.0 <= stats["hit_rate"] <= 1.0
+
+
+# ---------------------------------------------------------------------------
+# /access/credential
+# ---------------------------------------------------------------------------
+
+
+class TestCredentialAccess:
+    def test_rfid_and_nfc_resolve_to_user(self, client):
+        res = client.post(
+            "/users", json={"name": "badge_a", "rfid_code": "RF01", "nfc_tag": "NF01"}
+        )
+        assert res.status_code == 201
+        for method, code in (("rfid", "RF01"), ("nfc", "NF01")):
+            res = client.post(
+                "/access/credential", json={"method": method, "code": code}
+            )
+            assert res.status_code == 200
+            assert res.get_json() == {"access": True, "user": "badge_a"}
+
+    def test_unknown_code_is_denied_and_logged(self, client):
+        res = client.post("/access/credential", json={"method": "rfid", "code": "NOPE"})
+        assert res.get_json() == {"access": False, "user": None}
+        entry = client.get("/logs?method=rfid&granted=false&limit=1").get_json()[0]
+        assert entry["user"] == "Unknown"
+
+    def test_grant_logged_with_method(self, client):
+        client.post("/users", json={"name": "badge_b", "nfc_tag": "NF02"})
+        client.post("/access/credential", json={"method": "nfc", "code": "NF02"})
+        entry = client.get("/logs?user=badge_b&limit=1").get_json()[0]
+        assert entry["method"] == "nfc"
+        assert entry["access_granted"] is True
+
+    def test_schedule_applies_to_credentials(self, client):
+        res = client.post("/users", json={"name": "badge_c", "rfid_code": "RF03"})
+        uid = res.get_json()["id"]
+        other_day = (datetime.now().weekday() + 3) % 7
+        weekly = [{"days": [other_day], "start": "00:00", "end": "24:00"}]
+        client.put(f"/users/{uid}/schedule", json={"weekly": weekly})
+        res = client.post("/access/credential", json={"method": "rfid", "code": "RF03"})
+        assert res.get_json() == {"access": False, "user": "badge_c"}
+
+    def test_duplicate_code_rejected(self, client):
+        client.post("/users", json={"name": "badge_d", "rfid_code": "RF04"})
+        res = client.post("/users", json={"name": "badge_e", "rfid_code": "RF04"})
+        assert res.status_code == 409
+        assert "rfid_code" in res.get_json()["error"]
+
+    @pytest.mark.parametrize(
+        "body",
+        [{"method": "pin", "code": "1234"}, {"method": "rfid"}, {"code": "RF01"}],
+    )
+    def test_invalid_request(self, client, body):
+        assert client.post("/access/credential", json=body).status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# /users/<id>/schedule and /holidays
+# ---------------------------------------------------------------------------
+
+
+ALL_WEEK = [{"days": list(range(7)), "start": "00:00", "end": "24:00"}]
+
+
+class TestSchedules:
+    def test_schedule_round_trip(self, client):
+        uid = client.post("/users", json={"name": "sched_a"}).get_json()["id"]
+        assert client.get(f"/users/{uid}/schedule").get_json() == {"weekly": []}
+        weekly = [{"days": ["fri", "mon"], "start": "22:00", "end": "06:00"}]
+        res = client.put(f"/users/{uid}/schedule", json={"weekly": weekly})
+        assert res.status_code == 200
+        assert res.get_json()["intervals"] == 2
+        assert client.get(f"/users/{uid}/schedule").get_json()["weekly"] == [
+            {"day": "mon", "start": "22:00", "end": "06:00"},
+            {"day": "fri", "start": "22:00", "end": "06:00"},
+        ]
+
+    def test_schedule_errors(self, client):
+        assert client.get("/users/99999/schedule").status_code == 404
+        res = client.put("/users/99999/schedule", json={"weekly": ALL_WEEK})
+        assert res.status_code == 404
+        uid = client.post("/users", json={"name": "sched_b"}).get_json()["id"]
+        bad = [{"days": ["funday"], "start": "08:00", "end": "18:00"}]
+        res = client.put(f"/users/{uid}/schedule", json={"weekly": bad})
+        assert res.status_code == 400
+
+    def test_invalid_access_window_rejected(self, client):
+        res = client.post("/users", json={"name": "sched_c", "access_start": "8am"})
+        assert res.status_code == 400
+
+    def test_schedule_enforced_by_access(self, client):
+        uid = client.post("/users", json={"name": "sched_d"}).get_json()["id"]
+        other_day = (datetime.now().weekday() + 3) % 7
+        weekly = [{"days": [other_day], "start": "00:00", "end": "24:00"}]
+        client.put(f"/users/{uid}/schedule", json={"weekly": weekly})
+        assert not client.post("/access", json={"user": "sched_d"}).get_json()["access"]
+        client.put(f"/users/{uid}/schedule", json={"weekly": ALL_WEEK})
+        assert client.post("/access", json={"user": "sched_d"}).get_json()["access"]
+        client.put(f"/users/{uid}/schedule", json={"weekly": []})
+        assert client.post("/access", json={"user": "sched_d"}).get_json()["access"]
+
+    def test_holidays(self, client):
+        uid = client.post("/users", json={"name": "sched_e"}).get_json()["id"]
+        client.put(f"/users/{uid}/schedule", json={"weekly": ALL_WEEK})
+        today = date.today().isoformat()
+        res = client.post("/holidays", json={"date": today, "name": "Test day"})
+        assert res.status_code == 201
+        assert client.post("/holidays", json={"date": today}).status_code == 409
+        assert client.post("/holidays", json={"date": "2024-13-01"}).status_code == 400
+        assert {"date": today, "name": "Test day"} in client.get("/holidays").get_json()
+        try:
+            assert not client.post("/access", json={"user": "sched_e"}).get_json()[
+                "access"
+            ]
+            # Users without a schedule are not affected by holidays.
+            client.post("/users", json={"name": "sched_f"})
+            assert client.post("/access", json={"user": "sched_f"}).get_json()["access"]
+        finally:
+            assert client.delete(f"/holidays/{today}").status_code == 200
+        assert client.delete(f"/holidays/{today}").status_code == 404
+        assert client.post("/access", json={"user": "sched_e"}).get_json()["access"]
+
+
+# ---------------------------------------------------------------------------
+# /recognize
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def gallery(client, tmp_path_factory):
+    """Load a three-person gallery into the server; two are registered users."""
+    import numpy as np
+
+    import backend.server as server
+    from src.utils.encodings_store import save_encodings
+
+    rng = np.random.default_rng(0)
+    encodings = rng.normal(0, 0.1, (3, 128)).astype(np.float32)
+    names = ["recog_alice", "recog_bob", "recog_carol"]
+    store = str(tmp_path_factory.mktemp("gallery") / "encodings.frenc")
+    save_encodings(store, encodings, names)
+    server.load_recognition_gallery(store)
+    client.post("/users", json={"name": "recog_alice"})
+    client.post("/users", json={"name": "recog_bob"})
+    yield dict(zip(names, encodings.tolist()))
+    server._gallery = None
+
+
+class TestRecognize:
+    def test_batch_of_encodings(self, client, gallery):
+        far = [5.0] * 128
+        batch = [gallery["recog_bob"], far, gallery["recog_carol"]]
+        res = client.post("/recognize", json={"encodings": batch})
+        assert res.status_code == 200
+        results = res.get_json()["results"]
+        assert [r["name"] for r in results] == ["recog_bob", "Unknown", "recog_carol"]
+        # carol is in the gallery but not a registered user
+        assert [r["access"] for r in results] == [True, False, False]
+        assert results[0]["distance"] == pytest.approx(0.0, abs=1e-3)
+        assert results[1]["distance"] is None
+
+    def test_batch_is_logged(self, client, gallery):
+        batch = [gallery["recog_alice"], gallery["recog_alice"]]
+        client.post("/recognize", json={"encodings": batch})
+        logs = client.get("/logs?limit=2").get_json()
+        assert [(e["user"], e["access_granted"]) for e in logs] == [
+            ("recog_alice", True),
+            ("recog_alice", True),
+        ]
+        assert all(e["method"] == "face" for e in logs)
+
+    def test_images_are_encoded(self, client, gallery, monkeypatch):
+        import base64
+
+        import backend.server as server
+
+        monkeypatch.setattr(server, "_encode_crop", lambda data: gallery["recog_bob"])
+        image = base64.b64encode(b"\xff\xd8fake-jpeg").decode()
+        res = client.post("/recognize", json={"images": [image]})
+        assert res.status_code == 200
+        assert res.get_json()["results"][0]["name"] == "recog_bob"
+
+    def test_invalid_base64_rejected(self, client, gallery):
+        res = client.post("/recognize", json={"images": ["not base64!"]})
+        assert res.status_code == 400
+
+    def test_wrong_dimension_rejected(self, client, gallery):
+        res = client.post("/recognize", json={"encodings": [[0.1, 0.2]]})
+        assert res.status_code == 400
+
+    def test_requires_exactly_one_input(self, client, gallery):
+        assert client.post("/recognize", json={}).status_code == 400
+        res = client.post("/recognize", json={"encodings": [], "images": []})
+        assert res.status_code == 400
+
+    def test_batch_size_limit(self, client, gallery):
+        from src.config import RECOGNIZE_MAX_BATCH
+
+        batch = [[0.0] * 128] * (RECOGNIZE_MAX_BATCH + 1)
+        res = client.post("/recognize", json={"encodings": batch})
+        assert res.status_code == 400
+
+    def test_no_gallery_returns_503(self, client, monkeypatch):
+        import backend.server as server
+
+        def missing():
+            raise FileNotFoundError("no gallery")
+
+        monkeypatch.setattr(server, "_gallery", None)
+        monkeypatch.setattr(server, "load_gallery", missing)
+        res = client.post("/recognize", json={"encodings": [[0.0] * 128]})
+        assert res.status_code == 503
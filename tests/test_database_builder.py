@@ -0,0 +1,136 @@
+"""
+Tests for the parallel, incremental encodings database builder.
+
+A fake encoder derives a deterministic "encoding" from the image bytes, so
+no face-recognition library or real images are needed.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.database_builder import build_database, load_manifest
+from src.utils.encodings_store import open_encodings
+
+ENCODE_LOG = []
+
+
+def fake_encode(path):
+    """Encode an image as a vector seeded by its contents; 'noface' has none."""
+    ENCODE_LOG.append(os.path.basename(path))
+    data = open(path, "rb").read()
+    if data.startswith(b"noface"):
+        return None
+    if data.startswith(b"corrupt"):
+        raise ValueError("cannot decode image")
+    seed = int.from_bytes(data[:8].ljust(8, b"\0"), "little")
+    return np.random.default_rng(seed).normal(size=128)
+
+
+def _write(root, person, name, content):
+    folder = root / person
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / name).write_bytes(content)
+
+
+@pytest.fixture
+def faces(tmp_path):
+    root = tmp_path / "known_faces"
+    _write(root, "alice", "a1.jpg", b"alice-1")
+    _write(root, "alice", "a2.jpg", b"alice-2")
+    _write(root, "bob", "b1.jpg", b"bob-1")
+    _write(root, "bob", "empty.jpg", b"noface")
+    return root
+
+
+def _build(faces, tmp_path, **kwargs):
+    ENCODE_LOG.clear()
+    kwargs.setdefault("workers", 1)
+    return build_database(
+        str(faces),
+        store_path=str(tmp_path / "enc.frenc"),
+        manifest_path=str(tmp_path / "manifest.json"),
+        encode_fn=fake_encode,
+        progress=None,
+        **kwargs,
+    )
+
+
+class TestBuildDatabase:
+    def test_initial_build_encodes_everything(self, faces, tmp_path):
+        stats = _build(faces, tmp_path)
+        assert (stats.total, stats.encoded, stats.no_face, stats.reused) == (4, 3, 1, 0)
+        store = open_encodings(str(tmp_path / "enc.frenc"))
+        assert list(store.ids) == ["alice/a1.jpg", "alice/a2.jpg", "bob/b1.jpg"]
+        assert list(store.names) == ["alice", "alice", "bob"]
+        manifest = load_manifest(str(tmp_path / "manifest.json"))
+        assert manifest["bob/empty.jpg"]["has_face"] is False
+        assert len(manifest["alice/a1.jpg"]["sha256"]) == 64
+
+    def test_rerun_without_changes_encodes_nothing(self, faces, tmp_path):
+        _build(faces, tmp_path)
+        stats = _build(faces, tmp_path)
+        assert ENCODE_LOG == []
+        assert (stats.encoded, stats.reused) == (0, 4)
+        assert len(open_encodings(str(tmp_path / "enc.frenc"))) == 3
+
+    def test_only_new_and_changed_images_are_encoded(self, faces, tmp_path):
+        _build(faces, tmp_path)
+        before = np.array(open_encodings(str(tmp_path / "enc.frenc")).encodings)
+        _write(faces, "carol", "c1.jpg", b"carol-1")
+        _write(faces, "alice", "a2.jpg", b"alice-2-new")
+
+        stats = _build(faces, tmp_path)
+        assert sorted(ENCODE_LOG) == ["a2.jpg", "c1.jpg"]
+        assert stats.encoded == 2
+        store = open_encodings(str(tmp_path / "enc.frenc"))
+        assert "carol/c1.jpg" in list(store.ids)
+        np.testing.assert_array_equal(store.encodings[0], before[0])
+        assert not np.array_equal(store.encodings[1], before[1])
+
+    def test_touched_but_identical_file_is_not_reencoded(self, faces, tmp_path):
+        _build(faces, tmp_path)
+        path = faces / "bob" / "b1.jpg"
+        os.utime(path, ns=(0, 1_000_000_000))
+        _build(faces, tmp_path)
+        assert ENCODE_LOG == []
+
+    def test_deleted_images_are_dropped(self, faces, tmp_path):
+        _build(faces, tmp_path)
+        (faces / "bob" / "b1.jpg").unlink()
+        stats = _build(faces, tmp_path)
+        assert stats.deleted == 1
+        assert list(open_encodings(str(tmp_path / "enc.frenc")).names) == [
+            "alice",
+            "alice",
+        ]
+
+    def test_failed_images_are_skipped_and_retried(self, faces, tmp_path):
+        _write(faces, "bob", "bad.jpg", b"corrupt")
+        stats = _build(faces, tmp_path)
+        assert stats.failed == 1
+        _build(faces, tmp_path)
+        assert ENCODE_LOG == ["bad.jpg"]
+
+    def test_process_pool_matches_serial_build(self, faces, tmp_path):
+        _build(faces, tmp_path, full=True)
+        serial = np.array(open_encodings(str(tmp_path / "enc.frenc")).encodings)
+        _build(faces, tmp_path, workers=2, full=True)
+        parallel = open_encodings(str(tmp_path / "enc.frenc")).encodings
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_progress_reports_throughput(self, faces, tmp_path):
+        reports = []
+        build_database(
+            str(faces),
+            store_path=str(tmp_path / "enc.frenc"),
+            manifest_path=str(tmp_path / "manifest.json"),
+            workers=1,
+            encode_fn=fake_encode,
+            progress=lambda done, total, elapsed: reports.append((done, total)),
+        )
+        assert reports[-1] == (4, 4)
@@ -0,0 +1,80 @@
+"""
+Tests for the backend's per-thread SQLite connection pool.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import ConnectionPool
+
+
+def make_pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"))
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    return pool
+
+
+class TestConnectionPool:
+    def test_same_thread_reuses_connection(self, tmp_path):
+        pool = make_pool(tmp_path)
+        assert pool.connection() is pool.connection()
+        assert len(pool) == 1
+
+    def test_each_thread_gets_its_own_connection(self, tmp_path):
+        pool = make_pool(tmp_path)
+        seen = []
+        threads = [
+            threading.Thread(target=lambda: seen.append(id(pool.connection())))
+            for _ in range(3)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(set(seen + [id(pool.connection())])) == 4
+        assert len(pool) == 4
+
+    def test_connection_settings(self, tmp_path):
+        conn = make_pool(tmp_path).connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+
+    def test_concurrent_writers_do_not_lock(self, tmp_path):
+        pool = make_pool(tmp_path)
+        errors = []
+
+        def write():
+            try:
+                for i in range(50):
+                    with pool.connection() as conn:
+                        conn.execute("INSERT INTO t VALUES (?)", (i,))
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=write) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert pool.connection().execute("SELECT COUNT(*) FROM t").fetchone()[0] == 200
+
+    def test_fork_gets_fresh_connections(self, tmp_path):
+        pool = make_pool(tmp_path)
+        parent = pool.connection()
+        pool._pid = -1  # as seen from a forked child
+        child = pool.connection()
+        assert child is not parent
+        assert len(pool) == 1
+
+    def test_close_all(self, tmp_path):
+        pool = make_pool(tmp_path)
+        first = pool.connection()
+        pool.close_all()
+        assert len(pool) == 0
+        assert pool.connection() is not first
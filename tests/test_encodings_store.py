@@ -0,0 +1,121 @@
+"""
+Unit tests for the memory-mapped encodings store and pickle migration.
+"""
+
+import os
+import pickle
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.encodings_store import (
+    FORMAT_VERSION,
+    load_gallery,
+    migrate_pickle,
+    open_encodings,
+    save_encodings,
+)
+
+
+@pytest.fixture
+def gallery():
+    rng = np.random.default_rng(3)
+    encodings = rng.normal(0.0, 0.1, size=(20, 128))
+    names = [f"person_{i}" for i in range(19)] + ["Zoë Ørsted"]
+    return encodings, names
+
+
+class TestEncodingStore:
+    def test_round_trip(self, tmp_path, gallery):
+        encodings, names = gallery
+        path = str(tmp_path / "enc.frenc")
+        save_encodings(path, encodings, names, ids=[f"img{i}.jpg" for i in range(20)])
+
+        store = open_encodings(path)
+        assert len(store) == 20
+        assert store.version == FORMAT_VERSION
+        np.testing.assert_allclose(store.encodings, encodings, rtol=1e-6)
+        assert list(store.names) == names
+        assert store.ids[-1] == "img19.jpg"
+        np.testing.assert_allclose(
+            store.sq_norms, (encodings**2).sum(axis=1), rtol=1e-5
+        )
+
+    def test_encodings_are_memory_mapped(self, tmp_path, gallery):
+        path = str(tmp_path / "enc.frenc")
+        save_encodings(path, *gallery)
+        store = open_encodings(path)
+        assert isinstance(store.encodings, np.memmap)
+        assert not store.encodings.flags["WRITEABLE"]
+
+    def test_matcher_uses_mapped_matrix_without_copy(self, tmp_path, gallery):
+        encodings, names = gallery
+        path = str(tmp_path / "enc.frenc")
+        save_encodings(path, encodings, names)
+        store = open_encodings(path)
+        matcher = store.to_matcher()
+        assert np.shares_memory(matcher.index.vectors, store.encodings)
+        assert matcher.match(encodings[4])[0].name == "person_4"
+
+    def test_in_memory_open(self, tmp_path, gallery):
+        path = str(tmp_path / "enc.frenc")
+        save_encodings(path, *gallery)
+        store = open_encodings(path, mmap=False)
+        assert not isinstance(store.encodings, np.memmap)
+        assert store.names[0] == "person_0"
+
+    def test_empty_store(self, tmp_path):
+        path = str(tmp_path / "empty.frenc")
+        save_encodings(path, [], [])
+        store = open_encodings(path)
+        assert len(store) == 0
+        assert list(store.names) == []
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "not_a_store.bin"
+        path.write_bytes(b"hello world" * 10)
+        with pytest.raises(ValueError):
+            open_encodings(str(path))
+
+    def test_rejects_unknown_version(self, tmp_path, gallery):
+        path = str(tmp_path / "enc.frenc")
+        save_encodings(path, *gallery)
+        with open(path, "r+b") as f:
+            f.seek(8)
+            f.write(struct.pack("<I", FORMAT_VERSION + 1))
+        with pytest.raises(ValueError, match="format v"):
+            open_encodings(path)
+
+    def test_length_mismatch_rejected(self, tmp_path, gallery):
+        encodings, names = gallery
+        with pytest.raises(ValueError):
+            save_encodings(str(tmp_path / "bad.frenc"), encodings, names[:3])
+
+
+class TestMigration:
+    def test_migrate_pickle(self, tmp_path, gallery):
+        encodings, names = gallery
+        pickle_path = str(tmp_path / "encodings.pickle")
+        with open(pickle_path, "wb") as f:
+            pickle.dump({"encodings": list(encodings), "names": names}, f)
+
+        store_path = str(tmp_path / "encodings.frenc")
+        assert migrate_pickle(pickle_path, store_path) == 20
+        assert list(open_encodings(store_path).names) == names
+
+    def test_load_gallery_falls_back_to_pickle(self, tmp_path, gallery):
+        encodings, names = gallery
+        pickle_path = str(tmp_path / "encodings.pickle")
+        with open(pickle_path, "wb") as f:
+            pickle.dump({"encodings": list(encodings), "names": names}, f)
+
+        matcher = load_gallery(str(tmp_path / "missing.frenc"), pickle_path)
+        assert matcher.match(encodings[7])[0].name == "person_7"
+
+    def test_load_gallery_missing_files(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_gallery(str(tmp_path / "a.frenc"), str(tmp_path / "b.pickle"))
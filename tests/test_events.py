@@ -0,0 +1,79 @@
+"""
+Tests for the in-process event bus (src/utils/events.py).
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.events import ALL_TOPICS, EventBus
+
+
+class TestEventBus:
+    def test_delivers_in_order_per_topic(self):
+        received = []
+        with EventBus() as bus:
+            bus.subscribe("a", lambda e: received.append(("a", e.data)))
+            bus.subscribe("b", lambda e: received.append(("b", e.data)))
+            for i in range(100):
+                bus.publish("a" if i % 2 else "b", i)
+            assert bus.flush()
+        assert received == [("a" if i % 2 else "b", i) for i in range(100)]
+
+    def test_wildcard_and_unsubscribe(self):
+        seen, everything = [], []
+        bus = EventBus(threaded=False)
+        unsubscribe = bus.subscribe("x", lambda e: seen.append(e.data))
+        bus.subscribe(ALL_TOPICS, lambda e: everything.append(e.topic))
+        bus.publish("x", 1)
+        unsubscribe()
+        bus.publish("x", 2)
+        bus.publish("y", 3)
+        assert seen == [1]
+        assert everything == ["x", "x", "y"]
+
+    def test_handler_errors_are_isolated(self):
+        received = []
+
+        def failing(event):
+            raise RuntimeError("boom")
+
+        bus = EventBus(threaded=False)
+        bus.subscribe("t", failing)
+        bus.subscribe("t", lambda e: received.append(e.data))
+        bus.publish("t", "ok")
+        assert received == ["ok"]
+        assert bus.stats()["errors"] == 1 and bus.stats()["delivered"] == 1
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        release = threading.Event()
+        bus = EventBus(max_queue=2).start()
+        bus.subscribe("t", lambda e: release.wait(5))
+        results = [bus.publish("t", i) for i in range(10)]
+        release.set()
+        assert bus.stop()
+        assert results.count(False) == bus.stats()["dropped"] >= 7
+
+    def test_flush_waits_for_events_published_by_handlers(self):
+        chain = []
+        with EventBus() as bus:
+            bus.subscribe("first", lambda e: bus.publish("second", e.data + 1))
+            bus.subscribe("second", lambda e: chain.append(e.data))
+            bus.publish("first", 1)
+            assert bus.flush()
+            assert chain == [2]
+
+    def test_stop_drains_and_refuses_more(self):
+        received = []
+        bus = EventBus().start()
+        bus.subscribe("t", lambda e: received.append(e.data))
+        for i in range(50):
+            bus.publish("t", i)
+        assert bus.stop()
+        assert received == list(range(50))
+        with pytest.raises(RuntimeError):
+            bus.publish("t", 0)
@@ -0,0 +1,107 @@
+"""
+Unit tests for the gallery index backends (brute force and IVF-PQ).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.face_index import (
+    BruteForceIndex,
+    IVFPQIndex,
+    create_index,
+    kmeans,
+)
+from src.utils.matcher import FaceMatcher
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(7)
+    gallery = rng.normal(0.0, 0.056, size=(3000, 128)).astype(np.float32)
+    probes = gallery[:40] + rng.normal(0.0, 0.02, size=(40, 128)).astype(np.float32)
+    return gallery, probes
+
+
+def _small_ivfpq(gallery, **params):
+    index = IVFPQIndex(nlist=32, m=8, nbits=6, n_iter=8, **params)
+    index.train(gallery)
+    index.add(gallery)
+    return index
+
+
+class TestBruteForceIndex:
+    def test_search_returns_sorted_exact_neighbours(self, data):
+        gallery, probes = data
+        index = BruteForceIndex()
+        index.add(gallery)
+        distances, ids = index.search(probes, k=3)
+        assert ids.shape == (40, 3)
+        assert np.all(np.diff(distances, axis=1) >= 0)
+        np.testing.assert_array_equal(ids[:, 0], np.arange(40))
+
+    def test_k_larger_than_gallery_is_padded(self):
+        index = BruteForceIndex()
+        index.add(np.zeros((2, 128)))
+        distances, ids = index.search(np.zeros((1, 128)), k=4)
+        assert list(ids[0, 2:]) == [-1, -1]
+        assert np.isinf(distances[0, 2:]).all()
+
+
+class TestIVFPQIndex:
+    def test_add_requires_training(self, data):
+        with pytest.raises(RuntimeError):
+            IVFPQIndex().add(data[0])
+
+    def test_codes_are_compact(self, data):
+        index = _small_ivfpq(data[0], rerank=0)
+        assert len(index) == 3000
+        assert index._codes.dtype == np.uint8
+        assert index._codes.shape == (3000, 8)
+
+    def test_exhaustive_probe_with_rerank_is_exact(self, data):
+        gallery, probes = data
+        index = _small_ivfpq(gallery, rerank=50)
+        index.nprobe = index.nlist
+        _, ids = index.search(probes)
+        np.testing.assert_array_equal(ids[:, 0], np.arange(40))
+
+    def test_more_probes_do_not_lower_recall(self, data):
+        gallery, probes = data
+        index = _small_ivfpq(gallery, rerank=0)
+        recalls = []
+        for nprobe in (1, 4, 32):
+            index.nprobe = nprobe
+            recalls.append(np.mean(index.search(probes)[1][:, 0] == np.arange(40)))
+        assert recalls == sorted(recalls)
+        assert recalls[-1] >= 0.9
+
+
+def test_kmeans_recovers_separated_clusters():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0.0, 0.0], [10.0, 10.0]], dtype=np.float32)
+    points = np.vstack([c + rng.normal(0, 0.1, (50, 2)) for c in centers])
+    found = kmeans(points.astype(np.float32), 2, seed=1)
+    found = found[np.argsort(found[:, 0])]
+    np.testing.assert_allclose(found, centers, atol=0.1)
+
+
+def test_create_index_rejects_unknown_backend(data):
+    with pytest.raises(ValueError):
+        create_index(data[0], backend="annoy")
+
+
+def test_create_index_uses_brute_force_for_small_galleries(data):
+    assert isinstance(create_index(data[0][:100], backend="ivfpq"), BruteForceIndex)
+
+
+def test_matcher_accepts_prebuilt_index(data):
+    gallery, probes = data
+    names = [f"person_{i}" for i in range(len(gallery))]
+    index = _small_ivfpq(gallery, rerank=50, nprobe=8)
+    matcher = FaceMatcher(gallery, names, index=index)
+    assert [m.name for m in matcher.match(probes[:3])] == names[:3]
@@ -0,0 +1,57 @@
+"""
+Unit tests for bounding-box helpers used by downscaled detection.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.geometry import iou_matrix, match_boxes, scale_face_locations
+
+
+class TestScaleFaceLocations:
+    def test_maps_boxes_back_to_full_resolution(self):
+        assert scale_face_locations([(10, 40, 50, 20)], 0.5) == [(20, 80, 100, 40)]
+
+    def test_quarter_scale_rounds_to_pixels(self):
+        assert scale_face_locations([(3, 7, 9, 1)], 0.25) == [(12, 28, 36, 4)]
+
+    def test_clamps_to_frame(self):
+        boxes = scale_face_locations([(-2, 330, 250, 5)], 0.5, (480, 640, 3))
+        assert boxes == [(0, 640, 480, 10)]
+
+    def test_identity_scale(self):
+        assert scale_face_locations([(1, 2, 3, 4)], 1.0) == [(1, 2, 3, 4)]
+
+    def test_rejects_non_positive_scale(self):
+        with pytest.raises(ValueError):
+            scale_face_locations([(1, 2, 3, 4)], 0)
+
+
+class TestIoU:
+    def test_identical_boxes(self):
+        assert iou_matrix([(0, 10, 10, 0)], [(0, 10, 10, 0)])[0, 0] == 1.0
+
+    def test_half_overlap(self):
+        iou = iou_matrix([(0, 10, 10, 0)], [(0, 15, 10, 5)])[0, 0]
+        assert iou == pytest.approx(50 / 150)
+
+    def test_disjoint_and_empty(self):
+        assert iou_matrix([(0, 10, 10, 0)], [(20, 30, 30, 20)])[0, 0] == 0.0
+        assert iou_matrix([], [(0, 1, 1, 0)]).shape == (0, 1)
+
+    def test_match_boxes_greedy_pairs(self):
+        ref = [(0, 10, 10, 0), (50, 60, 60, 50)]
+        found = [(51, 61, 61, 51), (100, 110, 110, 100), (1, 10, 10, 1)]
+        assert sorted(match_boxes(ref, found)) == [(0, 2), (1, 0)]
+
+    def test_downscaled_detection_round_trip_overlaps(self):
+        full = [(100, 300, 300, 100)]
+        small = [tuple(int(v * 0.33) for v in full[0])]
+        restored = scale_face_locations(small, 0.33)
+        assert iou_matrix(full, restored)[0, 0] > 0.95
+        assert np.all(np.array(restored) > 0)
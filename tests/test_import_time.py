@@ -0,0 +1,77 @@
+"""
+Tests for the startup-time budget (src/utils/import_time.py): entry modules
+defer the heavy packages and have no import-time side effects.
+
+The wall-clock budgets in IMPORT_TIME_BUDGETS_MS depend on the machine, so
+they are only enforced with FACE_RECON_IMPORT_BUDGET=1, e.g. on a quiet
+benchmark runner.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import IMPORT_TIME_BUDGETS_MS
+from src.utils.import_time import eager_imports, parse_importtime, profile_import
+
+ENFORCE_BUDGET = os.environ.get("FACE_RECON_IMPORT_BUDGET") == "1"
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _heavy_dep
+import time:       900 |       1020 | mypkg.sub
+import time:        50 |       1070 | mypkg
+"""
+
+
+def profile_or_skip(module, repeats):
+    try:
+        return profile_import(module, repeats)
+    except RuntimeError as exc:
+        if "ModuleNotFoundError" in str(exc):
+            pytest.skip(str(exc).splitlines()[-1])
+        raise
+
+
+class TestParseImporttime:
+    def test_cumulative_time_and_modules(self):
+        profile = parse_importtime(SAMPLE, "mypkg.sub")
+        assert profile.seconds == pytest.approx(0.00102)
+        assert profile.modules == {"_heavy_dep", "mypkg.sub", "mypkg"}
+        assert eager_imports(profile, ["_heavy_dep", "cv2"]) == ["_heavy_dep"]
+        assert eager_imports(profile, ["mypkg"]) == ["mypkg"]
+
+    def test_missing_module(self):
+        with pytest.raises(ValueError):
+            parse_importtime(SAMPLE, "other")
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_TIME_BUDGETS_MS))
+def test_entry_module_defers_heavy_imports(module):
+    profile = profile_or_skip(module, repeats=1)
+    assert eager_imports(profile) == []
+    assert profile.stdout == ""
+
+
+@pytest.mark.skipif(not ENFORCE_BUDGET, reason="set FACE_RECON_IMPORT_BUDGET=1")
+@pytest.mark.parametrize("module", sorted(IMPORT_TIME_BUDGETS_MS))
+def test_entry_module_within_budget(module):
+    profile = profile_or_skip(module, repeats=3)
+    assert 1000.0 * profile.seconds <= IMPORT_TIME_BUDGETS_MS[module]
+
+
+@pytest.mark.parametrize("module", ["src.utils.face_utils", "backend.server"])
+def test_import_leaves_sys_path_alone(module):
+    code = f"import sys; before = list(sys.path); import {module}; "
+    code += "assert sys.path == before, sys.path"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+    )
+    if "ModuleNotFoundError" in result.stderr:
+        pytest.skip(result.stderr.splitlines()[-1])
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,106 @@
+"""
+Tests for the streaming access log export.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.log_export import iter_export
+from backend.log_query import LogFilter, build_log_query
+
+with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+    SCHEMA = f.read()
+
+ROWS = [
+    (
+        f"user_{i % 7}",
+        i % 3 != 0,
+        "nfc" if i % 5 == 0 else "face",
+        f"2024-05-01 08:{i // 60:02d}:{i % 60:02d}",
+    )
+    for i in range(250)
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO access_log (user, access_granted, method, timestamp) "
+        "VALUES (?, ?, ?, ?)",
+        ROWS + [('quote "and", comma', True, "face", "2024-05-01 09:00:00")],
+    )
+    yield conn
+    conn.close()
+
+
+def export(conn, fmt, compress=False, filters=LogFilter(), chunk_rows=16):
+    sql, params = build_log_query(filters)
+    chunks = list(iter_export(conn.execute(sql, params), fmt, compress, chunk_rows))
+    data = b"".join(chunks)
+    return (gzip.decompress(data) if compress else data).decode(), chunks
+
+
+class TestExport:
+    def test_ndjson(self, conn):
+        text, chunks = export(conn, "ndjson")
+        records = [json.loads(line) for line in text.splitlines()]
+        assert len(records) == len(ROWS) + 1
+        assert len(chunks) == -(-len(records) // 16)
+        assert records[0] == {
+            "id": len(ROWS) + 1,
+            "user": 'quote "and", comma',
+            "timestamp": "2024-05-01 09:00:00",
+            "access_granted": True,
+            "method": "face",
+        }
+        assert [r["id"] for r in records] == list(range(len(ROWS) + 1, 0, -1))
+
+    def test_csv(self, conn):
+        text, _ = export(conn, "csv")
+        rows = list(csv.reader(io.StringIO(text)))
+        assert rows[0] == ["id", "user", "timestamp", "access_granted", "method"]
+        assert rows[1] == [
+            str(len(ROWS) + 1),
+            'quote "and", comma',
+            "2024-05-01 09:00:00",
+            "1",
+            "face",
+        ]
+        assert len(rows) == len(ROWS) + 2
+
+    @pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+    def test_gzip_matches_plain(self, conn, fmt):
+        assert export(conn, fmt, compress=True)[0] == export(conn, fmt)[0]
+
+    def test_filtered_and_empty(self, conn):
+        text, _ = export(conn, "ndjson", filters=LogFilter(user="user_3", method="nfc"))
+        records = [json.loads(line) for line in text.splitlines()]
+        assert records and all(
+            r["user"] == "user_3" and r["method"] == "nfc" for r in records
+        )
+        text, _ = export(conn, "csv", compress=True, filters=LogFilter(user="nobody"))
+        assert text == "id,user,timestamp,access_granted,method\n"
+
+    def test_unknown_format(self, conn):
+        with pytest.raises(ValueError):
+            iter_export(conn.execute("SELECT 1"), "xml")
+
+    def test_cursor_closed_when_abandoned(self, conn):
+        cursor = conn.execute(*build_log_query(LogFilter()))
+        chunks = iter_export(cursor, "ndjson", chunk_rows=10)
+        next(chunks)
+        chunks.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            cursor.fetchone()
@@ -0,0 +1,137 @@
+"""
+Tests for keyset-paginated, filtered access log queries.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.log_query import Cursor, LogFilter, build_log_query, fetch_page, parse_bool
+
+with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+    SCHEMA = f.read()
+
+START = datetime(2024, 5, 1)
+
+
+@pytest.fixture(scope="module")
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    rng = random.Random(0)
+    rows = []
+    for i in range(3000):
+        # Several events per second, so pages split ties on timestamp.
+        stamp = START + timedelta(seconds=i // 4)
+        rows.append(
+            (
+                f"user_{rng.randrange(10)}",
+                rng.random() < 0.6,
+                rng.choice(["face", "nfc", "rfid"]),
+                str(stamp),
+            )
+        )
+    with conn:
+        conn.executemany(
+            "INSERT INTO access_log (user, access_granted, method, timestamp) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+    yield conn
+    conn.close()
+
+
+def walk(conn, filters, limit):
+    """All ids returned by following cursors page by page."""
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = fetch_page(conn, filters, cursor, limit)
+        assert len(rows) <= limit
+        ids.extend(row["id"] for row in rows)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+def expected_ids(conn, filters):
+    rows = conn.execute(
+        "SELECT id, user, method, access_granted, timestamp FROM access_log"
+    ).fetchall()
+    matching = [
+        row
+        for row in rows
+        if (filters.user is None or row["user"] == filters.user)
+        and (filters.method is None or row["method"] == filters.method)
+        and (filters.granted is None or bool(row["access_granted"]) == filters.granted)
+        and (filters.since is None or row["timestamp"] >= str(filters.since))
+        and (filters.until is None or row["timestamp"] < str(filters.until))
+    ]
+    return [row["id"] for row in sorted(matching, key=lambda r: -r["id"])]
+
+
+class TestFetchPage:
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            LogFilter(),
+            LogFilter(user="user_3"),
+            LogFilter(method="nfc", granted=False),
+            LogFilter(since=START + timedelta(minutes=2, seconds=3)),
+            LogFilter(
+                user="user_1",
+                since=START + timedelta(seconds=100),
+                until=START + timedelta(seconds=500),
+            ),
+            LogFilter(until=START + timedelta(seconds=30)),
+        ],
+    )
+    def test_walk_returns_every_match_once(self, conn, filters):
+        ids, pages = walk(conn, filters, limit=37)
+        assert ids == expected_ids(conn, filters)
+        assert pages == max(1, -(-len(ids) // 37))  # no trailing empty page
+
+    def test_no_next_cursor_on_last_page(self, conn):
+        rows, cursor = fetch_page(conn, LogFilter(user="nobody"))
+        assert rows == [] and cursor is None
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            LogFilter(user="a"),
+            LogFilter(method="nfc"),
+            LogFilter(granted=True),
+            LogFilter(since=START, until=START + timedelta(days=1)),
+        ],
+    )
+    def test_queries_use_an_index_without_sorting(self, conn, filters):
+        sql, params = build_log_query(filters, Cursor(100, str(START)), 50)
+        plan = " ".join(
+            row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)
+        )
+        assert "INDEX" in plan and "TEMP B-TREE" not in plan
+
+
+class TestCursor:
+    def test_round_trip(self):
+        cursor = Cursor(42, "2024-05-01 08:00:00")
+        assert Cursor.decode(cursor.encode()) == cursor
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            Cursor.decode("not a cursor")
+
+
+class TestParseBool:
+    def test_values(self):
+        assert parse_bool("TRUE") is True
+        assert parse_bool("0") is False
+        with pytest.raises(ValueError):
+            parse_bool("maybe")
@@ -0,0 +1,149 @@
+"""
+Tests for the write-behind access log writer.
+"""
+
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.db import ConnectionPool
+from backend.log_writer import AccessLogWriter
+
+SCHEMA = """
+CREATE TABLE access_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    access_granted BOOLEAN,
+    method TEXT DEFAULT 'face'
+);
+"""
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "log.db"))
+    pool.connection().executescript(SCHEMA)
+    yield pool
+    pool.close_all()
+
+
+def count_rows(pool):
+    return pool.connection().execute("SELECT COUNT(*) FROM access_log").fetchone()[0]
+
+
+class TestAccessLogWriter:
+    def test_no_events_lost_across_graceful_stop(self, pool):
+        writer = AccessLogWriter(
+            pool.connection, max_queue=50_000, batch_size=100, flush_interval_ms=1000
+        ).start()
+
+        def produce(worker):
+            for i in range(2000):
+                writer.submit(f"user_{worker}", i % 2 == 0, "face")
+
+        threads = [threading.Thread(target=produce, args=(w,)) for w in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert writer.stop()
+        assert count_rows(pool) == 10_000
+        stats = writer.stats()
+        assert stats["written"] == stats["submitted"] == 10_000
+        assert stats["queued"] == 0
+        rows = pool.connection().execute(
+            "SELECT user, COUNT(*) FROM access_log GROUP BY user"
+        )
+        assert sorted(tuple(row) for row in rows) == [
+            (f"user_{w}", 2000) for w in range(5)
+        ]
+
+    def test_events_are_written_in_batches(self, pool):
+        writer = AccessLogWriter(pool.connection, batch_size=250)
+        for _ in range(1000):
+            writer.submit("alice", True, "face")
+        writer.start().stop()
+        assert writer.stats()["batches"] == 4
+        assert count_rows(pool) == 1000
+
+    def test_submit_many_group_is_never_split(self, pool):
+        writer = AccessLogWriter(pool.connection, batch_size=3)
+        for _ in range(3):
+            writer.submit_many([("dave", True, "face")] * 2)
+        writer.submit_many([("erin", False, "face")] * 5)  # over batch_size
+        writer.start().stop()
+        assert writer.stats()["batches"] == 4
+        assert count_rows(pool) == 11
+
+    def test_partial_batch_written_after_interval(self, pool):
+        writer = AccessLogWriter(
+            pool.connection, batch_size=1000, flush_interval_ms=20
+        ).start()
+        writer.submit("bob", False, "nfc")
+        deadline = time.time() + 2
+        while count_rows(pool) == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        writer.stop()
+        rows = pool.connection().execute(
+            "SELECT user, access_granted, method FROM access_log"
+        )
+        assert [tuple(row) for row in rows] == [("bob", 0, "nfc")]
+
+    def test_flush_makes_events_visible(self, pool):
+        writer = AccessLogWriter(
+            pool.connection, batch_size=1000, flush_interval_ms=10_000
+        ).start()
+        writer.submit("carol", True)
+        assert writer.flush(timeout=2)
+        assert count_rows(pool) == 1
+        writer.stop()
+
+    def test_backpressure_when_queue_full(self, pool):
+        # Not started: nothing drains the queue.
+        writer = AccessLogWriter(pool.connection, max_queue=3, enqueue_timeout_ms=20)
+        writer.submit_many([("a", True, "face")] * 3)
+        with pytest.raises(queue.Full):
+            writer.submit("b", True)
+        with pytest.raises(queue.Full):
+            writer.submit_many([("c", True, "face")] * 2)
+        assert writer.stats()["rejected"] == 3
+        writer.start()
+        assert writer.stop()
+        assert count_rows(pool) == 3
+
+    def test_timestamp_taken_at_submit(self, pool):
+        writer = AccessLogWriter(pool.connection, flush_interval_ms=10_000).start()
+        submitted = time.time()
+        writer.submit("dave", True)
+        time.sleep(1.1)
+        writer.stop()
+        stamp = pool.connection().execute("SELECT timestamp FROM access_log").fetchone()
+        written = time.mktime(time.strptime(stamp[0] + " UTC", "%Y-%m-%d %H:%M:%S %Z"))
+        assert abs(written - time.mktime(time.gmtime(submitted))) < 1.0
+
+    def test_submit_after_stop_raises(self, pool):
+        writer = AccessLogWriter(pool.connection).start()
+        writer.stop()
+        with pytest.raises(RuntimeError):
+            writer.submit("eve", False)
+
+    def test_failed_batch_is_retried(self, tmp_path):
+        path = str(tmp_path / "retry.db")
+        pool = ConnectionPool(path)
+        writer = AccessLogWriter(pool.connection, flush_interval_ms=5)
+        writer.submit("frank", True)
+        writer.start()  # table does not exist yet: the first write fails
+        time.sleep(0.1)
+        sqlite3.connect(path).executescript(SCHEMA)
+        assert writer.flush(timeout=5)
+        writer.stop()
+        assert writer.stats()["failures"] >= 1
+        assert count_rows(pool) == 1
@@ -0,0 +1,88 @@
+"""
+Unit tests for the vectorized FaceMatcher.
+
+Only NumPy is required; encodings are synthetic 128-d vectors.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.matcher import UNKNOWN_NAME, FaceMatcher, as_matcher
+
+
+@pytest.fixture
+def gallery():
+    rng = np.random.default_rng(42)
+    encodings = rng.normal(0.0, 0.1, size=(50, 128))
+    names = [f"person_{i}" for i in range(50)]
+    return encodings, names
+
+
+class TestFaceMatcher:
+    def test_stores_contiguous_float32_matrix(self, gallery):
+        encodings, names = gallery
+        matcher = FaceMatcher(list(encodings), names)
+        assert matcher.encodings.dtype == np.float32
+        assert matcher.encodings.flags["C_CONTIGUOUS"]
+        assert len(matcher) == 50
+
+    def test_distances_match_numpy_norm(self, gallery):
+        encodings, names = gallery
+        matcher = FaceMatcher(encodings, names)
+        probes = encodings[:3] + 0.01
+        expected = np.linalg.norm(encodings[None, :, :] - probes[:, None, :], axis=2)
+        np.testing.assert_allclose(matcher.distances(probes), expected, atol=1e-4)
+
+    def test_match_identifies_each_face(self, gallery):
+        encodings, names = gallery
+        matcher = FaceMatcher(encodings, names)
+        results = matcher.match(encodings[[7, 21, 3]])
+        assert [r.name for r in results] == ["person_7", "person_21", "person_3"]
+        assert all(r.distance == pytest.approx(0.0, abs=1e-3) for r in results)
+
+    def test_picks_closest_not_first_within_tolerance(self):
+        encodings = np.zeros((2, 128))
+        encodings[0, 0] = 0.5
+        encodings[1, 0] = 0.1
+        matcher = FaceMatcher(encodings, ["far", "near"], tolerance=0.6)
+        assert matcher.match(np.zeros(128))[0].name == "near"
+
+    def test_unknown_when_beyond_tolerance(self, gallery):
+        encodings, names = gallery
+        matcher = FaceMatcher(encodings, names, tolerance=0.6)
+        result = matcher.match(np.full(128, 5.0))[0]
+        assert result.name == UNKNOWN_NAME
+        assert result.distance > 0.6
+
+    def test_empty_gallery_returns_unknown(self):
+        matcher = FaceMatcher([], [])
+        result = matcher.match(np.zeros((2, 128)))
+        assert [r.name for r in result] == [UNKNOWN_NAME, UNKNOWN_NAME]
+        assert result[0].index == -1
+
+    def test_mismatched_lengths_rejected(self, gallery):
+        encodings, names = gallery
+        with pytest.raises(ValueError):
+            FaceMatcher(encodings, names[:-1])
+
+
+def test_as_matcher_reuses_existing_matcher(gallery):
+    encodings, names = gallery
+    matcher = FaceMatcher(encodings, names)
+    assert as_matcher(matcher) is matcher
+    assert isinstance(as_matcher(list(encodings), names), FaceMatcher)
+
+
+def test_as_matcher_builds_once_per_legacy_gallery(gallery):
+    encodings, names = (list(items) for items in gallery)
+    matcher = as_matcher(encodings, names)
+    assert as_matcher(encodings, names) is matcher
+    assert as_matcher(list(encodings), names) is not matcher
+    encodings.append(encodings[0])
+    names.append("extra")
+    assert len(as_matcher(encodings, names).names) == len(encodings)
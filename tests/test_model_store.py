@@ -0,0 +1,205 @@
+"""
+Tests for the model lifecycle: versioned artifacts (utils/model_store.py),
+AccessAnomalyModel, ai_model.py and the offline trainer.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.model_store import ModelStore
+
+
+@pytest.fixture
+def sklearn():
+    return pytest.importorskip("sklearn")
+
+
+def make_db(path, rows):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+        conn.executescript(f.read())
+    add_rows(conn, rows)
+    return conn
+
+
+def add_rows(conn, rows):
+    with conn:
+        conn.executemany(
+            "INSERT INTO access_log (user, timestamp, access_granted, method) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+
+def daytime_rows(n, start_day=1):
+    return [
+        (
+            f"user{i % 7}",
+            f"2024-03-{start_day + (i // 40) % 20:02d} "
+            f"{8 + i % 10:02d}:{i % 60:02d}:00",
+            int(i % 13 != 0),
+            "rfid" if i % 5 == 0 else "face",
+        )
+        for i in range(n)
+    ]
+
+
+class TestModelStore:
+    def test_versions_round_trip_and_prune(self, tmp_path):
+        store = ModelStore(str(tmp_path), keep=2)
+        assert store.versions("m") == []
+        with pytest.raises(FileNotFoundError):
+            store.load("m")
+        assert [store.save("m", {"n": n}, {"rows": n}) for n in range(3)] == [1, 2, 3]
+        assert store.versions("m") == [2, 3]
+        model, metadata = store.load("m")
+        assert model == {"n": 2} and metadata["version"] == 3
+        assert metadata["rows"] == 2 and metadata["saved_at"] > 0
+        assert store.load("m", 2)[0] == {"n": 1}
+        assert sorted(os.listdir(tmp_path / "m")) == [
+            "v000002.json",
+            "v000002.pkl",
+            "v000003.json",
+            "v000003.pkl",
+        ]
+
+    def test_failed_save_leaves_no_version(self, tmp_path):
+        store = ModelStore(str(tmp_path))
+        with pytest.raises(Exception):
+            store.save("m", threading.Lock())  # not picklable
+        assert store.versions("m") == []
+        assert os.listdir(tmp_path / "m") == []
+
+    def test_concurrent_saves_get_distinct_versions(self, tmp_path):
+        store = ModelStore(str(tmp_path), keep=100)
+        versions = []
+        threads = [
+            threading.Thread(target=lambda: versions.append(store.save("m", 0)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(versions) == list(range(1, 9))
+
+
+class TestAccessAnomalyModel:
+    def test_trains_in_background_then_loads_lazily(self, tmp_path, sklearn):
+        from utils.anomaly_detection import AccessAnomalyModel
+
+        conn = make_db(str(tmp_path / "a.db"), daytime_rows(400))
+        store = ModelStore(str(tmp_path / "models"))
+        model = AccessAnomalyModel(lambda: conn, store, refit_rows=100)
+        assert list(model.scan()) == []  # no model yet: training started
+        assert model.wait_refit(30)
+        assert store.versions("access_anomaly") == [1]
+        assert model.metadata["rows"] == 400 and model.metadata["last_id"] == 400
+
+        fresh = AccessAnomalyModel(lambda: conn, store)
+        assert fresh._detector is None  # nothing loaded until first use
+        assert fresh.detector is not None and fresh.metadata["version"] == 1
+
+    def test_scan_scores_new_rows_and_refits_on_window(self, tmp_path, sklearn):
+        from utils.anomaly_detection import AccessAnomalyModel
+
+        conn = make_db(str(tmp_path / "a.db"), daytime_rows(300))
+        store = ModelStore(str(tmp_path / "models"))
+        model = AccessAnomalyModel(lambda: conn, store, window_rows=200, refit_rows=100)
+        assert model.train() == 1
+        assert model.metadata["first_id"] == 101  # sliding window
+        detector = model.detector
+
+        add_rows(conn, daytime_rows(50, start_day=21))
+        chunks = list(model.scan())
+        assert sum(len(c.ids) for c in chunks) == 50
+        assert chunks[0].ids[0] == 301
+        assert model.wait_refit(30) and model.detector is detector  # < refit_rows
+
+        add_rows(conn, daytime_rows(60, start_day=21))
+        assert [int(c.ids[0]) for c in model.scan()] == [351]
+        assert model.wait_refit(30)
+        assert model.detector is not detector
+        assert model.metadata["version"] == 2 and model.metadata["last_id"] == 410
+
+    def test_scan_streams_chunk_by_chunk(self, tmp_path, sklearn):
+        from utils.anomaly_detection import AccessAnomalyModel
+
+        conn = make_db(str(tmp_path / "a.db"), daytime_rows(100))
+        store = ModelStore(str(tmp_path / "models"))
+        model = AccessAnomalyModel(lambda: conn, store, refit_rows=10**6)
+        model.train()
+        add_rows(conn, daytime_rows(50, start_day=21))
+        scan = model.scan(chunk_rows=20)
+        assert len(next(scan).ids) == 20 and model._scanned_id == 120
+        assert [len(c.ids) for c in scan] == [20, 10]
+        assert model._scanned_id == 150 and list(model.scan()) == []
+
+    def test_first_scan_sees_history_before_the_model(self, tmp_path, sklearn):
+        from utils.anomaly_detection import AccessAnomalyModel, iter_access_features
+
+        denied = [("alice", f"2024-03-02 09:0{i}:00", 0, "face") for i in range(5)]
+        conn = make_db(str(tmp_path / "a.db"), daytime_rows(100) + denied)
+        store = ModelStore(str(tmp_path / "models"))
+        AccessAnomalyModel(lambda: conn, store).train()
+
+        add_rows(conn, [("alice", "2024-03-02 09:06:00", 0, "face")])
+        fresh = AccessAnomalyModel(lambda: conn, store)  # e.g. after a restart
+        (chunk,) = fresh.scan()
+        whole = np.vstack([m for _, m in iter_access_features(conn)])
+        assert chunk.features.tolist() == whole[-1:].tolist()
+        assert chunk.features[0, 2:].tolist() == [5, 0, 6]
+
+    def test_empty_log_is_not_trained(self, tmp_path, sklearn):
+        from utils.anomaly_detection import AccessAnomalyModel
+
+        conn = make_db(str(tmp_path / "a.db"), [])
+        model = AccessAnomalyModel(lambda: conn, ModelStore(str(tmp_path / "m")))
+        with pytest.raises(ValueError):
+            model.train()
+
+
+class TestTrainModels:
+    def test_main_trains_and_ai_model_loads_stored_version(
+        self, tmp_path, monkeypatch, sklearn
+    ):
+        import ai_model
+        from src.main_train_models import main
+
+        db_path = str(tmp_path / "a.db")
+        make_db(db_path, daytime_rows(300)).close()
+        model_dir = str(tmp_path / "models")
+        assert main(["--database", db_path, "--model-dir", model_dir]) == 2
+        store = ModelStore(model_dir)
+        assert store.versions("access_anomaly") == [1]
+        assert store.versions(ai_model.MODEL_NAME) == [1]
+        stored, metadata = store.load(ai_model.MODEL_NAME)
+        assert metadata["features"] == ai_model.FEATURES and metadata["rows"] == 300
+
+        monkeypatch.setattr(ai_model, "_model", None)
+        loaded = ai_model.get_model(store)
+        assert [c.tolist() for c in loaded.coefs_] == [
+            c.tolist() for c in stored.coefs_
+        ]
+        assert ai_model.predict_smart_access(10, 1) in (0, 1)
+
+
+def test_imports_do_not_train_or_import_sklearn():
+    code = (
+        "import sys, ai_model, anomaly_detection, utils.anomaly_detection; "
+        "assert 'sklearn' not in sys.modules, 'sklearn imported'; "
+        "assert ai_model._model is None and anomaly_detection._model is None"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,192 @@
+"""
+Tests for the persistent MQTT publisher (mqtt_client.py), run against the
+in-process broker in src/utils/mqtt_loopback.py.
+"""
+
+import functools
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("paho.mqtt.client")
+
+import mqtt_client  # noqa: E402
+from mqtt_client import MqttPublisher, door_topic  # noqa: E402
+from src.utils.mqtt_loopback import LoopbackBroker, topic_matches  # noqa: E402
+
+
+@pytest.fixture
+def broker():
+    broker = LoopbackBroker().start()
+    yield broker
+    broker.stop()
+
+
+@pytest.fixture
+def make_publisher(broker):
+    publishers = []
+
+    def make(**kwargs):
+        kwargs.setdefault("reconnect_min", 0.05)
+        kwargs.setdefault("reconnect_max", 0.2)
+        publisher = MqttPublisher("127.0.0.1", broker.port, **kwargs).start()
+        publishers.append(publisher)
+        return publisher
+
+    yield make
+    for publisher in publishers:
+        publisher.stop(timeout=1)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestDoorTopic:
+    def test_topics(self):
+        assert door_topic(None, "access_control") == "access_control"
+        assert door_topic("front", "access_control") == "access_control/front"
+
+    @pytest.mark.parametrize("door", ["", "a/b", "+", "#"])
+    def test_invalid_door(self, door):
+        with pytest.raises(ValueError):
+            door_topic(door)
+
+
+class TestLoopbackBroker:
+    def test_topic_matches(self):
+        assert topic_matches("access_control/#", "access_control/front")
+        assert topic_matches("access_control/+", "access_control/front")
+        assert not topic_matches("access_control/+", "access_control/a/b")
+        assert not topic_matches("access_control/back", "access_control/front")
+
+    def test_forwards_to_subscribers(self, broker, make_publisher):
+        received = []
+        subscriber = mqtt_client.create_mqtt_client("127.0.0.1", broker.port)
+        subscriber.on_message = lambda c, u, msg: received.append(msg.payload)
+        subscriber.subscribe("access_control/front")
+        subscriber.loop_start()
+        try:
+            time.sleep(0.2)
+            publisher = make_publisher()
+            publisher.publish_command("OpenDoor", door="front")
+            publisher.publish_command("OpenDoor", door="back")
+            wait_until(lambda: received)
+            assert received == [b"OpenDoor"]
+        finally:
+            subscriber.disconnect()
+            subscriber.loop_stop()
+
+
+class TestMqttPublisher:
+    @pytest.mark.parametrize("qos", [0, 1, 2])
+    def test_publishes_per_door_topics(self, broker, make_publisher, qos):
+        publisher = make_publisher(qos=qos)
+        publisher.publish_command("OpenDoor", door="front")
+        publisher.publish_command("CloseDoor", door="back")
+        publisher.publish_command("Lockdown")
+        assert publisher.flush()
+        assert broker.wait_for(3)
+        assert [(m.topic, m.payload, m.qos) for m in broker.messages] == [
+            ("access_control/front", b"OpenDoor", qos),
+            ("access_control/back", b"CloseDoor", qos),
+            ("access_control", b"Lockdown", qos),
+        ]
+        stats = publisher.stats()
+        assert stats["published"] == stats["count"] == 3
+        assert stats["in_flight"] == stats["queued"] == 0
+
+    def test_reuses_one_connection(self, broker, make_publisher):
+        publisher = make_publisher()
+        for i in range(50):
+            publisher.publish_command(f"cmd{i}", door="front")
+        assert publisher.flush()
+        assert broker.wait_for(50)
+        assert broker.connects == 1
+        assert [m.payload for m in broker.messages] == [
+            f"cmd{i}".encode() for i in range(50)
+        ]
+
+    def test_buffers_while_disconnected(self, broker, make_publisher):
+        publisher = make_publisher()
+        wait_until(lambda: publisher.connected)
+        broker.stop()
+        wait_until(lambda: not publisher.connected)
+        for i in range(5):
+            publisher.publish_command(f"q0-{i}", door="front", qos=0)
+            publisher.publish_command(f"q1-{i}", door="front", qos=1)
+        assert publisher.stats()["published"] == 0
+        broker.start()
+        assert publisher.flush(10)
+        assert broker.wait_for(10)
+        payloads = [m.payload.decode() for m in broker.messages]
+        assert [p for p in payloads if p.startswith("q0")] == [
+            f"q0-{i}" for i in range(5)
+        ]
+        assert sorted(payloads) == sorted(f"q{q}-{i}" for q in (0, 1) for i in range(5))
+        stats = publisher.stats()
+        assert stats["reconnects"] == 1 and stats["disconnects"] == 1
+
+    def test_drops_expired_and_oldest_messages(self, broker, make_publisher):
+        publisher = make_publisher(queue_size=3, max_age=0.2)
+        wait_until(lambda: publisher.connected)
+        broker.stop()
+        wait_until(lambda: not publisher.connected)
+        publisher.publish_command("stale")
+        time.sleep(0.3)
+        for i in range(3):
+            publisher.publish_command(f"fresh{i}")
+        publisher.publish_command("newest")
+        broker.start()
+        assert publisher.flush(10)
+        assert broker.wait_for(3)
+        assert [m.payload for m in broker.messages] == [b"fresh1", b"fresh2", b"newest"]
+        stats = publisher.stats()
+        assert stats["dropped"] == 2 and stats["expired"] == 0
+
+        broker.stop()
+        wait_until(lambda: not publisher.connected)
+        publisher.publish_command("late")
+        time.sleep(0.3)
+        broker.start()
+        assert publisher.flush(10)
+        assert publisher.stats()["expired"] == 1
+
+    def test_stop_sends_queue_and_refuses_more(self, broker, make_publisher):
+        publisher = make_publisher()
+        for i in range(20):
+            publisher.publish_command(f"cmd{i}")
+        assert publisher.stop()
+        assert broker.wait_for(20)
+        assert not publisher.running
+        with pytest.raises(RuntimeError):
+            publisher.publish_command("OpenDoor")
+
+    def test_invalid_qos(self):
+        with pytest.raises(ValueError):
+            MqttPublisher(qos=3)
+
+    def test_publish_access_command_shares_a_publisher(self, broker, monkeypatch):
+        monkeypatch.setattr(
+            mqtt_client,
+            "MqttPublisher",
+            functools.partial(MqttPublisher, port=broker.port),
+        )
+        monkeypatch.setattr(mqtt_client, "_publishers", {})
+        for door in ("front", "back"):
+            mqtt_client.publish_access_command("OpenDoor", "127.0.0.1", door=door)
+        publisher = mqtt_client.get_publisher("127.0.0.1")
+        assert publisher.stop()
+        assert broker.wait_for(2)
+        assert broker.connects == 1
+        assert [m.topic for m in broker.messages] == [
+            "access_control/front",
+            "access_control/back",
+        ]
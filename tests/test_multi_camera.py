@@ -0,0 +1,136 @@
+"""
+Tests for the multi-camera recognition service.
+
+Cameras are FakeVideoSources, so these run headless and without any
+face-recognition dependency.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.multi_camera import CameraSpec, MultiCameraService, parse_camera_spec
+from src.utils.pipeline import FakeVideoSource
+
+
+def frame_value(frame):
+    return int(frame[0, 0, 0])
+
+
+def run_service(specs, process_fn, **kwargs):
+    service = MultiCameraService(specs, lambda spec: process_fn, **kwargs)
+    with service:
+        results = list(service.results(timeout=10))
+    return service, results
+
+
+class TestParseCameraSpec:
+    def test_plain_source_gets_default_name(self):
+        assert parse_camera_spec("0", 3) == CameraSpec("cam3", "0", None)
+
+    def test_name_source_and_fps(self):
+        spec = parse_camera_spec("lobby=rtsp://user:pw@10.0.0.5/live;fps=5")
+        assert spec == CameraSpec("lobby", "rtsp://user:pw@10.0.0.5/live", 5.0)
+
+    def test_url_with_query_is_not_a_name(self):
+        spec = parse_camera_spec("rtsp://cam/stream?channel=1", 1)
+        assert spec == CameraSpec("cam1", "rtsp://cam/stream?channel=1", None)
+
+    def test_rejects_non_positive_fps(self):
+        with pytest.raises(ValueError):
+            parse_camera_spec("door=0;fps=0")
+
+
+class TestMultiCameraService:
+    def test_requires_unique_camera_names(self):
+        with pytest.raises(ValueError):
+            MultiCameraService(
+                [CameraSpec("a", FakeVideoSource(count=1))] * 2, lambda s: None
+            )
+
+    def test_processes_all_cameras_in_order_per_camera(self):
+        specs = [
+            CameraSpec(f"cam{i}", FakeVideoSource(count=20, shape=(2, 2, 3), fps=200))
+            for i in range(3)
+        ]
+        service, results = run_service(
+            specs, lambda f: (time.sleep(0.002), frame_value(f))[1], workers=2
+        )
+        for name in ("cam0", "cam1", "cam2"):
+            values = [r.result for r in results if r.camera == name]
+            assert values, name
+            assert values == sorted(values)
+            seqs = [r.seq for r in results if r.camera == name]
+            assert seqs == list(range(len(seqs)))
+        assert service.stats()["frames_processed"] == len(results)
+
+    def test_busy_camera_does_not_starve_others(self):
+        # Fast sources always have a frame ready; with one worker the
+        # round-robin scheduler must alternate between cameras.
+        specs = [
+            CameraSpec(
+                f"cam{i}", FakeVideoSource(count=10_000, shape=(2, 2, 3), fps=1000)
+            )
+            for i in range(3)
+        ]
+        service = MultiCameraService(
+            specs, lambda spec: lambda f: time.sleep(0.002), workers=1, max_fps=0
+        )
+        with service:
+            results = []
+            for item in service.results(timeout=5):
+                results.append(item.camera)
+                if len(results) == 60:
+                    break
+        counts = [results.count(f"cam{i}") for i in range(3)]
+        assert max(counts) - min(counts) <= 1
+
+    def test_fps_cap_limits_processing_rate(self):
+        specs = [
+            CameraSpec(
+                "capped", FakeVideoSource(count=60, shape=(2, 2, 3), fps=100), 10
+            ),
+            CameraSpec("free", FakeVideoSource(count=60, shape=(2, 2, 3), fps=100)),
+        ]
+        service, results = run_service(specs, frame_value, workers=2, max_fps=0)
+        capped = sum(1 for r in results if r.camera == "capped")
+        free = sum(1 for r in results if r.camera == "free")
+        # ~0.6 s of video: about 6 frames at 10 FPS vs. most of the 60.
+        assert 3 <= capped <= 10
+        assert free > 3 * capped
+        stats = service.stats()["cameras"]["capped"]
+        assert stats["dropped"] + stats["frames_processed"] == stats["frames_captured"]
+
+    def test_process_errors_are_counted_per_camera(self):
+        def process(frame):
+            if frame_value(frame) == 2:
+                raise RuntimeError("boom")
+            return frame_value(frame)
+
+        specs = [CameraSpec("door", FakeVideoSource(count=5, shape=(2, 2, 3), fps=50))]
+        service, results = run_service(specs, process, workers=1, max_fps=0)
+        assert service.stats()["cameras"]["door"]["errors"] == 1
+        assert None in [r.result for r in results]
+
+    def test_per_camera_state_from_factory(self):
+        created = []
+        lock = threading.Lock()
+
+        def factory(spec):
+            with lock:
+                created.append(spec.name)
+            return frame_value
+
+        specs = [
+            CameraSpec(n, FakeVideoSource(count=3, shape=(2, 2, 3), fps=50))
+            for n in ("a", "b")
+        ]
+        service = MultiCameraService(specs, factory, workers=1, max_fps=0)
+        with service:
+            list(service.results(timeout=5))
+        assert sorted(created) == ["a", "b"]
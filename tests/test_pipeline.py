@@ -0,0 +1,158 @@
+"""
+Tests for the multi-threaded recognition pipeline.
+
+A FakeVideoSource stands in for the webcam, so these run headless and
+without any face-recognition dependency.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.pipeline import (
+    BoundedWorkQueue,
+    FakeVideoSource,
+    LatestFrameCapture,
+    RecognitionPipeline,
+    open_video_source,
+)
+
+
+def frame_value(frame):
+    return int(frame[0, 0, 0])
+
+
+class TestFakeVideoSource:
+    def test_yields_count_frames_then_stops(self):
+        source = FakeVideoSource(count=3, shape=(2, 2, 3))
+        values = [frame_value(source.read()[1]) for _ in range(3)]
+        assert values == [0, 1, 2]
+        assert source.read() == (False, None)
+
+    def test_open_fake_source_string(self):
+        assert isinstance(open_video_source("fake:5"), FakeVideoSource)
+
+
+class TestBoundedWorkQueue:
+    def test_drop_oldest(self):
+        q = BoundedWorkQueue(2, "drop_oldest")
+        assert q.put(1) is None
+        assert q.put(2) is None
+        assert q.put(3) == 1
+        assert [q.get(), q.get()] == [2, 3]
+
+    def test_drop_newest(self):
+        q = BoundedWorkQueue(1, "drop_newest")
+        q.put(1)
+        assert q.put(2) == 2
+        assert q.get() == 1
+
+    def test_block_waits_for_space(self):
+        q = BoundedWorkQueue(1, "block")
+        q.put(1)
+        threading.Timer(0.05, q.get).start()
+        start = time.perf_counter()
+        assert q.put(2) is None
+        assert time.perf_counter() - start >= 0.04
+
+    def test_unknown_policy_rejected(self):
+        with pytest.raises(ValueError):
+            BoundedWorkQueue(1, "drop_random")
+
+
+def test_capture_keeps_only_latest_frame():
+    capture = LatestFrameCapture(FakeVideoSource(count=50, shape=(2, 2, 3))).start()
+    capture.join(2.0)
+    seq, frame, _ = capture.latest(0, timeout=1.0)
+    assert seq == 50 and frame_value(frame) == 49
+    assert capture.dropped == 49
+    assert capture.latest(seq, timeout=0.1) is None
+
+
+class TestRecognitionPipeline:
+    def test_results_are_ordered_and_complete_without_drops(self):
+        source = FakeVideoSource(count=40, shape=(2, 2, 3), fps=400)
+
+        def slow_on_even(frame):
+            if frame_value(frame) % 2 == 0:
+                time.sleep(0.004)
+            return frame_value(frame)
+
+        pipeline = RecognitionPipeline(
+            source, slow_on_even, workers=4, queue_size=64, drop_policy="block"
+        )
+        with pipeline:
+            results = [item.result for item in pipeline.results(timeout=5)]
+        seen = sorted(set(results))
+        assert results == seen
+        stats = pipeline.stats()
+        assert stats["frames_processed"] == len(results)
+        assert stats["dropped_at_queue"] == 0
+
+    def test_slow_workers_drop_frames_but_keep_order(self):
+        source = FakeVideoSource(count=60, shape=(2, 2, 3), fps=600)
+
+        def slow(frame):
+            time.sleep(0.01)
+            return frame_value(frame)
+
+        pipeline = RecognitionPipeline(
+            source, slow, workers=1, queue_size=2, drop_policy="drop_oldest"
+        )
+        with pipeline:
+            results = [item.result for item in pipeline.results(timeout=5)]
+        stats = pipeline.stats()
+        assert results == sorted(results)
+        assert len(results) < 60
+        assert stats["dropped_at_capture"] + stats["dropped_at_queue"] > 0
+
+    def test_stats_report_fps_and_stage_latency(self):
+        pipeline = RecognitionPipeline(
+            FakeVideoSource(count=10, shape=(2, 2, 3), fps=200),
+            lambda frame: None,
+            workers=2,
+        )
+        with pipeline:
+            list(pipeline.results(timeout=5))
+        stats = pipeline.stats()
+        assert stats["fps"] > 0
+        for stage in ("queue_wait", "process", "reorder", "end_to_end"):
+            assert stats["latency"][stage]["count"] > 0
+
+    def test_process_errors_do_not_stop_pipeline(self):
+        def flaky(frame):
+            if frame_value(frame) == 1:
+                raise RuntimeError("boom")
+            return "ok"
+
+        pipeline = RecognitionPipeline(
+            FakeVideoSource(count=3, shape=(2, 2, 3), fps=100),
+            flaky,
+            workers=1,
+            queue_size=8,
+            drop_policy="block",
+        )
+        with pipeline:
+            results = [item.result for item in pipeline.results(timeout=5)]
+        assert results == ["ok", None, "ok"]
+
+    def test_stop_while_consumer_is_idle(self):
+        pipeline = RecognitionPipeline(
+            FakeVideoSource(count=1000, shape=(2, 2, 3), fps=1000),
+            lambda frame: frame_value(frame),
+            queue_size=1,
+        )
+        pipeline.start()
+        time.sleep(0.05)
+        pipeline.stop(timeout=2.0)
+        assert all(not t.is_alive() for t in pipeline._threads)
+
+    def test_invalid_worker_count(self):
+        with pytest.raises(ValueError):
+            RecognitionPipeline(FakeVideoSource(count=1), np.mean, workers=0)
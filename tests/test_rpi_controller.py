@@ -0,0 +1,138 @@
+"""
+Tests for the timed door relay scheduler (rpi_controller.DoorController).
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpi_controller
+from rpi_controller import DoorController
+
+
+class PinLog:
+    """Records every pin write with its time."""
+
+    def __init__(self):
+        self.writes = []
+        self.levels = {}
+
+    def __call__(self, pin, high):
+        self.writes.append((time.monotonic(), pin, high))
+        self.levels[pin] = high
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class TestDoorController:
+    def test_unlock_returns_at_once_and_relocks(self):
+        pins = PinLog()
+        with DoorController({"front": 18}, set_pin=pins, setup_pin=None) as doors:
+            started = time.monotonic()
+            deadline = doors.unlock("front", 0.05)
+            assert time.monotonic() - started < 0.02
+            assert doors.is_open("front") and pins.levels[18] is True
+            assert wait_until(lambda: not doors.is_open("front"))
+            assert pins.levels[18] is False
+            relocked_at = pins.writes[-1][0]
+            assert relocked_at >= deadline
+            assert doors.stats()["relocks"] == 1
+
+    def test_regrant_extends_instead_of_stacking(self):
+        pins = PinLog()
+        with DoorController({"front": 18}, set_pin=pins, setup_pin=None) as doors:
+            doors.unlock("front", 0.1)
+            time.sleep(0.05)
+            deadline = doors.unlock("front", 0.1)
+            # A shorter grant never cuts the open window.
+            assert doors.unlock("front", 0.01) == deadline
+            time.sleep(0.08)  # past the first grant's deadline
+            assert doors.is_open("front") and pins.levels[18] is True
+            assert wait_until(lambda: not doors.is_open("front"))
+        assert [high for _, _, high in pins.writes] == [True, False]
+        stats = doors.stats()
+        assert stats["unlocks"] == 1 and stats["extensions"] == 2
+        assert stats["relocks"] == 1
+
+    def test_lock_and_stop_relock_open_doors(self):
+        pins = PinLog()
+        doors = DoorController({"a": 1, "b": 2}, set_pin=pins, setup_pin=None)
+        doors.unlock("a", 60)
+        doors.unlock("b", 60)
+        assert doors.remaining("a") > 59
+        assert doors.lock("a") and not doors.lock("a")
+        doors.stop()
+        assert pins.levels == {1: False, 2: False}
+        assert not doors.running
+        with pytest.raises(RuntimeError):
+            doors.unlock("a")
+
+    def test_unknown_door(self):
+        doors = DoorController({"a": 1}, set_pin=PinLog(), setup_pin=None)
+        assert "a" in doors and "b" not in doors
+        with pytest.raises(KeyError):
+            doors.unlock("b")
+        doors.stop()
+
+    def test_thousands_of_grants_across_doors(self):
+        """Many threads re-grant 50 doors; every door ends locked, no door is
+        relocked before its latest grant ran out, and superseded deadlines
+        do not pile up in the scheduler."""
+        pins = PinLog()
+        names = {f"door{i}": i for i in range(50)}
+        doors = DoorController(names, set_pin=pins, setup_pin=None).start()
+        granted = {}  # door -> latest deadline handed out
+        lock = threading.Lock()
+
+        def grant(seed):
+            rng = random.Random(seed)
+            for _ in range(500):
+                door = rng.choice(list(names))
+                deadline = doors.unlock(door, rng.uniform(0.001, 0.03))
+                with lock:
+                    granted[door] = max(granted.get(door, 0.0), deadline)
+                if rng.random() < 0.1:
+                    time.sleep(0.001)
+
+        threads = [threading.Thread(target=grant, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert wait_until(lambda: doors.stats()["open"] == 0)
+        stats = doors.stats()
+        doors.stop()
+
+        assert stats["unlocks"] + stats["extensions"] == 4000
+        assert stats["relocks"] == stats["unlocks"]
+        assert stats["scheduled"] <= 4 * len(names) + 64
+        assert stats["relock_lateness"]["count"] == stats["relocks"]
+        assert all(level is False for level in pins.levels.values())
+        last_relock = {}
+        for at, pin, high in pins.writes:
+            if not high:
+                last_relock[pin] = at
+        for door, deadline in granted.items():
+            assert last_relock[names[door]] >= deadline
+
+    @pytest.mark.skipif(rpi_controller.GPIO_AVAILABLE, reason="drives real GPIO")
+    def test_simulated_pins_by_default(self):
+        doors = DoorController({"sim": 40}, hold=0.02)
+        assert rpi_controller.SIMULATED_PINS[40] is False
+        doors.unlock("sim")
+        assert rpi_controller.SIMULATED_PINS[40] is True
+        assert wait_until(lambda: rpi_controller.SIMULATED_PINS[40] is False)
+        doors.stop()
@@ -0,0 +1,138 @@
+"""
+Tests for compiled access schedules (backend/schedule.py).
+"""
+
+import os
+import sys
+from datetime import date, datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.schedule import (
+    AccessSchedules,
+    compile_mask,
+    daily_intervals,
+    mask_allows,
+    minute_of_week,
+    parse_time_of_day,
+    parse_weekday,
+    parse_weekly,
+)
+
+# 2024-01-01 is a Monday
+MONDAY = datetime(2024, 1, 1)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    return MONDAY.replace(day=1 + day, hour=hour, minute=minute)
+
+
+class TestParsing:
+    def test_time_of_day(self):
+        assert parse_time_of_day("00:00") == 0
+        assert parse_time_of_day("08:30") == 510
+        assert parse_time_of_day("23:59:59") == 1439
+        assert parse_time_of_day("24:00", allow_end_of_day=True) == 1440
+
+    @pytest.mark.parametrize("value", ["24:00", "8", "08:60", "ab:cd", "", "-1:00"])
+    def test_invalid_time_of_day(self, value):
+        with pytest.raises(ValueError):
+            parse_time_of_day(value)
+
+    def test_weekday(self):
+        assert parse_weekday(0) == 0
+        assert parse_weekday("Sun") == 6
+        assert parse_weekday("wednesday") == 2
+        for value in (7, -1, True, "someday", None):
+            with pytest.raises(ValueError):
+                parse_weekday(value)
+
+    def test_weekly(self):
+        entries = [
+            {"days": ["mon", 1], "start": "08:00", "end": "18:00"},
+            {"days": ["monday"], "start": "08:00", "end": "18:00"},
+        ]
+        assert parse_weekly(entries) == [(0, 480, 1080), (1, 480, 1080)]
+        assert parse_weekly([]) == []
+
+    @pytest.mark.parametrize(
+        "entries",
+        [
+            None,
+            [{"days": [], "start": "08:00", "end": "18:00"}],
+            [{"days": ["mon"], "start": "08:00"}],
+            [{"days": ["mon"], "start": "08:00", "end": "08:00"}],
+            ["mon"],
+        ],
+    )
+    def test_invalid_weekly(self, entries):
+        with pytest.raises(ValueError):
+            parse_weekly(entries)
+
+    def test_daily_window(self):
+        assert daily_intervals("08:00", "24:00")[6] == (6, 480, 1440)
+        with pytest.raises(ValueError):
+            daily_intervals("08:00", "08:00")
+
+
+class TestMask:
+    def test_interval_bounds(self):
+        mask = compile_mask([(0, 480, 1080)])
+        assert not mask_allows(mask, minute_of_week(at(0, 7, 59)))
+        assert mask_allows(mask, minute_of_week(at(0, 8)))
+        assert mask_allows(mask, minute_of_week(at(0, 17, 59)))
+        assert not mask_allows(mask, minute_of_week(at(0, 18)))
+        assert not mask_allows(mask, minute_of_week(at(1, 9)))
+
+    def test_overnight_interval(self):
+        mask = compile_mask([(4, 22 * 60, 6 * 60)])  # Friday 22:00-06:00
+        assert mask_allows(mask, minute_of_week(at(4, 23)))
+        assert mask_allows(mask, minute_of_week(at(5, 5, 59)))
+        assert not mask_allows(mask, minute_of_week(at(5, 6)))
+        assert not mask_allows(mask, minute_of_week(at(4, 21)))
+
+    def test_sunday_wraps_to_monday(self):
+        mask = compile_mask([(6, 23 * 60, 60)])
+        assert mask_allows(mask, minute_of_week(at(6, 23, 30)))
+        assert mask_allows(mask, minute_of_week(at(0, 0, 30)))
+        assert not mask_allows(mask, minute_of_week(at(0, 1)))
+
+
+class TestAccessSchedules:
+    def test_unrestricted_users_are_allowed(self):
+        schedules = AccessSchedules.build({}, {}, [MONDAY.date()])
+        assert schedules.allows("anyone", at(0, 3))
+        assert not schedules.restricted("anyone")
+
+    def test_weekly_takes_precedence_over_daily(self):
+        schedules = AccessSchedules.build(
+            weekly={"alice": [(5, 600, 720)]},
+            daily={"alice": ("08:00", "18:00"), "bob": ("08:00", "18:00")},
+            holidays=[],
+        )
+        assert not schedules.allows("alice", at(0, 9))
+        assert schedules.allows("alice", at(5, 11))
+        assert schedules.allows("bob", at(0, 9))
+        assert not schedules.allows("bob", at(0, 19))
+
+    def test_holidays_refuse_scheduled_users(self):
+        schedules = AccessSchedules.build(
+            weekly={}, daily={"bob": ("00:00", "24:00")}, holidays=[date(2024, 1, 2)]
+        )
+        assert schedules.allows("bob", at(0, 12))
+        assert not schedules.allows("bob", at(1, 12))
+        assert schedules.allows("carol", at(1, 12))
+
+    def test_invalid_daily_window_denies(self):
+        schedules = AccessSchedules.build({}, {"bob": ("8am", "18:00")}, [])
+        assert schedules.restricted("bob")
+        assert not schedules.allows("bob", at(0, 9))
+
+    def test_identical_schedules_share_a_mask(self):
+        daily = {f"user{i}": ("08:00", "18:00") for i in range(100)}
+        weekly = {"alice": [(1, 0, 60), (0, 0, 60)], "bob": [(0, 0, 60), (1, 0, 60)]}
+        schedules = AccessSchedules.build(weekly, daily, [])
+        assert len(schedules) == 102
+        assert schedules.distinct_schedules == 2
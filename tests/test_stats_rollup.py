@@ -0,0 +1,156 @@
+"""
+Tests for the access_log rollup triggers and windowed statistics.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.stats import BACKFILL_SQL, parse_timestamp, query_stats
+
+# Importing backend.server here would bind its DATABASE_PATH before
+# test_backend_api patches it; the SQL file holds the same schema.
+with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+    SCHEMA = f.read()
+
+LEGACY_SCHEMA = """
+CREATE TABLE access_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    access_granted BOOLEAN,
+    method TEXT DEFAULT 'face'
+);
+"""
+
+START = datetime(2024, 5, 1, 6, 0, 0)
+INSERT_SQL = "INSERT INTO access_log (user, access_granted, timestamp) VALUES (?, ?, ?)"
+
+
+def random_rows(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (
+            f"user_{rng.randrange(20)}",
+            rng.random() < 0.7,
+            str(START + timedelta(seconds=rng.randrange(48 * 3600))),
+        )
+        for _ in range(count)
+    ]
+
+
+def brute_force(conn, since=None, until=None):
+    """The pre-rollup query over the raw log."""
+    rows = conn.execute(
+        """
+        SELECT user, COUNT(*), SUM(CASE WHEN access_granted THEN 1 ELSE 0 END)
+        FROM access_log
+        WHERE timestamp >= ? AND timestamp < ?
+        GROUP BY user
+        ORDER BY COUNT(*) DESC, user
+        """,
+        (str(since or datetime(1, 1, 1)), str(until or datetime(9999, 1, 1))),
+    ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    yield conn
+    conn.close()
+
+
+class TestRollup:
+    def test_totals_match_raw_log(self, conn):
+        with conn:
+            conn.executemany(INSERT_SQL, random_rows(2000))
+        assert query_stats(conn) == brute_force(conn)
+
+    def test_windows_match_raw_log(self, conn):
+        with conn:
+            conn.executemany(INSERT_SQL, random_rows(2000))
+        windows = [
+            (START + timedelta(hours=3), START + timedelta(hours=9)),  # whole hours
+            (
+                START + timedelta(hours=2, minutes=17, seconds=5),
+                START + timedelta(hours=30, minutes=41),
+            ),
+            (
+                START + timedelta(hours=5, minutes=10),  # inside one hour
+                START + timedelta(hours=5, minutes=50),
+            ),
+            (START + timedelta(hours=40, minutes=1), None),
+            (None, START + timedelta(hours=1, seconds=1)),
+        ]
+        for since, until in windows:
+            assert query_stats(conn, since, until) == brute_force(conn, since, until)
+
+    def test_delete_updates_rollup(self, conn):
+        with conn:
+            conn.executemany(INSERT_SQL, random_rows(500))
+            conn.execute("DELETE FROM access_log WHERE user = 'user_3'")
+            conn.execute("DELETE FROM access_log WHERE id % 7 = 0")
+        assert "user_3" not in [row[0] for row in query_stats(conn)]
+        assert query_stats(conn) == brute_force(conn)
+        since, until = START + timedelta(hours=1), START + timedelta(hours=20)
+        assert query_stats(conn, since, until) == brute_force(conn, since, until)
+
+    def test_default_timestamp_is_rolled_up(self, conn):
+        with conn:
+            conn.execute(
+                "INSERT INTO access_log (user, access_granted) VALUES ('amy', 1)"
+            )
+        assert query_stats(conn) == [("amy", 1, 1)]
+
+    def test_empty_window_rejected(self, conn):
+        with pytest.raises(ValueError):
+            query_stats(conn, START, START)
+
+    def test_backfill_existing_log_once(self):
+        conn = sqlite3.connect(":memory:")
+        conn.executescript(LEGACY_SCHEMA)
+        with conn:
+            conn.executemany(INSERT_SQL, random_rows(1000))
+        expected = brute_force(conn)
+        for _ in range(2):  # init_db runs on every start
+            conn.executescript("BEGIN IMMEDIATE;" + SCHEMA + BACKFILL_SQL + "COMMIT;")
+        assert query_stats(conn) == expected
+        with conn:
+            conn.executemany(INSERT_SQL, random_rows(100, seed=1))
+        assert query_stats(conn) == brute_force(conn)
+        indexes = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE tbl_name = 'access_log' "
+                "AND type = 'index'"
+            )
+        }
+        assert {
+            "idx_access_log_user",
+            "idx_access_log_timestamp",
+            "idx_access_log_granted",
+        } <= indexes
+
+
+class TestParseTimestamp:
+    def test_date_only(self):
+        assert parse_timestamp("2024-05-01") == datetime(2024, 5, 1)
+
+    def test_offset_converted_to_utc(self):
+        assert parse_timestamp("2024-05-01T10:30:00+02:00") == datetime(
+            2024, 5, 1, 8, 30
+        )
+        assert parse_timestamp("2024-05-01T08:30:00Z") == datetime(2024, 5, 1, 8, 30)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_timestamp("yesterday")
@@ -0,0 +1,174 @@
+"""
+Tests for face tracking between detections.
+
+Detection and encoding are scripted, so these run without face_recognition.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.matcher import FaceMatcher
+from src.utils.tracking import FaceTracker, opencv_tracker_factory
+
+ALICE = np.full(128, 0.1)
+BOB = np.full(128, -0.1)
+STRANGER = np.full(128, 0.9)
+
+
+def box_at(x, size=40):
+    """A face box whose left edge is at *x*."""
+    return (10, x + size, 10 + size, x)
+
+
+class ScriptedFaces:
+    """
+    detect_fn/encode_fn pair: ``script[i]`` lists ``(box, encoding)`` pairs
+    visible on frame *i*; the last entry repeats.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.frame = -1
+        self.detect_calls = 0
+        self.encoded_boxes = []
+
+    def faces(self):
+        return self.script[min(self.frame, len(self.script) - 1)]
+
+    def detect(self, rgb_frame):
+        self.detect_calls += 1
+        return [box for box, _ in self.faces()]
+
+    def encode(self, rgb_frame, boxes):
+        lookup = dict(self.faces())
+        self.encoded_boxes.extend(boxes)
+        return [lookup[box] for box in boxes]
+
+
+def run(script, frames, **kwargs):
+    faces = ScriptedFaces(script)
+    matcher = FaceMatcher([ALICE, BOB], ["alice", "bob"])
+    kwargs.setdefault("reidentify_every", 0)
+    tracker = FaceTracker(matcher, faces.detect, faces.encode, **kwargs)
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    outputs = []
+    for _ in range(frames):
+        faces.frame += 1
+        outputs.append(tracker.update(frame))
+    return tracker, faces, outputs
+
+
+def events(outputs, kind=None):
+    return [e for out in outputs for e in out.events if kind in (None, e.kind)]
+
+
+class TestFaceTracker:
+    def test_detects_every_n_frames_and_encodes_once(self):
+        tracker, faces, outputs = run([[(box_at(20), ALICE)]], 20, detect_every=5)
+        assert faces.detect_calls == 4
+        assert len(faces.encoded_boxes) == 1
+        assert all(out.names == ["alice"] for out in outputs)
+        assert [out.detected for out in outputs[:6]] == [1, 0, 0, 0, 0, 1]
+
+    def test_identified_fires_once_per_track(self):
+        _, _, outputs = run([[(box_at(20), ALICE)]], 30, detect_every=3)
+        identified = events(outputs, "identified")
+        assert [(e.name, e.track_id) for e in identified] == [("alice", 1)]
+
+    def test_moving_face_keeps_its_track(self):
+        script = [[(box_at(20 + 4 * i), BOB)] for i in range(12)]
+        tracker, faces, outputs = run(script, 12, detect_every=2)
+        assert {t.track_id for out in outputs for t in out.tracks} == {1}
+        # Frame 11 is not a detection frame: the box from frame 10 carries over.
+        assert outputs[-1].tracks[0].box == box_at(60)
+        assert len(faces.encoded_boxes) == 1
+
+    def test_new_face_gets_new_track_and_is_encoded(self):
+        script = [[(box_at(20), ALICE)]] * 4 + [
+            [(box_at(20), ALICE), (box_at(120), BOB)]
+        ]
+        tracker, faces, outputs = run(script, 8, detect_every=2)
+        assert [(e.kind, e.track_id) for e in events(outputs, "new")] == [
+            ("new", 1),
+            ("new", 2),
+        ]
+        assert outputs[-1].names == ["alice", "bob"]
+        assert faces.encoded_boxes == [box_at(20), box_at(120)]
+
+    def test_track_lost_after_max_misses(self):
+        script = [[(box_at(20), ALICE)]] * 2 + [[]]
+        tracker, _, outputs = run(script, 10, detect_every=1, max_misses=2)
+        lost = events(outputs, "lost")
+        assert [(e.track_id, e.name, e.frame_index) for e in lost] == [(1, "alice", 4)]
+        assert tracker.tracks == []
+
+    def test_unknown_track_is_retried_on_each_detection(self):
+        script = [[(box_at(20), STRANGER)]] * 4 + [[(box_at(20), ALICE)]]
+        _, faces, outputs = run(script, 8, detect_every=2)
+        # Encoded on detection frames 0, 2 and 4; known from frame 4 on.
+        assert len(faces.encoded_boxes) == 3
+        assert outputs[3].names == ["Unknown"]
+        assert outputs[-1].names == ["alice"]
+        assert len(events(outputs, "identified")) == 1
+
+    def test_missed_reidentification_keeps_identity(self):
+        script = (
+            [[(box_at(20), ALICE)]] * 8
+            + [[(box_at(20), STRANGER)]] * 8
+            + [[(box_at(20), ALICE)]]
+        )
+        _, faces, outputs = run(script, 30, detect_every=2, reidentify_every=8)
+        # Encoded on frames 0, 8, 16 and 24 only: the miss on frame 8 is
+        # not retried on every detection.
+        assert len(faces.encoded_boxes) == 4
+        assert all(out.names == ["alice"] for out in outputs)
+        assert len(events(outputs, "identified")) == 1
+
+    def test_reidentify_refreshes_known_tracks(self):
+        _, faces, _ = run(
+            [[(box_at(20), ALICE)]], 20, detect_every=2, reidentify_every=8
+        )
+        assert len(faces.encoded_boxes) == 3
+
+    def test_rejects_invalid_detect_every(self):
+        with pytest.raises(ValueError):
+            FaceTracker(FaceMatcher([ALICE], ["alice"]), None, None, detect_every=0)
+
+
+class TestOpenCVTrackers:
+    def test_unknown_tracker_raises(self):
+        pytest.importorskip("cv2")
+        with pytest.raises(ValueError):
+            opencv_tracker_factory("no-such-tracker")
+
+    def test_cv_tracker_follows_between_detections(self):
+        cv2 = pytest.importorskip("cv2")
+        try:
+            factory = opencv_tracker_factory("mil")
+        except ValueError:
+            pytest.skip("MIL tracker not available")
+
+        def frame_with_square(x):
+            frame = np.zeros((120, 200, 3), dtype=np.uint8)
+            cv2.rectangle(frame, (x, 30), (x + 40, 70), (255, 255, 255), -1)
+            cv2.circle(frame, (x + 20, 50), 8, (0, 0, 255), -1)
+            return frame
+
+        matcher = FaceMatcher([ALICE], ["alice"])
+        tracker = FaceTracker(
+            matcher,
+            lambda rgb: [(30, 60, 70, 20)],
+            lambda rgb, boxes: [ALICE] * len(boxes),
+            detect_every=100,
+            cv_tracker_factory=factory,
+        )
+        tracker.update(frame_with_square(20))
+        for x in range(22, 34, 2):
+            out = tracker.update(frame_with_square(x))
+        assert out.names == ["alice"]
+        assert out.tracks[0].box[3] > 20
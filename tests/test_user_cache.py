@@ -0,0 +1,162 @@
+"""
+Tests for the in-memory user cache and its cross-process invalidation.
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.db import ConnectionPool
+from backend.user_cache import UserCache, UserRecord
+
+with open(os.path.join(ROOT, "backend", "database.sql")) as f:
+    SCHEMA = f.read()
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "users.db"))
+    conn = pool.connection()
+    conn.executescript(SCHEMA)
+    with conn:
+        conn.execute(
+            "INSERT INTO users (name, access_start, access_end, rfid_code, nfc_tag) "
+            "VALUES ('alice', '08:00', '18:00', 'AABB', 'TAG1')"
+        )
+    yield pool
+    pool.close_all()
+
+
+class CountingConnect:
+    """Wraps ``pool.connection`` and counts the statements executed."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.statements = 0
+
+    def __call__(self):
+        counter = self
+
+        class Conn:
+            def execute(self, *args):
+                counter.statements += 1
+                return counter.pool.connection().execute(*args)
+
+        return Conn()
+
+
+class TestUserCache:
+    def test_full_record_is_cached(self, pool):
+        cache = UserCache(pool.connection)
+        assert cache.get("alice") == UserRecord(
+            1, "alice", "08:00", "18:00", "AABB", "TAG1"
+        )
+        assert cache.get("bob") is None
+        assert "alice" in cache
+
+    def test_credentials_resolve_to_users(self, pool):
+        cache = UserCache(pool.connection, check_interval_ms=0)
+        assert cache.find_credential("rfid", "AABB").name == "alice"
+        assert cache.find_credential("nfc", "TAG1").name == "alice"
+        assert cache.find_credential("nfc", "AABB") is None
+        with pool.connection() as conn:
+            conn.execute("UPDATE users SET rfid_code = 'CCDD' WHERE name = 'alice'")
+        assert cache.find_credential("rfid", "AABB") is None
+        assert cache.find_credential("rfid", "CCDD").name == "alice"
+        assert cache.stats()["credentials"] == 2
+
+    def test_credentials_are_unique(self, pool):
+        with pytest.raises(sqlite3.IntegrityError):
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO users (name, rfid_code) VALUES ('b', 'AABB')")
+        with pool.connection() as conn:  # NULL codes do not collide
+            conn.execute("INSERT INTO users (name) VALUES ('c'), ('d')")
+
+    def test_lookups_within_interval_do_not_touch_database(self, pool):
+        connect = CountingConnect(pool)
+        cache = UserCache(connect, check_interval_ms=60_000)
+        cache.get("alice")
+        loaded = connect.statements
+        for _ in range(1000):
+            cache.get("alice")
+            cache.get("nobody")
+        assert connect.statements == loaded
+        stats = cache.stats()
+        assert stats["hits"] == 2000 and stats["misses"] == 1
+        assert stats["size"] == 1 and stats["reloads"] == 1
+
+    def test_invalidate_reloads_on_next_lookup(self, pool):
+        cache = UserCache(pool.connection, check_interval_ms=60_000)
+        assert cache.get("bob") is None
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO users (name) VALUES ('bob')")
+        assert cache.get("bob") is None  # not checked yet
+        cache.invalidate()
+        assert cache.get("bob") is not None
+
+    def test_other_process_changes_seen_after_interval(self, pool):
+        cache = UserCache(pool.connection, check_interval_ms=0)
+        assert cache.get("alice") is not None
+        other = sqlite3.connect(pool.path)  # e.g. another gunicorn worker
+        with other:
+            other.execute("DELETE FROM users WHERE name = 'alice'")
+            other.execute("INSERT INTO users (name) VALUES ('carol')")
+        other.close()
+        assert cache.get("alice") is None
+        assert cache.get("carol") is not None
+
+    def test_unchanged_version_does_not_reload(self, pool):
+        cache = UserCache(pool.connection, check_interval_ms=0)
+        for _ in range(10):
+            cache.get("alice")
+        stats = cache.stats()
+        assert stats["checks"] == 10 and stats["reloads"] == 1
+
+    def test_update_bumps_version(self, pool):
+        cache = UserCache(pool.connection, check_interval_ms=0)
+        assert cache.get("alice").nfc_tag == "TAG1"
+        with pool.connection() as conn:
+            conn.execute("UPDATE users SET nfc_tag = 'TAG2' WHERE name = 'alice'")
+        assert cache.get("alice").nfc_tag == "TAG2"
+
+    def test_schedule_and_holiday_changes_bump_version(self, pool):
+        cache = UserCache(pool.connection, check_interval_ms=0)
+        monday_9 = datetime(2024, 1, 1, 9)
+        assert cache.is_allowed("alice", monday_9)  # daily 08:00-18:00
+        assert not cache.is_allowed("alice", monday_9.replace(hour=19))
+        assert not cache.is_allowed("bob", monday_9)
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO user_schedules VALUES (1, 1, '08:00', '18:00')")
+        assert not cache.is_allowed("alice", monday_9)  # Tuesdays only
+        assert cache.is_allowed("alice", datetime(2024, 1, 2, 9))
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO holidays VALUES ('2024-01-02', NULL)")
+        assert not cache.is_allowed("alice", datetime(2024, 1, 2, 9))
+        with pool.connection() as conn:
+            conn.execute("DELETE FROM users WHERE name = 'alice'")
+            remaining = conn.execute("SELECT COUNT(*) FROM user_schedules")
+            assert remaining.fetchone()[0] == 0
+        assert not cache.is_allowed("alice", monday_9)
+        assert cache.stats()["scheduled"] == 0
+
+    def test_failed_refresh_serves_previous_snapshot(self, pool):
+        cache = UserCache(pool.connection, check_interval_ms=0)
+        assert cache.get("alice") is not None
+        with pool.connection() as conn:
+            conn.execute("ALTER TABLE cache_version RENAME TO cache_version_old")
+        assert cache.get("alice") is not None
+        assert cache.stats()["errors"] == 1
+
+    def test_first_load_failure_raises(self, tmp_path):
+        pool = ConnectionPool(str(tmp_path / "empty.db"))
+        cache = UserCache(pool.connection)
+        for _ in range(2):  # never silently answers from an empty cache
+            with pytest.raises(sqlite3.Error):
+                cache.get("alice")
+        pool.close_all()
@@ -0,0 +1,150 @@
+"""
+Tests for the production entry point (backend/wsgi.py, backend/gunicorn.conf.py).
+"""
+
+import os
+import runpy
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """``backend.server`` pointed at a fresh database, with its own pool,
+    log writer and user cache."""
+    import src.config as cfg
+
+    monkeypatch.setattr(cfg, "DATABASE_PATH", str(tmp_path / "wsgi.db"))
+    from backend import server
+    from backend.db import ConnectionPool
+    from backend.log_writer import AccessLogWriter
+    from backend.user_cache import UserCache
+
+    monkeypatch.setattr(server, "DATABASE_PATH", cfg.DATABASE_PATH)
+    monkeypatch.setattr(server, "_pool", ConnectionPool(cfg.DATABASE_PATH))
+    monkeypatch.setattr(server, "_log_writer", AccessLogWriter(server._pool.connection))
+    monkeypatch.setattr(server, "_user_cache", UserCache(server._pool.connection))
+    monkeypatch.setattr(server, "_gallery", None)
+    yield server
+    server._log_writer.stop()
+    server._pool.close_all()
+
+
+class TestAppFactory:
+    def test_create_app_initialises_database(self, server):
+        from backend.wsgi import create_app
+
+        app = create_app()
+        assert app is server.app
+        with sqlite3.connect(server.DATABASE_PATH) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        assert {"users", "access_log", "cache_version"} <= tables
+        assert app.test_client().get("/health").status_code == 200
+
+    def test_init_worker_without_gallery(self, server, monkeypatch):
+        from backend import wsgi
+
+        def missing(*args, **kwargs):
+            raise FileNotFoundError("no gallery")
+
+        monkeypatch.setattr(server, "load_recognition_gallery", missing)
+        wsgi.create_app()
+        wsgi.init_worker()
+        assert server._log_writer.running
+        assert server._user_cache.stats()["reloads"] == 1
+
+    def test_shutdown_worker_drains_access_log(self, server, monkeypatch):
+        from backend import wsgi
+
+        monkeypatch.setattr(server, "load_recognition_gallery", lambda: None)
+        client = wsgi.create_app().test_client()
+        wsgi.init_worker()
+        for i in range(20):
+            client.post("/access", json={"user": f"user_{i}"})
+        assert wsgi.shutdown_worker()
+        assert not server._log_writer.running
+        assert len(server._pool) == 0
+        with sqlite3.connect(server.DATABASE_PATH) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM access_log").fetchone()[0] == 20
+
+
+class TestGunicornConfig:
+    def test_settings_and_hooks(self, monkeypatch):
+        import src.config as cfg
+
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        settings = runpy.run_path(os.path.join(ROOT, "backend", "gunicorn.conf.py"))
+        assert settings["bind"] == cfg.SERVER_BIND
+        assert settings["workers"] == (cfg.SERVER_WORKERS or os.cpu_count())
+        assert settings["threads"] == cfg.SERVER_THREADS
+        assert settings["preload_app"] is True
+        assert callable(settings["post_worker_init"])
+        assert callable(settings["worker_exit"])
+
+    def test_web_concurrency_overrides_workers(self, monkeypatch):
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        settings = runpy.run_path(os.path.join(ROOT, "backend", "gunicorn.conf.py"))
+        assert settings["workers"] == 3
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestGunicorn:
+    def test_serves_and_drains_on_sigterm(self, tmp_path):
+        pytest.importorskip("gunicorn")
+        db_path = str(tmp_path / "gunicorn.db")
+        port = free_port()
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "-c",
+                "backend/gunicorn.conf.py",
+                "--bind",
+                f"127.0.0.1:{port}",
+                "--workers",
+                "2",
+                "backend.wsgi:create_app()",
+            ],
+            cwd=ROOT,
+            env=dict(os.environ, FACE_RECON_DB=db_path),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    urllib.request.urlopen(base + "/health", timeout=1)
+                    break
+                except OSError:
+                    assert proc.poll() is None and time.monotonic() < deadline
+                    time.sleep(0.1)
+            for i in range(50):
+                req = urllib.request.Request(
+                    base + "/access",
+                    data=f'{{"user": "user_{i}"}}'.encode(),
+                    headers={"Content-Type": "application/json"},
+                )
+                assert urllib.request.urlopen(req, timeout=5).status == 200
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            assert proc.wait(timeout=30) == 0
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM access_log").fetchone()[0] == 50
@@ -3,10 +3,184 @@ AI-based anomaly detection for access logs or sensor data.
 
 Provides a wrapper class around Isolation Forest for detecting
 unusual patterns in security system data.
+
+Access-log rows are described by the features in ``ACCESS_FEATURES``
+(see :class:`AccessFeatures`).  :meth:`AnomalyDetector.score_batch` and
+:meth:`AnomalyDetector.detect_batch` score a whole array in one model
+call, and :meth:`AnomalyDetector.score_access_log` scores ``access_log``
+straight from SQLite in chunks, so memory use depends on the chunk size
+and not on the size of the log.
+
+:class:`AccessAnomalyModel` adds the model's lifecycle: it is trained
+from ``access_log`` (offline with ``python -m src.main_train_models``, or
+in the background), stored as a version in a :class:`ModelStore`, loaded
+on first use and refitted on a sliding window as new rows arrive.
+Importing this module trains nothing and does not import scikit-learn.
 """
 
+import os
+import sys
+
+if __name__ == "__main__":
+    # Make ``src.config`` importable when run as ``python utils/...``
+    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
 import numpy as np
-from sklearn.ensemble import IsolationForest
+
+from src.config import (
+    ANOMALY_CHUNK_ROWS,
+    ANOMALY_FREQUENCY_WINDOW_S,
+    ANOMALY_REFIT_ROWS,
+    ANOMALY_WINDOW_ROWS,
+)
+from utils.model_store import ModelStore
+
+_logger = logging.getLogger(__name__)
+
+ACCESS_FEATURES = ("hour", "weekday", "user_frequency", "method", "denial_streak")
+
+# access_log.method -> feature value; other methods get len(METHOD_CODES)
+METHOD_CODES = {"face": 0, "rfid": 1, "nfc": 2}
+
+_ACCESS_LOG_QUERY = (
+    "SELECT id, user, timestamp, access_granted, method FROM access_log "
+    "WHERE id > ? AND id <= ? AND timestamp IS NOT NULL ORDER BY id"
+)
+_MAX_ID = (1 << 63) - 1  # largest SQLite integer
+
+# First row within a time window before the newest row up to an id.
+_WINDOW_START_QUERY = (
+    "SELECT MIN(id) FROM access_log WHERE id <= :until AND timestamp >= "
+    "datetime((SELECT timestamp FROM access_log WHERE id <= :until "
+    "AND timestamp IS NOT NULL ORDER BY id DESC LIMIT 1), :offset)"
+)
+
+
+def _as_matrix(data) -> np.ndarray:
+    """2-D float array; a 1-D input holds one single-feature sample per
+    value, as passed to :meth:`AnomalyDetector.detect`."""
+    matrix = np.asarray(data, dtype=float)
+    return matrix.reshape(-1, 1) if matrix.ndim == 1 else matrix
+
+
+class AccessFeatures:
+    """
+    Feature vectors for ``access_log`` rows, one column per entry of
+    ``ACCESS_FEATURES``:
+
+    * ``hour`` and ``weekday`` (0 = Monday) of the timestamp (UTC, as
+      stored);
+    * ``user_frequency`` – accesses by the same user in the preceding
+      ``window_s`` seconds;
+    * ``method`` – the code of the method in ``METHOD_CODES``;
+    * ``denial_streak`` – consecutive denials of the user up to and
+      including this row (0 for a granted row).
+
+    The per-user state is kept between calls, so rows fed in consecutive
+    chunks get the same features as when fed at once.  Rows must come in
+    log order.
+    """
+
+    def __init__(self, window_s: float = ANOMALY_FREQUENCY_WINDOW_S):
+        self.window_s = window_s
+        self._recent: Dict[str, Deque[int]] = {}  # user -> access times
+        self._streaks: Dict[str, int] = {}  # user -> consecutive denials
+
+    def transform(self, rows: Sequence[Sequence]) -> np.ndarray:
+        """
+        Args:
+            rows: ``(id, user, timestamp, access_granted, method)`` rows.
+
+        Returns:
+            Array of shape ``(len(rows), len(ACCESS_FEATURES))``.
+        """
+        features = np.zeros((len(rows), len(ACCESS_FEATURES)))
+        if not rows:
+            return features
+        seconds = np.array([row[2] for row in rows], dtype="datetime64[s]").astype(
+            np.int64
+        )
+        features[:, 0] = (seconds % 86400) // 3600
+        features[:, 1] = (seconds // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+        other = len(METHOD_CODES)
+        features[:, 3] = [METHOD_CODES.get(row[4], other) for row in rows]
+
+        window = self.window_s
+        recent, streaks = self._recent, self._streaks
+        for i, (row, at) in enumerate(zip(rows, seconds.tolist())):
+            user = row[1] or ""
+            times = recent.get(user)
+            if times is None:
+                times = recent[user] = deque()
+            while times and at - times[0] >= window:
+                times.popleft()
+            features[i, 2] = len(times)
+            times.append(at)
+            streak = 0 if row[3] else streaks.get(user, 0) + 1
+            streaks[user] = streak
+            features[i, 4] = streak
+        return features
+
+
+def iter_access_features(
+    conn: sqlite3.Connection,
+    chunk_rows: int = ANOMALY_CHUNK_ROWS,
+    since_id: int = 0,
+    features: Optional[AccessFeatures] = None,
+    until_id: Optional[int] = None,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Read ``access_log`` rows after *since_id* with ``fetchmany`` from a
+    single ``SELECT`` and yield ``(ids, feature_matrix)`` per chunk.
+
+    Args:
+        conn: Connection to the backend database.
+        chunk_rows: Rows fetched and turned into features per chunk.
+        since_id: Only rows with a greater ``id``.
+        features: Extractor carrying per-user state from earlier rows
+            (default: a new :class:`AccessFeatures`).
+        until_id: Only rows with an ``id`` up to this one (default: all).
+    """
+    features = AccessFeatures() if features is None else features
+    until_id = _MAX_ID if until_id is None else until_id
+    cursor = conn.execute(_ACCESS_LOG_QUERY, (since_id, until_id))
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                return
+            ids = np.fromiter((row[0] for row in rows), np.int64, len(rows))
+            yield ids, features.transform(rows)
+    finally:
+        cursor.close()
+
+
+class ScoredChunk(NamedTuple):
+    """Anomaly scores for a chunk of ``access_log`` rows."""
+
+    ids: np.ndarray  # access_log.id
+    features: np.ndarray  # shape (n, len(ACCESS_FEATURES))
+    scores: np.ndarray  # lower is more anomalous; below 0 is flagged
+    labels: np.ndarray  # -1 if anomalous, 1 if normal
 
 
 class AnomalyDetector:
@@ -25,6 +199,8 @@ class AnomalyDetector:
             contamination: Expected proportion of outliers (0.0-0.5)
             random_state: Random seed for reproducibility
         """
+        from sklearn.ensemble import IsolationForest
+
         self.model = IsolationForest(
             contamination=contamination, random_state=random_state
         )
@@ -48,7 +224,7 @@ class AnomalyDetector:
         Returns:
             -1 if anomalous, 1 if normal
         """
-        return int(self.model.predict([[value]])[0])
+        return int(self.detect_batch([value])[0])
 
     def is_anomaly(self, value: float) -> bool:
         """
@@ -62,6 +238,265 @@ class AnomalyDetector:
         """
         return self.detect(value) == -1
 
+    def score_batch(self, data) -> np.ndarray:
+        """
+        Score many samples with one model call.
+
+        Args:
+            data: Array of shape (n_samples, n_features), or of shape
+                (n_samples,) for a model trained on a single feature
+
+        Returns:
+            Anomaly score per sample: lower is more anomalous, and samples
+            scoring below 0 are detected as anomalies
+        """
+        return self.model.decision_function(_as_matrix(data))
+
+    def detect_batch(self, data) -> np.ndarray:
+        """
+        Detect anomalies among many samples with one model call.
+
+        Args:
+            data: Array as for :meth:`score_batch`
+
+        Returns:
+            Integer array, -1 for each anomalous sample and 1 for normal ones
+        """
+        return self.model.predict(_as_matrix(data)).astype(int)
+
+    def score_access_log(
+        self,
+        conn: sqlite3.Connection,
+        chunk_rows: int = ANOMALY_CHUNK_ROWS,
+        since_id: int = 0,
+        features: Optional[AccessFeatures] = None,
+    ) -> Iterator[ScoredChunk]:
+        """
+        Score ``access_log`` chunk by chunk (see :func:`iter_access_features`).
+        The model must have been fitted on ``ACCESS_FEATURES`` vectors.
+
+        Yields:
+            A :class:`ScoredChunk` per chunk of at most *chunk_rows* rows
+        """
+        for ids, matrix in iter_access_features(conn, chunk_rows, since_id, features):
+            scores = self.score_batch(matrix)
+            # Same rule as IsolationForest.predict, without scoring twice.
+            labels = np.where(scores < 0, -1, 1)
+            yield ScoredChunk(ids, matrix, scores, labels)
+
+
+ANOMALY_MODEL_NAME = "access_anomaly"
+
+
+class AccessAnomalyModel:
+    """
+    Access-log :class:`AnomalyDetector` with a lifecycle.
+
+    The fitted detector is loaded from *store* on first use.
+    :meth:`train` fits a new one on the latest ``window_rows`` rows of
+    ``access_log`` and saves it as the next version.  :meth:`scan` scores
+    the rows logged since the previous scan and, once ``refit_rows`` rows
+    have arrived after the model's training window, refits it on a
+    background thread.  A new detector replaces the old one in a single
+    assignment, so scoring never waits for training.  Until a model
+    exists, :meth:`scan` starts training and returns nothing.
+
+    Example:
+        >>> model = AccessAnomalyModel(pool.connection)
+        >>> for chunk in model.scan():  # e.g. once a minute
+        ...     flagged = chunk.ids[chunk.labels == -1]
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        store: Optional[ModelStore] = None,
+        window_rows: int = ANOMALY_WINDOW_ROWS,
+        refit_rows: int = ANOMALY_REFIT_ROWS,
+        contamination: float = 0.01,
+        name: str = ANOMALY_MODEL_NAME,
+    ):
+        """
+        Args:
+            connect: Returns a connection to the backend database, such as
+                :meth:`backend.db.ConnectionPool.connection`; called on the
+                scanning and on the training thread.
+            store: Where versions are kept (default: ``ModelStore()``).
+            window_rows: Latest rows of ``access_log`` a model is fitted on.
+            refit_rows: Rows logged after a model's training window that
+                make :meth:`scan` refit it.
+            contamination: Expected share of anomalous rows.
+            name: Model name in *store*.
+        """
+        self.connect = connect
+        self.store = ModelStore() if store is None else store
+        self.window_rows = window_rows
+        self.refit_rows = refit_rows
+        self.contamination = contamination
+        self.name = name
+        self.metadata: Dict[str, Any] = {}
+        self._detector: Optional[AnomalyDetector] = None
+        self._loaded = False
+        self._lock = threading.Lock()  # loading and the refit thread
+        self._scan_lock = threading.Lock()
+        self._refit_thread: Optional[threading.Thread] = None
+        self._scanned_id: Optional[int] = None
+        self._features = AccessFeatures()
+
+    @property
+    def detector(self) -> Optional[AnomalyDetector]:
+        """The current detector, loaded from the store on first access
+        (``None`` if no model has been trained yet)."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+        return self._detector
+
+    def _load(self) -> None:
+        try:
+            detector, metadata = self.store.load(self.name)
+        except FileNotFoundError:
+            return
+        if tuple(metadata.get("features", ())) != ACCESS_FEATURES:
+            _logger.warning(
+                "Ignoring %s version %s: trained on other features",
+                self.name,
+                metadata.get("version"),
+            )
+            return
+        self._detector, self.metadata = detector, metadata
+
+    def train(self) -> int:
+        """
+        Fit a detector on the latest ``window_rows`` rows of ``access_log``,
+        store it and start using it.
+
+        Returns:
+            The stored version.
+
+        Raises:
+            ValueError: If ``access_log`` has no rows.
+        """
+        started = time.perf_counter()
+        conn = self.connect()
+        (max_id,) = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM access_log"
+        ).fetchone()
+        ids, matrices = [], []
+        since_id = max(max_id - self.window_rows, 0)
+        for chunk_ids, matrix in iter_access_features(conn, since_id=since_id):
+            ids.append(chunk_ids)
+            matrices.append(matrix)
+        if not ids:
+            raise ValueError("access_log has no rows to train on")
+        all_ids = np.concatenate(ids)
+        detector = AnomalyDetector(contamination=self.contamination)
+        detector.fit(np.vstack(matrices))
+        metadata = {
+            "features": list(ACCESS_FEATURES),
+            "rows": len(all_ids),
+            "first_id": int(all_ids[0]),
+            "last_id": int(all_ids[-1]),
+            "contamination": self.contamination,
+            "train_seconds": time.perf_counter() - started,
+        }
+        metadata["version"] = self.store.save(self.name, detector, metadata)
+        self._detector, self.metadata = detector, metadata
+        self._loaded = True
+        _logger.info(
+            "Trained %s version %d on %d rows",
+            self.name,
+            metadata["version"],
+            metadata["rows"],
+        )
+        return metadata["version"]
+
+    def refit_async(self) -> bool:
+        """
+        Run :meth:`train` on a background thread.
+
+        Returns:
+            ``False`` if a refit is already running.
+        """
+        with self._lock:
+            if self._refit_thread is not None and self._refit_thread.is_alive():
+                return False
+            self._refit_thread = threading.Thread(
+                target=self._refit, name="anomaly-refit", daemon=True
+            )
+            self._refit_thread.start()
+        return True
+
+    def _refit(self) -> None:
+        try:
+            self.train()
+        except Exception:
+            _logger.exception("Refitting %s failed", self.name)
+
+    def wait_refit(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a running refit; ``True`` once none is running."""
+        thread = self._refit_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def _warm_features(self, chunk_rows: int) -> None:
+        """
+        Replay the rows of the last ``window_s`` seconds up to
+        ``_scanned_id`` into the feature state, unscored, so the first
+        scanned rows see their users' recent accesses and denials as a
+        single pass over the log would.  Denial streaks that started before
+        that window are counted from its start.
+        """
+        conn = self.connect()
+        (start,) = conn.execute(
+            _WINDOW_START_QUERY,
+            {
+                "until": self._scanned_id,
+                "offset": f"-{self._features.window_s} seconds",
+            },
+        ).fetchone()
+        if start is None:
+            return
+        for _ in iter_access_features(
+            conn, chunk_rows, start - 1, self._features, self._scanned_id
+        ):
+            pass
+
+    def scan(self, chunk_rows: int = ANOMALY_CHUNK_ROWS) -> Iterator[ScoredChunk]:
+        """
+        Score the rows logged since the previous scan (the first scan starts
+        after the model's training window), refitting in the background
+        when enough new rows have arrived.  Meant to be called periodically,
+        from one thread at a time.
+
+        Chunks are read and scored as they are consumed, so memory depends
+        on *chunk_rows*, not on how far behind the scan is.  A chunk counts
+        as scanned once it is yielded; the refit check runs when the scan
+        is exhausted.
+
+        Yields:
+            A :class:`ScoredChunk` per chunk of at most *chunk_rows* rows.
+        """
+        detector = self.detector
+        if detector is None:
+            self.refit_async()
+            return
+        with self._scan_lock:
+            if self._scanned_id is None:
+                self._scanned_id = self.metadata.get("last_id", 0)
+                self._warm_features(chunk_rows)
+            for chunk in detector.score_access_log(
+                self.connect(), chunk_rows, self._scanned_id, self._features
+            ):
+                self._scanned_id = int(chunk.ids[-1])
+                yield chunk
+            if self._scanned_id - self.metadata.get("last_id", 0) >= self.refit_rows:
+                self.refit_async()
+
 
 if __name__ == "__main__":
     # Example usage
@@ -3,15 +3,23 @@ Quantum-safe encryption utilities using the Kyber algorithm (from pqcrypto).
 
 Provides high-level functions for key generation, encryption, and decryption
 using post-quantum cryptography.
+
+pqcrypto is imported on first use, so importing this module is cheap and
+silent even when the package is missing.
 """
 
-try:
-    from pqcrypto.kem.kyber import decrypt, encrypt, generate_keypair
+import importlib.util
+
+KYBER_AVAILABLE = importlib.util.find_spec("pqcrypto") is not None
+
+
+def _kyber():
+    """The ``pqcrypto.kem.kyber`` module, imported on first call."""
+    if not KYBER_AVAILABLE:
+        raise ImportError("pqcrypto package required. Install: pip install pqcrypto")
+    from pqcrypto.kem import kyber
 
-    KYBER_AVAILABLE = True
-except ImportError:
-    KYBER_AVAILABLE = False
-    print("Warning: pqcrypto not installed. Encryption unavailable.")
+    return kyber
 
 
 def generate_keys():
@@ -24,9 +32,7 @@ def generate_keys():
     Raises:
         ImportError: If pqcrypto is not installed
     """
-    if not KYBER_AVAILABLE:
-        raise ImportError("pqcrypto package required. Install: pip install pqcrypto")
-    public_key, private_key = generate_keypair()
+    public_key, private_key = _kyber().generate_keypair()
     return public_key, private_key
 
 
@@ -45,9 +51,7 @@ def encrypt_message(public_key, message=None):
     Raises:
         ImportError: If pqcrypto is not installed
     """
-    if not KYBER_AVAILABLE:
-        raise ImportError("pqcrypto package required. Install: pip install pqcrypto")
-    ciphertext, shared_secret = encrypt(public_key)
+    ciphertext, shared_secret = _kyber().encrypt(public_key)
     return ciphertext, shared_secret
 
 
@@ -65,9 +69,7 @@ def decrypt_message(ciphertext, private_key):
     Raises:
         ImportError: If pqcrypto is not installed
     """
-    if not KYBER_AVAILABLE:
-        raise ImportError("pqcrypto package required. Install: pip install pqcrypto")
-    decrypted_secret = decrypt(ciphertext, private_key)
+    decrypted_secret = _kyber().decrypt(ciphertext, private_key)
     return decrypted_secret
 
 
@@ -0,0 +1,127 @@
+"""
+Versioned on-disk storage for trained models.
+
+Each model gets a directory under ``MODEL_DIR`` holding numbered versions:
+``<name>/v000001.pkl`` with the pickled model and ``v000001.json`` with
+its metadata (training time, rows, features, ...).  The metadata file is
+written last, so a version is only visible once it is complete; a reader
+never sees a half-written model and a failed save leaves no version
+behind.  Saving prunes all but the newest ``keep`` versions.
+
+Artifacts are pickles: only load them from a directory you trust.
+
+Example:
+    >>> store = ModelStore()
+    >>> version = store.save("access_anomaly", detector, {"rows": 50000})
+    >>> detector, metadata = store.load("access_anomaly")
+"""
+
+import json
+import os
+import pickle
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import MODEL_DIR, MODEL_KEEP_VERSIONS
+
+_VERSION_FILE = re.compile(r"^v(\d{6})\.json$")
+
+
+class ModelStore:
+    """Numbered model versions in a directory, one subdirectory per model."""
+
+    def __init__(self, directory: str = MODEL_DIR, keep: int = MODEL_KEEP_VERSIONS):
+        """
+        Args:
+            directory: Root directory of the model artifacts.
+            keep: Newest versions kept per model when saving.
+        """
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, name: str, version: int, ext: str) -> str:
+        return os.path.join(self.directory, name, f"v{version:06d}.{ext}")
+
+    def versions(self, name: str) -> List[int]:
+        """Complete versions of *name*, oldest first."""
+        try:
+            files = os.listdir(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            return []
+        matches = (_VERSION_FILE.match(f) for f in files)
+        return sorted(int(m.group(1)) for m in matches if m)
+
+    def save(
+        self, name: str, model: Any, metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Store *model* as the next version of *name*.
+
+        Returns:
+            The new version number.
+        """
+        os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+        version = max(self.versions(name), default=0) + 1
+        while True:
+            # Claim the number, so concurrent trainers never share one.
+            try:
+                fd = os.open(
+                    self._path(name, version, "pkl"),
+                    os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                    0o644,
+                )
+                break
+            except FileExistsError:
+                version += 1
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            meta = dict(metadata or {}, version=version, saved_at=time.time())
+            tmp = self._path(name, version, "json.tmp")
+            with open(tmp, "w") as f:
+                json.dump(meta, f, indent=2, sort_keys=True)
+            os.replace(tmp, self._path(name, version, "json"))
+        except BaseException:
+            for ext in ("pkl", "json.tmp"):
+                try:
+                    os.remove(self._path(name, version, ext))
+                except FileNotFoundError:
+                    pass
+            raise
+        self._prune(name)
+        return version
+
+    def load(
+        self, name: str, version: Optional[int] = None
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Load a version of *name* (default: the newest).
+
+        Returns:
+            ``(model, metadata)``.
+
+        Raises:
+            FileNotFoundError: If the model has no (such) version.
+        """
+        if version is None:
+            versions = self.versions(name)
+            if not versions:
+                raise FileNotFoundError(f"No stored versions of model {name!r}")
+            version = versions[-1]
+        with open(self._path(name, version, "json")) as f:
+            metadata = json.load(f)
+        with open(self._path(name, version, "pkl"), "rb") as f:
+            model = pickle.load(f)
+        return model, metadata
+
+    def _prune(self, name: str) -> None:
+        for version in self.versions(name)[: -self.keep]:
+            # Metadata first: the version disappears before its model does.
+            for ext in ("json", "pkl"):
+                try:
+                    os.remove(self._path(name, version, ext))
+                except FileNotFoundError:
+                    pass
@@ -2,10 +2,9 @@
 Voice authentication module for Face-Recon system.
 
 Uses Google Speech Recognition API to verify users via passphrase.
+The ``speech_recognition`` package is imported on first use.
 """
 
-import speech_recognition as sr
-
 
 def recognize_voice() -> str:
     """
@@ -14,6 +13,8 @@ def recognize_voice() -> str:
     Returns:
         Recognized text or "Unknown voice" on failure.
     """
+    import speech_recognition as sr
+
     recognizer = sr.Recognizer()
     with sr.Microphone() as source:
         print("Speak your passphrase:")